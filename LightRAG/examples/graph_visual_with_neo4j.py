@@ -1,8 +1,12 @@
+import asyncio
 import os
 import json
 import xml.etree.ElementTree as ET
 from neo4j import GraphDatabase
 
+from lightrag.kg.networkx_impl import NetworkXStorage
+from lightrag.kg.shared_storage import initialize_share_data
+
 # Constants
 WORKING_DIR = "./dickens"
 BATCH_SIZE_NODES = 500
@@ -91,6 +95,19 @@ def convert_xml_to_json(xml_path, output_path):
         return None
 
 
+async def export_graphml() -> str:
+    """Write the graph of NetworkXStorage in WORKING_DIR as GraphML"""
+    initialize_share_data()
+    storage = NetworkXStorage(
+        namespace="chunk_entity_relation",
+        workspace="",
+        global_config={"working_dir": WORKING_DIR},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    return await storage.export_graphml()
+
+
 def process_in_batches(tx, query, data, batch_size):
     """Process data in batches and execute the given query."""
     for i in range(0, len(data), batch_size):
@@ -100,7 +117,8 @@ def process_in_batches(tx, query, data, batch_size):
 
 def main():
     # Paths
-    xml_file = os.path.join(WORKING_DIR, "graph_chunk_entity_relation.graphml")
+    # NetworkXStorage keeps a binary snapshot, export it as GraphML first
+    xml_file = asyncio.run(export_graphml())
     json_file = os.path.join(WORKING_DIR, "graph_data.json")
 
     # Convert XML to JSON
@@ -120,9 +120,13 @@ async def main():
         # Clear old data files
         files_to_delete = [
             "graph_chunk_entity_relation.graphml",
+            "graph_chunk_entity_relation.kg.json",
             "kv_store_doc_status.json",
             "kv_store_full_docs.json",
             "kv_store_text_chunks.json",
+            "kv_store_doc_status.wal.jsonl",
+            "kv_store_full_docs.wal.jsonl",
+            "kv_store_text_chunks.wal.jsonl",
             "vdb_chunks.json",
             "vdb_entities.json",
             "vdb_relationships.json",
@@ -247,6 +247,11 @@ def parse_args() -> argparse.Namespace:
     # Get MAX_GRAPH_NODES from environment
     args.max_graph_nodes = get_env_value("MAX_GRAPH_NODES", 1000, int)
 
+    # Export query stage latencies as Prometheus metrics on /metrics
+    args.enable_prometheus_metrics = get_env_value(
+        "ENABLE_PROMETHEUS_METRICS", False, bool
+    )
+
     # Handle openai-ollama special case
     if args.llm_binding == "openai-ollama":
         args.llm_binding = "openai"
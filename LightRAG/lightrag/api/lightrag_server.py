@@ -46,6 +46,7 @@ from lightrag.api.routers.document_routes import (
 from lightrag.api.routers.query_routes import create_query_routes
 from lightrag.api.routers.graph_routes import create_graph_routes
 from lightrag.api.routers.ollama_api import OllamaAPI
+from lightrag.api.metrics import setup_prometheus_metrics
 
 from lightrag.utils import logger, set_verbose_debug
 from lightrag.kg.shared_storage import (
@@ -263,6 +264,7 @@ def create_app(args):
     embedding_func = EmbeddingFunc(
         embedding_dim=args.embedding_dim,
         max_token_size=args.max_embed_tokens,
+        model_name=args.embedding_model,
         func=lambda texts: lollms_embed(
             texts,
             embed_model=args.embedding_model,
@@ -373,6 +375,9 @@ def create_app(args):
     ollama_api = OllamaAPI(rag, top_k=args.top_k, api_key=api_key)
     app.include_router(ollama_api.router, prefix="/api")
 
+    if args.enable_prometheus_metrics:
+        setup_prometheus_metrics(app, rag)
+
     @app.get("/")
     async def redirect_to_webui():
         """Redirect root path to /webui"""
@@ -481,6 +486,7 @@ def create_app(args):
                 },
                 "auth_mode": auth_mode,
                 "pipeline_busy": pipeline_status.get("busy", False),
+                "concurrency": rag.get_concurrency_metrics(),
                 "core_version": core_version,
                 "api_version": __api_version__,
                 "webui_title": webui_title,
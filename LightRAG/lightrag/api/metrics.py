@@ -0,0 +1,115 @@
+"""
+Prometheus metrics for the LightRAG API server.
+
+Query traces collected by the /query endpoint are exported as latency histograms,
+one series per stage, on the /metrics endpoint. The state of the LLM and embedding
+concurrency limiters is read at scrape time.
+"""
+
+import pipmaster as pm
+from fastapi import FastAPI
+
+from lightrag.tracing import QueryTrace, add_trace_listener
+from lightrag.utils import logger
+
+# From a few milliseconds for cache hits and graph lookups up to long LLM generations
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+_trace_observer = None
+_concurrency_collector = None
+
+
+class ConcurrencyCollector:
+    """Export the concurrency limiter metrics of a LightRAG instance"""
+
+    def __init__(self, rag):
+        self.rag = rag
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily, SummaryMetricFamily
+
+        limit = GaugeMetricFamily(
+            "lightrag_concurrency_limit",
+            "Current concurrency limit of the function",
+            labels=["function"],
+        )
+        running = GaugeMetricFamily(
+            "lightrag_concurrency_running",
+            "Calls currently running, including reserve slots",
+            labels=["function"],
+        )
+        queue_depth = GaugeMetricFamily(
+            "lightrag_concurrency_queue_depth",
+            "Calls waiting for a slot",
+            labels=["function"],
+        )
+        wait = SummaryMetricFamily(
+            "lightrag_concurrency_wait_seconds",
+            "Time calls waited for a slot",
+            labels=["function", "priority"],
+        )
+        for name, metrics in self.rag.get_concurrency_metrics().items():
+            limit.add_metric([name], metrics["limit"])
+            running.add_metric([name], metrics["running"] + metrics["reserved_running"])
+            queue_depth.add_metric([name], metrics["queue_depth"])
+            for priority, stats in metrics["wait"].items():
+                wait.add_metric(
+                    [name, str(priority)], stats["count"], stats["total_ms"] / 1000
+                )
+        yield from (limit, running, queue_depth, wait)
+
+
+def setup_prometheus_metrics(app: FastAPI, rag=None) -> None:
+    """Record query traces in Prometheus histograms and mount the /metrics endpoint
+
+    When `rag` is given, the state of its concurrency limiters is exported too.
+    """
+    global _trace_observer, _concurrency_collector
+
+    if not pm.is_installed("prometheus_client"):
+        pm.install("prometheus_client")
+
+    from prometheus_client import REGISTRY, Histogram, make_asgi_app
+
+    if _trace_observer is None:
+        query_latency = Histogram(
+            "lightrag_query_duration_seconds",
+            "End-to-end latency of LightRAG queries",
+            buckets=LATENCY_BUCKETS,
+        )
+        stage_latency = Histogram(
+            "lightrag_query_stage_duration_seconds",
+            "Latency of the stages of LightRAG queries",
+            ["stage"],
+            buckets=LATENCY_BUCKETS,
+        )
+
+        def observe_trace(trace: QueryTrace) -> None:
+            query_latency.observe(trace.total)
+            for span in trace.spans:
+                stage_latency.labels(stage=span.name).observe(span.duration)
+
+        _trace_observer = observe_trace
+        add_trace_listener(observe_trace)
+
+    if rag is not None and _concurrency_collector is None:
+        _concurrency_collector = ConcurrencyCollector(rag)
+        REGISTRY.register(_concurrency_collector)
+
+    app.mount("/metrics", make_asgi_app())
+    logger.info("Prometheus metrics available at /metrics")
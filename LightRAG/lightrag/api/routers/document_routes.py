@@ -18,12 +18,18 @@ from fastapi import (
     Depends,
     File,
     HTTPException,
+    Query,
     UploadFile,
 )
 from pydantic import BaseModel, Field, field_validator
 
 from lightrag import LightRAG
-from lightrag.base import DeletionResult, DocProcessingStatus, DocStatus
+from lightrag.base import (
+    DeletionResult,
+    DocProcessingStatus,
+    DocStatus,
+    DocStatusSortField,
+)
 from lightrag.api.utils_api import get_combined_auth_dependency
 from ..config import global_args
 
@@ -432,6 +438,81 @@ class DocsStatusesResponse(BaseModel):
         }
 
 
+class DocsPaginatedResponse(BaseModel):
+    """Response model for one page of documents
+
+    Attributes:
+        documents: Documents of the page, in listing order
+        next_cursor: Cursor of the next page, None on the last page
+        status_counts: Number of documents in each status
+    """
+
+    documents: List[DocStatusResponse] = Field(
+        default_factory=list, description="Documents of the page, in listing order"
+    )
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Pass as cursor to get the next page, null on the last page",
+    )
+    status_counts: Dict[str, int] = Field(
+        default_factory=dict, description="Number of documents in each status"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "documents": [
+                    {
+                        "id": "doc_456",
+                        "content_summary": "Processed document",
+                        "content_length": 8000,
+                        "status": "PROCESSED",
+                        "created_at": "2025-03-31T09:00:00",
+                        "updated_at": "2025-03-31T09:05:00",
+                        "chunks_count": 8,
+                        "file_path": "processed_doc.pdf",
+                    }
+                ],
+                "next_cursor": "WyIyMDI1LTAzLTMxVDA5OjA1OjAwIiwgImRvY180NTYiXQ==",
+                "status_counts": {
+                    "pending": 0,
+                    "processing": 0,
+                    "processed": 1,
+                    "failed": 0,
+                },
+            }
+        }
+
+
+class StatusCountsResponse(BaseModel):
+    """Response model for document status counts
+
+    Attributes:
+        status_counts: Number of documents in each status
+    """
+
+    status_counts: Dict[str, int] = Field(
+        default_factory=dict, description="Number of documents in each status"
+    )
+
+
+def to_doc_status_response(
+    doc_id: str, doc_status: DocProcessingStatus
+) -> DocStatusResponse:
+    return DocStatusResponse(
+        id=doc_id,
+        content_summary=doc_status.content_summary,
+        content_length=doc_status.content_length,
+        status=doc_status.status,
+        created_at=format_datetime(doc_status.created_at),
+        updated_at=format_datetime(doc_status.updated_at),
+        chunks_count=doc_status.chunks_count,
+        error=doc_status.error,
+        metadata=doc_status.metadata,
+        file_path=doc_status.file_path,
+    )
+
+
 class PipelineStatusResponse(BaseModel):
     """Response model for pipeline status
 
@@ -1466,18 +1547,7 @@ def create_document_routes(
                     if status not in response.statuses:
                         response.statuses[status] = []
                     response.statuses[status].append(
-                        DocStatusResponse(
-                            id=doc_id,
-                            content_summary=doc_status.content_summary,
-                            content_length=doc_status.content_length,
-                            status=doc_status.status,
-                            created_at=format_datetime(doc_status.created_at),
-                            updated_at=format_datetime(doc_status.updated_at),
-                            chunks_count=doc_status.chunks_count,
-                            error=doc_status.error,
-                            metadata=doc_status.metadata,
-                            file_path=doc_status.file_path,
-                        )
+                        to_doc_status_response(doc_id, doc_status)
                     )
             return response
         except Exception as e:
@@ -1485,6 +1555,91 @@ def create_document_routes(
             logger.error(traceback.format_exc())
             raise HTTPException(status_code=500, detail=str(e))
 
+    @router.get(
+        "/paginated",
+        response_model=DocsPaginatedResponse,
+        dependencies=[Depends(combined_auth)],
+    )
+    async def documents_paginated(
+        status_filter: Optional[DocStatus] = Query(
+            default=None, description="Only list documents with this status"
+        ),
+        page_size: int = Query(
+            default=50, ge=1, le=1000, description="Number of documents per page"
+        ),
+        cursor: Optional[str] = Query(
+            default=None,
+            description="next_cursor of the previous page, omit for the first page",
+        ),
+        sort_field: DocStatusSortField = Query(
+            default="updated_at", description="Field to order the documents by"
+        ),
+        sort_direction: Literal["asc", "desc"] = Query(
+            default="desc", description="Sort direction"
+        ),
+    ) -> DocsPaginatedResponse:
+        """
+        Get one page of documents, without their content.
+
+        Pages are addressed by cursor: pass the next_cursor of a response to get the
+        following page, with the same status filter and sort order. Cursors stay valid
+        while documents are added or change status.
+
+        Returns:
+            DocsPaginatedResponse: The documents of the page, the cursor of the next
+                                   page and the number of documents in each status.
+
+        Raises:
+            HTTPException: If the cursor is invalid (400) or an error occurs (500).
+        """
+        try:
+            page, status_counts = await asyncio.gather(
+                rag.get_docs_paginated(
+                    status_filter=status_filter,
+                    page_size=page_size,
+                    cursor=cursor,
+                    sort_field=sort_field,
+                    sort_direction=sort_direction,
+                ),
+                rag.get_processing_status(),
+            )
+            return DocsPaginatedResponse(
+                documents=[
+                    to_doc_status_response(doc_id, doc_status)
+                    for doc_id, doc_status in page.documents.items()
+                ],
+                next_cursor=page.next_cursor,
+                status_counts=status_counts,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error GET /documents/paginated: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @router.get(
+        "/status_counts",
+        response_model=StatusCountsResponse,
+        dependencies=[Depends(combined_auth)],
+    )
+    async def status_counts() -> StatusCountsResponse:
+        """
+        Get the number of documents in each status.
+
+        Returns:
+            StatusCountsResponse: The number of documents per status.
+
+        Raises:
+            HTTPException: If an error occurs while counting documents (500).
+        """
+        try:
+            return StatusCountsResponse(status_counts=await rag.get_processing_status())
+        except Exception as e:
+            logger.error(f"Error GET /documents/status_counts: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise HTTPException(status_code=500, detail=str(e))
+
     class DeleteDocByIdResponse(BaseModel):
         """Response model for single document deletion operation."""
 
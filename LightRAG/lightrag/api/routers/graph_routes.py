@@ -3,8 +3,10 @@ This module contains all graph-related routes for the LightRAG API.
 """
 
 from typing import Optional, Dict, Any
+import json
 import traceback
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from lightrag.utils import logger
@@ -78,6 +80,52 @@ def create_graph_routes(rag, api_key: Optional[str] = None):
                 status_code=500, detail=f"Error getting knowledge graph: {str(e)}"
             )
 
+    @router.get("/graphs/stream", dependencies=[Depends(combined_auth)])
+    async def stream_knowledge_graph(
+        label: str = Query(..., description="Label to get knowledge graph for"),
+        max_depth: int = Query(3, description="Maximum depth of graph", ge=1),
+        max_nodes: int = Query(1000, description="Maximum nodes to return", ge=1),
+    ):
+        """
+        Retrieve the same subgraph as /graphs as a stream of partial graphs, so it
+        can be rendered while it is being extracted.
+
+        Args:
+            label (str): Label of the starting node
+            max_depth (int, optional): Maximum depth of the subgraph,Defaults to 3
+            max_nodes: Maxiumu nodes to return
+
+        Returns:
+            StreamingResponse: NDJSON lines with nodes and edges. Each edge comes in the
+            same or a later line than its nodes. The is_truncated flag of the last line
+            applies to the whole subgraph.
+        """
+
+        async def stream_generator():
+            try:
+                async for chunk in rag.stream_knowledge_graph(
+                    node_label=label,
+                    max_depth=max_depth,
+                    max_nodes=max_nodes,
+                ):
+                    yield chunk.model_dump_json() + "\n"
+            except Exception as e:
+                logger.error(
+                    f"Error streaming knowledge graph for label '{label}': {str(e)}"
+                )
+                logger.error(traceback.format_exc())
+                yield json.dumps({"error": str(e)}) + "\n"
+
+        return StreamingResponse(
+            stream_generator(),
+            media_type="application/x-ndjson",
+            headers={
+                "Cache-Control": "no-cache",
+                "Content-Type": "application/x-ndjson",
+                "X-Accel-Buffering": "no",  # Ensure proper handling of streaming response when proxied by Nginx
+            },
+        )
+
     @router.get("/graph/entity/exists", dependencies=[Depends(combined_auth)])
     async def check_entity_exists(
         name: str = Query(..., description="Entity name to check"),
@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Literal, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from lightrag.base import QueryParam
+from lightrag.tracing import start_trace
 from ..utils_api import get_combined_auth_dependency
 from pydantic import BaseModel, Field, field_validator
 
@@ -87,6 +88,11 @@ class QueryRequest(BaseModel):
         description="User-provided prompt for the query. If provided, this will be used instead of the default value from prompt template.",
     )
 
+    include_timings: Optional[bool] = Field(
+        default=None,
+        description="If True, the response includes a per-stage timing breakdown of the query.",
+    )
+
     @field_validator("query", mode="after")
     @classmethod
     def query_strip_after(cls, query: str) -> str:
@@ -109,7 +115,9 @@ class QueryRequest(BaseModel):
     def to_query_params(self, is_stream: bool) -> "QueryParam":
         """Converts a QueryRequest instance into a QueryParam instance."""
         # Use Pydantic's `.model_dump(exclude_none=True)` to remove None values automatically
-        request_data = self.model_dump(exclude_none=True, exclude={"query"})
+        request_data = self.model_dump(
+            exclude_none=True, exclude={"query", "include_timings"}
+        )
 
         # Ensure `mode` and `stream` are set explicitly
         param = QueryParam(**request_data)
@@ -121,6 +129,10 @@ class QueryResponse(BaseModel):
     response: str = Field(
         description="The generated response",
     )
+    timings: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Per-stage timing breakdown, only returned when include_timings is set",
+    )
 
 
 def create_query_routes(rag, api_key: Optional[str] = None, top_k: int = 60):
@@ -146,17 +158,19 @@ def create_query_routes(rag, api_key: Optional[str] = None, top_k: int = 60):
         """
         try:
             param = request.to_query_params(False)
-            response = await rag.aquery(request.query, param=param)
+            with start_trace() as trace:
+                response = await rag.aquery(request.query, param=param)
+            timings = trace.report() if request.include_timings else None
 
             # If response is a string (e.g. cache hit), return directly
             if isinstance(response, str):
-                return QueryResponse(response=response)
+                return QueryResponse(response=response, timings=timings)
 
             if isinstance(response, dict):
                 result = json.dumps(response, indent=2)
-                return QueryResponse(response=result)
+                return QueryResponse(response=result, timings=timings)
             else:
-                return QueryResponse(response=str(response))
+                return QueryResponse(response=str(response), timings=timings)
         except Exception as e:
             trace_exception(e)
             raise HTTPException(status_code=500, detail=str(e))
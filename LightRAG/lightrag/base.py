@@ -1,20 +1,35 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+import base64
+from bisect import bisect_left, bisect_right
+from contextvars import ContextVar
+from datetime import datetime
 from enum import Enum
+import inspect
+import json
 import os
 from dotenv import load_dotenv
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, replace
 from typing import (
     Any,
+    AsyncIterator,
     Literal,
     TypedDict,
     TypeVar,
     Callable,
 )
+import numpy as np
+
 from .utils import EmbeddingFunc
+from .embedding_batcher import get_embedding_batcher
+from .tracing import traced_storage_method
 from .types import KnowledgeGraph
-from .constants import GRAPH_FIELD_SEP
+from .constants import (
+    GRAPH_FIELD_SEP,
+    GRAPH_SCAN_BATCH_SIZE,
+    STORAGE_SCAN_BATCH_SIZE,
+)
 
 # use the .env that is inside the current folder
 # allows to use different .env file for each lightrag instance
@@ -100,12 +115,70 @@ class QueryParam:
     """
 
 
+# Vectors given to BaseVectorStorage.upsert_with_vectors, used in place of
+# embeddings by the upsert running in the current task
+_upsert_vectors: ContextVar[np.ndarray | None] = ContextVar(
+    "upsert_vectors", default=None
+)
+
+
+def select_record_fields(
+    record: dict[str, Any], fields: list[str] | None
+) -> dict[str, Any]:
+    """The given fields of a record, or a copy of the whole record if fields is None"""
+    if fields is None:
+        return dict(record)
+    return {name: record[name] for name in fields if name in record}
+
+
+def vector_scan_record(
+    record: dict[str, Any], fields: list[str] | None, vector: Any = None
+) -> dict[str, Any]:
+    """A record yielded by BaseVectorStorage.iter_batches
+
+    Args:
+        record: The record as returned by get_by_ids, with its "id"
+        fields: Fields to keep, all fields if None
+        vector: The stored vector to add as "vector", if requested
+    """
+    result = select_record_fields(record, fields)
+    result["id"] = record["id"]
+    if vector is not None:
+        result["vector"] = np.asarray(vector, dtype=np.float32).tolist()
+    return result
+
+
 @dataclass
 class StorageNameSpace(ABC):
     namespace: str
     workspace: str
     global_config: dict[str, Any]
 
+    # Read methods timed as "<namespace>.<method>" spans when a query trace is active
+    _traced_methods = ()
+
+    # How a scan of iter_batches, iter_node_batches or iter_edge_batches can be
+    # resumed with their start_after argument:
+    # - "key": records are yielded by ascending id, and start_after is the last id
+    #   read ([source, target] for edges)
+    # - "row": unchanged data is yielded in the same order by every scan, and
+    #   start_after is the number of records already read
+    # - None: the order may change between scans, which start from the beginning
+    scan_order = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls._traced_methods:
+            method = cls.__dict__.get(name)
+            if (
+                method is None
+                or not inspect.iscoroutinefunction(method)
+                or getattr(method, "__isabstractmethod__", False)
+                or getattr(method, "__traced__", False)
+            ):
+                continue
+            setattr(cls, name, traced_storage_method(method))
+
     async def initialize(self):
         """Initialize the storage"""
         pass
@@ -151,22 +224,112 @@ class BaseVectorStorage(StorageNameSpace, ABC):
     cosine_better_than_threshold: float = field(default=0.2)
     meta_fields: set[str] = field(default_factory=set)
 
+    _traced_methods = ("query", "get_by_ids")
+
+    async def _embed_query(
+        self, query: str, query_embedding: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Embedding of the query as a (1, dim) array, computed unless given"""
+        if query_embedding is not None:
+            return np.asarray(query_embedding).reshape(1, -1)
+        # higher priority for query
+        return await self.embedding_func([query], _priority=5)
+
+    async def _embed_contents(self, contents: list[str]) -> np.ndarray:
+        """Embed the contents of an upsert, one vector per content
+
+        Contents are sent through the embedding batcher shared by all vector
+        storages using the same embedding function, which packs them into
+        token-budget batches together with concurrent upserts.
+        """
+        vectors = _upsert_vectors.get()
+        if vectors is not None:
+            if len(vectors) != len(contents):
+                raise ValueError(
+                    f"{len(vectors)} vectors given for {len(contents)} contents"
+                )
+            return vectors
+        batcher = get_embedding_batcher(self.embedding_func, self.global_config)
+        return await batcher.embed(contents)
+
     @abstractmethod
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        query_embedding: np.ndarray | None = None,
     ) -> list[dict[str, Any]]:
-        """Query the vector storage and retrieve top_k results."""
+        """Query the vector storage and retrieve top_k results.
+
+        query_embedding is the precomputed embedding of the query, if any. It
+        lets callers embed several queries with one batched call.
+        """
 
     @abstractmethod
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         """Insert or update vectors in the storage.
 
+        A "created_at" Unix timestamp in the data of a record is stored as its
+        creation time, so that copied records keep it.
+
         Importance notes for in-memory storage:
         1. Changes will be persisted to disk during the next index_done_callback
         2. Only one process should updating the storage at a time before index_done_callback,
            KG-storage-log should be used to avoid data corruption
         """
 
+    async def upsert_with_vectors(
+        self, data: dict[str, dict[str, Any]], vectors: dict[str, Any]
+    ) -> None:
+        """Insert or update records with given vectors instead of embedding them
+
+        Used to copy records between storages without calling the embedding
+        model again. Records are written by `upsert` as usual.
+
+        Args:
+            data: Records to upsert, as for upsert
+            vectors: The vector of each record, by record id
+        """
+        missing = [key for key in data if key not in vectors]
+        if missing:
+            raise ValueError(
+                f"No vector given for {len(missing)} records: {missing[:5]}"
+            )
+
+        matrix = np.array([vectors[key] for key in data], dtype=np.float32)
+        dim = self.embedding_func.embedding_dim
+        if data and matrix.shape[1] != dim:
+            raise ValueError(
+                f"Vectors of dimension {matrix.shape[1]} given to {self.namespace}, "
+                f"which stores vectors of dimension {dim}"
+            )
+        token = _upsert_vectors.set(matrix)
+        try:
+            await self.upsert(data)
+        finally:
+            _upsert_vectors.reset(token)
+
+    async def create_rebuild_storage(
+        self, embedding_func: EmbeddingFunc
+    ) -> BaseVectorStorage:
+        """Create an empty storage to rebuild the records of this storage in
+
+        The new storage embeds with the given function, and is independent of
+        this one until `swap_rebuild_storage` moves its records into it.
+        Storages unable to keep a second index next to their data raise
+        NotImplementedError, their records are then rebuilt in place.
+        """
+        raise NotImplementedError
+
+    async def swap_rebuild_storage(self, storage: BaseVectorStorage) -> None:
+        """Replace all records of this storage at once with those of a rebuild storage
+
+        Afterwards this storage embeds with the embedding function of the
+        rebuild storage, which must not be used anymore.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def delete_entity(self, entity_name: str) -> None:
         """Delete a single entity by its name.
@@ -211,6 +374,32 @@ class BaseVectorStorage(StorageNameSpace, ABC):
         """
         pass
 
+    def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        include_vector: bool = False,
+        start_after: Any = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Iterate over all vectors in batches of at most `batch_size` records
+
+        Backends read the records through a cursor, so memory use is bounded by
+        the batch size. Records written during the iteration may be missed.
+
+        Args:
+            batch_size: Maximum number of records per batch
+            fields: Fields to return besides "id", all fields if None
+            include_vector: Whether to add the stored vector as "vector", a list of floats
+            start_after: Position to resume an earlier scan from, as described by
+                `scan_order`. Only supported by backends that set `scan_order`.
+
+        Yields:
+            Lists of records, in the format of get_by_ids
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support iterating over its records"
+        )
+
     @abstractmethod
     async def delete(self, ids: list[str]):
         """Delete vectors with specified IDs
@@ -229,6 +418,8 @@ class BaseVectorStorage(StorageNameSpace, ABC):
 class BaseKVStorage(StorageNameSpace, ABC):
     embedding_func: EmbeddingFunc
 
+    _traced_methods = ("get_by_id", "get_by_ids")
+
     @abstractmethod
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         """Get value by id"""
@@ -265,6 +456,30 @@ class BaseKVStorage(StorageNameSpace, ABC):
             None
         """
 
+    def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        start_after: Any = None,
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        """Iterate over all records in batches of at most `batch_size` records
+
+        Backends read the records through a cursor, so memory use is bounded by
+        the batch size. Records written during the iteration may be missed.
+
+        Args:
+            batch_size: Maximum number of records per batch
+            fields: Fields to return for each record, all fields if None
+            start_after: Position to resume an earlier scan from, as described by
+                `scan_order`. Only supported by backends that set `scan_order`.
+
+        Yields:
+            Lists of (id, record) tuples
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support iterating over its records"
+        )
+
     async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
         """Delete specific records from storage by cache mode
 
@@ -302,6 +517,14 @@ class BaseGraphStorage(StorageNameSpace, ABC):
 
     embedding_func: EmbeddingFunc
 
+    _traced_methods = (
+        "get_nodes_batch",
+        "node_degrees_batch",
+        "get_edges_batch",
+        "edge_degrees_batch",
+        "get_nodes_edges_batch",
+    )
+
     @abstractmethod
     async def has_node(self, node_id: str) -> bool:
         """Check if a node exists in the graph.
@@ -541,6 +764,34 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             edge_data: A dictionary of edge properties
         """
 
+    async def upsert_nodes_batch(self, nodes: list[tuple[str, dict[str, str]]]) -> None:
+        """Insert or update multiple nodes, in order
+
+        Default implementation upserts nodes one by one.
+        Override this method for better performance in storage backends
+        that support batch operations.
+
+        Args:
+            nodes: List of (node_id, node_data) tuples, as for upsert_node
+        """
+        for node_id, node_data in nodes:
+            await self.upsert_node(node_id, node_data)
+
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]]
+    ) -> None:
+        """Insert or update multiple edges, in order
+
+        Default implementation upserts edges one by one.
+        Override this method for better performance in storage backends
+        that support batch operations.
+
+        Args:
+            edges: List of (source_node_id, target_node_id, edge_data) tuples, as for upsert_edge
+        """
+        for source_node_id, target_node_id, edge_data in edges:
+            await self.upsert_edge(source_node_id, target_node_id, edge_data)
+
     @abstractmethod
     async def delete_node(self, node_id: str) -> None:
         """Delete a node from the graph.
@@ -605,6 +856,88 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             indicating whether the graph was truncated due to max_nodes limit
         """
 
+    async def stream_knowledge_graph(
+        self, node_label: str, max_depth: int = 3, max_nodes: int = 1000
+    ) -> AsyncIterator[KnowledgeGraph]:
+        """
+        Retrieve the same subgraph as `get_knowledge_graph` in consecutive parts.
+
+        Every edge is part of the first chunk that contains both of its nodes.
+        The is_truncated flag of the last chunk applies to the whole subgraph.
+
+        Default implementation yields the result of get_knowledge_graph at once.
+        Override this method in storage backends that can extract the subgraph
+        incrementally.
+        """
+        yield await self.get_knowledge_graph(node_label, max_depth, max_nodes)
+
+    async def iter_node_batches(
+        self, batch_size: int = GRAPH_SCAN_BATCH_SIZE
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Scan all nodes of the graph in pages of at most `batch_size` nodes
+
+        Default implementation lists all labels and fetches their properties
+        page by page with get_nodes_batch. Override this method in storage
+        backends that can page through the nodes with a cursor.
+
+        Yields:
+            Lists of (node_id, node_data) tuples
+        """
+        labels = await self.get_all_labels()
+        for start in range(0, len(labels), batch_size):
+            page = labels[start : start + batch_size]
+            nodes = await self.get_nodes_batch(page)
+            batch = [(label, nodes[label]) for label in page if label in nodes]
+            if batch:
+                yield batch
+
+    async def iter_edge_batches(
+        self, batch_size: int = GRAPH_SCAN_BATCH_SIZE
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Scan all edges of the graph in pages of at most `batch_size` edges
+
+        Every undirected edge is yielded once. Default implementation walks the
+        edges of all labels page by page with get_nodes_edges_batch and
+        get_edges_batch. Override this method in storage backends that can page
+        through the edges with a cursor.
+
+        Yields:
+            Lists of (source_node_id, target_node_id, edge_data) tuples
+        """
+        labels = await self.get_all_labels()
+        rank = {label: i for i, label in enumerate(labels)}
+        pairs: list[dict[str, str]] = []
+
+        async def fetch(pairs: list[dict[str, str]]) -> list[tuple[str, str, dict]]:
+            edges = await self.get_edges_batch(pairs)
+            return [
+                (pair["src"], pair["tgt"], edges[(pair["src"], pair["tgt"])])
+                for pair in pairs
+                if (pair["src"], pair["tgt"]) in edges
+            ]
+
+        for start in range(0, len(labels), batch_size):
+            page = labels[start : start + batch_size]
+            nodes_edges = await self.get_nodes_edges_batch(page)
+            for label in page:
+                seen = set()
+                for src_id, tgt_id in nodes_edges.get(label, []):
+                    other = tgt_id if src_id == label else src_id
+                    # Each edge is yielded from its endpoint with the lowest rank
+                    if other in seen or rank.get(other, -1) < rank[label]:
+                        continue
+                    seen.add(other)
+                    pairs.append({"src": label, "tgt": other})
+            while len(pairs) >= batch_size:
+                batch = await fetch(pairs[:batch_size])
+                pairs = pairs[batch_size:]
+                if batch:
+                    yield batch
+        if pairs:
+            batch = await fetch(pairs)
+            if batch:
+                yield batch
+
 
 class DocStatus(str, Enum):
     """Document processing status"""
@@ -643,6 +976,103 @@ class DocProcessingStatus:
     """Additional metadata"""
 
 
+DocStatusSortField = Literal["created_at", "updated_at", "id", "file_path"]
+
+DOC_STATUS_SORT_FIELDS: tuple[str, ...] = (
+    "created_at",
+    "updated_at",
+    "id",
+    "file_path",
+)
+
+
+@dataclass
+class DocStatusPage:
+    """One page of a document status listing"""
+
+    documents: dict[str, DocProcessingStatus]
+    """Documents of the page, in listing order"""
+    next_cursor: str | None = None
+    """Cursor of the next page, None on the last page"""
+
+
+def doc_status_from_dict(
+    data: dict[str, Any], include_content: bool = True
+) -> DocProcessingStatus:
+    """Build a DocProcessingStatus from a stored record, ignoring unknown fields"""
+    known = {f.name for f in fields(DocProcessingStatus)}
+    values = {k: v for k, v in data.items() if k in known}
+    # If content is missing, use content_summary as content
+    if not include_content:
+        values["content"] = ""
+    elif values.get("content") is None:
+        values["content"] = values.get("content_summary") or ""
+    # If file_path is missing, use a placeholder as file path
+    if not values.get("file_path"):
+        values["file_path"] = "no-file-path"
+    if values.get("chunks_list") is None:
+        values["chunks_list"] = []
+    if values.get("metadata") is None:
+        values["metadata"] = {}
+    return DocProcessingStatus(**values)
+
+
+def doc_status_sort_value(doc_id: str, data: dict[str, Any], sort_field: str) -> str:
+    """The value a document is ordered by, as a string comparable across backends"""
+    if sort_field == "id":
+        return doc_id
+    value = data.get(sort_field)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else str(value)
+
+
+def encode_doc_status_cursor(sort_value: str, doc_id: str) -> str:
+    return base64.urlsafe_b64encode(
+        json.dumps([sort_value, doc_id], ensure_ascii=False).encode("utf-8")
+    ).decode("ascii")
+
+
+def decode_doc_status_cursor(cursor: str) -> tuple[str, str]:
+    """Decode a pagination cursor into the (sort value, document id) it points after
+
+    Raises:
+        ValueError: If the cursor was not produced by encode_doc_status_cursor
+    """
+    try:
+        sort_value, doc_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii"))
+        )
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor}") from e
+    return str(sort_value), str(doc_id)
+
+
+def page_sorted_doc_keys(
+    sorted_keys: list[tuple[str, str]],
+    page_size: int,
+    cursor: str | None = None,
+    descending: bool = True,
+) -> tuple[list[tuple[str, str]], str | None]:
+    """Cut one page out of (sort value, document id) keys sorted in ascending order
+
+    Returns:
+        The keys of the page in listing order and the cursor of the next page
+    """
+    cursor_key = decode_doc_status_cursor(cursor) if cursor else None
+    if descending:
+        end = bisect_left(sorted_keys, cursor_key) if cursor_key else len(sorted_keys)
+        start = max(0, end - page_size)
+        page = sorted_keys[start:end][::-1]
+        has_more = start > 0
+    else:
+        start = bisect_right(sorted_keys, cursor_key) if cursor_key else 0
+        page = sorted_keys[start : start + page_size]
+        has_more = start + page_size < len(sorted_keys)
+    next_cursor = encode_doc_status_cursor(*page[-1]) if has_more and page else None
+    return page, next_cursor
+
+
 @dataclass
 class DocStatusStorage(BaseKVStorage, ABC):
     """Base class for document status storage"""
@@ -657,6 +1087,61 @@ class DocStatusStorage(BaseKVStorage, ABC):
     ) -> dict[str, DocProcessingStatus]:
         """Get all documents with a specific status"""
 
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page_size: int = 50,
+        cursor: str | None = None,
+        sort_field: DocStatusSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+        include_content: bool = False,
+    ) -> DocStatusPage:
+        """Get one page of documents ordered by sort_field, with the id as tie-breaker
+
+        Pages are addressed by a cursor pointing after the last document of the
+        previous page (keyset pagination), so pages stay consistent while documents
+        are added or change status. This default implementation loads the documents
+        with get_docs_by_status; backends override it to page through an index
+        without loading document content.
+
+        Args:
+            status_filter: Only list documents with this status, None for all
+            page_size: Maximum number of documents in the page
+            cursor: next_cursor of the previous page, None for the first page
+            sort_field: Field to order the documents by
+            sort_direction: "asc" or "desc"
+            include_content: Whether to return the document content
+
+        Returns:
+            DocStatusPage with the documents in listing order and the next cursor
+
+        Raises:
+            ValueError: If the cursor or the sort field is invalid
+        """
+        if sort_field not in DOC_STATUS_SORT_FIELDS:
+            raise ValueError(f"Invalid sort field: {sort_field}")
+        statuses = [status_filter] if status_filter is not None else list(DocStatus)
+        docs: dict[str, DocProcessingStatus] = {}
+        for status in statuses:
+            docs.update(await self.get_docs_by_status(status))
+
+        sorted_keys = sorted(
+            (doc_status_sort_value(doc_id, doc.__dict__, sort_field), doc_id)
+            for doc_id, doc in docs.items()
+        )
+        page, next_cursor = page_sorted_doc_keys(
+            sorted_keys, page_size, cursor, descending=sort_direction == "desc"
+        )
+        return DocStatusPage(
+            documents={
+                doc_id: docs[doc_id]
+                if include_content
+                else replace(docs[doc_id], content="")
+                for _, doc_id in page
+            },
+            next_cursor=next_cursor,
+        )
+
     async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
         """Drop cache is not supported for Doc Status storage"""
         return False
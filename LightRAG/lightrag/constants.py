@@ -8,14 +8,46 @@ consistency and makes maintenance easier.
 
 # Default values for environment variables
 DEFAULT_MAX_GLEANING = 1
+DEFAULT_ENTITY_EXTRACT_FORMAT = "delimited"
 DEFAULT_MAX_TOKEN_SUMMARY = 500
 DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE = 6
 DEFAULT_WOKERS = 2
 DEFAULT_TIMEOUT = 150
+DEFAULT_TOKEN_COUNT_CACHE_SIZE = 8192
+DEFAULT_JSON_WAL_COMPACT_SIZE = 16 * 1024 * 1024  # Compact JSON storage logs from 16MB
+# Compact graph journals from 16MB
+DEFAULT_NETWORKX_JOURNAL_COMPACT_SIZE = 16 * 1024 * 1024
+# Seconds to collect texts for a partial embedding batch
+DEFAULT_EMBEDDING_BATCH_WINDOW = 0.01
+# Tokens per embedding request, the default batch budget of text-embeddings-inference
+DEFAULT_EMBEDDING_BATCH_MAX_TOKENS = 16384
 
 # Separator for graph fields
 GRAPH_FIELD_SEP = "<SEP>"
 
+# Number of nodes per chunk when streaming the top-degree subgraph
+GRAPH_STREAM_CHUNK_NODES = 200
+
+# Number of nodes or edges written per statement (Neo4j) or transaction (PostgreSQL)
+# by batch graph upserts
+GRAPH_UPSERT_BATCH_SIZE = 500
+
+# Number of nodes or edges read per page when scanning the whole graph, e.g. for export
+GRAPH_SCAN_BATCH_SIZE = 1000
+
+# Number of records read per batch when iterating over KV and vector storages
+STORAGE_SCAN_BATCH_SIZE = 1000
+
+# Storage migration: namespaces copied at the same time, and batches copied
+# between two checkpoints
+MIGRATION_MAX_PARALLEL = 4
+MIGRATION_CHECKPOINT_INTERVAL = 10
+
+# Vector storage rebuild: batches upserted at the same time in each storage, and
+# suffix of the namespace the new index is built in
+VECTOR_REBUILD_MAX_PARALLEL = 4
+VECTOR_REBUILD_NAMESPACE_SUFFIX = "_rebuild"
+
 # Logging configuration defaults
 DEFAULT_LOG_MAX_BYTES = 10485760  # Default 10MB
 DEFAULT_LOG_BACKUP_COUNT = 5  # Default 5 backups
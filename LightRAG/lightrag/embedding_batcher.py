@@ -0,0 +1,214 @@
+"""
+Token-budget batching of embedding calls shared by the vector storages.
+
+Vector storages used to cut their upserts into batches of a fixed number of texts.
+A batch of long relation descriptions could then exceed the token limit of the
+embedding server, while a batch of short entity names left it mostly idle.
+
+The batcher packs texts by token count instead: texts are sorted by length, which
+keeps padding low, and a batch is closed when it reaches `max_batch_size` texts or
+`max_batch_tokens` tokens. Upserts issued within `window` seconds of each other,
+e.g. for the entities of several documents, share batches. At most `max_inflight`
+batches are embedded at the same time.
+
+All storages using the same embedding function share one batcher.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+
+from .constants import (
+    DEFAULT_EMBEDDING_BATCH_MAX_TOKENS,
+    DEFAULT_EMBEDDING_BATCH_WINDOW,
+)
+from .tracing import trace_span, untraced_context
+from .utils import logger
+
+
+@dataclass
+class _PendingText:
+    text: str
+    tokens: int
+    future: asyncio.Future
+
+
+class EmbeddingBatcher:
+    """Embed texts in token-budget batches, coalescing concurrent requests
+
+    Args:
+        embedding_func: Async function embedding a list of texts
+        count_tokens: Returns the number of tokens of a text
+        max_batch_size: Maximum number of texts per batch
+        max_batch_tokens: Maximum number of tokens per batch, None for no limit.
+            A text longer than this is embedded in a batch of its own.
+        max_inflight: Maximum number of batches being embedded at the same time
+        window: Seconds to wait for more texts before embedding a batch that is
+            not full
+    """
+
+    def __init__(
+        self,
+        embedding_func: Callable[..., Any],
+        count_tokens: Callable[[str], int],
+        max_batch_size: int = 32,
+        max_batch_tokens: int | None = None,
+        max_inflight: int = 16,
+        window: float = DEFAULT_EMBEDDING_BATCH_WINDOW,
+    ):
+        self._embedding_func = weakref.ref(embedding_func)
+        self._count_tokens = count_tokens
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_tokens = max_batch_tokens
+        self.window = window
+        self._inflight = asyncio.Semaphore(max(1, max_inflight))
+        self._pending: list[_PendingText] = []
+        self._pending_tokens = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed the texts, returning one vector per text in input order"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            tokens = self._count_tokens(text)
+            future = loop.create_future()
+            self._pending.append(_PendingText(text, tokens, future))
+            self._pending_tokens += tokens
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch_size or (
+            self.max_batch_tokens is not None
+            and self._pending_tokens >= self.max_batch_tokens
+        ):
+            # Enough texts for at least one full batch
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.window, self._flush, context=untraced_context()
+            )
+
+        # Batches mix the texts of several callers, each times its own wait
+        with trace_span("embedding_batch"):
+            vectors = await asyncio.gather(*futures)
+        return np.array(vectors)
+
+    def _flush(self) -> None:
+        """Pack all pending texts into batches and start embedding them"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending, self._pending_tokens = self._pending, [], 0
+        for batch in self._pack(pending):
+            task = untraced_context().run(asyncio.create_task, self._embed_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    def _pack(self, pending: list[_PendingText]) -> list[list[_PendingText]]:
+        """Split texts sorted by length into batches within the size and token limits"""
+        batches: list[list[_PendingText]] = []
+        batch: list[_PendingText] = []
+        batch_tokens = 0
+        for item in sorted(pending, key=lambda item: item.tokens):
+            if batch and (
+                len(batch) >= self.max_batch_size
+                or (
+                    self.max_batch_tokens is not None
+                    and batch_tokens + item.tokens > self.max_batch_tokens
+                )
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(item)
+            batch_tokens += item.tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _embed_batch(self, batch: list[_PendingText]) -> None:
+        async with self._inflight:
+            try:
+                embedding_func = self._embedding_func()
+                if embedding_func is None:
+                    raise RuntimeError("Embedding function is no longer available")
+                vectors = await embedding_func([item.text for item in batch])
+                if len(vectors) != len(batch):
+                    raise ValueError(
+                        f"embedding is not 1-1 with data, {len(vectors)} != {len(batch)}"
+                    )
+            except asyncio.CancelledError:
+                for item in batch:
+                    item.future.cancel()
+                raise
+            except Exception as e:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                return
+        for item, vector in zip(batch, vectors):
+            if not item.future.done():
+                item.future.set_result(vector)
+
+
+# Batchers by id of the embedding function: (function ref, event loop, batcher)
+_batchers: dict[
+    int, tuple[weakref.ref, asyncio.AbstractEventLoop, EmbeddingBatcher]
+] = {}
+
+
+def get_embedding_batcher(
+    embedding_func: Callable[..., Any], global_config: dict[str, Any]
+) -> EmbeddingBatcher:
+    """Get the batcher shared by the storages using `embedding_func`
+
+    The token budget is `embedding_batch_max_tokens` from the global config. Tokens
+    are counted with the memoized `count_tokens` of the configured tokenizer.
+    """
+    loop = asyncio.get_running_loop()
+    key = id(embedding_func)
+    entry = _batchers.get(key)
+    if entry is not None and entry[0]() is embedding_func and entry[1] is loop:
+        return entry[2]
+
+    tokenizer = global_config.get("tokenizer")
+    if tokenizer is not None:
+        count_tokens = tokenizer.count_tokens
+    else:
+
+        def count_tokens(text: str) -> int:
+            # Rough estimate for English text
+            return len(text) // 4 + 1
+
+    max_batch_tokens = global_config.get(
+        "embedding_batch_max_tokens", DEFAULT_EMBEDDING_BATCH_MAX_TOKENS
+    )
+    batcher = EmbeddingBatcher(
+        embedding_func,
+        count_tokens,
+        max_batch_size=global_config.get("embedding_batch_num", 32),
+        max_batch_tokens=max_batch_tokens,
+        max_inflight=global_config.get("embedding_func_max_async", 16),
+        window=global_config.get(
+            "embedding_batch_window", DEFAULT_EMBEDDING_BATCH_WINDOW
+        ),
+    )
+    logger.debug(
+        f"Embedding batcher: {batcher.max_batch_size} texts, "
+        f"{max_batch_tokens} tokens per batch"
+    )
+
+    def forget(ref: weakref.ref) -> None:
+        if key in _batchers and _batchers[key][0] is ref:
+            del _batchers[key]
+
+    _batchers[key] = (weakref.ref(embedding_func, forget), loop, batcher)
+    return batcher
@@ -0,0 +1,431 @@
+"""
+Streaming export of the knowledge graph.
+
+Entities and relations are read page by page with the `iter_node_batches` and
+`iter_edge_batches` iterators of the graph storage. The vector records of each
+page are fetched with one `get_by_ids` call, and the rows of the page are
+written before the next page is read, so that the memory used by an export
+does not grow with the size of the graph.
+
+The export has three sections: entities and relations from the graph, and
+relationships scanned from the relationship vector storage with its
+`iter_batches` iterator. Supported formats:
+
+- `csv`: one table per section, preceded by a `# ENTITIES` style marker
+- `jsonl`: one JSON object per row, with the section in its `type` field
+- `parquet`: one table with a `section` column, one row group per page
+- `md`: one Markdown table per section
+- `excel` and `txt`: one sheet or fixed-width table per section. Both need
+  all rows to lay out a section, so they are collected in memory first.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from typing import Any, AsyncIterator, TextIO
+
+from .base import BaseGraphStorage, BaseVectorStorage
+from .constants import GRAPH_SCAN_BATCH_SIZE
+from .utils import compute_mdhash_id, logger
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet", "md", "excel", "txt")
+
+# Section name -> (title, row type)
+SECTIONS = {
+    "entities": ("Entities", "entity"),
+    "relations": ("Relations", "relation"),
+    "relationships": ("Relationships", "relationship"),
+}
+
+# Columns of the single table written to Parquet files
+PARQUET_COLUMNS = (
+    "section",
+    "entity_name",
+    "src_entity",
+    "tgt_entity",
+    "relationship_id",
+    "source_id",
+    "graph_data",
+    "vector_data",
+    "data",
+)
+
+
+class ExportWriter:
+    """Write the rows of the export sections in order
+
+    Sections are started in order and receive their rows in batches.
+    Subclasses write rows as they arrive unless noted otherwise.
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.section: str | None = None
+        self.section_rows = 0
+
+    def start_section(self, section: str) -> None:
+        self.section = section
+        self.section_rows = 0
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        if rows:
+            self._write_rows(rows)
+            self.section_rows += len(rows)
+
+    def end_section(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _write_rows(self, rows: list[dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+
+class CsvExportWriter(ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self._file: TextIO = open(output_path, "w", newline="", encoding="utf-8")
+        self._writer: csv.DictWriter | None = None
+        self._written_sections = 0
+
+    def _write_rows(self, rows: list[dict[str, Any]]) -> None:
+        if self.section_rows == 0:
+            if self._written_sections:
+                self._file.write("\n\n")
+            self._file.write(f"# {self.section.upper()}\n")
+            self._writer = csv.DictWriter(self._file, fieldnames=list(rows[0]))
+            self._writer.writeheader()
+            self._written_sections += 1
+        self._writer.writerows(
+            {key: _to_text(value) for key, value in row.items()} for row in rows
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JsonLinesExportWriter(ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self._file: TextIO = open(output_path, "w", encoding="utf-8")
+
+    def _write_rows(self, rows: list[dict[str, Any]]) -> None:
+        row_type = SECTIONS[self.section][1]
+        self._file.writelines(
+            json.dumps({"type": row_type, **row}, ensure_ascii=False, default=str)
+            + "\n"
+            for row in rows
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetExportWriter(ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        import pipmaster as pm
+
+        if not pm.is_installed("pyarrow"):
+            pm.install("pyarrow")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.string()) for column in PARQUET_COLUMNS])
+        self._writer = pq.ParquetWriter(output_path, self._schema)
+
+    def _write_rows(self, rows: list[dict[str, Any]]) -> None:
+        row_type = SECTIONS[self.section][1]
+        columns = {column: [] for column in PARQUET_COLUMNS}
+        for row in rows:
+            columns["section"].append(row_type)
+            for column in PARQUET_COLUMNS[1:]:
+                value = row.get(column)
+                columns[column].append(
+                    None
+                    if value is None
+                    else value
+                    if isinstance(value, str)
+                    else json.dumps(value, ensure_ascii=False, default=str)
+                )
+        self._writer.write_table(
+            self._pa.Table.from_pydict(columns, schema=self._schema)
+        )
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class MarkdownExportWriter(ExportWriter):
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self._file: TextIO = open(output_path, "w", encoding="utf-8")
+        self._file.write("# LightRAG Data Export\n\n")
+
+    def start_section(self, section: str) -> None:
+        super().start_section(section)
+        self._file.write(f"## {SECTIONS[section][0]}\n\n")
+
+    def _write_rows(self, rows: list[dict[str, Any]]) -> None:
+        if self.section_rows == 0:
+            self._file.write("| " + " | ".join(rows[0]) + " |\n")
+            self._file.write("| " + " | ".join(["---"] * len(rows[0])) + " |\n")
+        self._file.writelines(
+            "| " + " | ".join(_to_text(v) for v in row.values()) + " |\n"
+            for row in rows
+        )
+
+    def end_section(self) -> None:
+        if self.section_rows:
+            self._file.write("\n\n")
+        else:
+            row_type = SECTIONS[self.section][1]
+            self._file.write(f"*No {row_type} data available*\n\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class BufferedExportWriter(ExportWriter):
+    """Collect the rows of all sections and write them on close"""
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.sections: dict[str, list[dict[str, str]]] = {}
+
+    def start_section(self, section: str) -> None:
+        super().start_section(section)
+        self.sections[section] = []
+
+    def _write_rows(self, rows: list[dict[str, Any]]) -> None:
+        self.sections[self.section].extend(
+            {key: _to_text(value) for key, value in row.items()} for row in rows
+        )
+
+
+class ExcelExportWriter(BufferedExportWriter):
+    def close(self) -> None:
+        import pandas as pd
+
+        with pd.ExcelWriter(self.output_path, engine="xlsxwriter") as writer:
+            for section, rows in self.sections.items():
+                if rows:
+                    pd.DataFrame(rows).to_excel(
+                        writer, sheet_name=SECTIONS[section][0], index=False
+                    )
+
+
+class TextExportWriter(BufferedExportWriter):
+    def close(self) -> None:
+        with open(self.output_path, "w", encoding="utf-8") as txtfile:
+            txtfile.write("LIGHTRAG DATA EXPORT\n")
+            txtfile.write("=" * 80 + "\n\n")
+            for section, rows in self.sections.items():
+                title, row_type = SECTIONS[section]
+                txtfile.write(title.upper() + "\n")
+                txtfile.write("-" * 80 + "\n")
+                if not rows:
+                    txtfile.write(f"No {row_type} data available\n\n")
+                    continue
+                # Create fixed width columns
+                col_widths = {
+                    k: max(len(k), max(len(row[k]) for row in rows)) for k in rows[0]
+                }
+                header = "  ".join(k.ljust(col_widths[k]) for k in rows[0])
+                txtfile.write(header + "\n")
+                txtfile.write("-" * len(header) + "\n")
+                for row in rows:
+                    txtfile.write(
+                        "  ".join(v.ljust(col_widths[k]) for k, v in row.items()) + "\n"
+                    )
+                txtfile.write("\n\n")
+
+
+EXPORT_WRITERS: dict[str, type[ExportWriter]] = {
+    "csv": CsvExportWriter,
+    "jsonl": JsonLinesExportWriter,
+    "parquet": ParquetExportWriter,
+    "md": MarkdownExportWriter,
+    "excel": ExcelExportWriter,
+    "txt": TextExportWriter,
+}
+
+
+def _to_text(value: Any) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+async def _records_by_id(
+    vdb: BaseVectorStorage, ids: list[str]
+) -> dict[str, dict[str, Any]]:
+    """Vector records of the given ids that exist, by id"""
+    records = await vdb.get_by_ids(ids)
+    return {
+        record["id"]: record
+        for record in records
+        if record is not None and record.get("id") is not None
+    }
+
+
+def _relation_ids(src_id: str, tgt_id: str) -> tuple[str, str]:
+    """Relationship vector ids of an edge, in both orientations"""
+    return (
+        compute_mdhash_id(src_id + tgt_id, prefix="rel-"),
+        compute_mdhash_id(tgt_id + src_id, prefix="rel-"),
+    )
+
+
+async def iter_entity_rows(
+    graph: BaseGraphStorage,
+    entities_vdb: BaseVectorStorage,
+    include_vector_data: bool = False,
+    batch_size: int = GRAPH_SCAN_BATCH_SIZE,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Rows of the entities section, one list per page of nodes"""
+    async for nodes in graph.iter_node_batches(batch_size):
+        vectors = {}
+        if include_vector_data:
+            vectors = await _records_by_id(
+                entities_vdb,
+                [compute_mdhash_id(name, prefix="ent-") for name, _ in nodes],
+            )
+        rows = []
+        for entity_name, node_data in nodes:
+            row = {
+                "entity_name": entity_name,
+                "source_id": node_data.get("source_id"),
+                "graph_data": node_data,
+            }
+            if include_vector_data:
+                row["vector_data"] = vectors.get(
+                    compute_mdhash_id(entity_name, prefix="ent-")
+                )
+            rows.append(row)
+        yield rows
+
+
+async def iter_relation_rows(
+    graph: BaseGraphStorage,
+    relationships_vdb: BaseVectorStorage,
+    include_vector_data: bool = False,
+    batch_size: int = GRAPH_SCAN_BATCH_SIZE,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Rows of the relations section, one list per page of edges"""
+    async for edges in graph.iter_edge_batches(batch_size):
+        vectors = {}
+        if include_vector_data:
+            vectors = await _records_by_id(
+                relationships_vdb,
+                [rel_id for src, tgt, _ in edges for rel_id in _relation_ids(src, tgt)],
+            )
+        rows = []
+        for src_id, tgt_id, edge_data in edges:
+            row = {
+                "src_entity": src_id,
+                "tgt_entity": tgt_id,
+                "source_id": edge_data.get("source_id"),
+                "graph_data": edge_data,
+            }
+            if include_vector_data:
+                rel_id, reverse_id = _relation_ids(src_id, tgt_id)
+                row["vector_data"] = vectors.get(rel_id) or vectors.get(reverse_id)
+            rows.append(row)
+        yield rows
+
+
+async def iter_relationship_rows(
+    graph: BaseGraphStorage,
+    relationships_vdb: BaseVectorStorage,
+    batch_size: int = GRAPH_SCAN_BATCH_SIZE,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Rows of the relationships section, one per relationship vector record
+
+    The records are scanned with `iter_batches`. Storages that cannot be
+    scanned fall back to looking up the vector records of the graph edges.
+    """
+    try:
+        records = relationships_vdb.iter_batches(batch_size)
+    except NotImplementedError:
+        records = None
+
+    if records is not None:
+        async for batch in records:
+            yield [
+                {"relationship_id": record["id"], "data": record} for record in batch
+            ]
+        return
+
+    async for edges in graph.iter_edge_batches(batch_size):
+        records_by_id = await _records_by_id(
+            relationships_vdb,
+            [rel_id for src, tgt, _ in edges for rel_id in _relation_ids(src, tgt)],
+        )
+        yield [
+            {"relationship_id": rel_id, "data": record}
+            for rel_id, record in records_by_id.items()
+        ]
+
+
+async def aexport_data(
+    chunk_entity_relation_graph: BaseGraphStorage,
+    entities_vdb: BaseVectorStorage,
+    relationships_vdb: BaseVectorStorage,
+    output_path: str,
+    file_format: str = "csv",
+    include_vector_data: bool = False,
+    batch_size: int = GRAPH_SCAN_BATCH_SIZE,
+) -> None:
+    """
+    Export all entities, relations, and relationships, one page at a time.
+
+    Args:
+        chunk_entity_relation_graph: Graph storage instance for entities and relations
+        entities_vdb: Vector database storage for entities
+        relationships_vdb: Vector database storage for relationships
+        output_path: The path to the output file (including extension).
+        file_format: Output format - "csv", "jsonl", "parquet", "md", "excel", "txt".
+        include_vector_data: Whether to include data from the vector database.
+        batch_size: Number of nodes or edges read and written per page.
+    """
+    writer_cls = EXPORT_WRITERS.get(file_format)
+    if writer_cls is None:
+        raise ValueError(
+            f"Unsupported file format: {file_format}. "
+            f"Choose from: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    sections = {
+        "entities": iter_entity_rows(
+            chunk_entity_relation_graph, entities_vdb, include_vector_data, batch_size
+        ),
+        "relations": iter_relation_rows(
+            chunk_entity_relation_graph,
+            relationships_vdb,
+            include_vector_data,
+            batch_size,
+        ),
+        "relationships": iter_relationship_rows(
+            chunk_entity_relation_graph, relationships_vdb, batch_size
+        ),
+    }
+
+    writer = writer_cls(output_path)
+    counts = {}
+    try:
+        for section, batches in sections.items():
+            writer.start_section(section)
+            async for rows in batches:
+                writer.write_rows(rows)
+            writer.end_section()
+            counts[section] = writer.section_rows
+    finally:
+        writer.close()
+
+    logger.info(
+        f"Exported {counts['entities']} entities, {counts['relations']} relations "
+        f"and {counts['relationships']} relationships to {output_path}"
+    )
+    print(f"Data exported to: {output_path} with format: {file_format}")
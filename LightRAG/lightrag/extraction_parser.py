@@ -0,0 +1,286 @@
+"""
+Parser for the entity extraction output of the LLM.
+
+Extraction results are parsed once when a chunk is extracted and again for every
+cached result when entities and relationships are rebuilt, which amounts to
+millions of records for a large backfill. The parser compiles the delimiter
+patterns of a prompt configuration once and splits the output into records in a
+single pass. Each record body is then split on the tuple delimiter with plain
+string operations.
+
+Two output formats are understood:
+
+- `delimited`: the default format of `PROMPTS["entity_extraction"]`, with
+  records like `("entity"<|>name<|>type<|>description)` separated by the record
+  delimiter.
+- `jsonl`: one JSON object per line, as requested by
+  `PROMPTS["entity_extraction_jsonl"]`, e.g.
+  `{"type": "entity", "name": ..., "entity_type": ..., "description": ...}`.
+
+The format of an output is detected from its first record, so cached results of
+either format can be parsed regardless of the configured format.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Iterator
+
+from .prompt import PROMPTS
+from .utils import clean_str, is_float_regex, logger, normalize_extracted_info
+
+EXTRACTION_FORMATS = ("delimited", "jsonl")
+
+# Fields of the JSON-lines records, in the order of the delimited records
+JSON_RECORD_FIELDS = {
+    "entity": ("name", "entity_type", "description"),
+    "relationship": ("source", "target", "description", "keywords", "strength"),
+    "content_keywords": ("keywords",),
+}
+
+_RECORD_BODY = re.compile(r"\((.*)\)")
+# First line starting a record: "(" for delimited output, "{" for JSON lines
+_FIRST_RECORD = re.compile(r"^\s*([({])", re.MULTILINE)
+
+
+def parse_entity_record(
+    record_attributes: list[str],
+    chunk_key: str,
+    file_path: str = "unknown_source",
+) -> dict[str, Any] | None:
+    """Build entity data from the attributes of a record, None if it is not a valid entity"""
+    if len(record_attributes) < 4 or '"entity"' not in record_attributes[0]:
+        return None
+
+    # Clean and validate entity name
+    entity_name = clean_str(record_attributes[1]).strip()
+    if not entity_name:
+        logger.warning(
+            f"Entity extraction error: empty entity name in: {record_attributes}"
+        )
+        return None
+
+    # Normalize entity name
+    entity_name = normalize_extracted_info(entity_name, is_entity=True)
+
+    # Check if entity name became empty after normalization
+    if not entity_name or not entity_name.strip():
+        logger.warning(
+            f"Entity extraction error: entity name became empty after normalization. Original: '{record_attributes[1]}'"
+        )
+        return None
+
+    # Clean and validate entity type
+    entity_type = clean_str(record_attributes[2]).strip('"')
+    if not entity_type.strip() or entity_type.startswith('("'):
+        logger.warning(
+            f"Entity extraction error: invalid entity type in: {record_attributes}"
+        )
+        return None
+
+    # Clean and validate description
+    entity_description = clean_str(record_attributes[3])
+    entity_description = normalize_extracted_info(entity_description)
+
+    if not entity_description.strip():
+        logger.warning(
+            f"Entity extraction error: empty description for entity '{entity_name}' of type '{entity_type}'"
+        )
+        return None
+
+    return dict(
+        entity_name=entity_name,
+        entity_type=entity_type,
+        description=entity_description,
+        source_id=chunk_key,
+        file_path=file_path,
+    )
+
+
+def parse_relationship_record(
+    record_attributes: list[str],
+    chunk_key: str,
+    file_path: str = "unknown_source",
+) -> dict[str, Any] | None:
+    """Build relationship data from the attributes of a record, None if it is not a valid relationship"""
+    if len(record_attributes) < 5 or '"relationship"' not in record_attributes[0]:
+        return None
+    # add this record as edge
+    source = clean_str(record_attributes[1])
+    target = clean_str(record_attributes[2])
+
+    # Normalize source and target entity names
+    source = normalize_extracted_info(source, is_entity=True)
+    target = normalize_extracted_info(target, is_entity=True)
+
+    # Check if source or target became empty after normalization
+    if not source or not source.strip():
+        logger.warning(
+            f"Relationship extraction error: source entity became empty after normalization. Original: '{record_attributes[1]}'"
+        )
+        return None
+
+    if not target or not target.strip():
+        logger.warning(
+            f"Relationship extraction error: target entity became empty after normalization. Original: '{record_attributes[2]}'"
+        )
+        return None
+
+    if source == target:
+        logger.debug(
+            f"Relationship source and target are the same in: {record_attributes}"
+        )
+        return None
+
+    edge_description = clean_str(record_attributes[3])
+    edge_description = normalize_extracted_info(edge_description)
+
+    edge_keywords = normalize_extracted_info(
+        clean_str(record_attributes[4]), is_entity=True
+    )
+    edge_keywords = edge_keywords.replace("，", ",")
+
+    strength = record_attributes[-1].strip('"').strip("'")
+    weight = float(strength) if is_float_regex(strength) else 1.0
+    return dict(
+        src_id=source,
+        tgt_id=target,
+        weight=weight,
+        description=edge_description,
+        keywords=edge_keywords,
+        source_id=chunk_key,
+        file_path=file_path,
+    )
+
+
+class ExtractionParser:
+    """Parse extraction output written with the given delimiters
+
+    Use `get_extraction_parser` to get the parser of the delimiters in `PROMPTS`.
+    """
+
+    def __init__(
+        self, tuple_delimiter: str, record_delimiter: str, completion_delimiter: str
+    ):
+        self.tuple_delimiter = tuple_delimiter
+        self.record_delimiter = record_delimiter
+        self.completion_delimiter = completion_delimiter
+        self._record_split = re.compile(
+            f"{re.escape(record_delimiter)}|{re.escape(completion_delimiter)}"
+        )
+
+    @staticmethod
+    def detect_format(text: str) -> str:
+        """`jsonl` if the first record of the output is a JSON object, else `delimited`"""
+        match = _FIRST_RECORD.search(text)
+        return "jsonl" if match is not None and match.group(1) == "{" else "delimited"
+
+    def delimited_records(self, text: str) -> Iterator[list[str]]:
+        """Attributes of each record of delimited output"""
+        tuple_delimiter = self.tuple_delimiter
+        for record in self._record_split.split(text):
+            body = _RECORD_BODY.search(record)
+            if body is None:
+                continue
+            yield [a for a in map(str.strip, body.group(1).split(tuple_delimiter)) if a]
+
+    def json_records(self, text: str) -> Iterator[list[str]]:
+        """Attributes of each record of JSON-lines output, in delimited order"""
+        for line in text.splitlines():
+            line = line.strip()
+            if not line.startswith("{"):
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Entity extraction error: invalid JSON record: {line}")
+                continue
+            if not isinstance(record, dict):
+                continue
+            record_type = str(record.get("type", "")).lower()
+            fields = JSON_RECORD_FIELDS.get(record_type)
+            if fields is None:
+                continue
+            yield [f'"{record_type}"'] + [
+                "" if record.get(name) is None else str(record[name]) for name in fields
+            ]
+
+    def records(self, text: str) -> Iterator[list[str]]:
+        """Attributes of each record of the output, in either format"""
+        if not text:
+            return iter(())
+        if self.detect_format(text) == "jsonl":
+            return self.json_records(text)
+        return self.delimited_records(text)
+
+    def parse(
+        self, text: str, chunk_key: str, file_path: str = "unknown_source"
+    ) -> tuple[defaultdict[str, list], defaultdict[tuple[str, str], list]]:
+        """Entities by name and relationships by (source, target) found in the output"""
+        maybe_nodes = defaultdict(list)
+        maybe_edges = defaultdict(list)
+        for record_attributes in self.records(text):
+            entity_data = parse_entity_record(record_attributes, chunk_key, file_path)
+            if entity_data is not None:
+                maybe_nodes[entity_data["entity_name"]].append(entity_data)
+                continue
+
+            relationship_data = parse_relationship_record(
+                record_attributes, chunk_key, file_path
+            )
+            if relationship_data is not None:
+                maybe_edges[
+                    (relationship_data["src_id"], relationship_data["tgt_id"])
+                ].append(relationship_data)
+        return maybe_nodes, maybe_edges
+
+    def to_json_lines(self, text: str) -> str:
+        """Rewrite delimited output as JSON lines, e.g. for the prompt examples"""
+        lines = []
+        for record_attributes in self.delimited_records(text):
+            record_type = record_attributes[0].strip('"').lower()
+            fields = JSON_RECORD_FIELDS.get(record_type)
+            if fields is None or len(record_attributes) <= len(fields):
+                continue
+            record: dict[str, Any] = {"type": record_type}
+            for name, value in zip(fields, record_attributes[1:]):
+                record[name] = value.strip('"')
+            if record_type == "relationship" and is_float_regex(record["strength"]):
+                record["strength"] = float(record["strength"])
+            lines.append(json.dumps(record, ensure_ascii=False))
+        return "\n".join(lines)
+
+
+@lru_cache(maxsize=8)
+def _extraction_parser(
+    tuple_delimiter: str, record_delimiter: str, completion_delimiter: str
+) -> ExtractionParser:
+    return ExtractionParser(tuple_delimiter, record_delimiter, completion_delimiter)
+
+
+def get_extraction_parser() -> ExtractionParser:
+    """The parser for the delimiters currently configured in `PROMPTS`"""
+    return _extraction_parser(
+        PROMPTS["DEFAULT_TUPLE_DELIMITER"],
+        PROMPTS["DEFAULT_RECORD_DELIMITER"],
+        PROMPTS["DEFAULT_COMPLETION_DELIMITER"],
+    )
+
+
+def json_lines_examples(examples: list[str]) -> list[str]:
+    """Rewrite the outputs of formatted extraction examples as JSON lines"""
+    parser = get_extraction_parser()
+    converted = []
+    for example in examples:
+        head, sep, output = example.partition("Output:\n")
+        if not sep:
+            converted.append(example)
+            continue
+        converted.append(
+            f"{head}{sep}{parser.to_json_lines(output)}\n"
+            f"{parser.completion_delimiter}\n#############################"
+        )
+    return converted
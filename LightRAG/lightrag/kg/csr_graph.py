@@ -0,0 +1,118 @@
+"""
+Read-optimized compressed sparse row (CSR) view of an undirected graph.
+
+Nodes are numbered in graph order. The neighbors of node `i` are
+`neighbors[offsets[i]:offsets[i + 1]]`, in the adjacency order of the source
+graph, so results match the ones computed on the graph itself. Degrees are
+precomputed, which turns degree lookups for a batch of nodes into a single
+gather. The degree ordering is computed once per view.
+
+The view is immutable: it is rebuilt after the graph has been persisted and
+dropped as soon as the graph changes.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import networkx as nx
+
+
+@dataclass
+class CSRGraph:
+    node_ids: list[str]
+    index: dict[str, int]
+    offsets: np.ndarray
+    neighbors: np.ndarray
+    degrees: np.ndarray
+    _degree_order: np.ndarray | None = field(default=None, repr=False)
+
+    @classmethod
+    def from_networkx(cls, graph: nx.Graph) -> "CSRGraph":
+        node_ids = list(graph.nodes())
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        adjacency = graph.adj
+        counts = np.fromiter(
+            (len(adjacency[n]) for n in node_ids), dtype=np.int64, count=len(node_ids)
+        )
+        offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        neighbors = np.fromiter(
+            (index[m] for n in node_ids for m in adjacency[n]),
+            dtype=np.int64,
+            count=int(offsets[-1]),
+        )
+        # A self-loop is listed once but counts twice towards the degree
+        degrees = counts.copy()
+        for n, _ in nx.selfloop_edges(graph):
+            degrees[index[n]] += 1
+        return cls(node_ids, index, offsets, neighbors, degrees)
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def positions(self, node_ids: list[str]) -> np.ndarray:
+        """Integer ids of the given nodes, -1 for nodes not in the graph"""
+        get = self.index.get
+        return np.fromiter(
+            (get(n, -1) for n in node_ids), dtype=np.int64, count=len(node_ids)
+        )
+
+    def degrees_of(self, node_ids: list[str]) -> np.ndarray:
+        """Degrees of the given nodes, 0 for nodes not in the graph"""
+        positions = self.positions(node_ids)
+        degrees = np.zeros(len(positions), dtype=self.degrees.dtype)
+        # Only gather known nodes: -1 is out of range in an empty graph
+        found = positions >= 0
+        degrees[found] = self.degrees[positions[found]]
+        return degrees
+
+    def neighbor_slices(self, positions: np.ndarray) -> list[np.ndarray]:
+        """Neighbor ids of each node, empty for positions of -1"""
+        # Unknown nodes get an empty range
+        found = positions >= 0
+        starts = np.zeros(len(positions), dtype=np.int64)
+        ends = np.zeros(len(positions), dtype=np.int64)
+        starts[found] = self.offsets[positions[found]]
+        ends[found] = self.offsets[positions[found] + 1]
+        return [self.neighbors[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+
+    def node_edges(
+        self, node_ids: list[str]
+    ) -> dict[str, list[tuple[str, str]] | None]:
+        """Edges of each node as (node, neighbor) pairs, None for unknown nodes"""
+        positions = self.positions(node_ids)
+        names = self.node_ids
+        result: dict[str, list[tuple[str, str]] | None] = {}
+        for node_id, position, neighbors in zip(
+            node_ids, positions.tolist(), self.neighbor_slices(positions)
+        ):
+            result[node_id] = (
+                [(node_id, names[m]) for m in neighbors.tolist()]
+                if position >= 0
+                else None
+            )
+        return result
+
+    def neighbors_of(self, node_ids: list[str]) -> dict[str, list[str]]:
+        """Neighbor ids of each of the given nodes that are in the graph"""
+        positions = self.positions(node_ids)
+        names = self.node_ids
+        return {
+            node_id: [names[m] for m in neighbors.tolist()]
+            for node_id, position, neighbors in zip(
+                node_ids, positions.tolist(), self.neighbor_slices(positions)
+            )
+            if position >= 0
+        }
+
+    def degree_order(self) -> np.ndarray:
+        """Node ids sorted by degree, highest first, ties in graph order (cached)"""
+        if self._degree_order is None:
+            self._degree_order = np.argsort(-self.degrees, kind="stable")
+        return self._degree_order
+
+    def top_degree_nodes(self, limit: int) -> list[str]:
+        return [self.node_ids[i] for i in self.degree_order()[:limit].tolist()]
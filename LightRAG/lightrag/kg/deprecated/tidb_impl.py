@@ -429,12 +429,14 @@ class TiDBVectorDBStorage(BaseVectorStorage):
             self.db = None
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        query_embedding: np.ndarray | None = None,
     ) -> list[dict[str, Any]]:
         """Search from tidb vector"""
-        embeddings = await self.embedding_func(
-            [query], _priority=5
-        )  # higher priority for query
+        embeddings = await self._embed_query(query, query_embedding)
         embedding = embeddings[0]
 
         embedding_string = "[" + ", ".join(map(str, embedding.tolist())) + "]"
@@ -1,13 +1,16 @@
 import os
 import time
-import asyncio
-from typing import Any, final
+from typing import Any, AsyncIterator, final
 import json
 import numpy as np
 from dataclasses import dataclass
 
-from lightrag.utils import logger, compute_mdhash_id
-from lightrag.base import BaseVectorStorage
+from lightrag.utils import EmbeddingFunc, logger, compute_mdhash_id
+from lightrag.base import BaseVectorStorage, vector_scan_record
+from lightrag.constants import (
+    STORAGE_SCAN_BATCH_SIZE,
+    VECTOR_REBUILD_NAMESPACE_SUFFIX,
+)
 
 from .shared_storage import (
     get_storage_lock,
@@ -18,6 +21,8 @@ from .shared_storage import (
 # You must manually install faiss-cpu or faiss-gpu before using FAISS vector db
 import faiss  # type: ignore
 
+_SUPPORTED_INDEX_TYPES = ("flat", "hnsw", "ivf")
+
 
 @final
 @dataclass
@@ -25,6 +30,16 @@ class FaissVectorDBStorage(BaseVectorStorage):
     """
     A Faiss-based Vector DB Storage for LightRAG.
     Uses cosine similarity by storing normalized vectors in a Faiss index with inner product search.
+
+    Vectors are added with explicit Faiss ids, and hash maps from custom id and from
+    relation endpoints to Faiss id are kept in memory, so lookups and deletions do not
+    scan the metadata or rebuild the index.
+
+    The index type is selected with faiss_index_type in vector_db_storage_cls_kwargs
+    (or FAISS_INDEX_TYPE):
+    - flat: exact search (default)
+    - hnsw: approximate graph search, deleted vectors are skipped and purged on save
+    - ivf: inverted lists, vectors are kept in a flat index until enough are collected for training
     """
 
     def __post_init__(self):
@@ -37,6 +52,22 @@ class FaissVectorDBStorage(BaseVectorStorage):
             )
         self.cosine_better_than_threshold = cosine_threshold
 
+        self._index_type = kwargs.get(
+            "faiss_index_type", os.getenv("FAISS_INDEX_TYPE", "flat")
+        ).lower()
+        if self._index_type not in _SUPPORTED_INDEX_TYPES:
+            raise ValueError(
+                f"faiss_index_type must be one of {_SUPPORTED_INDEX_TYPES}, got {self._index_type}"
+            )
+        self._hnsw_m = int(kwargs.get("faiss_hnsw_m", 32))
+        self._hnsw_ef_search = int(kwargs.get("faiss_hnsw_ef_search", 64))
+        self._ivf_nlist = int(kwargs.get("faiss_ivf_nlist", 1024))
+        self._ivf_nprobe = int(kwargs.get("faiss_ivf_nprobe", 16))
+        # Faiss recommends at least 39 training points per inverted list
+        self._ivf_train_size = int(
+            kwargs.get("faiss_ivf_train_size", self._ivf_nlist * 39)
+        )
+
         # Where to save index file if you want persistent storage
         working_dir = self.global_config["working_dir"]
         if self.workspace:
@@ -53,18 +84,10 @@ class FaissVectorDBStorage(BaseVectorStorage):
             )
         self._meta_file = self._faiss_index_file + ".meta.json"
 
-        self._max_batch_size = self.global_config["embedding_batch_num"]
         # Embedding dimension (e.g. 768) must match your embedding function
         self._dim = self.embedding_func.embedding_dim
 
-        # Create an empty Faiss index for inner product (useful for normalized vectors = cosine similarity).
-        # If you have a large number of vectors, you might want IVF or other indexes.
-        # For demonstration, we use a simple IndexFlatIP.
-        self._index = faiss.IndexFlatIP(self._dim)
-        # Keep a local store for metadata, IDs, etc.
-        # Maps <int faiss_id> → metadata (including your original ID).
-        self._id_to_meta = {}
-
+        self._reset_index()
         self._load_faiss_index()
 
     async def initialize(self):
@@ -84,8 +107,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
                     f"Process {os.getpid()} FAISS reloading {self.namespace} due to update by another process"
                 )
                 # Reload data
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset_index()
                 self._load_faiss_index()
                 self.storage_updated.value = False
             return self._index
@@ -119,21 +141,13 @@ class FaissVectorDBStorage(BaseVectorStorage):
             # Store only known meta fields if needed
             meta = {mf: v[mf] for mf in self.meta_fields if mf in v}
             meta["__id__"] = k
-            meta["__created_at__"] = current_time
+            # Copied records keep their creation time
+            meta["__created_at__"] = v.get("created_at", current_time)
             list_data.append(meta)
             contents.append(v["content"])
 
         # Split into batches for embedding if needed
-        batches = [
-            contents[i : i + self._max_batch_size]
-            for i in range(0, len(contents), self._max_batch_size)
-        ]
-
-        embedding_tasks = [self.embedding_func(batch) for batch in batches]
-        embeddings_list = await asyncio.gather(*embedding_tasks)
-
-        # Flatten the list of arrays
-        embeddings = np.concatenate(embeddings_list, axis=0)
+        embeddings = await self._embed_contents(contents)
         if len(embeddings) != len(list_data):
             logger.error(
                 f"Embedding size mismatch. Embeddings: {len(embeddings)}, Data: {len(list_data)}"
@@ -141,46 +155,46 @@ class FaissVectorDBStorage(BaseVectorStorage):
             return []
 
         # Convert to float32 and normalize embeddings for cosine similarity (in-place)
-        embeddings = embeddings.astype(np.float32)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
         faiss.normalize_L2(embeddings)
 
-        # Upsert logic:
-        # 1. Identify which vectors to remove if they exist
-        # 2. Remove them
-        # 3. Add the new vectors
-        existing_ids_to_remove = []
-        for meta, emb in zip(list_data, embeddings):
-            faiss_internal_id = self._find_faiss_id_by_custom_id(meta["__id__"])
-            if faiss_internal_id is not None:
-                existing_ids_to_remove.append(faiss_internal_id)
-
-        if existing_ids_to_remove:
-            await self._remove_faiss_ids(existing_ids_to_remove)
-
-        # Step 2: Add new vectors
         index = await self._get_index()
-        start_idx = index.ntotal
-        index.add(embeddings)
 
-        # Step 3: Store metadata + vector for each new ID
-        for i, meta in enumerate(list_data):
-            fid = start_idx + i
-            # Store the raw vector so we can rebuild if something is removed
-            meta["__vector__"] = embeddings[i].tolist()
-            self._id_to_meta.update({fid: meta})
+        # Upsert logic:
+        # 1. Remove the vectors of custom ids that already exist
+        # 2. Add the new vectors under fresh Faiss ids
+        self._remove_faiss_ids(
+            [
+                self._custom_id_to_fid[meta["__id__"]]
+                for meta in list_data
+                if meta["__id__"] in self._custom_id_to_fid
+            ]
+        )
+
+        fids = np.arange(
+            self._next_fid, self._next_fid + len(list_data), dtype=np.int64
+        )
+        self._next_fid += len(list_data)
+        index.add_with_ids(embeddings, fids)
+        for fid, meta in zip(fids.tolist(), list_data):
+            self._add_meta(fid, meta)
+
+        self._maybe_train_ivf()
 
         logger.debug(f"Upserted {len(list_data)} vectors into Faiss index.")
         return [m["__id__"] for m in list_data]
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        query_embedding: np.ndarray | None = None,
     ) -> list[dict[str, Any]]:
         """
         Search by a textual query; returns top_k results with their metadata + similarity distance.
         """
-        embedding = await self.embedding_func(
-            [query], _priority=5
-        )  # higher priority for query
+        embedding = await self._embed_query(query, query_embedding)
         # embedding is shape (1, dim)
         embedding = np.array(embedding, dtype=np.float32)
         faiss.normalize_L2(embedding)  # we do in-place normalization
@@ -191,10 +205,25 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
         # Perform the similarity search
         index = await self._get_index()
-        distances, indices = index.search(embedding, top_k)
+        if index.ntotal == 0 or top_k <= 0:
+            return []
 
-        distances = distances[0]
-        indices = indices[0]
+        # Deleted vectors may still be in an HNSW index, widen the search until
+        # enough live results are found
+        k = min(top_k, index.ntotal)
+        while True:
+            distances, indices = index.search(embedding, k)
+            distances = distances[0]
+            indices = indices[0]
+            live = sum(1 for idx in indices if idx in self._id_to_meta)
+            if (
+                live >= top_k
+                or k >= index.ntotal
+                or index.ntotal == len(self._id_to_meta)
+                or distances[-1] < self.cosine_better_than_threshold
+            ):
+                break
+            k = min(k * 2, index.ntotal)
 
         results = []
         for dist, idx in zip(distances, indices):
@@ -206,7 +235,10 @@ class FaissVectorDBStorage(BaseVectorStorage):
             if dist < self.cosine_better_than_threshold:
                 continue
 
-            meta = self._id_to_meta.get(idx, {})
+            meta = self._id_to_meta.get(int(idx))
+            if meta is None:
+                # Deleted, but not purged from the index yet
+                continue
             results.append(
                 {
                     **meta,
@@ -215,6 +247,8 @@ class FaissVectorDBStorage(BaseVectorStorage):
                     "created_at": meta.get("__created_at__"),
                 }
             )
+            if len(results) >= top_k:
+                break
 
         return results
 
@@ -233,14 +267,13 @@ class FaissVectorDBStorage(BaseVectorStorage):
            KG-storage-log should be used to avoid data corruption
         """
         logger.debug(f"Deleting {len(ids)} vectors from {self.namespace}")
-        to_remove = []
-        for cid in ids:
-            fid = self._find_faiss_id_by_custom_id(cid)
-            if fid is not None:
-                to_remove.append(fid)
+        await self._get_index()
+        to_remove = [
+            self._custom_id_to_fid[cid] for cid in ids if cid in self._custom_id_to_fid
+        ]
 
         if to_remove:
-            await self._remove_faiss_ids(to_remove)
+            self._remove_faiss_ids(to_remove)
         logger.debug(
             f"Successfully deleted {len(to_remove)} vectors from {self.namespace}"
         )
@@ -264,66 +297,147 @@ class FaissVectorDBStorage(BaseVectorStorage):
            KG-storage-log should be used to avoid data corruption
         """
         logger.debug(f"Searching relations for entity {entity_name}")
-        relations = []
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("src_id") == entity_name or meta.get("tgt_id") == entity_name:
-                relations.append(fid)
+        await self._get_index()
+        relations = list(self._entity_to_fids.get(entity_name, ()))
 
         logger.debug(f"Found {len(relations)} relations for {entity_name}")
         if relations:
-            await self._remove_faiss_ids(relations)
+            self._remove_faiss_ids(relations)
             logger.debug(f"Deleted {len(relations)} relations for {entity_name}")
 
     # --------------------------------------------------------------------------------
     # Internal helper methods
     # --------------------------------------------------------------------------------
 
-    def _find_faiss_id_by_custom_id(self, custom_id: str):
-        """
-        Return the Faiss internal ID for a given custom ID, or None if not found.
-        """
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("__id__") == custom_id:
-                return fid
-        return None
+    def _reset_index(self):
+        """Reset the index and all in-memory lookup tables to an empty state"""
+        self._index = self._new_index()
+        # Maps <int faiss_id> → metadata (including your original ID).
+        self._id_to_meta: dict[int, dict[str, Any]] = {}
+        # Maps custom ID → faiss_id, and relation endpoint → faiss_ids
+        self._custom_id_to_fid: dict[str, int] = {}
+        self._entity_to_fids: dict[str, set[int]] = {}
+        self._next_fid = 0
+
+    def _new_index(self):
+        """Create an empty index that accepts explicit ids"""
+        if self._index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(
+                self._dim, self._hnsw_m, faiss.METRIC_INNER_PRODUCT
+            )
+            base.hnsw.efSearch = self._hnsw_ef_search
+            return faiss.IndexIDMap2(base)
+        # IVF indexes need training, so they start as a flat index
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self._dim))
+
+    def _is_ivf(self, index) -> bool:
+        return isinstance(faiss.downcast_index(index), faiss.IndexIVF)
+
+    def _configure_index(self, index):
+        """Apply search-time parameters, which are not kept by every index file"""
+        if self._is_ivf(index):
+            ivf = faiss.downcast_index(index)
+            ivf.nprobe = self._ivf_nprobe
+            # Hashtable direct map supports both reconstruct and remove_ids
+            if ivf.direct_map.type != faiss.DirectMap.Hashtable:
+                ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        elif self._index_type == "hnsw" and isinstance(index, faiss.IndexIDMap2):
+            base = faiss.downcast_index(index.index)
+            if isinstance(base, faiss.IndexHNSW):
+                base.hnsw.efSearch = self._hnsw_ef_search
+
+    def _export_vectors(self, index) -> tuple[np.ndarray, np.ndarray]:
+        """Return (vectors, faiss_ids) stored in an IndexIDMap2 index"""
+        fids = faiss.vector_to_array(index.id_map).astype(np.int64)
+        if len(fids) == 0:
+            return np.zeros((0, self._dim), dtype=np.float32), fids
+        vectors = index.index.reconstruct_n(0, index.ntotal)
+        return np.ascontiguousarray(vectors, dtype=np.float32), fids
+
+    def _build_ivf(self, vectors: np.ndarray, fids: np.ndarray):
+        quantizer = faiss.IndexFlatIP(self._dim)
+        index = faiss.IndexIVFFlat(
+            quantizer, self._dim, self._ivf_nlist, faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(vectors)
+        self._configure_index(index)
+        index.add_with_ids(vectors, fids)
+        return index
+
+    def _maybe_train_ivf(self):
+        """Switch from the flat staging index to IVF once there is enough training data"""
+        if (
+            self._index_type != "ivf"
+            or self._is_ivf(self._index)
+            or len(self._id_to_meta) < self._ivf_train_size
+        ):
+            return
+        vectors, fids = self._export_vectors(self._index)
+        logger.info(
+            f"Training FAISS IVF index for {self.namespace} with {len(fids)} vectors"
+        )
+        self._index = self._build_ivf(vectors, fids)
 
-    async def _remove_faiss_ids(self, fid_list):
+    def _purge_deleted_vectors(self):
+        """Rebuild an HNSW index without the vectors that were deleted from it"""
+        index = self._index
+        deleted = index.ntotal - len(self._id_to_meta)
+        if deleted == 0 or deleted < index.ntotal // 5:
+            return
+        vectors, fids = self._export_vectors(index)
+        keep = np.isin(fids, np.fromiter(self._id_to_meta, dtype=np.int64))
+        logger.info(
+            f"Rebuilding FAISS HNSW index for {self.namespace}: dropping {deleted} deleted vectors"
+        )
+        self._index = self._new_index()
+        if keep.any():
+            self._index.add_with_ids(vectors[keep], fids[keep])
+
+    def _add_meta(self, fid: int, meta: dict[str, Any]):
+        self._id_to_meta[fid] = meta
+        self._custom_id_to_fid[meta["__id__"]] = fid
+        for field_name in ("src_id", "tgt_id"):
+            entity_name = meta.get(field_name)
+            if entity_name is not None:
+                self._entity_to_fids.setdefault(entity_name, set()).add(fid)
+
+    def _remove_faiss_ids(self, fid_list):
         """
-        Remove a list of internal Faiss IDs from the index.
-        Because IndexFlatIP doesn't support 'removals',
-        we rebuild the index excluding those vectors.
+        Remove a list of internal Faiss IDs from the index and the lookup tables.
+        The vectors are removed in place, except for HNSW which cannot remove vectors:
+        they are skipped at query time and purged when the index is saved.
         """
-        keep_fids = [fid for fid in self._id_to_meta if fid not in fid_list]
-
-        # Rebuild the index
-        vectors_to_keep = []
-        new_id_to_meta = {}
-        for new_fid, old_fid in enumerate(keep_fids):
-            vec_meta = self._id_to_meta[old_fid]
-            vectors_to_keep.append(vec_meta["__vector__"])  # stored as list
-            new_id_to_meta[new_fid] = vec_meta
-
-        async with self._storage_lock:
-            # Re-init index
-            self._index = faiss.IndexFlatIP(self._dim)
-            if vectors_to_keep:
-                arr = np.array(vectors_to_keep, dtype=np.float32)
-                self._index.add(arr)
-
-            self._id_to_meta = new_id_to_meta
+        if not fid_list:
+            return
+        for fid in fid_list:
+            meta = self._id_to_meta.pop(fid, None)
+            if meta is None:
+                continue
+            if self._custom_id_to_fid.get(meta["__id__"]) == fid:
+                del self._custom_id_to_fid[meta["__id__"]]
+            for field_name in ("src_id", "tgt_id"):
+                fids = self._entity_to_fids.get(meta.get(field_name))
+                if fids is not None:
+                    fids.discard(fid)
+                    if not fids:
+                        del self._entity_to_fids[meta.get(field_name)]
+
+        if self._index_type != "hnsw":
+            self._index.remove_ids(np.asarray(fid_list, dtype=np.int64))
 
     def _save_faiss_index(self):
         """
         Save the current Faiss index + metadata to disk so it can persist across runs.
         """
+        if self._index_type == "hnsw":
+            self._purge_deleted_vectors()
         faiss.write_index(self._index, self._faiss_index_file)
 
-        # Save metadata dict to JSON. Convert all keys to strings for JSON storage.
-        # _id_to_meta is { int: { '__id__': doc_id, '__vector__': [float,...], ... } }
-        # We'll keep the int -> dict, but JSON requires string keys.
-        serializable_dict = {}
-        for fid, meta in self._id_to_meta.items():
-            serializable_dict[str(fid)] = meta
+        # Save metadata dict to JSON. JSON requires string keys for the faiss ids.
+        serializable_dict = {
+            "next_fid": self._next_fid,
+            "data": {str(fid): meta for fid, meta in self._id_to_meta.items()},
+        }
 
         with open(self._meta_file, "w", encoding="utf-8") as f:
             json.dump(serializable_dict, f)
@@ -339,25 +453,42 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
         try:
             # Load the Faiss index
-            self._index = faiss.read_index(self._faiss_index_file)
+            index = faiss.read_index(self._faiss_index_file)
             # Load metadata
             with open(self._meta_file, "r", encoding="utf-8") as f:
                 stored_dict = json.load(f)
 
-            # Convert string keys back to int
-            self._id_to_meta = {}
+            if "data" in stored_dict and "next_fid" in stored_dict:
+                next_fid = stored_dict["next_fid"]
+                stored_dict = stored_dict["data"]
+            else:
+                # Legacy format: a plain IndexFlatIP whose positions are the faiss ids,
+                # with a copy of every vector in the metadata
+                next_fid = len(stored_dict)
+                vectors = np.ascontiguousarray(
+                    index.reconstruct_n(0, index.ntotal), dtype=np.float32
+                )
+                index = self._new_index()
+                index.add_with_ids(vectors, np.arange(len(vectors), dtype=np.int64))
+                logger.info(
+                    f"Migrated legacy Faiss index for {self.namespace} to id-mapped index"
+                )
+
+            self._configure_index(index)
+            self._index = index
+            self._next_fid = next_fid
             for fid_str, meta in stored_dict.items():
-                fid = int(fid_str)
-                self._id_to_meta[fid] = meta
+                meta.pop("__vector__", None)
+                self._add_meta(int(fid_str), meta)
+            self._maybe_train_ivf()
 
             logger.info(
-                f"Faiss index loaded with {self._index.ntotal} vectors from {self._faiss_index_file}"
+                f"Faiss index loaded with {len(self._id_to_meta)} vectors from {self._faiss_index_file}"
             )
         except Exception as e:
             logger.error(f"Failed to load Faiss index or metadata: {e}")
             logger.warning("Starting with an empty Faiss index.")
-            self._index = faiss.IndexFlatIP(self._dim)
-            self._id_to_meta = {}
+            self._reset_index()
 
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
@@ -367,8 +498,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
                 logger.warning(
                     f"Storage for FAISS {self.namespace} was updated by another process, reloading..."
                 )
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset_index()
                 self._load_faiss_index()
                 self.storage_updated.value = False
                 return False  # Return error
@@ -398,7 +528,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
             The vector data if found, or None if not found
         """
         # Find the Faiss internal ID for the custom ID
-        fid = self._find_faiss_id_by_custom_id(id)
+        fid = self._custom_id_to_fid.get(id)
         if fid is None:
             return None
 
@@ -427,7 +557,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
         results = []
         for id in ids:
-            fid = self._find_faiss_id_by_custom_id(id)
+            fid = self._custom_id_to_fid.get(id)
             if fid is not None:
                 metadata = self._id_to_meta.get(fid, {})
                 if metadata:
@@ -441,6 +571,87 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
         return results
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        include_vector: bool = False,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Iterate over the records present at the start of the iteration
+
+        Vectors are reconstructed from the index, normalized as stored for
+        inner product search.
+        """
+        await self._get_index()
+        fids = list(self._id_to_meta)
+        for start in range(0, len(fids), batch_size):
+            index = await self._get_index()
+            metas = [
+                (fid, self._id_to_meta[fid])
+                for fid in fids[start : start + batch_size]
+                if fid in self._id_to_meta
+            ]
+            vectors = (
+                index.reconstruct_batch(
+                    np.array([fid for fid, _ in metas], dtype=np.int64)
+                )
+                if include_vector and metas
+                else [None] * len(metas)
+            )
+            batch = [
+                vector_scan_record(
+                    {
+                        **meta,
+                        "id": meta.get("__id__"),
+                        "created_at": meta.get("__created_at__"),
+                    },
+                    fields,
+                    vector,
+                )
+                for (_, meta), vector in zip(metas, vectors)
+            ]
+            if batch:
+                yield batch
+
+    async def create_rebuild_storage(
+        self, embedding_func: EmbeddingFunc
+    ) -> "FaissVectorDBStorage":
+        namespace = self.namespace + VECTOR_REBUILD_NAMESPACE_SUFFIX
+        # Discard the files an interrupted rebuild may have left
+        index_file = os.path.join(
+            os.path.dirname(self._faiss_index_file), f"faiss_index_{namespace}.index"
+        )
+        for file_name in (index_file, index_file + ".meta.json"):
+            if os.path.exists(file_name):
+                os.remove(file_name)
+        storage = FaissVectorDBStorage(
+            namespace=namespace,
+            workspace=self.workspace,
+            global_config=self.global_config,
+            embedding_func=embedding_func,
+            meta_fields=self.meta_fields,
+        )
+        await storage.initialize()
+        return storage
+
+    async def swap_rebuild_storage(self, storage: "FaissVectorDBStorage") -> None:
+        async with self._storage_lock:
+            storage._save_faiss_index()
+            os.replace(storage._faiss_index_file, self._faiss_index_file)
+            os.replace(storage._meta_file, self._meta_file)
+            self.embedding_func = storage.embedding_func
+            self._dim = self.embedding_func.embedding_dim
+            self._reset_index()
+            self._load_faiss_index()
+
+            # Notify other processes
+            await set_all_update_flags(self.namespace)
+            self.storage_updated.value = False
+
+        logger.info(
+            f"Process {os.getpid()} swapped in rebuilt FAISS index {self.namespace}"
+        )
+
     async def drop(self) -> dict[str, str]:
         """Drop all vector data from storage and clean up resources
 
@@ -459,18 +670,14 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         try:
             async with self._storage_lock:
-                # Reset the index
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
-
                 # Remove storage files if they exist
                 if os.path.exists(self._faiss_index_file):
                     os.remove(self._faiss_index_file)
                 if os.path.exists(self._meta_file):
                     os.remove(self._meta_file)
 
-                self._id_to_meta = {}
-                self._load_faiss_index()
+                # Reset the index
+                self._reset_index()
 
                 # Notify other processes
                 await set_all_update_flags(self.namespace)
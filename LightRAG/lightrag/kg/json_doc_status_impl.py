@@ -1,17 +1,27 @@
+from bisect import bisect_left, bisect_right, insort
 from dataclasses import dataclass
 import os
-from typing import Any, Union, final
+from typing import Any, AsyncIterator, Literal, Union, final
 
 from lightrag.base import (
+    DOC_STATUS_SORT_FIELDS,
     DocProcessingStatus,
     DocStatus,
+    DocStatusPage,
+    DocStatusSortField,
     DocStatusStorage,
+    doc_status_from_dict,
+    doc_status_sort_value,
+    page_sorted_doc_keys,
+    select_record_fields,
 )
+from lightrag.constants import STORAGE_SCAN_BATCH_SIZE
 from lightrag.utils import (
     load_json,
     logger,
     write_json,
 )
+from .json_wal import JsonWriteAheadLog, json_wal_enabled
 from .shared_storage import (
     get_namespace_data,
     get_storage_lock,
@@ -23,11 +33,21 @@ from .shared_storage import (
 )
 
 
+# Fields kept out of the in-memory status index
+_UNINDEXED_FIELDS = ("content", "chunks_list")
+
+
+def _status_value(status: Any) -> str:
+    return status.value if isinstance(status, DocStatus) else status
+
+
 @final
 @dataclass
 class JsonDocStatusStorage(DocStatusStorage):
     """JSON implementation of document status storage"""
 
+    scan_order = "key"
+
     def __post_init__(self):
         working_dir = self.global_config["working_dir"]
         if self.workspace:
@@ -45,6 +65,33 @@ class JsonDocStatusStorage(DocStatusStorage):
         self._data = None
         self._storage_lock = None
         self.storage_updated = None
+        # Persist mutations as appended log records instead of rewriting the file
+        self._wal = (
+            JsonWriteAheadLog(self._file_name, self.namespace)
+            if json_wal_enabled()
+            else None
+        )
+        # Status -> ids index and per document metadata without content, used for
+        # counts and listings. The index is local to the process; a version shared
+        # between processes tells when another process changed the documents.
+        self._ids_by_status: dict[str, dict[str, None]] = {}
+        self._doc_meta: dict[str, dict[str, Any]] = {}
+        # (sort field, status or None for all) -> (sort value, id) keys in ascending
+        # order. A list is built on its first listing and kept sorted afterwards.
+        self._sorted_keys: dict[tuple[str, str | None], list[tuple[str, str]]] = {}
+        self._index_version = -1
+        self._index_state = None
+
+    def _load_data(self) -> dict[str, Any]:
+        if self._wal is not None:
+            return self._wal.load()
+        wal = JsonWriteAheadLog(self._file_name, self.namespace)
+        if wal.has_logs():
+            # The log was enabled in an earlier run, fold it into the JSON file
+            data = wal.load()
+            wal.fold_into_snapshot(data)
+            return data
+        return load_json(self._file_name) or {}
 
     async def initialize(self):
         """Initialize storage data"""
@@ -54,13 +101,85 @@ class JsonDocStatusStorage(DocStatusStorage):
             # check need_init must before get_namespace_data
             need_init = await try_initialize_namespace(self.namespace)
             self._data = await get_namespace_data(self.namespace)
+            self._index_state = await get_namespace_data(
+                f"{self.namespace}_status_index"
+            )
             if need_init:
-                loaded_data = load_json(self._file_name) or {}
+                loaded_data = self._load_data()
                 async with self._storage_lock:
                     self._data.update(loaded_data)
                     logger.info(
                         f"Process {os.getpid()} doc status load {self.namespace} with {len(loaded_data)} records"
                     )
+                    if self._wal is not None:
+                        self._wal.finish_interrupted_compaction(loaded_data)
+
+    def _index_doc(self, doc_id: str, doc: dict[str, Any]) -> None:
+        self._unindex_doc(doc_id)
+        status = _status_value(doc.get("status"))
+        self._ids_by_status.setdefault(status, {})[doc_id] = None
+        meta = {k: v for k, v in doc.items() if k not in _UNINDEXED_FIELDS}
+        self._doc_meta[doc_id] = meta
+        for (sort_field, sorted_status), keys in self._sorted_keys.items():
+            if sorted_status is None or sorted_status == status:
+                insort(keys, (doc_status_sort_value(doc_id, meta, sort_field), doc_id))
+
+    def _unindex_doc(self, doc_id: str) -> None:
+        meta = self._doc_meta.pop(doc_id, None)
+        if meta is not None:
+            status = _status_value(meta.get("status"))
+            self._ids_by_status.get(status, {}).pop(doc_id, None)
+            for (sort_field, sorted_status), keys in self._sorted_keys.items():
+                if sorted_status is None or sorted_status == status:
+                    key = (doc_status_sort_value(doc_id, meta, sort_field), doc_id)
+                    position = bisect_left(keys, key)
+                    if position < len(keys) and keys[position] == key:
+                        del keys[position]
+
+    def _get_sorted_keys(
+        self, sort_field: str, status: str | None
+    ) -> list[tuple[str, str]]:
+        """Sorted (sort value, id) keys of the documents, optionally of one status
+
+        Must be called with the storage lock held, after `_ensure_index`.
+        """
+        keys = self._sorted_keys.get((sort_field, status))
+        if keys is None:
+            doc_ids = (
+                self._doc_meta
+                if status is None
+                else self._ids_by_status.get(status, {})
+            )
+            keys = sorted(
+                (
+                    doc_status_sort_value(doc_id, self._doc_meta[doc_id], sort_field),
+                    doc_id,
+                )
+                for doc_id in doc_ids
+            )
+            self._sorted_keys[(sort_field, status)] = keys
+        return keys
+
+    def _ensure_index(self) -> None:
+        """Rebuild the index if the documents were changed by another process
+
+        Must be called with the storage lock held.
+        """
+        version = self._index_state.get("version", 0)
+        if version == self._index_version:
+            return
+        self._ids_by_status = {status.value: {} for status in DocStatus}
+        self._doc_meta = {}
+        self._sorted_keys = {}
+        for doc_id, doc in self._data.items():
+            self._index_doc(doc_id, doc)
+        self._index_version = version
+
+    def _bump_index_version(self) -> None:
+        """Mark the index of other processes as stale after a change made here"""
+        version = self._index_state.get("version", 0) + 1
+        self._index_state["version"] = version
+        self._index_version = version
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
         """Return keys that should be processed (not in storage or not successfully processed)"""
@@ -76,12 +195,35 @@ class JsonDocStatusStorage(DocStatusStorage):
                     result.append(data)
         return result
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        start_after: str | None = None,
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        """Iterate over a sorted snapshot of the document ids, copying one batch at a time"""
+        async with self._storage_lock:
+            doc_ids = sorted(self._data.keys())
+        if start_after is not None:
+            doc_ids = doc_ids[bisect_right(doc_ids, start_after) :]
+        for start in range(0, len(doc_ids), batch_size):
+            async with self._storage_lock:
+                batch = [
+                    (doc_id, select_record_fields(self._data[doc_id], fields))
+                    for doc_id in doc_ids[start : start + batch_size]
+                    if doc_id in self._data
+                ]
+            if batch:
+                yield batch
+
     async def get_status_counts(self) -> dict[str, int]:
         """Get counts of documents in each status"""
         counts = {status.value: 0 for status in DocStatus}
         async with self._storage_lock:
-            for doc in self._data.values():
-                counts[doc["status"]] += 1
+            self._ensure_index()
+            for status, ids in self._ids_by_status.items():
+                if status in counts:
+                    counts[status] = len(ids)
         return counts
 
     async def get_docs_by_status(
@@ -90,34 +232,74 @@ class JsonDocStatusStorage(DocStatusStorage):
         """Get all documents with a specific status"""
         result = {}
         async with self._storage_lock:
-            for k, v in self._data.items():
-                if v["status"] == status.value:
-                    try:
-                        # Make a copy of the data to avoid modifying the original
-                        data = v.copy()
-                        # If content is missing, use content_summary as content
-                        if "content" not in data and "content_summary" in data:
-                            data["content"] = data["content_summary"]
-                        # If file_path is not in data, use document id as file path
-                        if "file_path" not in data:
-                            data["file_path"] = "no-file-path"
-                        result[k] = DocProcessingStatus(**data)
-                    except KeyError as e:
-                        logger.error(f"Missing required field for document {k}: {e}")
-                        continue
+            self._ensure_index()
+            for k in self._ids_by_status.get(status.value, {}):
+                v = self._data.get(k)
+                if v is None:
+                    continue
+                try:
+                    result[k] = doc_status_from_dict(v)
+                except (KeyError, TypeError) as e:
+                    logger.error(f"Missing required field for document {k}: {e}")
+                    continue
         return result
 
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page_size: int = 50,
+        cursor: str | None = None,
+        sort_field: DocStatusSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+        include_content: bool = False,
+    ) -> DocStatusPage:
+        """Page through the sorted index, reading content only for the page"""
+        if sort_field not in DOC_STATUS_SORT_FIELDS:
+            raise ValueError(f"Invalid sort field: {sort_field}")
+        async with self._storage_lock:
+            self._ensure_index()
+            sorted_keys = self._get_sorted_keys(
+                sort_field, status_filter.value if status_filter is not None else None
+            )
+            page, next_cursor = page_sorted_doc_keys(
+                sorted_keys, page_size, cursor, descending=sort_direction == "desc"
+            )
+
+            documents = {}
+            for _, doc_id in page:
+                data = (
+                    self._data.get(doc_id)
+                    if include_content
+                    else self._doc_meta[doc_id]
+                )
+                if data is None:
+                    continue
+                try:
+                    documents[doc_id] = doc_status_from_dict(data, include_content)
+                except (KeyError, TypeError) as e:
+                    logger.error(f"Missing required field for document {doc_id}: {e}")
+        return DocStatusPage(documents=documents, next_cursor=next_cursor)
+
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
             if self.storage_updated.value:
                 data_dict = (
                     dict(self._data) if hasattr(self._data, "_getvalue") else self._data
                 )
-                logger.debug(
-                    f"Process {os.getpid()} doc status writting {len(data_dict)} records to {self.namespace}"
-                )
-                write_json(data_dict, self._file_name)
+                # With the log enabled only the changed records are appended
+                if self._wal is None:
+                    logger.debug(
+                        f"Process {os.getpid()} doc status writting {len(data_dict)} records to {self.namespace}"
+                    )
+                    write_json(data_dict, self._file_name)
                 await clear_all_update_flags(self.namespace)
+            # Changes of this process are flushed even if another process
+            # already cleared the update flags
+            if self._wal is not None:
+                await self._wal.flush(self._data)
+
+        if self._wal is not None:
+            self._wal.maybe_compact_in_background(self._storage_lock, self._data)
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         """
@@ -133,7 +315,13 @@ class JsonDocStatusStorage(DocStatusStorage):
             for doc_id, doc_data in data.items():
                 if "chunks_list" not in doc_data:
                     doc_data["chunks_list"] = []
+            if self._wal is not None:
+                self._wal.record_changes(data)
+            self._ensure_index()
             self._data.update(data)
+            for doc_id, doc_data in data.items():
+                self._index_doc(doc_id, doc_data)
+            self._bump_index_version()
             await set_all_update_flags(self.namespace)
 
         await self.index_done_callback()
@@ -156,13 +344,19 @@ class JsonDocStatusStorage(DocStatusStorage):
             None
         """
         async with self._storage_lock:
+            if self._wal is not None:
+                self._wal.record_changes(doc_ids)
+
+            self._ensure_index()
             any_deleted = False
             for doc_id in doc_ids:
                 result = self._data.pop(doc_id, None)
                 if result is not None:
                     any_deleted = True
+                    self._unindex_doc(doc_id)
 
             if any_deleted:
+                self._bump_index_version()
                 await set_all_update_flags(self.namespace)
 
     async def drop(self) -> dict[str, str]:
@@ -180,10 +374,18 @@ class JsonDocStatusStorage(DocStatusStorage):
         """
         try:
             async with self._storage_lock:
+                if self._wal is not None:
+                    self._wal.record_clear()
                 self._data.clear()
+                self._ids_by_status = {status.value: {} for status in DocStatus}
+                self._doc_meta = {}
+                self._sorted_keys = {}
+                self._bump_index_version()
                 await set_all_update_flags(self.namespace)
 
             await self.index_done_callback()
+            if self._wal is not None:
+                await self._wal.compact(self._storage_lock, self._data, force=True)
             logger.info(f"Process {os.getpid()} drop {self.namespace}")
             return {"status": "success", "message": "data dropped"}
         except Exception as e:
@@ -1,15 +1,19 @@
 import os
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import Any, final
+from typing import Any, AsyncIterator, final
 
 from lightrag.base import (
     BaseKVStorage,
+    select_record_fields,
 )
+from lightrag.constants import STORAGE_SCAN_BATCH_SIZE
 from lightrag.utils import (
     load_json,
     logger,
     write_json,
 )
+from .json_wal import JsonWriteAheadLog, json_wal_enabled
 from .shared_storage import (
     get_namespace_data,
     get_storage_lock,
@@ -24,6 +28,8 @@ from .shared_storage import (
 @final
 @dataclass
 class JsonKVStorage(BaseKVStorage):
+    scan_order = "key"
+
     def __post_init__(self):
         working_dir = self.global_config["working_dir"]
         if self.workspace:
@@ -41,6 +47,23 @@ class JsonKVStorage(BaseKVStorage):
         self._data = None
         self._storage_lock = None
         self.storage_updated = None
+        # Persist mutations as appended log records instead of rewriting the file
+        self._wal = (
+            JsonWriteAheadLog(self._file_name, self.namespace)
+            if json_wal_enabled()
+            else None
+        )
+
+    def _load_data(self) -> dict[str, Any]:
+        if self._wal is not None:
+            return self._wal.load()
+        wal = JsonWriteAheadLog(self._file_name, self.namespace)
+        if wal.has_logs():
+            # The log was enabled in an earlier run, fold it into the JSON file
+            data = wal.load()
+            wal.fold_into_snapshot(data)
+            return data
+        return load_json(self._file_name) or {}
 
     async def initialize(self):
         """Initialize storage data"""
@@ -51,7 +74,7 @@ class JsonKVStorage(BaseKVStorage):
             need_init = await try_initialize_namespace(self.namespace)
             self._data = await get_namespace_data(self.namespace)
             if need_init:
-                loaded_data = load_json(self._file_name) or {}
+                loaded_data = self._load_data()
                 async with self._storage_lock:
                     # Migrate legacy cache structure if needed
                     if self.namespace.endswith("_cache"):
@@ -65,6 +88,8 @@ class JsonKVStorage(BaseKVStorage):
                     logger.info(
                         f"Process {os.getpid()} KV load {self.namespace} with {data_count} records"
                     )
+                    if self._wal is not None:
+                        self._wal.finish_interrupted_compaction(loaded_data)
 
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
@@ -76,11 +101,20 @@ class JsonKVStorage(BaseKVStorage):
                 # Calculate data count - all data is now flattened
                 data_count = len(data_dict)
 
-                logger.debug(
-                    f"Process {os.getpid()} KV writting {data_count} records to {self.namespace}"
-                )
-                write_json(data_dict, self._file_name)
+                # With the log enabled only the changed records are appended
+                if self._wal is None:
+                    logger.debug(
+                        f"Process {os.getpid()} KV writting {data_count} records to {self.namespace}"
+                    )
+                    write_json(data_dict, self._file_name)
                 await clear_all_update_flags(self.namespace)
+            # Changes of this process are flushed even if another process
+            # already cleared the update flags
+            if self._wal is not None:
+                await self._wal.flush(self._data)
+
+        if self._wal is not None:
+            self._wal.maybe_compact_in_background(self._storage_lock, self._data)
 
     async def get_all(self) -> dict[str, Any]:
         """Get all data from storage
@@ -102,6 +136,32 @@ class JsonKVStorage(BaseKVStorage):
                     result[key] = value
             return result
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        start_after: str | None = None,
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        """Iterate over a sorted snapshot of the keys, copying one batch of records at a time"""
+        async with self._storage_lock:
+            keys = sorted(self._data.keys())
+        if start_after is not None:
+            keys = keys[bisect_right(keys, start_after) :]
+        for start in range(0, len(keys), batch_size):
+            batch = []
+            async with self._storage_lock:
+                for key in keys[start : start + batch_size]:
+                    value = self._data.get(key)
+                    if value is None:
+                        # Deleted since the iteration started
+                        continue
+                    record = dict(value)
+                    record.setdefault("create_time", 0)
+                    record.setdefault("update_time", 0)
+                    batch.append((key, select_record_fields(record, fields)))
+            if batch:
+                yield batch
+
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         async with self._storage_lock:
             result = self._data.get(id)
@@ -168,6 +228,8 @@ class JsonKVStorage(BaseKVStorage):
 
                 v["_id"] = k
 
+            if self._wal is not None:
+                self._wal.record_changes(data)
             self._data.update(data)
             await set_all_update_flags(self.namespace)
 
@@ -185,6 +247,9 @@ class JsonKVStorage(BaseKVStorage):
             None
         """
         async with self._storage_lock:
+            if self._wal is not None:
+                self._wal.record_changes(ids)
+
             any_deleted = False
             for doc_id in ids:
                 result = self._data.pop(doc_id, None)
@@ -223,6 +288,8 @@ class JsonKVStorage(BaseKVStorage):
                         keys_to_delete.append(key)
 
                 # Batch delete
+                if self._wal is not None:
+                    self._wal.record_changes(keys_to_delete)
                 for key in keys_to_delete:
                     self._data.pop(key, None)
 
@@ -300,10 +367,14 @@ class JsonKVStorage(BaseKVStorage):
         """
         try:
             async with self._storage_lock:
+                if self._wal is not None:
+                    self._wal.record_clear()
                 self._data.clear()
                 await set_all_update_flags(self.namespace)
 
             await self.index_done_callback()
+            if self._wal is not None:
+                await self._wal.compact(self._storage_lock, self._data, force=True)
             logger.info(f"Process {os.getpid()} drop {self.namespace}")
             return {"status": "success", "message": "data dropped"}
         except Exception as e:
@@ -365,3 +436,5 @@ class JsonKVStorage(BaseKVStorage):
         """
         if self.namespace.endswith("_cache"):
             await self.index_done_callback()
+        if self._wal is not None:
+            await self._wal.wait_for_compaction()
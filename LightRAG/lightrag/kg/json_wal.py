@@ -0,0 +1,287 @@
+"""
+Append-only write-ahead log for the JSON file storages.
+
+Without the log, every persisted change rewrites the whole JSON file. The log is
+opt-in (`JSON_STORAGE_WAL=true`). Mutations only mark their ids as changed; each
+`index_done_callback` appends the current values of the changed ids to
+`<snapshot>.wal.jsonl` as JSON lines and fsyncs them once, in a worker thread:
+
+    {"op": "clear"}
+    {"op": "upsert", "data": {"<id>": {...}, ...}}
+    {"op": "delete", "ids": ["<id>", ...]}
+
+Since a flush writes the values current at flush time under the storage lock, the
+log stays in order when several processes share the files.
+
+Compaction folds the log into the JSON snapshot. The log is first renamed to
+`<snapshot>.wal.compacting.jsonl` under the storage lock, so new mutations go to a
+fresh log while the snapshot is written in a worker thread. The snapshot is
+replaced atomically and then the rotated log is removed. If writing the snapshot
+fails, the next compaction appends the new log to the rotated one and retries.
+Appends and snapshots are fsynced before they count as persisted. On load the
+snapshot is read and both logs are replayed in order. Replaying records that are
+already part of the snapshot is harmless, because every record carries the full
+value it sets.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import shutil
+from typing import Any
+
+from lightrag.constants import DEFAULT_JSON_WAL_COMPACT_SIZE
+from lightrag.utils import get_env_value, load_json, logger
+
+
+def json_wal_enabled() -> bool:
+    """Whether the JSON storages persist mutations through the append-only log"""
+    return get_env_value("JSON_STORAGE_WAL", False, bool)
+
+
+def truncate_torn_tail(log_file: str) -> None:
+    """Cut a partial last line left by a crash, so the next append starts a new line"""
+    with open(log_file, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Walk back to the end of the last complete record
+        position = size
+        while position > 0:
+            step = min(65536, position)
+            f.seek(position - step)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                position = position - step + newline + 1
+                break
+            position -= step
+        logger.warning(
+            f"Discarding {size - position} bytes of an incomplete record in {log_file}"
+        )
+        f.truncate(position)
+
+
+class JsonWriteAheadLog:
+    """Snapshot plus append-only mutation log for a JSON storage file
+
+    Callers hold the storage lock around `record_*`, `flush` and `rotate`, which
+    also serializes flushes from different processes sharing the same files.
+    """
+
+    def __init__(self, snapshot_file: str, namespace: str):
+        self.snapshot_file = snapshot_file
+        self.namespace = namespace
+        base, _ = os.path.splitext(snapshot_file)
+        self.log_file = f"{base}.wal.jsonl"
+        self.compacting_file = f"{base}.wal.compacting.jsonl"
+        self.compact_size = get_env_value(
+            "JSON_WAL_COMPACT_SIZE", DEFAULT_JSON_WAL_COMPACT_SIZE, int
+        )
+        self._compaction_task: asyncio.Task | None = None
+        # Ids changed by this process since the last flush, in change order
+        self._changed_ids: dict[str, None] = {}
+        self._cleared = False
+        # The rotated log of a compaction of this process that failed
+        self._compaction_failed = False
+
+    def load(self) -> dict[str, Any]:
+        """Read the snapshot and replay the pending logs on top of it"""
+        data = load_json(self.snapshot_file) or {}
+        replayed = 0
+        for log_file in (self.compacting_file, self.log_file):
+            replayed += self._replay(log_file, data)
+        if replayed:
+            logger.info(
+                f"Process {os.getpid()} replayed {replayed} log records for {self.namespace}"
+            )
+        return data
+
+    def _replay(self, log_file: str, data: dict[str, Any]) -> int:
+        if not os.path.exists(log_file):
+            return 0
+        truncate_torn_tail(log_file)
+        count = 0
+        with open(log_file, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line is expected after a crash during an append
+                    logger.warning(
+                        f"Skipping unreadable log record {line_number} in {log_file}"
+                    )
+                    continue
+                op = record.get("op")
+                if op == "upsert":
+                    data.update(record["data"])
+                elif op == "delete":
+                    for id in record["ids"]:
+                        data.pop(id, None)
+                elif op == "clear":
+                    data.clear()
+                else:
+                    logger.warning(f"Unknown log operation {op!r} in {log_file}")
+                    continue
+                count += 1
+        return count
+
+    def record_changes(self, ids) -> None:
+        """Mark ids as upserted or deleted, to be written by the next flush"""
+        self._changed_ids.update(dict.fromkeys(ids))
+
+    def record_clear(self) -> None:
+        self._changed_ids.clear()
+        self._cleared = True
+
+    def has_pending_changes(self) -> bool:
+        return self._cleared or bool(self._changed_ids)
+
+    def _append(self, text: str) -> None:
+        # Reopen for every flush: another process may have rotated the log
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def flush(self, data: Any) -> None:
+        """Append the current values of the changed ids and fsync them once
+
+        The changes stay pending if the write fails, so the next flush retries them.
+        """
+        if not self.has_pending_changes():
+            return
+        records = []
+        if self._cleared:
+            records.append({"op": "clear"})
+        upserts = {}
+        deleted_ids = []
+        for id in self._changed_ids:
+            value = data.get(id)
+            if value is None:
+                deleted_ids.append(id)
+            else:
+                upserts[id] = value
+        if upserts:
+            records.append({"op": "upsert", "data": upserts})
+        if deleted_ids:
+            records.append({"op": "delete", "ids": deleted_ids})
+        # Serialize on the event loop, the records are only consistent under the lock
+        text = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        await asyncio.to_thread(self._append, text)
+        self._changed_ids.clear()
+        self._cleared = False
+
+    def fold_into_snapshot(self, data: dict[str, Any]) -> None:
+        """Write the loaded data as the snapshot and remove both logs
+
+        Used when the log is disabled after it was enabled, so no records are lost.
+        """
+        self.write_snapshot(data)
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+
+    def has_logs(self) -> bool:
+        return os.path.exists(self.log_file) or os.path.exists(self.compacting_file)
+
+    def finish_interrupted_compaction(self, data: dict[str, Any]) -> None:
+        """Fold a log left over by a compaction that did not complete"""
+        if os.path.exists(self.compacting_file):
+            logger.info(f"Completing interrupted log compaction for {self.namespace}")
+            self.write_snapshot(data)
+
+    def needs_compaction(self) -> bool:
+        """The log is compacted once it outgrows both the threshold and the snapshot"""
+        if self._compaction_failed:
+            return True
+        try:
+            log_size = os.path.getsize(self.log_file)
+        except OSError:
+            return False
+        try:
+            snapshot_size = os.path.getsize(self.snapshot_file)
+        except OSError:
+            snapshot_size = 0
+        return log_size >= max(self.compact_size, snapshot_size)
+
+    def rotate(self) -> bool:
+        """Move the current log aside for compaction
+
+        After a failed compaction of this process, the current log is appended to
+        the rotated one instead, so the next snapshot replaces both.
+
+        Returns:
+            False if there is nothing to compact or another compaction is running
+        """
+        if os.path.exists(self.compacting_file):
+            if not self._compaction_failed:
+                return False
+            if os.path.exists(self.log_file):
+                with (
+                    open(self.log_file, "rb") as src,
+                    open(self.compacting_file, "ab") as dst,
+                ):
+                    shutil.copyfileobj(src, dst)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self.log_file)
+            self._compaction_failed = False
+            return True
+        if not os.path.exists(self.log_file):
+            return False
+        os.replace(self.log_file, self.compacting_file)
+        return True
+
+    def write_snapshot(self, data: dict[str, Any]) -> None:
+        """Atomically replace the snapshot, then drop the rotated log it includes"""
+        tmp_file = f"{self.snapshot_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+        if os.path.exists(self.compacting_file):
+            os.remove(self.compacting_file)
+
+    async def compact(self, storage_lock, data: Any, force: bool = False) -> None:
+        """Fold the log into the snapshot without holding the lock while writing"""
+        async with storage_lock:
+            if not force and not self.needs_compaction():
+                return
+            if not self.rotate():
+                return
+            # Copy each record so the snapshot is consistent with the rotated log
+            snapshot = {
+                k: dict(v) if isinstance(v, dict) else v for k, v in data.items()
+            }
+
+        logger.debug(
+            f"Process {os.getpid()} compacting {self.namespace} log into {len(snapshot)} records"
+        )
+        try:
+            await asyncio.to_thread(self.write_snapshot, snapshot)
+        except Exception as e:
+            # The rotated log is kept, replayed on the next start and folded into
+            # the snapshot by the next compaction
+            logger.error(f"Error compacting {self.namespace} log: {e}")
+            self._compaction_failed = True
+
+    def maybe_compact_in_background(self, storage_lock, data: Any) -> None:
+        """Start a compaction task when the log has grown past the threshold"""
+        if self._compaction_task is not None and not self._compaction_task.done():
+            return
+        if not self.needs_compaction():
+            return
+        self._compaction_task = asyncio.create_task(self.compact(storage_lock, data))
+
+    async def wait_for_compaction(self) -> None:
+        if self._compaction_task is not None:
+            await self._compaction_task
+            self._compaction_task = None
@@ -1,10 +1,10 @@
-import asyncio
 import os
-from typing import Any, final
+from typing import Any, AsyncIterator, final
 from dataclasses import dataclass
 import numpy as np
 from lightrag.utils import logger, compute_mdhash_id
-from ..base import BaseVectorStorage
+from ..base import BaseVectorStorage, vector_scan_record
+from ..constants import STORAGE_SCAN_BATCH_SIZE
 import pipmaster as pm
 
 if not pm.is_installed("pymilvus"):
@@ -715,7 +715,6 @@ class MilvusVectorDBStorage(BaseVectorStorage):
                 "MILVUS_DB_NAME", config.get("milvus", "db_name", fallback=None)
             ),
         )
-        self._max_batch_size = self.global_config["embedding_batch_num"]
 
         # Create collection and check compatibility
         self._create_collection_if_not_exist()
@@ -735,35 +734,30 @@ class MilvusVectorDBStorage(BaseVectorStorage):
         list_data: list[dict[str, Any]] = [
             {
                 "id": k,
-                "created_at": current_time,
+                # Copied records keep their creation time
+                "created_at": v.get("created_at", current_time),
                 **{k1: v1 for k1, v1 in v.items() if k1 in self.meta_fields},
             }
             for k, v in data.items()
         ]
         contents = [v["content"] for v in data.values()]
-        batches = [
-            contents[i : i + self._max_batch_size]
-            for i in range(0, len(contents), self._max_batch_size)
-        ]
-
-        embedding_tasks = [self.embedding_func(batch) for batch in batches]
-        embeddings_list = await asyncio.gather(*embedding_tasks)
-
-        embeddings = np.concatenate(embeddings_list)
+        embeddings = await self._embed_contents(contents)
         for i, d in enumerate(list_data):
             d["vector"] = embeddings[i]
         results = self._client.upsert(collection_name=self.namespace, data=list_data)
         return results
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        query_embedding: np.ndarray | None = None,
     ) -> list[dict[str, Any]]:
         # Ensure collection is loaded before querying
         self._ensure_collection_loaded()
 
-        embedding = await self.embedding_func(
-            [query], _priority=5
-        )  # higher priority for query
+        embedding = await self._embed_query(query, query_embedding)
 
         # Include all meta_fields (created_at is now always included)
         output_fields = list(self.meta_fields)
@@ -948,6 +942,37 @@ class MilvusVectorDBStorage(BaseVectorStorage):
             logger.error(f"Error retrieving vector data for IDs {ids}: {e}")
             return []
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        include_vector: bool = False,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        # Ensure collection is loaded before querying
+        self._ensure_collection_loaded()
+
+        output_fields = list(self.meta_fields) + ["id"]
+        if include_vector:
+            output_fields.append("vector")
+
+        iterator = self._client.query_iterator(
+            collection_name=self.namespace,
+            batch_size=batch_size,
+            filter="",
+            output_fields=output_fields,
+        )
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                yield [
+                    vector_scan_record(row, fields, row.pop("vector", None))
+                    for row in rows
+                ]
+        finally:
+            iterator.close()
+
     async def drop(self) -> dict[str, str]:
         """Drop all vector data from storage and clean up resources
 
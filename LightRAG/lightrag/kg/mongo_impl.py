@@ -5,19 +5,32 @@ import numpy as np
 import configparser
 import asyncio
 
-from typing import Any, Union, final
+from typing import Any, AsyncIterator, Literal, Union, final
 
 from ..base import (
     BaseGraphStorage,
     BaseKVStorage,
     BaseVectorStorage,
+    DOC_STATUS_SORT_FIELDS,
     DocProcessingStatus,
     DocStatus,
+    DocStatusPage,
+    DocStatusSortField,
     DocStatusStorage,
+    decode_doc_status_cursor,
+    doc_status_from_dict,
+    doc_status_sort_value,
+    encode_doc_status_cursor,
+    select_record_fields,
+    vector_scan_record,
 )
 from ..utils import logger, compute_mdhash_id
 from ..types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
-from ..constants import GRAPH_FIELD_SEP
+from ..constants import (
+    GRAPH_FIELD_SEP,
+    GRAPH_SCAN_BATCH_SIZE,
+    STORAGE_SCAN_BATCH_SIZE,
+)
 
 import pipmaster as pm
 
@@ -74,6 +87,23 @@ class ClientManager:
                         cls._instances["db"] = None
 
 
+async def _find_batches(
+    collection: AsyncCollection,
+    projection: dict[str, int] | None,
+    batch_size: int,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Read a whole collection in _id order through one server-side cursor"""
+    batch = []
+    cursor = collection.find({}, projection).sort("_id", 1).batch_size(batch_size)
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 @final
 @dataclass
 class MongoKVStorage(BaseKVStorage):
@@ -166,6 +196,22 @@ class MongoKVStorage(BaseKVStorage):
             result[doc_id] = doc
         return result
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        projection = {name: 1 for name in fields} if fields is not None else None
+        async for docs in _find_batches(self._data, projection, batch_size):
+            batch = []
+            for doc in docs:
+                doc_id = doc.pop("_id")
+                # Ensure time fields are present for all documents
+                doc.setdefault("create_time", 0)
+                doc.setdefault("update_time", 0)
+                batch.append((doc_id, select_record_fields(doc, fields)))
+            yield batch
+
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         logger.debug(f"Inserting {len(data)} to {self.namespace}")
         if not data:
@@ -321,8 +367,22 @@ class MongoDocStatusStorage(DocStatusStorage):
         if self.db is None:
             self.db = await ClientManager.get_client()
             self._data = await get_or_create_collection(self.db, self._collection_name)
+            await self.create_status_indexes_if_not_exists()
             logger.debug(f"Use MongoDB as DocStatus {self._collection_name}")
 
+    async def create_status_indexes_if_not_exists(self):
+        """Create the indexes used by status counts, status filters and listings"""
+        try:
+            for sort_field in ("created_at", "updated_at", "file_path"):
+                await self._data.create_index(
+                    [("status", 1), (sort_field, 1), ("_id", 1)]
+                )
+                await self._data.create_index([(sort_field, 1), ("_id", 1)])
+        except PyMongoError as e:
+            logger.error(
+                f"Error creating doc status indexes for {self._collection_name}: {e}"
+            )
+
     async def finalize(self):
         if self.db is not None:
             await ClientManager.release_client(self.db)
@@ -356,15 +416,25 @@ class MongoDocStatusStorage(DocStatusStorage):
             )
         await asyncio.gather(*update_tasks)
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        projection = {name: 1 for name in fields} if fields is not None else None
+        async for docs in _find_batches(self._data, projection, batch_size):
+            yield [(doc.pop("_id"), doc) for doc in docs]
+
     async def get_status_counts(self) -> dict[str, int]:
         """Get counts of documents in each status"""
-        pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
-        cursor = self._data.aggregate(pipeline, allowDiskUse=True)
-        result = await cursor.to_list()
-        counts = {}
-        for doc in result:
-            counts[doc["_id"]] = doc["count"]
-        return counts
+        # One count per status is answered from the status index
+        results = await asyncio.gather(
+            *[
+                self._data.count_documents({"status": status.value})
+                for status in DocStatus
+            ]
+        )
+        return {status.value: count for status, count in zip(DocStatus, results)}
 
     async def get_docs_by_status(
         self, status: DocStatus
@@ -387,6 +457,58 @@ class MongoDocStatusStorage(DocStatusStorage):
             for doc in result
         }
 
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page_size: int = 50,
+        cursor: str | None = None,
+        sort_field: DocStatusSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+        include_content: bool = False,
+    ) -> DocStatusPage:
+        """Keyset pagination over the (status, sort field, _id) indexes"""
+        if sort_field not in DOC_STATUS_SORT_FIELDS:
+            raise ValueError(f"Invalid sort field: {sort_field}")
+        sort_key = "_id" if sort_field == "id" else sort_field
+        descending = sort_direction == "desc"
+        direction = -1 if descending else 1
+
+        query: dict[str, Any] = {}
+        if status_filter is not None:
+            query["status"] = status_filter.value
+        if cursor:
+            sort_value, last_id = decode_doc_status_cursor(cursor)
+            op = "$lt" if descending else "$gt"
+            if sort_key == "_id":
+                query["_id"] = {op: last_id}
+            else:
+                query["$or"] = [
+                    {sort_key: {op: sort_value}},
+                    {sort_key: sort_value, "_id": {op: last_id}},
+                ]
+
+        projection = None if include_content else {"content": 0, "chunks_list": 0}
+        docs = (
+            await self._data.find(query, projection)
+            .sort([(sort_key, direction), ("_id", direction)])
+            .limit(page_size + 1)
+            .to_list()
+        )
+
+        next_cursor = None
+        if len(docs) > page_size:
+            docs = docs[:page_size]
+            last = docs[-1]
+            next_cursor = encode_doc_status_cursor(
+                doc_status_sort_value(last["_id"], last, sort_field), last["_id"]
+            )
+        return DocStatusPage(
+            documents={
+                doc["_id"]: doc_status_from_dict(doc, include_content) for doc in docs
+            },
+            next_cursor=next_cursor,
+        )
+
     async def index_done_callback(self) -> None:
         # Mongo handles persistence automatically
         pass
@@ -757,13 +879,9 @@ class MongoGraphStorage(BaseGraphStorage):
         """
         Insert or update a node document.
         """
-        update_doc = {"$set": {**node_data}}
-        if node_data.get("source_id", ""):
-            update_doc["$set"]["source_ids"] = node_data["source_id"].split(
-                GRAPH_FIELD_SEP
-            )
-
-        await self.collection.update_one({"_id": node_id}, update_doc, upsert=True)
+        await self.collection.update_one(
+            {"_id": node_id}, self._set_with_source_ids(node_data), upsert=True
+        )
 
     async def upsert_edge(
         self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
@@ -801,6 +919,72 @@ class MongoGraphStorage(BaseGraphStorage):
             upsert=True,
         )
 
+    @staticmethod
+    def _set_with_source_ids(data: dict[str, str]) -> dict:
+        """Update document setting the properties, with source_id split into source_ids"""
+        update_doc = {"$set": {**data}}
+        if data.get("source_id", ""):
+            update_doc["$set"]["source_ids"] = data["source_id"].split(GRAPH_FIELD_SEP)
+        return update_doc
+
+    async def upsert_nodes_batch(self, nodes: list[tuple[str, dict[str, str]]]) -> None:
+        """
+        Insert or update multiple node documents with a single bulk_write.
+        """
+        if not nodes:
+            return
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": node_id}, self._set_with_source_ids(node_data), upsert=True
+                )
+                for node_id, node_data in nodes
+            ]
+        )
+
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]]
+    ) -> None:
+        """
+        Upsert multiple edges with one bulk_write for their source nodes and one
+        for the edge documents, with the same semantics as upsert_edge.
+        """
+        if not edges:
+            return
+        # Ensure source nodes exist
+        source_node_ids = dict.fromkeys(source for source, _, _ in edges)
+        await self.collection.bulk_write(
+            [
+                UpdateOne({"_id": node_id}, {"$set": {}}, upsert=True)
+                for node_id in source_node_ids
+            ]
+        )
+
+        operations = []
+        for source_node_id, target_node_id, edge_data in edges:
+            update_doc = self._set_with_source_ids(edge_data)
+            update_doc["$set"]["source_node_id"] = source_node_id
+            update_doc["$set"]["target_node_id"] = target_node_id
+            operations.append(
+                UpdateOne(
+                    {
+                        "$or": [
+                            {
+                                "source_node_id": source_node_id,
+                                "target_node_id": target_node_id,
+                            },
+                            {
+                                "source_node_id": target_node_id,
+                                "target_node_id": source_node_id,
+                            },
+                        ]
+                    },
+                    update_doc,
+                    upsert=True,
+                )
+            )
+        await self.edge_collection.bulk_write(operations)
+
     #
     # -------------------------------------------------------------------------
     # DELETION
@@ -841,6 +1025,34 @@ class MongoGraphStorage(BaseGraphStorage):
             labels.append(doc["_id"])
         return labels
 
+    async def iter_node_batches(
+        self, batch_size: int = GRAPH_SCAN_BATCH_SIZE
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Page through the node documents with a cursor sorted by _id"""
+        batch = []
+        cursor = self.collection.find({}).sort("_id", 1).batch_size(batch_size)
+        async for doc in cursor:
+            batch.append((doc["_id"], doc))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def iter_edge_batches(
+        self, batch_size: int = GRAPH_SCAN_BATCH_SIZE
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Page through the edge documents, each undirected edge is stored once"""
+        batch = []
+        cursor = self.edge_collection.find({}).batch_size(batch_size)
+        async for doc in cursor:
+            batch.append((doc.get("source_node_id"), doc.get("target_node_id"), doc))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     def _construct_graph_node(
         self, node_id, node_data: dict[str, str]
     ) -> KnowledgeGraphNode:
@@ -1377,7 +1589,6 @@ class MongoVectorDBStorage(BaseVectorStorage):
             )
         self.cosine_better_than_threshold = cosine_threshold
         self._collection_name = self.namespace
-        self._max_batch_size = self.global_config["embedding_batch_num"]
 
     async def initialize(self):
         if self.db is None:
@@ -1441,20 +1652,14 @@ class MongoVectorDBStorage(BaseVectorStorage):
         list_data = [
             {
                 "_id": k,
-                "created_at": current_time,  # Add created_at field as Unix timestamp
+                # Unix timestamp, copied records keep their creation time
+                "created_at": v.get("created_at", current_time),
                 **{k1: v1 for k1, v1 in v.items() if k1 in self.meta_fields},
             }
             for k, v in data.items()
         ]
         contents = [v["content"] for v in data.values()]
-        batches = [
-            contents[i : i + self._max_batch_size]
-            for i in range(0, len(contents), self._max_batch_size)
-        ]
-
-        embedding_tasks = [self.embedding_func(batch) for batch in batches]
-        embeddings_list = await asyncio.gather(*embedding_tasks)
-        embeddings = np.concatenate(embeddings_list)
+        embeddings = await self._embed_contents(contents)
         for i, d in enumerate(list_data):
             d["vector"] = np.array(embeddings[i], dtype=np.float32).tolist()
 
@@ -1468,13 +1673,15 @@ class MongoVectorDBStorage(BaseVectorStorage):
         return list_data
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        query_embedding: np.ndarray | None = None,
     ) -> list[dict[str, Any]]:
         """Queries the vector database using Atlas Vector Search."""
         # Generate the embedding
-        embedding = await self.embedding_func(
-            [query], _priority=5
-        )  # higher priority for query
+        embedding = await self._embed_query(query, query_embedding)
 
         # Convert numpy array to a list to ensure compatibility with MongoDB
         query_vector = embedding[0].tolist()
@@ -1644,6 +1851,21 @@ class MongoVectorDBStorage(BaseVectorStorage):
             logger.error(f"Error retrieving vector data for IDs {ids}: {e}")
             return []
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        include_vector: bool = False,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        projection = None if include_vector else {"vector": 0}
+        async for docs in _find_batches(self._data, projection, batch_size):
+            batch = []
+            for doc in docs:
+                vector = doc.pop("vector", None)
+                doc["id"] = doc.pop("_id")
+                batch.append(vector_scan_record(doc, fields, vector))
+            yield batch
+
     async def drop(self) -> dict[str, str]:
         """Drop the storage by removing all documents in the collection and recreating vector index.
 
@@ -1,16 +1,20 @@
-import asyncio
 import os
-from typing import Any, final
+from typing import Any, AsyncIterator, final
 from dataclasses import dataclass
 import numpy as np
 import time
 
 from lightrag.utils import (
+    EmbeddingFunc,
     logger,
     compute_mdhash_id,
 )
 import pipmaster as pm
-from lightrag.base import BaseVectorStorage
+from lightrag.base import BaseVectorStorage, vector_scan_record
+from lightrag.constants import (
+    STORAGE_SCAN_BATCH_SIZE,
+    VECTOR_REBUILD_NAMESPACE_SUFFIX,
+)
 
 if not pm.is_installed("nano-vectordb"):
     pm.install("nano-vectordb")
@@ -26,6 +30,8 @@ from .shared_storage import (
 @final
 @dataclass
 class NanoVectorDBStorage(BaseVectorStorage):
+    scan_order = "row"
+
     def __post_init__(self):
         # Initialize basic attributes
         self._client = None
@@ -54,7 +60,6 @@ class NanoVectorDBStorage(BaseVectorStorage):
             self._client_file_name = os.path.join(
                 working_dir, f"vdb_{self.namespace}.json"
             )
-        self._max_batch_size = self.global_config["embedding_batch_num"]
 
         self._client = NanoVectorDB(
             self.embedding_func.embedding_dim,
@@ -103,22 +108,15 @@ class NanoVectorDBStorage(BaseVectorStorage):
         list_data = [
             {
                 "__id__": k,
-                "__created_at__": current_time,
+                # Copied records keep their creation time
+                "__created_at__": v.get("created_at", current_time),
                 **{k1: v1 for k1, v1 in v.items() if k1 in self.meta_fields},
             }
             for k, v in data.items()
         ]
         contents = [v["content"] for v in data.values()]
-        batches = [
-            contents[i : i + self._max_batch_size]
-            for i in range(0, len(contents), self._max_batch_size)
-        ]
-
         # Execute embedding outside of lock to avoid long lock times
-        embedding_tasks = [self.embedding_func(batch) for batch in batches]
-        embeddings_list = await asyncio.gather(*embedding_tasks)
-
-        embeddings = np.concatenate(embeddings_list)
+        embeddings = await self._embed_contents(contents)
         if len(embeddings) == len(list_data):
             for i, d in enumerate(list_data):
                 d["__vector__"] = embeddings[i]
@@ -132,12 +130,14 @@ class NanoVectorDBStorage(BaseVectorStorage):
             )
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        query_embedding: np.ndarray | None = None,
     ) -> list[dict[str, Any]]:
         # Execute embedding outside of lock to avoid improve cocurrent
-        embedding = await self.embedding_func(
-            [query], _priority=5
-        )  # higher priority for query
+        embedding = await self._embed_query(query, query_embedding)
         embedding = embedding[0]
 
         client = await self._get_client()
@@ -312,6 +312,78 @@ class NanoVectorDBStorage(BaseVectorStorage):
             for dp in results
         ]
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        include_vector: bool = False,
+        start_after: int | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Iterate over the records and rows of the matrix as of the start of the iteration
+
+        Vectors are returned normalized, as stored for cosine similarity. A scan
+        resumed with `start_after` starts at that row.
+        """
+        storage = await self.client_storage
+        # Upserts replace rows in place or append to the data list and a new
+        # matrix, deletes rebuild both: the rows of these references stay aligned
+        data, matrix = storage["data"], storage["matrix"]
+        rows = len(matrix)
+        for start in range(start_after or 0, rows, batch_size):
+            stop = min(start + batch_size, rows)
+            yield [
+                vector_scan_record(
+                    {
+                        **data[row],
+                        "id": data[row].get("__id__"),
+                        "created_at": data[row].get("__created_at__"),
+                    },
+                    fields,
+                    matrix[row] if include_vector else None,
+                )
+                for row in range(start, stop)
+            ]
+
+    async def create_rebuild_storage(
+        self, embedding_func: EmbeddingFunc
+    ) -> "NanoVectorDBStorage":
+        namespace = self.namespace + VECTOR_REBUILD_NAMESPACE_SUFFIX
+        # Discard the file an interrupted rebuild may have left
+        file_name = os.path.join(
+            os.path.dirname(self._client_file_name), f"vdb_{namespace}.json"
+        )
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        storage = NanoVectorDBStorage(
+            namespace=namespace,
+            workspace=self.workspace,
+            global_config=self.global_config,
+            embedding_func=embedding_func,
+            meta_fields=self.meta_fields,
+        )
+        await storage.initialize()
+        return storage
+
+    async def swap_rebuild_storage(self, storage: "NanoVectorDBStorage") -> None:
+        async with self._storage_lock:
+            storage._client.save()
+            # Readers load either the previous or the rebuilt file
+            os.replace(storage._client_file_name, self._client_file_name)
+            self.embedding_func = storage.embedding_func
+            self._client = NanoVectorDB(
+                self.embedding_func.embedding_dim,
+                storage_file=self._client_file_name,
+            )
+
+            # Notify other processes that data has been updated
+            await set_all_update_flags(self.namespace)
+            # Reset own update flag to avoid self-reloading
+            self.storage_updated.value = False
+
+        logger.info(
+            f"Process {os.getpid()} swapped in rebuilt {self.namespace}(file:{self._client_file_name})"
+        )
+
     async def drop(self) -> dict[str, str]:
         """Drop all vector data from storage and clean up resources
 
@@ -1,8 +1,9 @@
 import os
 import re
 from dataclasses import dataclass
-from typing import final
+from typing import AsyncIterator, final
 import configparser
+from collections import defaultdict
 
 
 from tenacity import (
@@ -16,7 +17,11 @@ import logging
 from ..utils import logger
 from ..base import BaseGraphStorage
 from ..types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
-from ..constants import GRAPH_FIELD_SEP
+from ..constants import (
+    GRAPH_FIELD_SEP,
+    GRAPH_SCAN_BATCH_SIZE,
+    GRAPH_UPSERT_BATCH_SIZE,
+)
 import pipmaster as pm
 
 if not pm.is_installed("neo4j"):
@@ -47,6 +52,8 @@ logging.getLogger("neo4j").setLevel(logging.ERROR)
 @final
 @dataclass
 class Neo4JStorage(BaseGraphStorage):
+    scan_order = "key"
+
     def __init__(self, namespace, global_config, embedding_func, workspace=None):
         # Check NEO4J_WORKSPACE environment variable and override workspace if set
         neo4j_workspace = os.environ.get("NEO4J_WORKSPACE")
@@ -895,6 +902,117 @@ class Neo4JStorage(BaseGraphStorage):
             logger.error(f"Error during edge upsert: {str(e)}")
             raise
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_nodes_batch(self, nodes: list[tuple[str, dict[str, str]]]) -> None:
+        """
+        Upsert multiple nodes in one transaction using UNWIND.
+
+        The entity type is set as a node label, which cannot be a query parameter,
+        so one statement is run per entity type.
+
+        Args:
+            nodes: List of (node_id, node_data) tuples
+        """
+        if not nodes:
+            return
+        workspace_label = self._get_workspace_label()
+        rows_by_type: dict[str, list[dict]] = defaultdict(list)
+        for node_id, node_data in nodes:
+            if "entity_id" not in node_data:
+                raise ValueError(
+                    "Neo4j: node properties must contain an 'entity_id' field"
+                )
+            rows_by_type[node_data["entity_type"]].append(
+                {"entity_id": node_id, "properties": node_data}
+            )
+
+        try:
+            async with self._driver.session(database=self._DATABASE) as session:
+
+                async def execute_upsert(tx: AsyncManagedTransaction):
+                    for entity_type, rows in rows_by_type.items():
+                        query = f"""
+                        UNWIND $rows AS row
+                        MERGE (n:`{workspace_label}` {{entity_id: row.entity_id}})
+                        SET n += row.properties
+                        SET n:`{entity_type}`
+                        """
+                        for start in range(0, len(rows), GRAPH_UPSERT_BATCH_SIZE):
+                            result = await tx.run(
+                                query,
+                                rows=rows[start : start + GRAPH_UPSERT_BATCH_SIZE],
+                            )
+                            await result.consume()  # Ensure result is fully consumed
+
+                await session.execute_write(execute_upsert)
+        except Exception as e:
+            logger.error(f"Error during batch upsert: {str(e)}")
+            raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]]
+    ) -> None:
+        """
+        Upsert multiple edges in one transaction using UNWIND.
+
+        As for upsert_edge, an edge is only created if both of its nodes exist.
+
+        Args:
+            edges: List of (source_node_id, target_node_id, edge_data) tuples
+        """
+        if not edges:
+            return
+        workspace_label = self._get_workspace_label()
+        rows = [
+            {"src": source_node_id, "tgt": target_node_id, "properties": edge_data}
+            for source_node_id, target_node_id, edge_data in edges
+        ]
+
+        try:
+            async with self._driver.session(database=self._DATABASE) as session:
+
+                async def execute_upsert(tx: AsyncManagedTransaction):
+                    query = f"""
+                    UNWIND $rows AS row
+                    MATCH (source:`{workspace_label}` {{entity_id: row.src}})
+                    MATCH (target:`{workspace_label}` {{entity_id: row.tgt}})
+                    MERGE (source)-[r:DIRECTED]-(target)
+                    SET r += row.properties
+                    """
+                    for start in range(0, len(rows), GRAPH_UPSERT_BATCH_SIZE):
+                        result = await tx.run(
+                            query, rows=rows[start : start + GRAPH_UPSERT_BATCH_SIZE]
+                        )
+                        await result.consume()  # Ensure result is consumed
+
+                await session.execute_write(execute_upsert)
+        except Exception as e:
+            logger.error(f"Error during batch edge upsert: {str(e)}")
+            raise
+
     async def get_knowledge_graph(
         self,
         node_label: str,
@@ -1304,6 +1422,107 @@ class Neo4JStorage(BaseGraphStorage):
                 )  # Ensure results are consumed even if processing fails
             return labels
 
+    async def _scan_nodes_page(
+        self, after: str | None, limit: int
+    ) -> list[tuple[str, dict]]:
+        """Next page of nodes ordered by entity_id, starting after the given id"""
+        workspace_label = self._get_workspace_label()
+        async with self._driver.session(
+            database=self._DATABASE, default_access_mode="READ"
+        ) as session:
+            query = f"""
+            MATCH (n:`{workspace_label}`)
+            WHERE n.entity_id IS NOT NULL
+              AND ($after IS NULL OR n.entity_id > $after)
+            RETURN n.entity_id AS entity_id, n
+            ORDER BY n.entity_id
+            LIMIT $limit
+            """
+            result = await session.run(query, after=after, limit=limit)
+            nodes = []
+            async for record in result:
+                node_dict = dict(record["n"])
+                if "labels" in node_dict:
+                    node_dict["labels"] = [
+                        label
+                        for label in node_dict["labels"]
+                        if label != workspace_label
+                    ]
+                nodes.append((record["entity_id"], node_dict))
+            await result.consume()
+            return nodes
+
+    async def iter_node_batches(
+        self, batch_size: int = GRAPH_SCAN_BATCH_SIZE, start_after: str | None = None
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Page through the nodes with keyset pagination on the entity_id index"""
+        after = start_after
+        while True:
+            batch = await self._scan_nodes_page(after, batch_size)
+            if not batch:
+                return
+            yield batch
+            after = batch[-1][0]
+
+    async def _scan_node_edges(
+        self, node_ids: list[str]
+    ) -> list[tuple[str, str, dict]]:
+        """Edges of the given nodes, ordered by source in the order of node_ids, then by target
+
+        Every edge is read from its endpoint with the lowest entity_id, so that
+        undirected edges are returned once.
+        """
+        workspace_label = self._get_workspace_label()
+        query = f"""
+        UNWIND $node_ids AS id
+        MATCH (a:`{workspace_label}` {{entity_id: id}})-[r]-(b:`{workspace_label}`)
+        WHERE a.entity_id < b.entity_id
+        RETURN a.entity_id AS src_id, b.entity_id AS tgt_id, properties(r) AS edge
+        """
+        edges = []
+        async with self._driver.session(
+            database=self._DATABASE, default_access_mode="READ"
+        ) as session:
+            result = await session.run(query, node_ids=node_ids)
+            async for record in result:
+                edges.append((record["src_id"], record["tgt_id"], record["edge"]))
+            await result.consume()
+        rank = {node_id: i for i, node_id in enumerate(node_ids)}
+        edges.sort(key=lambda edge: (rank.get(edge[0], len(rank)), edge[1]))
+        return edges
+
+    async def iter_edge_batches(
+        self,
+        batch_size: int = GRAPH_SCAN_BATCH_SIZE,
+        start_after: list[str] | None = None,
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Page through the edges of each page of nodes
+
+        Edges are yielded by source in entity_id order, then by target, so a
+        scan resumed after a [source, target] edge first reads the remaining
+        edges of that source.
+        """
+        after = None
+        edges = []
+        if start_after is not None:
+            after, last_target = start_after
+            edges = [
+                edge
+                for edge in await self._scan_node_edges([after])
+                if edge[1] > last_target
+            ]
+        while True:
+            nodes = await self._scan_nodes_page(after, batch_size)
+            if not nodes:
+                break
+            after = nodes[-1][0]
+            edges.extend(await self._scan_node_edges([node_id for node_id, _ in nodes]))
+            while len(edges) >= batch_size:
+                yield edges[:batch_size]
+                edges = edges[batch_size:]
+        if edges:
+            yield edges
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -1,11 +1,16 @@
+import asyncio
 import os
 from dataclasses import dataclass
-from typing import final
+from typing import Any, AsyncIterator, final
 
 from lightrag.types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
-from lightrag.utils import logger
+from lightrag.utils import get_env_value, logger
 from lightrag.base import BaseGraphStorage
-from lightrag.constants import GRAPH_FIELD_SEP
+from lightrag.constants import (
+    GRAPH_FIELD_SEP,
+    GRAPH_SCAN_BATCH_SIZE,
+    GRAPH_STREAM_CHUNK_NODES,
+)
 
 import pipmaster as pm
 
@@ -13,6 +18,9 @@ if not pm.is_installed("networkx"):
     pm.install("networkx")
 
 import networkx as nx
+from .csr_graph import CSRGraph
+from .networkx_snapshot import NetworkXSnapshotStore, build_graph_tables
+from .subgraph import SubgraphExtractor
 from .shared_storage import (
     get_storage_lock,
     get_update_flag,
@@ -30,6 +38,20 @@ load_dotenv(dotenv_path=".env", override=False)
 @final
 @dataclass
 class NetworkXStorage(BaseGraphStorage):
+    """Graph storage held in memory as a NetworkX graph
+
+    The graph is persisted as a binary columnar snapshot plus a journal of
+    the changes made since (see `networkx_snapshot`). GraphML is only used to
+    import graphs written by earlier versions and by `export_graphml`.
+
+    With NETWORKX_CSR_SNAPSHOT enabled, a read-only CSR view of the graph is
+    rebuilt whenever the graph has been persisted or reloaded, and serves
+    degree lookups, neighbor expansion and subgraph extraction until the
+    next change.
+    """
+
+    scan_order = "row"
+
     @staticmethod
     def load_nx_graph(file_name) -> nx.Graph:
         if os.path.exists(file_name):
@@ -49,27 +71,26 @@ class NetworkXStorage(BaseGraphStorage):
             # Include workspace in the file path for data isolation
             workspace_dir = os.path.join(working_dir, self.workspace)
             os.makedirs(workspace_dir, exist_ok=True)
-            self._graphml_xml_file = os.path.join(
-                workspace_dir, f"graph_{self.namespace}.graphml"
-            )
+            self._graph_file = os.path.join(workspace_dir, f"graph_{self.namespace}")
         else:
             # Default behavior when workspace is empty
-            self._graphml_xml_file = os.path.join(
-                working_dir, f"graph_{self.namespace}.graphml"
-            )
+            self._graph_file = os.path.join(working_dir, f"graph_{self.namespace}")
+        self._graphml_xml_file = f"{self._graph_file}.graphml"
         self._storage_lock = None
         self.storage_updated = None
         self._graph = None
-
-        # Load initial graph
-        preloaded_graph = NetworkXStorage.load_nx_graph(self._graphml_xml_file)
-        if preloaded_graph is not None:
-            logger.info(
-                f"Loaded graph from {self._graphml_xml_file} with {preloaded_graph.number_of_nodes()} nodes, {preloaded_graph.number_of_edges()} edges"
-            )
-        else:
+        self._snapshot = NetworkXSnapshotStore(self._graph_file, self.namespace)
+        # Changes not yet written to the journal, in the order they were made
+        self._pending_changes: list[tuple] = []
+        self._csr_enabled = get_env_value("NETWORKX_CSR_SNAPSHOT", False, bool)
+        self._csr: CSRGraph | None = None
+        self._degree_order: list[str] | None = None
+
+        # Load initial graph, a legacy GraphML file is converted in initialize()
+        self._graph = self._snapshot.load()
+        if self._snapshot.generation is None:
             logger.info("Created new empty graph")
-        self._graph = preloaded_graph or nx.Graph()
+        self._rebuild_csr()
 
     async def initialize(self):
         """Initialize storage data"""
@@ -77,6 +98,12 @@ class NetworkXStorage(BaseGraphStorage):
         self.storage_updated = await get_update_flag(self.namespace)
         # Get the storage lock for use in other methods
         self._storage_lock = get_storage_lock()
+        async with self._storage_lock:
+            if self._snapshot.generation is None:
+                # Convert a GraphML file of an earlier version, or load the
+                # snapshot another process has converted it to in the meantime
+                self._graph = self._snapshot.load(migrate_legacy=True)
+                self._rebuild_csr()
 
     async def _get_graph(self):
         """Check if the storage should be reloaded"""
@@ -87,15 +114,30 @@ class NetworkXStorage(BaseGraphStorage):
                 logger.info(
                     f"Process {os.getpid()} reloading graph {self.namespace} due to update by another process"
                 )
-                # Reload data
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
+                # Replay the changes made since the last load
+                self._graph = self._snapshot.refresh(self._graph)
+                self._rebuild_csr()
                 # Reset update flag
                 self.storage_updated.value = False
 
             return self._graph
 
+    def _rebuild_csr(self) -> None:
+        """Rebuild the CSR view from the current graph when it is enabled"""
+        self._degree_order = None
+        if self._csr_enabled:
+            self._csr = CSRGraph.from_networkx(self._graph)
+
+    def _graph_changed(self) -> None:
+        """Drop the read caches, the CSR view is rebuilt on the next save"""
+        self._csr = None
+        self._degree_order = None
+
+    async def _get_csr(self) -> CSRGraph | None:
+        """CSR view of the graph, or None if it is disabled or the graph has changed"""
+        await self._get_graph()
+        return self._csr
+
     async def has_node(self, node_id: str) -> bool:
         graph = await self._get_graph()
         return graph.has_node(node_id)
@@ -130,6 +172,41 @@ class NetworkXStorage(BaseGraphStorage):
             return list(graph.edges(source_node_id))
         return None
 
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        csr = await self._get_csr()
+        if csr is not None:
+            return dict(zip(node_ids, csr.degrees_of(node_ids).tolist()))
+        graph = await self._get_graph()
+        return {
+            node_id: graph.degree(node_id) if graph.has_node(node_id) else 0
+            for node_id in node_ids
+        }
+
+    async def edge_degrees_batch(
+        self, edge_pairs: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], int]:
+        node_ids = list(dict.fromkeys(n for pair in edge_pairs for n in pair))
+        degrees = await self.node_degrees_batch(node_ids)
+        return {
+            (src_id, tgt_id): degrees[src_id] + degrees[tgt_id]
+            for src_id, tgt_id in edge_pairs
+        }
+
+    async def get_nodes_edges_batch(
+        self, node_ids: list[str]
+    ) -> dict[str, list[tuple[str, str]]]:
+        csr = await self._get_csr()
+        if csr is not None:
+            return {
+                node_id: edges or []
+                for node_id, edges in csr.node_edges(node_ids).items()
+            }
+        graph = await self._get_graph()
+        return {
+            node_id: list(graph.edges(node_id)) if graph.has_node(node_id) else []
+            for node_id in node_ids
+        }
+
     async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
         """
         Importance notes:
@@ -139,6 +216,8 @@ class NetworkXStorage(BaseGraphStorage):
         """
         graph = await self._get_graph()
         graph.add_node(node_id, **node_data)
+        self._graph_changed()
+        self._pending_changes.append(("node", node_id))
 
     async def upsert_edge(
         self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
@@ -150,7 +229,53 @@ class NetworkXStorage(BaseGraphStorage):
            KG-storage-log should be used to avoid data corruption
         """
         graph = await self._get_graph()
+        # Nodes created implicitly by the edge must be journaled as well
+        for node_id in (source_node_id, target_node_id):
+            if not graph.has_node(node_id):
+                self._pending_changes.append(("node", node_id))
         graph.add_edge(source_node_id, target_node_id, **edge_data)
+        self._graph_changed()
+        self._pending_changes.append(("edge", source_node_id, target_node_id))
+
+    async def upsert_nodes_batch(self, nodes: list[tuple[str, dict[str, str]]]) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        if not nodes:
+            return
+        graph = await self._get_graph()
+        graph.add_nodes_from(nodes)
+        self._graph_changed()
+        self._pending_changes.extend(("node", node_id) for node_id, _ in nodes)
+
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]]
+    ) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        if not edges:
+            return
+        graph = await self._get_graph()
+        # Nodes created implicitly by the edges must be journaled as well
+        created = set()
+        for source_node_id, target_node_id, _ in edges:
+            for node_id in (source_node_id, target_node_id):
+                if node_id not in created and not graph.has_node(node_id):
+                    created.add(node_id)
+                    self._pending_changes.append(("node", node_id))
+        graph.add_edges_from(edges)
+        self._graph_changed()
+        self._pending_changes.extend(
+            ("edge", source_node_id, target_node_id)
+            for source_node_id, target_node_id, _ in edges
+        )
 
     async def delete_node(self, node_id: str) -> None:
         """
@@ -162,6 +287,8 @@ class NetworkXStorage(BaseGraphStorage):
         graph = await self._get_graph()
         if graph.has_node(node_id):
             graph.remove_node(node_id)
+            self._graph_changed()
+            self._pending_changes.append(("delete_nodes", [node_id]))
             logger.debug(f"Node {node_id} deleted from the graph.")
         else:
             logger.warning(f"Node {node_id} not found in the graph for deletion.")
@@ -178,9 +305,14 @@ class NetworkXStorage(BaseGraphStorage):
             nodes: List of node IDs to be deleted
         """
         graph = await self._get_graph()
+        removed = []
         for node in nodes:
             if graph.has_node(node):
                 graph.remove_node(node)
+                removed.append(node)
+        if removed:
+            self._graph_changed()
+            self._pending_changes.append(("delete_nodes", removed))
 
     async def remove_edges(self, edges: list[tuple[str, str]]):
         """Delete multiple edges
@@ -194,9 +326,14 @@ class NetworkXStorage(BaseGraphStorage):
             edges: List of edges to be deleted, each edge is a (source, target) tuple
         """
         graph = await self._get_graph()
+        removed = []
         for source, target in edges:
             if graph.has_edge(source, target):
                 graph.remove_edge(source, target)
+                removed.append([source, target])
+        if removed:
+            self._graph_changed()
+            self._pending_changes.append(("delete_edges", removed))
 
     async def get_all_labels(self) -> list[str]:
         """
@@ -212,23 +349,75 @@ class NetworkXStorage(BaseGraphStorage):
         # Return sorted list
         return sorted(list(labels))
 
-    async def get_knowledge_graph(
+    def _top_degree_nodes(self, limit: int) -> list[str]:
+        """Nodes with the highest degree, ties in graph order"""
+        if self._csr is not None:
+            return self._csr.top_degree_nodes(limit)
+        if self._degree_order is None:
+            # Cached until the graph changes
+            self._degree_order = [
+                node
+                for node, _ in sorted(
+                    self._graph.degree(), key=lambda x: x[1], reverse=True
+                )
+            ]
+        return self._degree_order[:limit]
+
+    async def _neighbors_batch(self, node_ids: list[str]) -> dict[str, list[str]]:
+        graph = await self._get_graph()
+        if self._csr is not None:
+            return self._csr.neighbors_of(node_ids)
+        return {
+            node_id: list(graph.adj[node_id])
+            for node_id in node_ids
+            if graph.has_node(node_id)
+        }
+
+    @staticmethod
+    def _subgraph_chunk(
+        graph: nx.Graph, node_ids: list[str], emitted: set[str]
+    ) -> KnowledgeGraph:
+        """Nodes of the chunk, plus their edges to the nodes emitted so far"""
+        chunk = KnowledgeGraph()
+        for node in node_ids:
+            if node not in graph or node in emitted:
+                continue
+            emitted.add(node)
+            chunk.nodes.append(
+                KnowledgeGraphNode(
+                    id=str(node), labels=[str(node)], properties=dict(graph.nodes[node])
+                )
+            )
+            for neighbor, edge_data in graph.adj[node].items():
+                if neighbor not in emitted:
+                    continue
+                source, target = str(node), str(neighbor)
+                # Esure unique edge_id for undirect graph
+                if source > target:
+                    source, target = target, source
+                chunk.edges.append(
+                    KnowledgeGraphEdge(
+                        id=f"{source}-{target}",
+                        type="DIRECTED",
+                        source=source,
+                        target=target,
+                        properties=dict(edge_data),
+                    )
+                )
+        return chunk
+
+    async def stream_knowledge_graph(
         self,
         node_label: str,
         max_depth: int = 3,
         max_nodes: int = None,
-    ) -> KnowledgeGraph:
+    ) -> AsyncIterator[KnowledgeGraph]:
         """
-        Retrieve a connected subgraph of nodes where the label includes the specified `node_label`.
-
-        Args:
-            node_label: Label of the starting node，* means all nodes
-            max_depth: Maximum depth of the subgraph, Defaults to 3
-            max_nodes: Maxiumu nodes to return by BFS, Defaults to 1000
+        Retrieve the subgraph of `get_knowledge_graph` one BFS level at a time.
 
-        Returns:
-            KnowledgeGraph object containing nodes and edges, with an is_truncated flag
-            indicating whether the graph was truncated due to max_nodes limit
+        For `*` the nodes with the highest degree are returned in chunks of
+        GRAPH_STREAM_CHUNK_NODES nodes. The last chunk carries the is_truncated
+        flag of the whole subgraph and may be empty.
         """
         # Get max_nodes from global_config if not provided
         if max_nodes is None:
@@ -238,134 +427,73 @@ class NetworkXStorage(BaseGraphStorage):
             max_nodes = min(max_nodes, self.global_config.get("max_graph_nodes", 1000))
 
         graph = await self._get_graph()
-
-        result = KnowledgeGraph()
+        emitted: set[str] = set()
 
         # Handle special case for "*" label
         if node_label == "*":
-            # Get degrees of all nodes
-            degrees = dict(graph.degree())
-            # Sort nodes by degree in descending order and take top max_nodes
-            sorted_nodes = sorted(degrees.items(), key=lambda x: x[1], reverse=True)
-
-            # Check if graph is truncated
-            if len(sorted_nodes) > max_nodes:
-                result.is_truncated = True
+            nodes = self._top_degree_nodes(max_nodes)
+            is_truncated = graph.number_of_nodes() > max_nodes
+            if is_truncated:
                 logger.info(
-                    f"Graph truncated: {len(sorted_nodes)} nodes found, limited to {max_nodes}"
+                    f"Graph truncated: {graph.number_of_nodes()} nodes found, limited to {max_nodes}"
                 )
-
-            limited_nodes = [node for node, _ in sorted_nodes[:max_nodes]]
-            # Create subgraph with the highest degree nodes
-            subgraph = graph.subgraph(limited_nodes)
-        else:
-            # Check if node exists
-            if node_label not in graph:
-                logger.warning(f"Node {node_label} not found in the graph")
-                return KnowledgeGraph()  # Return empty graph
-
-            # Use modified BFS to get nodes, prioritizing high-degree nodes at the same depth
-            bfs_nodes = []
-            visited = set()
-            # Store (node, depth, degree) in the queue
-            queue = [(node_label, 0, graph.degree(node_label))]
-
-            # Modified breadth-first search with degree-based prioritization
-            while queue and len(bfs_nodes) < max_nodes:
-                # Get the current depth from the first node in queue
-                current_depth = queue[0][1]
-
-                # Collect all nodes at the current depth
-                current_level_nodes = []
-                while queue and queue[0][1] == current_depth:
-                    current_level_nodes.append(queue.pop(0))
-
-                # Sort nodes at current depth by degree (highest first)
-                current_level_nodes.sort(key=lambda x: x[2], reverse=True)
-
-                # Process all nodes at current depth in order of degree
-                for current_node, depth, degree in current_level_nodes:
-                    if current_node not in visited:
-                        visited.add(current_node)
-                        bfs_nodes.append(current_node)
-
-                        # Only explore neighbors if we haven't reached max_depth
-                        if depth < max_depth:
-                            # Add neighbor nodes to queue with incremented depth
-                            neighbors = list(graph.neighbors(current_node))
-                            # Filter out already visited neighbors
-                            unvisited_neighbors = [
-                                n for n in neighbors if n not in visited
-                            ]
-                            # Add neighbors to the queue with their degrees
-                            for neighbor in unvisited_neighbors:
-                                neighbor_degree = graph.degree(neighbor)
-                                queue.append((neighbor, depth + 1, neighbor_degree))
-
-                    # Check if we've reached max_nodes
-                    if len(bfs_nodes) >= max_nodes:
-                        break
-
-            # Check if graph is truncated - if we still have nodes in the queue
-            # and we've reached max_nodes, then the graph is truncated
-            if queue and len(bfs_nodes) >= max_nodes:
-                result.is_truncated = True
-                logger.info(
-                    f"Graph truncated: breadth-first search limited to {max_nodes} nodes"
-                )
-
-            # Create subgraph with BFS discovered nodes
-            subgraph = graph.subgraph(bfs_nodes)
-
-        # Add nodes to result
-        seen_nodes = set()
-        seen_edges = set()
-        for node in subgraph.nodes():
-            if str(node) in seen_nodes:
-                continue
-
-            node_data = dict(subgraph.nodes[node])
-            # Get entity_type as labels
-            labels = []
-            if "entity_type" in node_data:
-                if isinstance(node_data["entity_type"], list):
-                    labels.extend(node_data["entity_type"])
-                else:
-                    labels.append(node_data["entity_type"])
-
-            # Create node with properties
-            node_properties = {k: v for k, v in node_data.items()}
-
-            result.nodes.append(
-                KnowledgeGraphNode(
-                    id=str(node), labels=[str(node)], properties=node_properties
+            for start in range(0, len(nodes), GRAPH_STREAM_CHUNK_NODES):
+                chunk = self._subgraph_chunk(
+                    graph, nodes[start : start + GRAPH_STREAM_CHUNK_NODES], emitted
                 )
+                chunk.is_truncated = is_truncated
+                yield chunk
+            if not nodes:
+                yield KnowledgeGraph(is_truncated=is_truncated)
+            return
+
+        # Check if node exists
+        if node_label not in graph:
+            logger.warning(f"Node {node_label} not found in the graph")
+            yield KnowledgeGraph()  # Return empty graph
+            return
+
+        # BFS prioritizing high-degree nodes at the same depth
+        extractor = SubgraphExtractor(
+            node_label,
+            max_depth,
+            max_nodes,
+            self._neighbors_batch,
+            self.node_degrees_batch,
+        )
+        async for level in extractor.levels():
+            yield self._subgraph_chunk(graph, level, emitted)
+        if extractor.is_truncated:
+            logger.info(
+                f"Graph truncated: breadth-first search limited to {max_nodes} nodes"
             )
-            seen_nodes.add(str(node))
-
-        # Add edges to result
-        for edge in subgraph.edges():
-            source, target = edge
-            # Esure unique edge_id for undirect graph
-            if str(source) > str(target):
-                source, target = target, source
-            edge_id = f"{source}-{target}"
-            if edge_id in seen_edges:
-                continue
+        yield KnowledgeGraph(is_truncated=extractor.is_truncated)
 
-            edge_data = dict(subgraph.edges[edge])
+    async def get_knowledge_graph(
+        self,
+        node_label: str,
+        max_depth: int = 3,
+        max_nodes: int = None,
+    ) -> KnowledgeGraph:
+        """
+        Retrieve a connected subgraph of nodes where the label includes the specified `node_label`.
 
-            # Create edge with complete information
-            result.edges.append(
-                KnowledgeGraphEdge(
-                    id=edge_id,
-                    type="DIRECTED",
-                    source=str(source),
-                    target=str(target),
-                    properties=edge_data,
-                )
-            )
-            seen_edges.add(edge_id)
+        Args:
+            node_label: Label of the starting node，* means all nodes
+            max_depth: Maximum depth of the subgraph, Defaults to 3
+            max_nodes: Maxiumu nodes to return by BFS, Defaults to 1000
+
+        Returns:
+            KnowledgeGraph object containing nodes and edges, with an is_truncated flag
+            indicating whether the graph was truncated due to max_nodes limit
+        """
+        result = KnowledgeGraph()
+        async for chunk in self.stream_knowledge_graph(
+            node_label, max_depth, max_nodes
+        ):
+            result.nodes.extend(chunk.nodes)
+            result.edges.extend(chunk.edges)
+            result.is_truncated = chunk.is_truncated
 
         logger.info(
             f"Subgraph query successful | Node count: {len(result.nodes)} | Edge count: {len(result.edges)}"
@@ -399,8 +527,73 @@ class NetworkXStorage(BaseGraphStorage):
                     matching_edges.append(edge_data_with_nodes)
         return matching_edges
 
+    async def iter_node_batches(
+        self, batch_size: int = GRAPH_SCAN_BATCH_SIZE, start_after: int | None = None
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        graph = await self._get_graph()
+        node_ids = list(graph.nodes())[start_after or 0 :]
+        for start in range(0, len(node_ids), batch_size):
+            batch = [
+                (node_id, dict(graph.nodes[node_id]))
+                for node_id in node_ids[start : start + batch_size]
+                if node_id in graph
+            ]
+            if batch:
+                yield batch
+
+    async def iter_edge_batches(
+        self, batch_size: int = GRAPH_SCAN_BATCH_SIZE, start_after: int | None = None
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        graph = await self._get_graph()
+        edges = list(graph.edges())[start_after or 0 :]
+        for start in range(0, len(edges), batch_size):
+            batch = [
+                (u, v, dict(graph.edges[u, v]))
+                for u, v in edges[start : start + batch_size]
+                if graph.has_edge(u, v)
+            ]
+            if batch:
+                yield batch
+
+    def _journal_records(self) -> list[dict[str, Any]]:
+        """Turn the pending changes into journal records carrying the current attributes
+
+        The pending changes are kept until the records have been appended, so a
+        failed append is retried by the next call to `index_done_callback`.
+        """
+        records = []
+        for change in self._pending_changes:
+            op = change[0]
+            if op == "node":
+                node_id = change[1]
+                # Skip nodes deleted afterwards, the deletion follows in the journal
+                if self._graph.has_node(node_id):
+                    records.append(
+                        {
+                            "op": "node",
+                            "id": node_id,
+                            "data": dict(self._graph.nodes[node_id]),
+                        }
+                    )
+            elif op == "edge":
+                source, target = change[1], change[2]
+                if self._graph.has_edge(source, target):
+                    records.append(
+                        {
+                            "op": "edge",
+                            "src": source,
+                            "tgt": target,
+                            "data": dict(self._graph.edges[source, target]),
+                        }
+                    )
+            elif op == "delete_nodes":
+                records.append({"op": "delete_nodes", "ids": change[1]})
+            elif op == "delete_edges":
+                records.append({"op": "delete_edges", "edges": change[1]})
+        return records
+
     async def index_done_callback(self) -> bool:
-        """Save data to disk"""
+        """Append the changes since the last call to the journal"""
         async with self._storage_lock:
             # Check if storage was updated by another process
             if self.storage_updated.value:
@@ -408,9 +601,9 @@ class NetworkXStorage(BaseGraphStorage):
                 logger.info(
                     f"Graph for {self.namespace} was updated by another process, reloading..."
                 )
-                self._graph = (
-                    NetworkXStorage.load_nx_graph(self._graphml_xml_file) or nx.Graph()
-                )
+                self._graph = self._snapshot.load()
+                self._pending_changes = []
+                self._rebuild_csr()
                 # Reset update flag
                 self.storage_updated.value = False
                 return False  # Return error
@@ -418,10 +611,22 @@ class NetworkXStorage(BaseGraphStorage):
         # Acquire lock and perform persistence
         async with self._storage_lock:
             try:
-                # Save data to disk
-                NetworkXStorage.write_nx_graph(self._graph, self._graphml_xml_file)
-                # Notify other processes that data has been updated
-                await set_all_update_flags(self.namespace)
+                records = self._journal_records()
+                if records:
+                    self._snapshot.append(records)
+                    logger.debug(
+                        f"Appended {len(records)} journal records for graph {self.namespace}"
+                    )
+                self._pending_changes = []
+                if self._snapshot.needs_compaction():
+                    # Tables are built here, the files are written off the event loop
+                    tables = build_graph_tables(self._graph)
+                    await asyncio.to_thread(self._snapshot.write_snapshot, tables)
+                if self._csr is None:
+                    self._rebuild_csr()
+                if records:
+                    # Notify other processes that data has been updated
+                    await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
                 self.storage_updated.value = False
                 return True  # Return success
@@ -431,11 +636,25 @@ class NetworkXStorage(BaseGraphStorage):
 
         return True
 
+    async def export_graphml(self, file_name: str | None = None) -> str:
+        """Write the current graph as GraphML, e.g. for external visualization tools
+
+        Args:
+            file_name: Output path, defaults to graph_<namespace>.graphml in the working directory
+
+        Returns:
+            The path of the written file
+        """
+        file_name = file_name or self._graphml_xml_file
+        graph = await self._get_graph()
+        await asyncio.to_thread(NetworkXStorage.write_nx_graph, graph, file_name)
+        return file_name
+
     async def drop(self) -> dict[str, str]:
         """Drop all graph data from storage and clean up resources
 
         This method will:
-        1. Remove the graph storage file if it exists
+        1. Replace the graph snapshot and journal with an empty snapshot
         2. Reset the graph to an empty state
         3. Update flags to notify other processes
         4. Changes is persisted to disk immediately
@@ -447,16 +666,16 @@ class NetworkXStorage(BaseGraphStorage):
         """
         try:
             async with self._storage_lock:
-                # delete _client_file_name
-                if os.path.exists(self._graphml_xml_file):
-                    os.remove(self._graphml_xml_file)
                 self._graph = nx.Graph()
+                self._pending_changes = []
+                self._rebuild_csr()
+                self._snapshot.write_snapshot(build_graph_tables(self._graph))
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
                 # Reset own update flag to avoid self-reloading
                 self.storage_updated.value = False
                 logger.info(
-                    f"Process {os.getpid()} drop graph {self.namespace} (file:{self._graphml_xml_file})"
+                    f"Process {os.getpid()} drop graph {self.namespace} (file:{self._snapshot.manifest_file})"
                 )
             return {"status": "success", "message": "data dropped"}
         except Exception as e:
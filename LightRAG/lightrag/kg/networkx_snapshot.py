@@ -0,0 +1,486 @@
+"""
+Binary snapshot and delta journal for the NetworkX graph storage.
+
+A graph is persisted as a snapshot directory `<base>.kg.<generation>/` with a
+columnar node/edge table:
+
+    strings.txt          every distinct string, concatenated
+    string_offsets.npy   character offsets of the strings in strings.txt
+    nodes.npy            string index of each node id
+    edges.npy            (source, target) positions into nodes.npy
+    node_<i>.npy         one column per node attribute (edge_<i>.npy for edges)
+    node_<i>.mask.npy    presence mask, only for numeric columns with gaps
+    tables.json          row counts and the name and kind of every column
+    journal.jsonl        changes made after the snapshot was written
+
+The arrays are memory-mapped on load. Changes are appended to the journal as
+one JSON line per node, edge or deletion:
+
+    {"op": "node", "id": "<id>", "data": {...}}
+    {"op": "edge", "src": "<id>", "tgt": "<id>", "data": {...}}
+    {"op": "delete_nodes", "ids": ["<id>", ...]}
+    {"op": "delete_edges", "edges": [["<id>", "<id>"], ...]}
+
+Node and edge records carry the full attribute set. `<base>.kg.json` names the
+current generation, and is replaced atomically once a new snapshot is complete.
+A process that already holds the current generation only replays the journal
+from the offset it has read up to. When the journal outgrows the snapshot it is
+folded into a new generation.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from typing import Any
+
+import numpy as np
+import networkx as nx
+
+from lightrag.constants import DEFAULT_NETWORKX_JOURNAL_COMPACT_SIZE
+from lightrag.utils import get_env_value, load_json, logger, write_json
+from .json_wal import truncate_torn_tail
+
+FORMAT_VERSION = 1
+
+_MISSING = object()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _dumps(record: Any) -> str:
+    return json.dumps(record, ensure_ascii=False, default=_json_default)
+
+
+class _StringTable:
+    def __init__(self):
+        self.index: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def add(self, value: str) -> int:
+        position = self.index.get(value)
+        if position is None:
+            position = len(self.strings)
+            self.index[value] = position
+            self.strings.append(value)
+        return position
+
+
+def _column_kind(values: list[Any]) -> str:
+    types = {type(v) for v in values if v is not _MISSING}
+    if types == {str}:
+        return "str"
+    if types == {bool}:
+        return "bool"
+    if types == {int}:
+        return "int"
+    if types == {float}:
+        return "float"
+    return "json"
+
+
+def _encode_column(
+    values: list[Any], strings: _StringTable
+) -> tuple[str, np.ndarray, np.ndarray | None]:
+    """Encode one attribute column as (kind, values, presence mask or None)"""
+    kind = _column_kind(values)
+    if kind == "int":
+        try:
+            array = np.array(
+                [0 if v is _MISSING else v for v in values], dtype=np.int64
+            )
+        except OverflowError:
+            kind = "json"
+    if kind == "str":
+        return (
+            kind,
+            np.array(
+                [-1 if v is _MISSING else strings.add(v) for v in values],
+                dtype=np.int64,
+            ),
+            None,
+        )
+    if kind == "json":
+        return (
+            kind,
+            np.array(
+                [-1 if v is _MISSING else strings.add(_dumps(v)) for v in values],
+                dtype=np.int64,
+            ),
+            None,
+        )
+    if kind == "bool":
+        return (
+            kind,
+            np.array([-1 if v is _MISSING else int(v) for v in values], dtype=np.int8),
+            None,
+        )
+    if kind == "float":
+        array = np.array(
+            [np.nan if v is _MISSING else v for v in values], dtype=np.float64
+        )
+    mask = None
+    if any(v is _MISSING for v in values):
+        mask = np.array([v is not _MISSING for v in values], dtype=np.bool_)
+    return kind, array, mask
+
+
+def _decode_column(
+    kind: str,
+    array: np.ndarray,
+    mask: np.ndarray | None,
+    strings: list[str],
+    rows: list[dict[str, Any]],
+    name: str,
+) -> None:
+    """Set the attribute `name` on every row that has a value in the column"""
+    values = array.tolist()
+    if kind in ("str", "json"):
+        for row, position in zip(rows, values):
+            if position >= 0:
+                value = strings[position]
+                row[name] = json.loads(value) if kind == "json" else value
+    elif kind == "bool":
+        for row, value in zip(rows, values):
+            if value >= 0:
+                row[name] = bool(value)
+    else:
+        present = mask.tolist() if mask is not None else None
+        for i, (row, value) in enumerate(zip(rows, values)):
+            if present is None or present[i]:
+                row[name] = value
+
+
+def build_graph_tables(graph: nx.Graph) -> dict[str, Any]:
+    """Convert a graph into columnar arrays ready to be written by `write_graph_tables`
+
+    This walks the graph without awaiting, so it sees a consistent state.
+    """
+    strings = _StringTable()
+    node_ids = list(graph.nodes())
+    positions = {node_id: i for i, node_id in enumerate(node_ids)}
+    nodes = np.array([strings.add(str(n)) for n in node_ids], dtype=np.int64)
+
+    edge_list = list(graph.edges(data=True))
+    edges = np.array(
+        [(positions[u], positions[v]) for u, v, _ in edge_list], dtype=np.int64
+    ).reshape(-1, 2)
+
+    def encode(rows: list[dict[str, Any]], prefix: str):
+        # Keep attribute names in order of first appearance
+        names = dict.fromkeys(k for row in rows for k in row)
+        columns = []
+        arrays = {}
+        for i, name in enumerate(names):
+            kind, array, mask = _encode_column(
+                [row.get(name, _MISSING) for row in rows], strings
+            )
+            columns.append({"name": name, "kind": kind, "mask": mask is not None})
+            arrays[f"{prefix}_{i}"] = array
+            if mask is not None:
+                arrays[f"{prefix}_{i}.mask"] = mask
+        return columns, arrays
+
+    node_columns, node_arrays = encode([graph.nodes[n] for n in node_ids], "node")
+    edge_columns, edge_arrays = encode([data for _, _, data in edge_list], "edge")
+
+    offsets = np.zeros(len(strings.strings) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in strings.strings], out=offsets[1:])
+    return {
+        "meta": {
+            "format": FORMAT_VERSION,
+            "nodes": len(node_ids),
+            "edges": len(edge_list),
+            "node_columns": node_columns,
+            "edge_columns": edge_columns,
+        },
+        "text": "".join(strings.strings),
+        "arrays": {
+            "string_offsets": offsets,
+            "nodes": nodes,
+            "edges": edges,
+            **node_arrays,
+            **edge_arrays,
+        },
+    }
+
+
+def write_graph_tables(tables: dict[str, Any], directory: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    with open(
+        os.path.join(directory, "strings.txt"), "w", encoding="utf-8", newline=""
+    ) as f:
+        f.write(tables["text"])
+    for name, array in tables["arrays"].items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+    write_json(tables["meta"], os.path.join(directory, "tables.json"))
+
+
+def read_graph_tables(directory: str) -> nx.Graph:
+    """Rebuild a graph from the memory-mapped columnar tables of a snapshot"""
+    meta = load_json(os.path.join(directory, "tables.json"))
+    if meta is None:
+        raise FileNotFoundError(f"Graph snapshot tables not found in {directory}")
+
+    def array(name: str) -> np.ndarray:
+        return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+    with open(
+        os.path.join(directory, "strings.txt"), encoding="utf-8", newline=""
+    ) as f:
+        text = f.read()
+    offsets = array("string_offsets").tolist()
+    strings = [text[a:b] for a, b in zip(offsets, offsets[1:])]
+
+    node_ids = [strings[i] for i in array("nodes").tolist()]
+    node_rows: list[dict[str, Any]] = [{} for _ in node_ids]
+    for i, column in enumerate(meta["node_columns"]):
+        _decode_column(
+            column["kind"],
+            array(f"node_{i}"),
+            array(f"node_{i}.mask") if column["mask"] else None,
+            strings,
+            node_rows,
+            column["name"],
+        )
+
+    edge_pairs = array("edges").tolist()
+    edge_rows: list[dict[str, Any]] = [{} for _ in edge_pairs]
+    for i, column in enumerate(meta["edge_columns"]):
+        _decode_column(
+            column["kind"],
+            array(f"edge_{i}"),
+            array(f"edge_{i}.mask") if column["mask"] else None,
+            strings,
+            edge_rows,
+            column["name"],
+        )
+
+    graph = nx.Graph()
+    graph.add_nodes_from(zip(node_ids, node_rows))
+    graph.add_edges_from(
+        (node_ids[u], node_ids[v], data) for (u, v), data in zip(edge_pairs, edge_rows)
+    )
+    return graph
+
+
+def apply_journal_record(graph: nx.Graph, record: dict[str, Any]) -> bool:
+    """Apply one journal record to the graph, returning False for unknown records"""
+    op = record.get("op")
+    if op == "node":
+        node_id = record["id"]
+        if graph.has_node(node_id):
+            attributes = graph.nodes[node_id]
+            attributes.clear()
+            attributes.update(record["data"])
+        else:
+            graph.add_node(node_id, **record["data"])
+    elif op == "edge":
+        source, target = record["src"], record["tgt"]
+        if graph.has_edge(source, target):
+            attributes = graph.edges[source, target]
+            attributes.clear()
+            attributes.update(record["data"])
+        else:
+            graph.add_edge(source, target, **record["data"])
+    elif op == "delete_nodes":
+        graph.remove_nodes_from(record["ids"])
+    elif op == "delete_edges":
+        graph.remove_edges_from([tuple(edge) for edge in record["edges"]])
+    else:
+        return False
+    return True
+
+
+class NetworkXSnapshotStore:
+    """Current snapshot generation and journal position for one graph file
+
+    Callers hold the storage lock around every method, which also serializes
+    journal appends and compactions of different processes.
+    """
+
+    def __init__(self, base_file: str, namespace: str):
+        self.base_file = base_file
+        self.namespace = namespace
+        self.manifest_file = f"{base_file}.kg.json"
+        self.legacy_graphml_file = f"{base_file}.graphml"
+        self.compact_size = get_env_value(
+            "NETWORKX_JOURNAL_COMPACT_SIZE", DEFAULT_NETWORKX_JOURNAL_COMPACT_SIZE, int
+        )
+        # Generation and journal offset that the in-memory graph reflects
+        self.generation: str | None = None
+        self.journal_offset = 0
+
+    def _snapshot_dir(self, generation: str) -> str:
+        return f"{self.base_file}.kg.{generation}"
+
+    def _journal_file(self, generation: str) -> str:
+        return os.path.join(self._snapshot_dir(generation), "journal.jsonl")
+
+    def _current_generation(self) -> str | None:
+        manifest = load_json(self.manifest_file)
+        return manifest.get("generation") if manifest else None
+
+    def load(self, migrate_legacy: bool = False) -> nx.Graph:
+        """Read the current snapshot and replay its whole journal
+
+        Args:
+            migrate_legacy: Convert a GraphML file of an earlier version when there
+                is no snapshot yet. This writes files, so the storage lock must be held.
+        """
+        generation = self._current_generation()
+        if generation is None:
+            graph = self._migrate_legacy_graphml() if migrate_legacy else None
+            if graph is None:
+                self.generation = None
+                self.journal_offset = 0
+                return nx.Graph()
+            return graph
+
+        graph = read_graph_tables(self._snapshot_dir(generation))
+        self.generation = generation
+        self.journal_offset = 0
+        journal_file = self._journal_file(generation)
+        if os.path.exists(journal_file):
+            truncate_torn_tail(journal_file)
+        replayed = self._replay(graph)
+        logger.info(
+            f"Loaded graph {self.namespace} with {graph.number_of_nodes()} nodes, "
+            f"{graph.number_of_edges()} edges ({replayed} journal records)"
+        )
+        return graph
+
+    def refresh(self, graph: nx.Graph) -> nx.Graph:
+        """Bring a graph loaded earlier up to date with the files
+
+        Only the journal records appended since the last load or refresh are
+        replayed, unless the snapshot generation has changed in the meantime.
+        """
+        generation = self._current_generation()
+        if generation is None or generation != self.generation:
+            return self.load()
+        replayed = self._replay(graph)
+        logger.debug(
+            f"Process {os.getpid()} replayed {replayed} journal records for {self.namespace}"
+        )
+        return graph
+
+    def _replay(self, graph: nx.Graph) -> int:
+        journal_file = self._journal_file(self.generation)
+        if not os.path.exists(journal_file):
+            return 0
+        with open(journal_file, "rb") as f:
+            f.seek(self.journal_offset)
+            chunk = f.read()
+        # Leave an incomplete last line for the next refresh
+        end = chunk.rfind(b"\n") + 1
+        count = 0
+        for line_number, line in enumerate(chunk[:end].splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(
+                    f"Skipping unreadable journal record {line_number} in {journal_file}"
+                )
+                continue
+            if apply_journal_record(graph, record):
+                count += 1
+            else:
+                logger.warning(
+                    f"Unknown journal operation {record.get('op')!r} in {journal_file}"
+                )
+        self.journal_offset += end
+        return count
+
+    def _migrate_legacy_graphml(self) -> nx.Graph | None:
+        if not os.path.exists(self.legacy_graphml_file):
+            return None
+        logger.info(
+            f"Converting {self.legacy_graphml_file} to the binary graph snapshot format"
+        )
+        graph = nx.read_graphml(self.legacy_graphml_file)
+        self.write_snapshot(build_graph_tables(graph))
+        # The GraphML file is no longer read or updated
+        os.replace(self.legacy_graphml_file, f"{self.legacy_graphml_file}.bak")
+        return graph
+
+    def append(self, records: list[dict[str, Any]]) -> None:
+        """Append a batch of records to the journal of the current generation"""
+        if not records:
+            return
+        if self.generation is None:
+            # First save: start from an empty snapshot
+            self.write_snapshot(build_graph_tables(nx.Graph()))
+        data = "".join(_dumps(record) + "\n" for record in records).encode("utf-8")
+        with open(self._journal_file(self.generation), "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            self.journal_offset = f.tell()
+
+    def needs_compaction(self) -> bool:
+        """The journal is compacted once it outgrows both the threshold and the snapshot"""
+        if self.generation is None:
+            return False
+        if self.journal_offset < self.compact_size:
+            return False
+        snapshot_dir = self._snapshot_dir(self.generation)
+        try:
+            snapshot_size = sum(
+                entry.stat().st_size
+                for entry in os.scandir(snapshot_dir)
+                if entry.name != "journal.jsonl"
+            )
+        except OSError:
+            snapshot_size = 0
+        return self.journal_offset >= snapshot_size
+
+    def write_snapshot(self, tables: dict[str, Any]) -> None:
+        """Write the tables as a new generation with an empty journal and switch to it"""
+        previous = self._current_generation()
+        generation = f"{time.time_ns():x}"
+        snapshot_dir = self._snapshot_dir(generation)
+        write_graph_tables(tables, snapshot_dir)
+        open(self._journal_file(generation), "wb").close()
+
+        tmp_file = f"{self.manifest_file}.tmp"
+        write_json({"format": FORMAT_VERSION, "generation": generation}, tmp_file)
+        os.replace(tmp_file, self.manifest_file)
+        self.generation = generation
+        self.journal_offset = 0
+        logger.info(
+            f"Wrote graph snapshot {generation} for {self.namespace} with "
+            f"{tables['meta']['nodes']} nodes, {tables['meta']['edges']} edges"
+        )
+        self._remove_stale_snapshots(keep=(generation, previous))
+
+    def _remove_stale_snapshots(self, keep: tuple[str | None, ...]) -> None:
+        """Remove the snapshot directories of all generations not in `keep`
+
+        The previous generation is kept, so a process that read the old manifest
+        just before it was replaced can still load that snapshot.
+        """
+        directory = os.path.dirname(self.base_file) or "."
+        prefix = f"{os.path.basename(self.base_file)}.kg."
+        kept = {
+            os.path.basename(self._snapshot_dir(generation))
+            for generation in keep
+            if generation is not None
+        }
+        for entry in os.scandir(directory):
+            if (
+                entry.is_dir()
+                and entry.name.startswith(prefix)
+                and entry.name not in kept
+            ):
+                shutil.rmtree(entry.path, ignore_errors=True)
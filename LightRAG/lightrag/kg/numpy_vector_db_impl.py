@@ -0,0 +1,745 @@
+import glob
+import json
+import os
+import struct
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, final
+
+import numpy as np
+
+from lightrag.utils import EmbeddingFunc, logger, compute_mdhash_id
+from lightrag.base import BaseVectorStorage, vector_scan_record
+from lightrag.constants import (
+    STORAGE_SCAN_BATCH_SIZE,
+    VECTOR_REBUILD_NAMESPACE_SUFFIX,
+)
+
+from .shared_storage import (
+    get_storage_lock,
+    get_update_flag,
+    set_all_update_flags,
+)
+
+# Fixed size of the .npy header, so the row count can be updated in place on append
+_NPY_HEADER_SIZE = 256
+# Rows scored per block, bounds the temporary memory of int8/float16 queries
+_QUERY_BLOCK_ROWS = 65536
+_SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+
+def _write_npy_header(f, dtype: np.dtype, rows: int, dim: int) -> None:
+    """Write a version 1.0 .npy header padded to _NPY_HEADER_SIZE bytes at the start of f"""
+    header = {
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": (rows, dim),
+    }
+    prefix = np.lib.format.magic(1, 0)
+    header_len = _NPY_HEADER_SIZE - len(prefix) - 2
+    text = repr(header).encode("latin1")
+    body = text + b" " * (header_len - len(text) - 1) + b"\n"
+    f.seek(0)
+    f.write(prefix + struct.pack("<H", header_len) + body)
+
+
+@final
+@dataclass
+class NumpyVectorDBStorage(BaseVectorStorage):
+    """
+    Local vector storage backed by a memory-mapped .npy matrix.
+
+    Vectors are normalized and stored as float32, float16 or int8 rows in
+    vdb_{namespace}.npy, which is memory-mapped instead of loaded. Metadata is kept in
+    an append-only vdb_{namespace}.meta.jsonl log next to it. New and updated vectors are
+    appended on index_done_callback, and the files are compacted only once deleted rows
+    make up a large part of them.
+
+    Compactions and rebuilds write the matrix to a new vdb_{namespace}.{generation}.npy
+    file, named in the first line of the new metadata log. Replacing the log switches
+    both files at once, so a crash never pairs a matrix with the rows of another.
+
+    Set vector_dtype in vector_db_storage_cls_kwargs (or NUMPY_VECTOR_DTYPE) to
+    float16 or int8 to reduce disk and page cache usage.
+    """
+
+    scan_order = "row"
+
+    def __post_init__(self):
+        # Use global config value if specified, otherwise use default
+        kwargs = self.global_config.get("vector_db_storage_cls_kwargs", {})
+        cosine_threshold = kwargs.get("cosine_better_than_threshold")
+        if cosine_threshold is None:
+            raise ValueError(
+                "cosine_better_than_threshold must be specified in vector_db_storage_cls_kwargs"
+            )
+        self.cosine_better_than_threshold = cosine_threshold
+
+        vector_dtype = kwargs.get(
+            "vector_dtype", os.getenv("NUMPY_VECTOR_DTYPE", "float32")
+        )
+        if vector_dtype not in _SUPPORTED_DTYPES:
+            raise ValueError(
+                f"vector_dtype must be one of {_SUPPORTED_DTYPES}, got {vector_dtype}"
+            )
+        self._dtype = np.dtype(vector_dtype)
+
+        working_dir = self.global_config["working_dir"]
+        if self.workspace:
+            # Include workspace in the file path for data isolation
+            workspace_dir = os.path.join(working_dir, self.workspace)
+            os.makedirs(workspace_dir, exist_ok=True)
+            base_path = os.path.join(workspace_dir, f"vdb_{self.namespace}")
+        else:
+            # Default behavior when workspace is empty
+            base_path = os.path.join(working_dir, f"vdb_{self.namespace}")
+        self._base_path = base_path
+        self._meta_file = base_path + ".meta.jsonl"
+        # Generation of the matrix file, None for vdb_{namespace}.npy
+        self._generation: str | None = None
+
+        self._dim = self.embedding_func.embedding_dim
+        self._storage_lock = None
+        self.storage_updated = None
+
+        self._load()
+
+    async def initialize(self):
+        """Initialize storage data"""
+        # Get the update flag for cross-process update notification
+        self.storage_updated = await get_update_flag(self.namespace)
+        # Get the storage lock for use in other methods
+        self._storage_lock = get_storage_lock(enable_logging=False)
+
+    # ------------------------------------------------------------------
+    # In-memory state
+    # ------------------------------------------------------------------
+
+    @property
+    def _matrix_file(self) -> str:
+        return self._generation_file(self._generation)
+
+    def _generation_file(self, generation: str | None) -> str:
+        if generation is None:
+            return self._base_path + ".npy"
+        return f"{self._base_path}.{generation}.npy"
+
+    def _reset_state(self):
+        self._matrix: np.ndarray | None = None  # memory-mapped persisted rows
+        self._persisted_rows = 0
+        self._pending_vectors: list[np.ndarray] = []
+        self._pending_matrix: np.ndarray | None = None
+        self._pending_log: list[str] = []
+        self._row_ids: list[str | None] = []
+        self._row_meta: list[dict[str, Any] | None] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._id_to_row: dict[str, int] = {}
+        self._entity_rows: dict[str, set[int]] = {}
+
+    def _load(self):
+        """Map the vector matrix and replay the metadata log"""
+        self._reset_state()
+
+        records = []
+        self._generation = None
+        if os.path.exists(self._meta_file):
+            with open(self._meta_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn last line from an interrupted write
+                        logger.warning(
+                            f"Skipping corrupted metadata line in {self._meta_file}"
+                        )
+            if records and "generation" in records[0]:
+                self._generation = records.pop(0)["generation"]
+                if not os.path.exists(self._matrix_file):
+                    raise ValueError(
+                        f"Vector file {self._matrix_file} named by {self._meta_file} is missing"
+                    )
+
+        if os.path.exists(self._matrix_file):
+            matrix = np.load(self._matrix_file, mmap_mode="r")
+            if matrix.ndim != 2 or matrix.shape[1] != self._dim:
+                raise ValueError(
+                    f"Vector file {self._matrix_file} has shape {matrix.shape}, expected dimension {self._dim}"
+                )
+            if matrix.dtype != self._dtype:
+                raise ValueError(
+                    f"Vector file {self._matrix_file} is {matrix.dtype}, configured vector_dtype is {self._dtype}"
+                )
+            self._matrix = matrix
+            self._persisted_rows = matrix.shape[0]
+
+        self._ensure_capacity(self._persisted_rows)
+        self._row_ids = [None] * self._persisted_rows
+        self._row_meta = [None] * self._persisted_rows
+
+        for record in records:
+            if "del" in record:
+                self._mark_deleted(record["del"])
+                continue
+            row = record["row"]
+            if row >= self._persisted_rows:
+                # Metadata without its vector, flush was interrupted
+                continue
+            self._set_row(row, record["data"])
+
+        logger.info(
+            f"Loaded {len(self._id_to_row)} vectors for {self.namespace} ({self._dtype}, rows={self._persisted_rows})"
+        )
+
+    def _ensure_capacity(self, rows: int):
+        if rows > len(self._alive):
+            alive = np.zeros(max(rows, len(self._alive) * 2, 1024), dtype=bool)
+            alive[: len(self._alive)] = self._alive
+            self._alive = alive
+
+    def _set_row(self, row: int, meta: dict[str, Any]):
+        doc_id = meta["__id__"]
+        self._mark_deleted(doc_id)
+        self._row_ids[row] = doc_id
+        self._row_meta[row] = meta
+        self._alive[row] = True
+        self._id_to_row[doc_id] = row
+        for field_name in ("src_id", "tgt_id"):
+            entity_name = meta.get(field_name)
+            if entity_name is not None:
+                self._entity_rows.setdefault(entity_name, set()).add(row)
+
+    def _mark_deleted(self, doc_id: str) -> bool:
+        row = self._id_to_row.pop(doc_id, None)
+        if row is None:
+            return False
+        meta = self._row_meta[row]
+        for field_name in ("src_id", "tgt_id"):
+            entity_name = meta.get(field_name) if meta else None
+            rows = self._entity_rows.get(entity_name)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._entity_rows[entity_name]
+        self._row_ids[row] = None
+        self._row_meta[row] = None
+        self._alive[row] = False
+        return True
+
+    def _delete_ids(self, ids: list[str]) -> int:
+        deleted = 0
+        for doc_id in ids:
+            if self._mark_deleted(doc_id):
+                self._pending_log.append(json.dumps({"del": doc_id}))
+                deleted += 1
+        return deleted
+
+    def _encode_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        if self._dtype == np.int8:
+            return np.clip(np.round(vectors * 127.0), -127, 127).astype(np.int8)
+        return vectors.astype(self._dtype)
+
+    def _get_pending_matrix(self) -> np.ndarray | None:
+        if not self._pending_vectors:
+            return None
+        if self._pending_matrix is None:
+            self._pending_matrix = np.concatenate(self._pending_vectors)
+            self._pending_vectors = [self._pending_matrix]
+        return self._pending_matrix
+
+    def _score(self, query_vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every row, persisted and pending"""
+        scale = 1.0 / 127.0 if self._dtype == np.int8 else 1.0
+        parts = []
+        if self._matrix is not None and self._persisted_rows:
+            for start in range(0, self._persisted_rows, _QUERY_BLOCK_ROWS):
+                block = self._matrix[start : start + _QUERY_BLOCK_ROWS]
+                parts.append(block.astype(np.float32, copy=False) @ query_vector)
+        pending = self._get_pending_matrix()
+        if pending is not None:
+            parts.append(pending.astype(np.float32, copy=False) @ query_vector)
+        if not parts:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(parts) * scale
+
+    async def _get_client(self):
+        """Check if the storage should be reloaded"""
+        # Acquire lock to prevent concurrent read and write
+        async with self._storage_lock:
+            # Check if data needs to be reloaded
+            if self.storage_updated.value:
+                logger.info(
+                    f"Process {os.getpid()} reloading {self.namespace} due to update by another process"
+                )
+                self._load()
+                # Reset update flag
+                self.storage_updated.value = False
+            return self
+
+    # ------------------------------------------------------------------
+    # BaseVectorStorage interface
+    # ------------------------------------------------------------------
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        logger.debug(f"Inserting {len(data)} to {self.namespace}")
+        if not data:
+            return
+
+        current_time = int(time.time())
+        list_data = [
+            {
+                "__id__": k,
+                # Copied records keep their creation time
+                "__created_at__": v.get("created_at", current_time),
+                **{k1: v1 for k1, v1 in v.items() if k1 in self.meta_fields},
+            }
+            for k, v in data.items()
+        ]
+        contents = [v["content"] for v in data.values()]
+        # Execute embedding outside of lock to avoid long lock times
+        embeddings = await self._embed_contents(contents)
+        if len(embeddings) != len(list_data):
+            # sometimes the embedding is not returned correctly. just log it.
+            logger.error(
+                f"embedding is not 1-1 with data, {len(embeddings)} != {len(list_data)}"
+            )
+            return
+
+        await self._get_client()
+        encoded = self._encode_vectors(embeddings)
+        first_row = len(self._row_ids)
+        self._ensure_capacity(first_row + len(list_data))
+        self._row_ids.extend([None] * len(list_data))
+        self._row_meta.extend([None] * len(list_data))
+        for offset, meta in enumerate(list_data):
+            row = first_row + offset
+            self._set_row(row, meta)
+            self._pending_log.append(
+                json.dumps({"row": row, "data": meta}, ensure_ascii=False)
+            )
+        self._pending_vectors.append(encoded)
+        self._pending_matrix = None
+
+    async def query(
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        query_embedding: np.ndarray | None = None,
+    ) -> list[dict[str, Any]]:
+        # Execute embedding outside of lock to avoid improve cocurrent
+        embedding = await self._embed_query(query, query_embedding)
+        # Keep the query in float32, only the stored rows are quantized
+        query_vector = np.asarray(embedding[0], dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        query_vector = query_vector / (norm if norm else 1.0)
+
+        await self._get_client()
+        scores = self._score(query_vector)
+        total_rows = len(scores)
+        if total_rows == 0 or top_k <= 0:
+            return []
+
+        alive = self._alive[:total_rows]
+        scores = np.where(
+            alive & (scores >= self.cosine_better_than_threshold), scores, -np.inf
+        )
+        k = min(top_k, total_rows)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates])]
+
+        results = []
+        for row in candidates:
+            score = float(scores[row])
+            if score == -np.inf:
+                break
+            meta = self._row_meta[row]
+            results.append(
+                {
+                    **meta,
+                    "id": meta["__id__"],
+                    "distance": score,
+                    "created_at": meta.get("__created_at__"),
+                }
+            )
+        return results
+
+    @property
+    async def client_storage(self):
+        await self._get_client()
+        return {
+            "embedding_dim": self._dim,
+            "data": [meta for meta in self._row_meta if meta is not None],
+        }
+
+    async def delete(self, ids: list[str]):
+        """Delete vectors with specified IDs
+
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+
+        Args:
+            ids: List of vector IDs to be deleted
+        """
+        try:
+            await self._get_client()
+            deleted = self._delete_ids(ids)
+            logger.debug(
+                f"Successfully deleted {deleted} vectors from {self.namespace}"
+            )
+        except Exception as e:
+            logger.error(f"Error while deleting vectors from {self.namespace}: {e}")
+
+    async def delete_entity(self, entity_name: str) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        try:
+            entity_id = compute_mdhash_id(entity_name, prefix="ent-")
+            logger.debug(
+                f"Attempting to delete entity {entity_name} with ID {entity_id}"
+            )
+            await self._get_client()
+            if self._delete_ids([entity_id]):
+                logger.debug(f"Successfully deleted entity {entity_name}")
+            else:
+                logger.debug(f"Entity {entity_name} not found in storage")
+        except Exception as e:
+            logger.error(f"Error deleting entity {entity_name}: {e}")
+
+    async def delete_entity_relation(self, entity_name: str) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        try:
+            await self._get_client()
+            rows = self._entity_rows.get(entity_name, set())
+            ids_to_delete = [self._row_ids[row] for row in sorted(rows)]
+            logger.debug(
+                f"Found {len(ids_to_delete)} relations for entity {entity_name}"
+            )
+            if ids_to_delete:
+                self._delete_ids(ids_to_delete)
+                logger.debug(
+                    f"Deleted {len(ids_to_delete)} relations for {entity_name}"
+                )
+            else:
+                logger.debug(f"No relations found for entity {entity_name}")
+        except Exception as e:
+            logger.error(f"Error deleting relations for {entity_name}: {e}")
+
+    def _flush(self):
+        """Append pending vectors and metadata to disk, compacting if needed"""
+        pending = self._get_pending_matrix()
+        if pending is not None and len(pending):
+            new_rows = self._persisted_rows + len(pending)
+            # Drop the read-only mapping before extending the file
+            self._matrix = None
+            mode = "r+b" if os.path.exists(self._matrix_file) else "w+b"
+            with open(self._matrix_file, mode) as f:
+                if mode == "w+b":
+                    _write_npy_header(f, self._dtype, 0, self._dim)
+                f.seek(
+                    _NPY_HEADER_SIZE
+                    + self._persisted_rows * self._dim * self._dtype.itemsize
+                )
+                f.write(np.ascontiguousarray(pending).tobytes())
+                f.truncate()
+                # Vectors are written before the header and metadata refer to them
+                f.flush()
+                _write_npy_header(f, self._dtype, new_rows, self._dim)
+            self._persisted_rows = new_rows
+            self._pending_vectors = []
+            self._pending_matrix = None
+            self._matrix = np.load(self._matrix_file, mmap_mode="r")
+
+        if self._pending_log:
+            with open(self._meta_file, "a", encoding="utf-8") as f:
+                f.write("\n".join(self._pending_log) + "\n")
+            self._pending_log = []
+
+        dead_rows = self._persisted_rows - len(self._id_to_row)
+        if dead_rows >= 1024 and dead_rows > self._persisted_rows // 4:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the vector and metadata files without deleted rows"""
+        live_rows = np.flatnonzero(self._alive[: self._persisted_rows])
+        logger.info(
+            f"Compacting {self.namespace}: {self._persisted_rows} rows -> {len(live_rows)} rows"
+        )
+        generation = uuid.uuid4().hex
+        with open(self._generation_file(generation), "w+b") as f:
+            _write_npy_header(f, self._dtype, len(live_rows), self._dim)
+            f.seek(_NPY_HEADER_SIZE)
+            for start in range(0, len(live_rows), _QUERY_BLOCK_ROWS):
+                block_rows = live_rows[start : start + _QUERY_BLOCK_ROWS]
+                f.write(np.ascontiguousarray(self._matrix[block_rows]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._commit_generation(
+            generation,
+            (
+                json.dumps(
+                    {"row": new_row, "data": self._row_meta[row]}, ensure_ascii=False
+                )
+                for new_row, row in enumerate(live_rows)
+            ),
+        )
+
+    def _commit_generation(self, generation: str, meta_lines) -> None:
+        """Switch to a written matrix generation with a new metadata log
+
+        The log naming the generation replaces the current one atomically, then
+        the matrix files of other generations are removed.
+        """
+        tmp_meta_file = self._meta_file + ".tmp"
+        with open(tmp_meta_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"generation": generation}) + "\n")
+            for line in meta_lines:
+                f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._matrix = None
+        os.replace(tmp_meta_file, self._meta_file)
+        self._remove_matrix_files(keep=self._generation_file(generation))
+        self._load()
+
+    def _remove_matrix_files(self, keep: str | None = None) -> None:
+        """Remove the matrix files of all generations but `keep`"""
+        for file_name in [self._base_path + ".npy"] + glob.glob(
+            glob.escape(self._base_path) + ".*.npy"
+        ):
+            if file_name != keep and os.path.exists(file_name):
+                try:
+                    os.remove(file_name)
+                except OSError as e:
+                    logger.warning(f"Unable to remove {file_name}: {e}")
+
+    async def index_done_callback(self) -> bool:
+        """Save data to disk"""
+        async with self._storage_lock:
+            # Check if storage was updated by another process
+            if self.storage_updated.value:
+                # Storage was updated by another process, reload data instead of saving
+                logger.warning(
+                    f"Storage for {self.namespace} was updated by another process, reloading..."
+                )
+                self._load()
+                # Reset update flag
+                self.storage_updated.value = False
+                return False  # Return error
+
+        # Acquire lock and perform persistence
+        async with self._storage_lock:
+            try:
+                # Save data to disk
+                self._flush()
+                # Notify other processes that data has been updated
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+                return True  # Return success
+            except Exception as e:
+                logger.error(f"Error saving data for {self.namespace}: {e}")
+                return False  # Return error
+
+    def _format_meta(self, meta: dict[str, Any]) -> dict[str, Any]:
+        return {
+            **meta,
+            "id": meta.get("__id__"),
+            "created_at": meta.get("__created_at__"),
+        }
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        """Get vector data by its ID
+
+        Args:
+            id: The unique identifier of the vector
+
+        Returns:
+            The vector data if found, or None if not found
+        """
+        await self._get_client()
+        row = self._id_to_row.get(id)
+        if row is None:
+            return None
+        return self._format_meta(self._row_meta[row])
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        """Get multiple vector data by their IDs
+
+        Args:
+            ids: List of unique identifiers
+
+        Returns:
+            List of vector data objects that were found
+        """
+        if not ids:
+            return []
+        await self._get_client()
+        return [
+            self._format_meta(self._row_meta[self._id_to_row[id]])
+            for id in ids
+            if id in self._id_to_row
+        ]
+
+    def _row_vectors(self, rows: list[int]) -> np.ndarray:
+        """Decoded vectors of the given rows, persisted or pending"""
+        vectors = np.empty((len(rows), self._dim), dtype=np.float32)
+        pending = self._get_pending_matrix()
+        for i, row in enumerate(rows):
+            if row < self._persisted_rows:
+                vectors[i] = self._matrix[row]
+            else:
+                vectors[i] = pending[row - self._persisted_rows]
+        if self._dtype == np.int8:
+            vectors /= 127.0
+        return vectors
+
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        include_vector: bool = False,
+        start_after: int | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Iterate over the ids present at the start of the iteration
+
+        Rows are looked up per batch, so compaction during the iteration is
+        harmless. Vectors are returned normalized, as stored. Ids are listed in
+        the order of the metadata log, so a scan resumed with `start_after`
+        skips that many ids.
+        """
+        await self._get_client()
+        ids = list(self._id_to_row)[start_after or 0 :]
+        for start in range(0, len(ids), batch_size):
+            await self._get_client()
+            rows = [
+                self._id_to_row[id]
+                for id in ids[start : start + batch_size]
+                if id in self._id_to_row
+            ]
+            vectors = self._row_vectors(rows) if include_vector else [None] * len(rows)
+            batch = [
+                vector_scan_record(
+                    self._format_meta(self._row_meta[row]), fields, vector
+                )
+                for row, vector in zip(rows, vectors)
+            ]
+            if batch:
+                yield batch
+
+    async def create_rebuild_storage(
+        self, embedding_func: EmbeddingFunc
+    ) -> "NumpyVectorDBStorage":
+        namespace = self.namespace + VECTOR_REBUILD_NAMESPACE_SUFFIX
+        # Discard the files an interrupted rebuild may have left
+        base_path = os.path.join(os.path.dirname(self._base_path), f"vdb_{namespace}")
+        for file_name in [base_path + ".npy", base_path + ".meta.jsonl"] + glob.glob(
+            glob.escape(base_path) + ".*.npy"
+        ):
+            if os.path.exists(file_name):
+                os.remove(file_name)
+        storage = NumpyVectorDBStorage(
+            namespace=namespace,
+            workspace=self.workspace,
+            global_config=self.global_config,
+            embedding_func=embedding_func,
+            meta_fields=self.meta_fields,
+        )
+        await storage.initialize()
+        return storage
+
+    async def swap_rebuild_storage(self, storage: "NumpyVectorDBStorage") -> None:
+        async with self._storage_lock:
+            storage._flush()
+            storage._matrix = None
+            self.embedding_func = storage.embedding_func
+            self._dim = self.embedding_func.embedding_dim
+            if os.path.exists(storage._matrix_file):
+                # Move the rebuilt matrix in as a new generation of this storage
+                generation = uuid.uuid4().hex
+                os.replace(storage._matrix_file, self._generation_file(generation))
+                meta_lines = []
+                if os.path.exists(storage._meta_file):
+                    with open(storage._meta_file, encoding="utf-8") as f:
+                        meta_lines = [line.strip() for line in f if line.strip()]
+                if storage._generation is not None:
+                    # Drop the generation line of the rebuild storage
+                    meta_lines = meta_lines[1:]
+                self._commit_generation(generation, meta_lines)
+            else:
+                # Nothing was rebuilt
+                self._matrix = None
+                if os.path.exists(self._meta_file):
+                    os.remove(self._meta_file)
+                self._remove_matrix_files()
+                self._load()
+            if os.path.exists(storage._meta_file):
+                os.remove(storage._meta_file)
+
+            # Notify other processes that data has been updated
+            await set_all_update_flags(self.namespace)
+            # Reset own update flag to avoid self-reloading
+            self.storage_updated.value = False
+
+        logger.info(
+            f"Process {os.getpid()} swapped in rebuilt {self.namespace}(file:{self._matrix_file})"
+        )
+
+    async def drop(self) -> dict[str, str]:
+        """Drop all vector data from storage and clean up resources
+
+        This method will:
+        1. Remove the vector and metadata files if they exist
+        2. Reset the in-memory state
+        3. Update flags to notify other processes
+        4. Changes is persisted to disk immediately
+
+        Returns:
+            dict[str, str]: Operation status and message
+            - On success: {"status": "success", "message": "data dropped"}
+            - On failure: {"status": "error", "message": "<error details>"}
+        """
+        try:
+            async with self._storage_lock:
+                self._matrix = None
+                if os.path.exists(self._meta_file):
+                    os.remove(self._meta_file)
+                self._remove_matrix_files()
+                self._generation = None
+                self._reset_state()
+
+                # Notify other processes that data has been updated
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+
+                logger.info(
+                    f"Process {os.getpid()} drop {self.namespace}(file:{self._matrix_file})"
+                )
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
@@ -5,7 +5,7 @@ import re
 import datetime
 from datetime import timezone
 from dataclasses import dataclass, field
-from typing import Any, Union, final
+from typing import Any, AsyncIterator, Literal, Union, final
 import numpy as np
 import configparser
 
@@ -22,13 +22,29 @@ from ..base import (
     BaseGraphStorage,
     BaseKVStorage,
     BaseVectorStorage,
+    DOC_STATUS_SORT_FIELDS,
     DocProcessingStatus,
     DocStatus,
+    DocStatusPage,
+    DocStatusSortField,
     DocStatusStorage,
+    decode_doc_status_cursor,
+    doc_status_from_dict,
+    doc_status_sort_value,
+    encode_doc_status_cursor,
+    select_record_fields,
+    vector_scan_record,
 )
 from ..namespace import NameSpace, is_namespace
-from ..utils import logger
-from ..constants import GRAPH_FIELD_SEP
+from ..utils import EmbeddingFunc, logger
+from ..constants import (
+    GRAPH_FIELD_SEP,
+    GRAPH_SCAN_BATCH_SIZE,
+    GRAPH_UPSERT_BATCH_SIZE,
+    STORAGE_SCAN_BATCH_SIZE,
+    VECTOR_REBUILD_NAMESPACE_SUFFIX,
+)
+from .subgraph import SubgraphExtractor
 
 import pipmaster as pm
 
@@ -439,6 +455,29 @@ class PostgreSQLDB:
                 f"Failed to add chunks_list column to LIGHTRAG_DOC_STATUS: {e}"
             )
 
+    async def _create_doc_status_indexes(self):
+        """Create the LIGHTRAG_DOC_STATUS indexes used by status counts, filters and listings"""
+        indexes = {
+            "idx_lightrag_doc_status_workspace_status": "(workspace, status)",
+            # Same expressions as the ORDER BY of PGDocStatusStorage.get_docs_paginated
+            "idx_lightrag_doc_status_workspace_created_at": "(workspace, (COALESCE(created_at, 'epoch'::timestamptz)), id)",
+            "idx_lightrag_doc_status_workspace_updated_at": "(workspace, (COALESCE(updated_at, 'epoch'::timestamptz)), id)",
+        }
+        for index_name, columns in indexes.items():
+            check_index_sql = f"""
+            SELECT 1 FROM pg_indexes
+            WHERE indexname = '{index_name}'
+            AND tablename = 'lightrag_doc_status'
+            """
+            index_exists = await self.query(check_index_sql)
+            if not index_exists:
+                logger.info(
+                    f"PostgreSQL, Creating index {index_name} on LIGHTRAG_DOC_STATUS"
+                )
+                await self.execute(
+                    f"CREATE INDEX {index_name} ON LIGHTRAG_DOC_STATUS{columns}"
+                )
+
     async def _migrate_text_chunks_add_llm_cache_list(self):
         """Add llm_cache_list column to LIGHTRAG_DOC_CHUNKS table if it doesn't exist"""
         try:
@@ -582,6 +621,12 @@ class PostgreSQLDB:
                 f"PostgreSQL, Failed to migrate text chunks llm_cache_list field: {e}"
             )
 
+        # Create doc status indexes for status counts and paginated listings
+        try:
+            await self._create_doc_status_indexes()
+        except Exception as e:
+            logger.error(f"PostgreSQL, Failed to create doc status indexes: {e}")
+
     async def query(
         self,
         sql: str,
@@ -627,6 +672,52 @@ class PostgreSQLDB:
                 logger.error(f"PostgreSQL database, error:{e}")
                 raise
 
+    async def query_batches(
+        self,
+        sql: str,
+        params: dict[str, Any] | None = None,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        key: str = "id",
+        after: Any = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Stream the rows of a query in batches ordered by a unique key column
+
+        Each batch is a separate keyset query for the rows after the last key of
+        the previous batch, so no connection or transaction is held between
+        batches and a caller can stop iterating at any point.
+
+        Args:
+            sql: Query without ORDER BY or LIMIT, selecting the key column
+            params: Query parameters, referenced as $1, $2, ... in sql
+            batch_size: Maximum number of rows per batch
+            key: Unique column the rows are ordered and resumed by
+            after: Key to start after, e.g. the last key of an interrupted scan
+        """
+        args = list(params.values()) if params else []
+        after = len(args) + 1
+        first_page = f"SELECT * FROM ({sql}) AS scan ORDER BY {key} LIMIT {batch_size}"
+        next_page = (
+            f"SELECT * FROM ({sql}) AS scan WHERE {key} > ${after} "
+            f"ORDER BY {key} LIMIT {batch_size}"
+        )
+        last_key = after
+        while True:
+            try:
+                async with self.pool.acquire() as connection:  # type: ignore
+                    if last_key is None:
+                        rows = await connection.fetch(first_page, *args)
+                    else:
+                        rows = await connection.fetch(next_page, *args, last_key)
+            except Exception as e:
+                logger.error(f"PostgreSQL database, error:{e}")
+                raise
+            if not rows:
+                break
+            last_key = rows[-1][key]
+            yield [dict(row) for row in rows]
+            if len(rows) < batch_size:
+                break
+
     async def execute(
         self,
         sql: str,
@@ -664,6 +755,36 @@ class PostgreSQLDB:
             logger.error(f"PostgreSQL database,\nsql:{sql},\ndata:{data},\nerror:{e}")
             raise
 
+    async def execute_in_transaction(
+        self,
+        statements: list[tuple[str, dict[str, Any] | None]],
+        with_age: bool = False,
+        graph_name: str | None = None,
+    ) -> None:
+        """Execute (sql, data) statements one by one in a single transaction
+
+        Unlike execute, no error is ignored: the first failing statement rolls
+        back the whole transaction and its error is raised.
+        """
+        async with self.pool.acquire() as connection:  # type: ignore
+            if with_age and graph_name:
+                await self.configure_age(connection, graph_name)
+            elif with_age and not graph_name:
+                raise ValueError("Graph name is required when with_age is True")
+
+            try:
+                async with connection.transaction():
+                    for sql, data in statements:
+                        if data is None:
+                            await connection.execute(sql)
+                        else:
+                            await connection.execute(sql, *data.values())
+            except Exception as e:
+                logger.error(
+                    f"PostgreSQL database, error in a transaction of {len(statements)} statements:{e}"
+                )
+                raise
+
 
 class ClientManager:
     _instances: dict[str, Any] = {"db": None, "ref_count": 0}
@@ -735,6 +856,8 @@ class ClientManager:
 class PGKVStorage(BaseKVStorage):
     db: PostgreSQLDB = field(default=None)
 
+    scan_order = "key"
+
     def __post_init__(self):
         self._max_batch_size = self.global_config["embedding_batch_num"]
 
@@ -911,6 +1034,45 @@ class PGKVStorage(BaseKVStorage):
 
         return results if results else []
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        start_after: str | None = None,
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        table_name = namespace_to_table_name(self.namespace)
+        if not table_name:
+            raise ValueError(f"Unknown namespace for iter_batches: {self.namespace}")
+
+        sql = f"SELECT * FROM {table_name} WHERE workspace=$1"
+        params = {"workspace": self.db.workspace}
+        async for rows in self.db.query_batches(
+            sql, params, batch_size, after=start_after
+        ):
+            batch = []
+            for row in rows:
+                create_time = row.get("create_time", 0)
+                update_time = row.get("update_time", 0)
+                row["create_time"] = create_time
+                row["update_time"] = create_time if update_time == 0 else update_time
+                if is_namespace(self.namespace, NameSpace.KV_STORE_TEXT_CHUNKS):
+                    # Parse llm_cache_list JSON string back to list
+                    llm_cache_list = row.get("llm_cache_list", [])
+                    if isinstance(llm_cache_list, str):
+                        try:
+                            llm_cache_list = json.loads(llm_cache_list)
+                        except json.JSONDecodeError:
+                            llm_cache_list = []
+                    row["llm_cache_list"] = llm_cache_list
+                elif is_namespace(
+                    self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE
+                ):
+                    # Same field mapping as get_by_ids
+                    row["return"] = row.get("return_value", "")
+                    row["mode"] = row.get("mode", "default")
+                batch.append((row["id"], select_record_fields(row, fields)))
+            yield batch
+
     async def filter_keys(self, keys: set[str]) -> set[str]:
         """Filter out duplicated content"""
         sql = SQL_TEMPLATES["filter_keys"].format(
@@ -980,6 +1142,16 @@ class PGKVStorage(BaseKVStorage):
                 }
 
                 await self.db.execute(upsert_sql, _data)
+        elif is_namespace(self.namespace, NameSpace.KV_STORE_EMBEDDING_CACHE):
+            for k, v in data.items():
+                upsert_sql = SQL_TEMPLATES["upsert_embedding_cache"]
+                _data = {
+                    "workspace": self.db.workspace,
+                    "id": k,
+                    "model": v.get("model", ""),
+                    "embedding": v["embedding"],
+                }
+                await self.db.execute(upsert_sql, _data)
 
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
@@ -1070,9 +1242,12 @@ class PGKVStorage(BaseKVStorage):
 @dataclass
 class PGVectorStorage(BaseVectorStorage):
     db: PostgreSQLDB | None = field(default=None)
+    # Workspace of the rows of a rebuild storage, see create_rebuild_storage
+    rebuild_workspace: str | None = field(default=None)
+
+    scan_order = "key"
 
     def __post_init__(self):
-        self._max_batch_size = self.global_config["embedding_batch_num"]
         config = self.global_config.get("vector_db_storage_cls_kwargs", {})
         cosine_threshold = config.get("cosine_better_than_threshold")
         if cosine_threshold is None:
@@ -1081,6 +1256,10 @@ class PGVectorStorage(BaseVectorStorage):
             )
         self.cosine_better_than_threshold = cosine_threshold
 
+    @property
+    def _workspace(self) -> str:
+        return self.rebuild_workspace or self.db.workspace
+
     async def initialize(self):
         if self.db is None:
             self.db = await ClientManager.get_client()
@@ -1108,7 +1287,7 @@ class PGVectorStorage(BaseVectorStorage):
         try:
             upsert_sql = SQL_TEMPLATES["upsert_chunk"]
             data: dict[str, Any] = {
-                "workspace": self.db.workspace,
+                "workspace": self._workspace,
                 "id": item["__id__"],
                 "tokens": item["tokens"],
                 "chunk_order_index": item["chunk_order_index"],
@@ -1136,7 +1315,7 @@ class PGVectorStorage(BaseVectorStorage):
             chunk_ids = [source_id]
 
         data: dict[str, Any] = {
-            "workspace": self.db.workspace,
+            "workspace": self._workspace,
             "id": item["__id__"],
             "entity_name": item["entity_name"],
             "content": item["content"],
@@ -1159,7 +1338,7 @@ class PGVectorStorage(BaseVectorStorage):
             chunk_ids = [source_id]
 
         data: dict[str, Any] = {
-            "workspace": self.db.workspace,
+            "workspace": self._workspace,
             "id": item["__id__"],
             "source_id": item["src_id"],
             "target_id": item["tgt_id"],
@@ -1187,24 +1366,22 @@ class PGVectorStorage(BaseVectorStorage):
             for k, v in data.items()
         ]
         contents = [v["content"] for v in data.values()]
-        batches = [
-            contents[i : i + self._max_batch_size]
-            for i in range(0, len(contents), self._max_batch_size)
-        ]
-
-        embedding_tasks = [self.embedding_func(batch) for batch in batches]
-        embeddings_list = await asyncio.gather(*embedding_tasks)
-
-        embeddings = np.concatenate(embeddings_list)
+        embeddings = await self._embed_contents(contents)
         for i, d in enumerate(list_data):
             d["__vector__"] = embeddings[i]
         for item in list_data:
+            # Copied records keep their creation time
+            item_time = (
+                datetime.datetime.fromtimestamp(item["created_at"], timezone.utc)
+                if item.get("created_at")
+                else current_time
+            )
             if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS):
-                upsert_sql, data = self._upsert_chunks(item, current_time)
+                upsert_sql, data = self._upsert_chunks(item, item_time)
             elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_ENTITIES):
-                upsert_sql, data = self._upsert_entities(item, current_time)
+                upsert_sql, data = self._upsert_entities(item, item_time)
             elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS):
-                upsert_sql, data = self._upsert_relationships(item, current_time)
+                upsert_sql, data = self._upsert_relationships(item, item_time)
             else:
                 raise ValueError(f"{self.namespace} is not supported")
 
@@ -1212,17 +1389,19 @@ class PGVectorStorage(BaseVectorStorage):
 
     #################### query method ###############
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        query_embedding: np.ndarray | None = None,
     ) -> list[dict[str, Any]]:
-        embeddings = await self.embedding_func(
-            [query], _priority=5
-        )  # higher priority for query
+        embeddings = await self._embed_query(query, query_embedding)
         embedding = embeddings[0]
         embedding_string = ",".join(map(str, embedding))
         # Use parameterized document IDs (None means search across all documents)
         sql = SQL_TEMPLATES[self.namespace].format(embedding_string=embedding_string)
         params = {
-            "workspace": self.db.workspace,
+            "workspace": self._workspace,
             "doc_ids": ids,
             "better_than_threshold": self.cosine_better_than_threshold,
             "top_k": top_k,
@@ -1252,7 +1431,7 @@ class PGVectorStorage(BaseVectorStorage):
 
         try:
             await self.db.execute(
-                delete_sql, {"workspace": self.db.workspace, "ids": ids}
+                delete_sql, {"workspace": self._workspace, "ids": ids}
             )
             logger.debug(
                 f"Successfully deleted {len(ids)} vectors from {self.namespace}"
@@ -1272,7 +1451,7 @@ class PGVectorStorage(BaseVectorStorage):
                             WHERE workspace=$1 AND entity_name=$2"""
 
             await self.db.execute(
-                delete_sql, {"workspace": self.db.workspace, "entity_name": entity_name}
+                delete_sql, {"workspace": self._workspace, "entity_name": entity_name}
             )
             logger.debug(f"Successfully deleted entity {entity_name}")
         except Exception as e:
@@ -1290,7 +1469,7 @@ class PGVectorStorage(BaseVectorStorage):
                             WHERE workspace=$1 AND (source_id=$2 OR target_id=$2)"""
 
             await self.db.execute(
-                delete_sql, {"workspace": self.db.workspace, "entity_name": entity_name}
+                delete_sql, {"workspace": self._workspace, "entity_name": entity_name}
             )
             logger.debug(f"Successfully deleted relations for entity {entity_name}")
         except Exception as e:
@@ -1311,7 +1490,7 @@ class PGVectorStorage(BaseVectorStorage):
             return None
 
         query = f"SELECT *, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM {table_name} WHERE workspace=$1 AND id=$2"
-        params = {"workspace": self.db.workspace, "id": id}
+        params = {"workspace": self._workspace, "id": id}
 
         try:
             result = await self.db.query(query, params)
@@ -1341,7 +1520,7 @@ class PGVectorStorage(BaseVectorStorage):
 
         ids_str = ",".join([f"'{id}'" for id in ids])
         query = f"SELECT *, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM {table_name} WHERE workspace=$1 AND id IN ({ids_str})"
-        params = {"workspace": self.db.workspace}
+        params = {"workspace": self._workspace}
 
         try:
             results = await self.db.query(query, params, multirows=True)
@@ -1350,6 +1529,79 @@ class PGVectorStorage(BaseVectorStorage):
             logger.error(f"Error retrieving vector data for IDs {ids}: {e}")
             return []
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        include_vector: bool = False,
+        start_after: str | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        table_name = namespace_to_table_name(self.namespace)
+        if not table_name:
+            raise ValueError(f"Unknown namespace for iter_batches: {self.namespace}")
+
+        query = f"SELECT *, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM {table_name} WHERE workspace=$1"
+        params = {"workspace": self._workspace}
+        async for rows in self.db.query_batches(
+            query, params, batch_size, after=start_after
+        ):
+            batch = []
+            for row in rows:
+                vector = row.pop("content_vector", None)
+                if not include_vector:
+                    vector = None
+                elif isinstance(vector, str):
+                    # pgvector values arrive as "[x,y,...]" without a registered codec
+                    vector = json.loads(vector)
+                batch.append(vector_scan_record(row, fields, vector))
+            yield batch
+
+    async def create_rebuild_storage(
+        self, embedding_func: EmbeddingFunc
+    ) -> "PGVectorStorage":
+        """Rebuild storage writing to the same table under a shadow workspace"""
+        storage = PGVectorStorage(
+            namespace=self.namespace,
+            workspace=self.workspace,
+            global_config=self.global_config,
+            embedding_func=embedding_func,
+            meta_fields=self.meta_fields,
+            rebuild_workspace=self._workspace + VECTOR_REBUILD_NAMESPACE_SUFFIX,
+        )
+        await storage.initialize()
+        # Discard the rows an interrupted rebuild may have left
+        result = await storage.drop()
+        if result["status"] != "success":
+            await storage.finalize()
+            raise RuntimeError(
+                f"Unable to clear the rebuild workspace of {self.namespace}: "
+                f"{result['message']}"
+            )
+        return storage
+
+    async def swap_rebuild_storage(self, storage: "PGVectorStorage") -> None:
+        """Move the rows of the shadow workspace into this one in a transaction"""
+        table_name = namespace_to_table_name(self.namespace)
+        await self.db.execute_in_transaction(
+            [
+                (
+                    SQL_TEMPLATES["drop_specifiy_table_workspace"].format(
+                        table_name=table_name
+                    ),
+                    {"workspace": self._workspace},
+                ),
+                (
+                    f"UPDATE {table_name} SET workspace=$1 WHERE workspace=$2",
+                    {
+                        "workspace": self._workspace,
+                        "rebuild_workspace": storage._workspace,
+                    },
+                ),
+            ]
+        )
+        self.embedding_func = storage.embedding_func
+        logger.info(f"PostgreSQL, swapped in rebuilt vectors of {self.namespace}")
+
     async def drop(self) -> dict[str, str]:
         """Drop the storage"""
         try:
@@ -1363,7 +1615,7 @@ class PGVectorStorage(BaseVectorStorage):
             drop_sql = SQL_TEMPLATES["drop_specifiy_table_workspace"].format(
                 table_name=table_name
             )
-            await self.db.execute(drop_sql, {"workspace": self.db.workspace})
+            await self.db.execute(drop_sql, {"workspace": self._workspace})
             return {"status": "success", "message": "data dropped"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -1374,6 +1626,8 @@ class PGVectorStorage(BaseVectorStorage):
 class PGDocStatusStorage(DocStatusStorage):
     db: PostgreSQLDB = field(default=None)
 
+    scan_order = "key"
+
     async def initialize(self):
         if self.db is None:
             self.db = await ClientManager.get_client()
@@ -1484,6 +1738,41 @@ class PGDocStatusStorage(DocStatusStorage):
 
         return processed_results
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        start_after: str | None = None,
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        sql = "SELECT * FROM LIGHTRAG_DOC_STATUS WHERE workspace=$1"
+        params = {"workspace": self.db.workspace}
+        async for rows in self.db.query_batches(
+            sql, params, batch_size, after=start_after
+        ):
+            batch = []
+            for row in rows:
+                # Parse chunks_list JSON string back to list
+                chunks_list = row.get("chunks_list", [])
+                if isinstance(chunks_list, str):
+                    try:
+                        chunks_list = json.loads(chunks_list)
+                    except json.JSONDecodeError:
+                        chunks_list = []
+
+                doc = {
+                    "content": row["content"],
+                    "content_length": row["content_length"],
+                    "content_summary": row["content_summary"],
+                    "status": row["status"],
+                    "chunks_count": row["chunks_count"],
+                    "created_at": row["created_at"],
+                    "updated_at": row["updated_at"],
+                    "file_path": row["file_path"],
+                    "chunks_list": chunks_list,
+                }
+                batch.append((row["id"], select_record_fields(doc, fields)))
+            yield batch
+
     async def get_status_counts(self) -> dict[str, int]:
         """Get counts of documents in each status"""
         sql = """SELECT status as "status", COUNT(1) as "count"
@@ -1528,6 +1817,82 @@ class PGDocStatusStorage(DocStatusStorage):
 
         return docs_by_status
 
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page_size: int = 50,
+        cursor: str | None = None,
+        sort_field: DocStatusSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+        include_content: bool = False,
+    ) -> DocStatusPage:
+        """Keyset pagination over the (workspace, sort field, id) indexes"""
+        if sort_field not in DOC_STATUS_SORT_FIELDS:
+            raise ValueError(f"Invalid sort field: {sort_field}")
+        # NULL sort values are ordered as the epoch (or an empty path), which is
+        # also what an empty cursor value decodes to
+        sort_expr = {
+            "id": "id",
+            "created_at": "COALESCE(created_at, 'epoch'::timestamptz)",
+            "updated_at": "COALESCE(updated_at, 'epoch'::timestamptz)",
+            "file_path": "COALESCE(file_path, '')",
+        }[sort_field]
+        descending = sort_direction == "desc"
+        order = "DESC" if descending else "ASC"
+
+        columns = "id, content_summary, content_length, chunks_count, status, file_path, created_at, updated_at"
+        if include_content:
+            columns += ", content, chunks_list"
+
+        params: dict[str, Any] = {"workspace": self.db.workspace}
+        conditions = ["workspace=$1"]
+        if status_filter is not None:
+            params["status"] = status_filter.value
+            conditions.append(f"status=${len(params)}")
+        if cursor:
+            sort_value, last_id = decode_doc_status_cursor(cursor)
+            op = "<" if descending else ">"
+            if sort_field == "id":
+                params["last_id"] = last_id
+                conditions.append(f"id {op} ${len(params)}")
+            else:
+                if sort_field in ("created_at", "updated_at"):
+                    sort_value = (
+                        datetime.datetime.fromisoformat(sort_value)
+                        if sort_value
+                        else datetime.datetime.fromtimestamp(0, tz=timezone.utc)
+                    )
+                params["sort_value"] = sort_value
+                params["last_id"] = last_id
+                conditions.append(
+                    f"({sort_expr}, id) {op} (${len(params) - 1}, ${len(params)})"
+                )
+        params["limit"] = page_size + 1
+
+        sql = f"""SELECT {columns} FROM LIGHTRAG_DOC_STATUS
+                 WHERE {" AND ".join(conditions)}
+                 ORDER BY {sort_expr} {order}, id {order}
+                 LIMIT ${len(params)}"""
+        rows = await self.db.query(sql, params, True)
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = encode_doc_status_cursor(
+                doc_status_sort_value(last["id"], last, sort_field), last["id"]
+            )
+
+        documents = {}
+        for row in rows:
+            if include_content and isinstance(row.get("chunks_list"), str):
+                try:
+                    row["chunks_list"] = json.loads(row["chunks_list"])
+                except json.JSONDecodeError:
+                    row["chunks_list"] = []
+            documents[row["id"]] = doc_status_from_dict(row, include_content)
+        return DocStatusPage(documents=documents, next_cursor=next_cursor)
+
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
         pass
@@ -1666,6 +2031,8 @@ class PGGraphQueryException(Exception):
 @final
 @dataclass
 class PGGraphStorage(BaseGraphStorage):
+    scan_order = "key"
+
     def __post_init__(self):
         # Graph name will be dynamically generated in initialize() based on workspace
         self.db: PostgreSQLDB | None = None
@@ -1918,6 +2285,28 @@ class PGGraphStorage(BaseGraphStorage):
 
         return result
 
+    async def _execute_batch(self, queries: list[str]) -> None:
+        """
+        Execute cypher queries in one transaction, all or none of them apply
+
+        Args:
+            queries (list[str]): cypher queries converted like in _query
+        """
+        try:
+            await self.db.execute_in_transaction(
+                [(query, None) for query in queries],
+                with_age=True,
+                graph_name=self.graph_name,
+            )
+        except Exception as e:
+            raise PGGraphQueryException(
+                {
+                    "message": f"Error executing {len(queries)} graph queries",
+                    "wrapped": queries[0] if queries else "",
+                    "detail": str(e),
+                }
+            ) from e
+
     async def has_node(self, node_id: str) -> bool:
         entity_name_label = self._normalize_node_id(node_id)
 
@@ -2064,23 +2453,7 @@ class PGGraphStorage(BaseGraphStorage):
             node_id: The unique identifier for the node (used as label)
             node_data: Dictionary of node properties
         """
-        if "entity_id" not in node_data:
-            raise ValueError(
-                "PostgreSQL: node properties must contain an 'entity_id' field"
-            )
-
-        label = self._normalize_node_id(node_id)
-        properties = self._format_properties(node_data)
-
-        query = """SELECT * FROM cypher('%s', $$
-                     MERGE (n:base {entity_id: "%s"})
-                     SET n += %s
-                     RETURN n
-                   $$) AS (n agtype)""" % (
-            self.graph_name,
-            label,
-            properties,
-        )
+        query = self._upsert_node_query(node_id, node_data)
 
         try:
             await self._query(query, readonly=False, upsert=True)
@@ -2105,11 +2478,44 @@ class PGGraphStorage(BaseGraphStorage):
             target_node_id (str): Label of the target node (used as identifier)
             edge_data (dict): dictionary of properties to set on the edge
         """
+        query = self._upsert_edge_query(source_node_id, target_node_id, edge_data)
+
+        try:
+            await self._query(query, readonly=False, upsert=True)
+
+        except Exception:
+            logger.error(
+                f"POSTGRES, upsert_edge error on edge: `{source_node_id}`-`{target_node_id}`"
+            )
+            raise
+
+    def _upsert_node_query(self, node_id: str, node_data: dict[str, str]) -> str:
+        if "entity_id" not in node_data:
+            raise ValueError(
+                "PostgreSQL: node properties must contain an 'entity_id' field"
+            )
+
+        label = self._normalize_node_id(node_id)
+        properties = self._format_properties(node_data)
+
+        return """SELECT * FROM cypher('%s', $$
+                     MERGE (n:base {entity_id: "%s"})
+                     SET n += %s
+                     RETURN n
+                   $$) AS (n agtype)""" % (
+            self.graph_name,
+            label,
+            properties,
+        )
+
+    def _upsert_edge_query(
+        self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
+    ) -> str:
         src_label = self._normalize_node_id(source_node_id)
         tgt_label = self._normalize_node_id(target_node_id)
         edge_properties = self._format_properties(edge_data)
 
-        query = """SELECT * FROM cypher('%s', $$
+        return """SELECT * FROM cypher('%s', $$
                      MATCH (source:base {entity_id: "%s"})
                      WITH source
                      MATCH (target:base {entity_id: "%s"})
@@ -2125,14 +2531,60 @@ class PGGraphStorage(BaseGraphStorage):
             edge_properties,  # https://github.com/HKUDS/LightRAG/issues/1438#issuecomment-2826000195
         )
 
-        try:
-            await self._query(query, readonly=False, upsert=True)
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_nodes_batch(self, nodes: list[tuple[str, dict[str, str]]]) -> None:
+        """
+        Upsert multiple nodes, executing the Cypher statements of up to
+        GRAPH_UPSERT_BATCH_SIZE nodes in one transaction.
 
-        except Exception:
-            logger.error(
-                f"POSTGRES, upsert_edge error on edge: `{source_node_id}`-`{target_node_id}`"
-            )
-            raise
+        Args:
+            nodes: List of (node_id, node_data) tuples
+        """
+        queries = [
+            self._upsert_node_query(node_id, node_data) for node_id, node_data in nodes
+        ]
+        for start in range(0, len(queries), GRAPH_UPSERT_BATCH_SIZE):
+            batch = queries[start : start + GRAPH_UPSERT_BATCH_SIZE]
+            try:
+                await self._execute_batch(batch)
+            except Exception:
+                logger.error(
+                    f"POSTGRES, upsert_nodes_batch error on {len(batch)} nodes"
+                )
+                raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]]
+    ) -> None:
+        """
+        Upsert multiple edges, executing the Cypher statements of up to
+        GRAPH_UPSERT_BATCH_SIZE edges in one transaction.
+
+        Args:
+            edges: List of (source_node_id, target_node_id, edge_data) tuples
+        """
+        queries = [
+            self._upsert_edge_query(source_node_id, target_node_id, edge_data)
+            for source_node_id, target_node_id, edge_data in edges
+        ]
+        for start in range(0, len(queries), GRAPH_UPSERT_BATCH_SIZE):
+            batch = queries[start : start + GRAPH_UPSERT_BATCH_SIZE]
+            try:
+                await self._execute_batch(batch)
+            except Exception:
+                logger.error(
+                    f"POSTGRES, upsert_edges_batch error on {len(batch)} edges"
+                )
+                raise
 
     async def delete_node(self, node_id: str) -> None:
         """
@@ -2507,6 +2959,116 @@ class PGGraphStorage(BaseGraphStorage):
                 labels.append(result["label"])
         return labels
 
+    async def _scan_nodes_page(
+        self, after: str | None, limit: int
+    ) -> list[tuple[str, dict]]:
+        """Next page of nodes ordered by entity_id, starting after the given id"""
+        after_filter = (
+            ""
+            if after is None
+            else f'AND n.entity_id > "{self._normalize_node_id(after)}"'
+        )
+        query = f"""SELECT * FROM cypher('{self.graph_name}', $$
+                     MATCH (n:base)
+                     WHERE n.entity_id IS NOT NULL {after_filter}
+                     RETURN n.entity_id AS node_id, n
+                     ORDER BY n.entity_id
+                     LIMIT {int(limit)}
+                   $$) AS (node_id text, n agtype)"""
+
+        nodes = []
+        for result in await self._query(query):
+            if not result["node_id"] or not result["n"]:
+                continue
+            node_dict = result["n"]["properties"]
+            if isinstance(node_dict, str):
+                try:
+                    node_dict = json.loads(node_dict)
+                except json.JSONDecodeError:
+                    logger.warning(f"Failed to parse node string in scan: {node_dict}")
+            nodes.append((result["node_id"], node_dict))
+        return nodes
+
+    async def iter_node_batches(
+        self, batch_size: int = GRAPH_SCAN_BATCH_SIZE, start_after: str | None = None
+    ) -> AsyncIterator[list[tuple[str, dict]]]:
+        """Page through the nodes with keyset pagination on entity_id"""
+        after = start_after
+        while True:
+            batch = await self._scan_nodes_page(after, batch_size)
+            if not batch:
+                return
+            yield batch
+            after = batch[-1][0]
+
+    async def _scan_node_edges(
+        self, node_ids: list[str]
+    ) -> list[tuple[str, str, dict]]:
+        """Edges of the given nodes, ordered by source in the order of node_ids, then by target
+
+        Every edge is read from its endpoint with the lowest entity_id, so that
+        undirected edges are returned once.
+        """
+        formatted_ids = ", ".join(
+            '"' + self._normalize_node_id(node_id) + '"' for node_id in node_ids
+        )
+        query = f"""SELECT * FROM cypher('{self.graph_name}', $$
+                 UNWIND [{formatted_ids}] AS node_id
+                 MATCH (a:base {{entity_id: node_id}})-[r]-(b:base)
+                 WHERE a.entity_id < b.entity_id
+                 RETURN a.entity_id AS source, b.entity_id AS target, properties(r) AS edge_properties
+               $$) AS (source text, target text, edge_properties agtype)"""
+
+        edges = []
+        for result in await self._query(query):
+            if not result["source"] or not result["target"]:
+                continue
+            edge_props = result["edge_properties"] or {}
+            if isinstance(edge_props, str):
+                try:
+                    edge_props = json.loads(edge_props)
+                except json.JSONDecodeError:
+                    logger.warning(
+                        f"Failed to parse edge properties string: {edge_props}"
+                    )
+                    continue
+            edges.append((result["source"], result["target"], edge_props))
+        rank = {node_id: i for i, node_id in enumerate(node_ids)}
+        edges.sort(key=lambda edge: (rank.get(edge[0], len(rank)), edge[1]))
+        return edges
+
+    async def iter_edge_batches(
+        self,
+        batch_size: int = GRAPH_SCAN_BATCH_SIZE,
+        start_after: list[str] | None = None,
+    ) -> AsyncIterator[list[tuple[str, str, dict]]]:
+        """Page through the edges of each page of nodes
+
+        Edges are yielded by source in entity_id order, then by target, so a
+        scan resumed after a [source, target] edge first reads the remaining
+        edges of that source.
+        """
+        after = None
+        edges = []
+        if start_after is not None:
+            after, last_target = start_after
+            edges = [
+                edge
+                for edge in await self._scan_node_edges([after])
+                if edge[1] > last_target
+            ]
+        while True:
+            nodes = await self._scan_nodes_page(after, batch_size)
+            if not nodes:
+                break
+            after = nodes[-1][0]
+            edges.extend(await self._scan_node_edges([node_id for node_id, _ in nodes]))
+            while len(edges) >= batch_size:
+                yield edges[:batch_size]
+                edges = edges[batch_size:]
+        if edges:
+            yield edges
+
     async def get_nodes_by_chunk_ids(self, chunk_ids: list[str]) -> list[dict]:
         """
         Retrieves nodes from the graph that are associated with a given list of chunk IDs.
@@ -2611,6 +3173,9 @@ class PGGraphStorage(BaseGraphStorage):
         This method is used as a fallback when the standard Cypher query is too slow
         or when we need to guarantee BFS ordering.
 
+        The traversal is done by the shared SubgraphExtractor, which expands each
+        level with one batched query for outgoing and one for incoming edges.
+
         Args:
             node_label: Label of the starting node
             max_depth: Maximum depth of the subgraph
@@ -2619,13 +3184,7 @@ class PGGraphStorage(BaseGraphStorage):
         Returns:
             KnowledgeGraph object containing nodes and edges
         """
-        from collections import deque
-
         result = KnowledgeGraph()
-        visited_nodes = set()
-        visited_node_ids = set()
-        visited_edges = set()
-        visited_edge_pairs = set()
 
         # Get starting node data
         label = self._normalize_node_id(node_label)
@@ -2649,41 +3208,14 @@ class PGGraphStorage(BaseGraphStorage):
             properties=start_node_data["properties"],
         )
 
-        # Initialize BFS queue, each element is a tuple of (node, depth)
-        queue = deque([(start_node, 0)])
-
-        visited_nodes.add(entity_id)
-        visited_node_ids.add(internal_id)
-        result.nodes.append(start_node)
+        # Nodes and edges seen while expanding, keyed by entity_id and by sorted
+        # entity_id pair so (A,B) and (B,A) are treated as the same edge
+        nodes_by_entity_id = {entity_id: start_node}
+        edges_by_pair: dict[tuple[str, str], KnowledgeGraphEdge] = {}
+        expanded: set[str] = set()
 
-        result.is_truncated = False
-
-        # BFS search main loop
-        while queue:
-            # Get all nodes at the current depth
-            current_level_nodes = []
-            current_depth = None
-
-            # Determine current depth
-            if queue:
-                current_depth = queue[0][1]
-
-            # Extract all nodes at current depth from the queue
-            while queue and queue[0][1] == current_depth:
-                node, depth = queue.popleft()
-                if depth > max_depth:
-                    continue
-                current_level_nodes.append(node)
-
-            if not current_level_nodes:
-                continue
-
-            # Check depth limit
-            if current_depth > max_depth:
-                continue
-
-            # Prepare node IDs list
-            node_ids = [node.labels[0] for node in current_level_nodes]
+        async def expand(node_ids: list[str]) -> dict[str, list[str]]:
+            expanded.update(node_ids)
             formatted_ids = ", ".join(
                 [f'"{self._normalize_node_id(node_id)}"' for node_id in node_ids]
             )
@@ -2724,92 +3256,66 @@ class PGGraphStorage(BaseGraphStorage):
             outgoing_results = await self._query(outgoing_query)
             incoming_results = await self._query(incoming_query)
 
-            # Combine results
-            neighbors = outgoing_results + incoming_results
-
-            # Create mapping from node ID to node object
-            node_map = {node.labels[0]: node for node in current_level_nodes}
-
-            # Process all results in a single loop
-            for record in neighbors:
+            neighbors: dict[str, list[str]] = {}
+            for record in outgoing_results + incoming_results:
                 if not record.get("neighbor") or not record.get("r"):
                     continue
 
+                neighbor_entity_id = record["neighbor_id"]
+                if not neighbor_entity_id:
+                    continue
+
                 # Get current node information
                 current_entity_id = record["current_id"]
-                current_node = node_map[current_entity_id]
-
-                # Get neighbor node information
-                neighbor_entity_id = record["neighbor_id"]
+                current_node = nodes_by_entity_id[current_entity_id]
                 neighbor_internal_id = str(record["neighbor_internal_id"])
-                is_outgoing = record["is_outgoing"]
 
                 # Determine edge direction
-                if is_outgoing:
+                if record["is_outgoing"]:
                     source_id = current_node.id
                     target_id = neighbor_internal_id
                 else:
                     source_id = neighbor_internal_id
                     target_id = current_node.id
 
-                if not neighbor_entity_id:
-                    continue
-
-                # Get edge and node information
-                b_node = record["neighbor"]
-                rel = record["r"]
-                edge_id = str(record["edge_id"])
-
-                # Create neighbor node object
-                neighbor_node = KnowledgeGraphNode(
-                    id=neighbor_internal_id,
-                    labels=[neighbor_entity_id],
-                    properties=b_node["properties"],
-                )
+                if neighbor_entity_id not in nodes_by_entity_id:
+                    nodes_by_entity_id[neighbor_entity_id] = KnowledgeGraphNode(
+                        id=neighbor_internal_id,
+                        labels=[neighbor_entity_id],
+                        properties=record["neighbor"]["properties"],
+                    )
 
-                # Sort entity_ids to ensure (A,B) and (B,A) are treated as the same edge
                 sorted_pair = tuple(sorted([current_entity_id, neighbor_entity_id]))
-
-                # Create edge object
-                edge = KnowledgeGraphEdge(
-                    id=edge_id,
-                    type=rel["label"],
-                    source=source_id,
-                    target=target_id,
-                    properties=rel["properties"],
-                )
-
-                if neighbor_internal_id in visited_node_ids:
-                    # Add backward edge if neighbor node is already visited
-                    if (
-                        edge_id not in visited_edges
-                        and sorted_pair not in visited_edge_pairs
-                    ):
-                        result.edges.append(edge)
-                        visited_edges.add(edge_id)
-                        visited_edge_pairs.add(sorted_pair)
-                else:
-                    if len(visited_node_ids) < max_nodes and current_depth < max_depth:
-                        # Add new node to result and queue
-                        result.nodes.append(neighbor_node)
-                        visited_nodes.add(neighbor_entity_id)
-                        visited_node_ids.add(neighbor_internal_id)
-
-                        # Add node to queue with incremented depth
-                        queue.append((neighbor_node, current_depth + 1))
-
-                        # Add forward edge
-                        if (
-                            edge_id not in visited_edges
-                            and sorted_pair not in visited_edge_pairs
-                        ):
-                            result.edges.append(edge)
-                            visited_edges.add(edge_id)
-                            visited_edge_pairs.add(sorted_pair)
-                    else:
-                        if current_depth < max_depth:
-                            result.is_truncated = True
-
+                if sorted_pair not in edges_by_pair:
+                    rel = record["r"]
+                    edges_by_pair[sorted_pair] = KnowledgeGraphEdge(
+                        id=str(record["edge_id"]),
+                        type=rel["label"],
+                        source=source_id,
+                        target=target_id,
+                        properties=rel["properties"],
+                    )
+                neighbors.setdefault(current_entity_id, []).append(neighbor_entity_id)
+            return neighbors
+
+        extractor = SubgraphExtractor(entity_id, max_depth, max_nodes, expand)
+        visited = await extractor.run()
+
+        # The last level is not expanded by the traversal, fetch its edges
+        # so the edges among all visited nodes are returned
+        unexpanded = [node_id for node_id in visited if node_id not in expanded]
+        if unexpanded:
+            await expand(unexpanded)
+
+        result.nodes = [nodes_by_entity_id[node_id] for node_id in visited]
+        # Keep the edges between visited nodes
+        visited_set = set(visited)
+        result.edges = [
+            edge
+            for (source, target), edge in edges_by_pair.items()
+            if source in visited_set and target in visited_set
+        ]
+        result.is_truncated = extractor.is_truncated
         return result
 
     async def get_knowledge_graph(
@@ -2963,6 +3469,7 @@ NAMESPACE_TABLE_MAP = {
     NameSpace.VECTOR_STORE_RELATIONSHIPS: "LIGHTRAG_VDB_RELATION",
     NameSpace.DOC_STATUS: "LIGHTRAG_DOC_STATUS",
     NameSpace.KV_STORE_LLM_RESPONSE_CACHE: "LIGHTRAG_LLM_CACHE",
+    NameSpace.KV_STORE_EMBEDDING_CACHE: "LIGHTRAG_EMBEDDING_CACHE",
 }
 
 
@@ -3057,6 +3564,17 @@ TABLES = {
 	                CONSTRAINT LIGHTRAG_LLM_CACHE_PK PRIMARY KEY (workspace, mode, id)
                     )"""
     },
+    "LIGHTRAG_EMBEDDING_CACHE": {
+        "ddl": """CREATE TABLE LIGHTRAG_EMBEDDING_CACHE (
+	                workspace varchar(255) NOT NULL,
+	                id varchar(255) NOT NULL,
+	                model varchar(255) NULL,
+                    embedding TEXT,
+                    create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+	                CONSTRAINT LIGHTRAG_EMBEDDING_CACHE_PK PRIMARY KEY (workspace, id)
+                    )"""
+    },
     "LIGHTRAG_DOC_STATUS": {
         "ddl": """CREATE TABLE LIGHTRAG_DOC_STATUS (
 	               workspace varchar(255) NOT NULL,
@@ -3107,6 +3625,12 @@ SQL_TEMPLATES = {
                                  create_time, update_time
                                  FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND id IN ({ids})
                                 """,
+    "get_by_id_embedding_cache": """SELECT id, model, embedding, create_time, update_time
+                                FROM LIGHTRAG_EMBEDDING_CACHE WHERE workspace=$1 AND id=$2
+                               """,
+    "get_by_ids_embedding_cache": """SELECT id, model, embedding, create_time, update_time
+                                 FROM LIGHTRAG_EMBEDDING_CACHE WHERE workspace=$1 AND id IN ({ids})
+                                """,
     "filter_keys": "SELECT id FROM {table_name} WHERE workspace=$1 AND id IN ({ids})",
     "upsert_doc_full": """INSERT INTO LIGHTRAG_DOC_FULL (id, content, workspace)
                         VALUES ($1, $2, $3)
@@ -3123,6 +3647,13 @@ SQL_TEMPLATES = {
                                       cache_type=EXCLUDED.cache_type,
                                       update_time = CURRENT_TIMESTAMP
                                      """,
+    "upsert_embedding_cache": """INSERT INTO LIGHTRAG_EMBEDDING_CACHE(workspace,id,model,embedding)
+                                      VALUES ($1, $2, $3, $4)
+                                      ON CONFLICT (workspace,id) DO UPDATE
+                                      SET model=EXCLUDED.model,
+                                      embedding=EXCLUDED.embedding,
+                                      update_time = CURRENT_TIMESTAMP
+                                     """,
     "upsert_text_chunk": """INSERT INTO LIGHTRAG_DOC_CHUNKS (workspace, id, tokens,
                       chunk_order_index, full_doc_id, content, file_path, llm_cache_list,
                       create_time, update_time)
@@ -1,12 +1,12 @@
-import asyncio
 import os
-from typing import Any, final, List
+from typing import Any, AsyncIterator, final, List
 from dataclasses import dataclass
 import numpy as np
 import hashlib
 import uuid
 from ..utils import logger
-from ..base import BaseVectorStorage
+from ..base import BaseVectorStorage, vector_scan_record
+from ..constants import STORAGE_SCAN_BATCH_SIZE
 import configparser
 import pipmaster as pm
 
@@ -110,7 +110,6 @@ class QdrantVectorDBStorage(BaseVectorStorage):
                 "QDRANT_API_KEY", config.get("qdrant", "apikey", fallback=None)
             ),
         )
-        self._max_batch_size = self.global_config["embedding_batch_num"]
         QdrantVectorDBStorage.create_collection_if_not_exist(
             self._client,
             self.namespace,
@@ -131,21 +130,14 @@ class QdrantVectorDBStorage(BaseVectorStorage):
         list_data = [
             {
                 "id": k,
-                "created_at": current_time,
+                # Copied records keep their creation time
+                "created_at": v.get("created_at", current_time),
                 **{k1: v1 for k1, v1 in v.items() if k1 in self.meta_fields},
             }
             for k, v in data.items()
         ]
         contents = [v["content"] for v in data.values()]
-        batches = [
-            contents[i : i + self._max_batch_size]
-            for i in range(0, len(contents), self._max_batch_size)
-        ]
-
-        embedding_tasks = [self.embedding_func(batch) for batch in batches]
-        embeddings_list = await asyncio.gather(*embedding_tasks)
-
-        embeddings = np.concatenate(embeddings_list)
+        embeddings = await self._embed_contents(contents)
 
         list_points = []
         for i, d in enumerate(list_data):
@@ -163,11 +155,13 @@ class QdrantVectorDBStorage(BaseVectorStorage):
         return results
 
     async def query(
-        self, query: str, top_k: int, ids: list[str] | None = None
+        self,
+        query: str,
+        top_k: int,
+        ids: list[str] | None = None,
+        query_embedding: np.ndarray | None = None,
     ) -> list[dict[str, Any]]:
-        embedding = await self.embedding_func(
-            [query], _priority=5
-        )  # higher priority for query
+        embedding = await self._embed_query(query, query_embedding)
         results = self._client.search(
             collection_name=self.namespace,
             query_vector=embedding[0],
@@ -353,6 +347,33 @@ class QdrantVectorDBStorage(BaseVectorStorage):
             logger.error(f"Error retrieving vector data for IDs {ids}: {e}")
             return []
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+        include_vector: bool = False,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        offset = None
+        while True:
+            points, offset = self._client.scroll(
+                collection_name=self.namespace,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=include_vector,
+            )
+            batch = []
+            for point in points:
+                payload = point.payload
+                if "created_at" not in payload:
+                    payload["created_at"] = None
+                vector = point.vector if include_vector else None
+                batch.append(vector_scan_record(payload, fields, vector))
+            if batch:
+                yield batch
+            if offset is None:
+                break
+
     async def drop(self) -> dict[str, str]:
         """Drop all vector data from storage and clean up resources
 
@@ -1,5 +1,5 @@
 import os
-from typing import Any, final, Union
+from typing import Any, AsyncIterator, Literal, final, Union
 from dataclasses import dataclass
 import pipmaster as pm
 import configparser
@@ -16,10 +16,19 @@ from lightrag.utils import logger
 
 from lightrag.base import (
     BaseKVStorage,
+    DOC_STATUS_SORT_FIELDS,
     DocStatusStorage,
     DocStatus,
+    DocStatusPage,
+    DocStatusSortField,
     DocProcessingStatus,
+    decode_doc_status_cursor,
+    doc_status_from_dict,
+    doc_status_sort_value,
+    encode_doc_status_cursor,
+    select_record_fields,
 )
+from lightrag.constants import STORAGE_SCAN_BATCH_SIZE
 import json
 
 
@@ -67,6 +76,42 @@ class RedisConnectionManager:
             cls._pools.clear()
 
 
+async def _scan_json_values(
+    redis: Redis, namespace: str, batch_size: int
+) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+    """Batches of (id, record) stored as JSON under "<namespace>:<id>"
+
+    Keys are walked with SCAN and each batch is read with one MGET. As with any
+    SCAN, a key may be returned twice if the keyspace is rehashed meanwhile.
+    """
+    prefix = f"{namespace}:"
+
+    async def read(keys: list[str]) -> list[tuple[str, dict[str, Any]]]:
+        batch = []
+        for key, value in zip(keys, await redis.mget(keys)):
+            if value is None:
+                # Deleted since it was scanned
+                continue
+            try:
+                batch.append((key[len(prefix) :], json.loads(value)))
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON decode error for key {key}: {e}")
+        return batch
+
+    keys = []
+    async for key in redis.scan_iter(match=f"{prefix}*", count=batch_size):
+        keys.append(key)
+        if len(keys) >= batch_size:
+            batch = await read(keys)
+            keys = []
+            if batch:
+                yield batch
+    if keys:
+        batch = await read(keys)
+        if batch:
+            yield batch
+
+
 @final
 @dataclass
 class RedisKVStorage(BaseKVStorage):
@@ -231,6 +276,22 @@ class RedisKVStorage(BaseKVStorage):
                 logger.error(f"Error getting all data from Redis: {e}")
                 return {}
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        async with self._get_redis_connection() as redis:
+            async for batch in _scan_json_values(redis, self.namespace, batch_size):
+                for _, data in batch:
+                    # Ensure time fields are present for all documents
+                    data.setdefault("create_time", 0)
+                    data.setdefault("update_time", 0)
+                yield [
+                    (key_id, select_record_fields(data, fields))
+                    for key_id, data in batch
+                ]
+
     async def filter_keys(self, keys: set[str]) -> set[str]:
         async with self._get_redis_connection() as redis:
             pipe = redis.pipeline()
@@ -513,6 +574,17 @@ class RedisDocStatusStorage(DocStatusStorage):
         # Use shared connection pool
         self._pool = RedisConnectionManager.get_pool(redis_url)
         self._redis = Redis(connection_pool=self._pool)
+        # Secondary index, outside of the "<namespace>:*" document key pattern:
+        # one set of document ids per status and a hash of document metadata
+        # without content, used for counts and listings, and per sort field one
+        # sorted set of "<sort value>\0<id>" members for all documents and one per
+        # status. All members have score 0, so the sets are ordered by member and
+        # a page is read with ZRANGEBYLEX from the cursor.
+        index_prefix = f"{self.namespace}_index"
+        self._status_key_prefix = f"{index_prefix}:status:"
+        self._sort_key_prefix = f"{index_prefix}:sort:"
+        self._meta_key = f"{index_prefix}:meta"
+        self._index_ready_key = f"{index_prefix}:ready"
         logger.info(
             f"Initialized Redis doc status storage for {self.namespace} using shared connection pool"
         )
@@ -525,10 +597,102 @@ class RedisDocStatusStorage(DocStatusStorage):
                 logger.info(
                     f"Connected to Redis for doc status namespace {self.namespace}"
                 )
+                if not await redis.exists(self._index_ready_key):
+                    await self._rebuild_index(redis)
         except Exception as e:
             logger.error(f"Failed to connect to Redis for doc status: {e}")
             raise
 
+    def _status_key(self, status: str) -> str:
+        return f"{self._status_key_prefix}{status}"
+
+    def _sort_key(self, sort_field: str, status: str | None) -> str:
+        return f"{self._sort_key_prefix}{sort_field}:{status or 'all'}"
+
+    def _index_keys(self) -> list[str]:
+        keys = [self._meta_key]
+        for status in DocStatus:
+            keys.append(self._status_key(status.value))
+        for sort_field in DOC_STATUS_SORT_FIELDS:
+            keys.append(self._sort_key(sort_field, None))
+            for status in DocStatus:
+                keys.append(self._sort_key(sort_field, status.value))
+        return keys
+
+    @staticmethod
+    def _sort_member(doc_id: str, meta: dict[str, Any], sort_field: str) -> str:
+        return f"{doc_status_sort_value(doc_id, meta, sort_field)}\0{doc_id}"
+
+    @staticmethod
+    def _doc_meta(doc: dict[str, Any]) -> str:
+        return json.dumps(
+            {k: v for k, v in doc.items() if k not in ("content", "chunks_list")}
+        )
+
+    def _queue_sort_removal(self, pipe, doc_id: str, old_meta: str | None) -> None:
+        """Remove the sorted set members built from the previously indexed metadata"""
+        if not old_meta:
+            return
+        meta = json.loads(old_meta)
+        for sort_field in DOC_STATUS_SORT_FIELDS:
+            member = self._sort_member(doc_id, meta, sort_field)
+            pipe.zrem(self._sort_key(sort_field, None), member)
+            for status in DocStatus:
+                pipe.zrem(self._sort_key(sort_field, status.value), member)
+
+    def _queue_index_removal(self, pipe, doc_id: str, old_meta: str | None) -> None:
+        for status in DocStatus:
+            pipe.srem(self._status_key(status.value), doc_id)
+        self._queue_sort_removal(pipe, doc_id, old_meta)
+        pipe.hdel(self._meta_key, doc_id)
+
+    def _queue_index_update(
+        self, pipe, doc_id: str, doc: dict[str, Any], old_meta: str | None
+    ) -> None:
+        status = doc.get("status")
+        status = status.value if isinstance(status, DocStatus) else status
+        for other in DocStatus:
+            if other.value != status:
+                pipe.srem(self._status_key(other.value), doc_id)
+        pipe.sadd(self._status_key(status), doc_id)
+        self._queue_sort_removal(pipe, doc_id, old_meta)
+        for sort_field in DOC_STATUS_SORT_FIELDS:
+            member = self._sort_member(doc_id, doc, sort_field)
+            pipe.zadd(self._sort_key(sort_field, None), {member: 0})
+            pipe.zadd(self._sort_key(sort_field, status), {member: 0})
+        pipe.hset(self._meta_key, doc_id, self._doc_meta(doc))
+
+    async def _rebuild_index(self, redis) -> None:
+        """Build the status index from the stored documents"""
+        await redis.delete(*self._index_keys())
+
+        indexed = 0
+        cursor = 0
+        while True:
+            cursor, keys = await redis.scan(
+                cursor, match=f"{self.namespace}:*", count=1000
+            )
+            if keys:
+                values = await redis.mget(keys)
+                pipe = redis.pipeline()
+                for key, value in zip(keys, values):
+                    if not value:
+                        continue
+                    try:
+                        doc = json.loads(value)
+                    except json.JSONDecodeError:
+                        continue
+                    self._queue_index_update(pipe, key.split(":", 1)[1], doc, None)
+                    indexed += 1
+                await pipe.execute()
+            if cursor == 0:
+                break
+
+        await redis.set(self._index_ready_key, 1)
+        logger.info(
+            f"Built doc status index of {self.namespace} for {indexed} documents"
+        )
+
     @asynccontextmanager
     async def _get_redis_connection(self):
         """Safe context manager for Redis operations."""
@@ -592,37 +756,29 @@ class RedisDocStatusStorage(DocStatusStorage):
                 logger.error(f"Error in get_by_ids: {e}")
         return result
 
+    async def iter_batches(
+        self,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        fields: list[str] | None = None,
+    ) -> AsyncIterator[list[tuple[str, dict[str, Any]]]]:
+        async with self._get_redis_connection() as redis:
+            async for batch in _scan_json_values(redis, self.namespace, batch_size):
+                yield [
+                    (doc_id, select_record_fields(data, fields))
+                    for doc_id, data in batch
+                ]
+
     async def get_status_counts(self) -> dict[str, int]:
         """Get counts of documents in each status"""
         counts = {status.value: 0 for status in DocStatus}
         async with self._get_redis_connection() as redis:
             try:
-                # Use SCAN to iterate through all keys in the namespace
-                cursor = 0
-                while True:
-                    cursor, keys = await redis.scan(
-                        cursor, match=f"{self.namespace}:*", count=1000
-                    )
-                    if keys:
-                        # Get all values in batch
-                        pipe = redis.pipeline()
-                        for key in keys:
-                            pipe.get(key)
-                        values = await pipe.execute()
-
-                        # Count statuses
-                        for value in values:
-                            if value:
-                                try:
-                                    doc_data = json.loads(value)
-                                    status = doc_data.get("status")
-                                    if status in counts:
-                                        counts[status] += 1
-                                except json.JSONDecodeError:
-                                    continue
-
-                    if cursor == 0:
-                        break
+                pipe = redis.pipeline()
+                for status in DocStatus:
+                    pipe.scard(self._status_key(status.value))
+                results = await pipe.execute()
+                for status, count in zip(DocStatus, results):
+                    counts[status.value] = count
             except Exception as e:
                 logger.error(f"Error getting status counts: {e}")
 
@@ -635,54 +791,95 @@ class RedisDocStatusStorage(DocStatusStorage):
         result = {}
         async with self._get_redis_connection() as redis:
             try:
-                # Use SCAN to iterate through all keys in the namespace
-                cursor = 0
-                while True:
-                    cursor, keys = await redis.scan(
-                        cursor, match=f"{self.namespace}:*", count=1000
+                doc_ids = list(await redis.smembers(self._status_key(status.value)))
+                # Fetch the documents of the status in batches
+                for i in range(0, len(doc_ids), 1000):
+                    batch = doc_ids[i : i + 1000]
+                    values = await redis.mget(
+                        [f"{self.namespace}:{doc_id}" for doc_id in batch]
                     )
-                    if keys:
-                        # Get all values in batch
-                        pipe = redis.pipeline()
-                        for key in keys:
-                            pipe.get(key)
-                        values = await pipe.execute()
-
-                        # Filter by status and create DocProcessingStatus objects
-                        for key, value in zip(keys, values):
-                            if value:
-                                try:
-                                    doc_data = json.loads(value)
-                                    if doc_data.get("status") == status.value:
-                                        # Extract document ID from key
-                                        doc_id = key.split(":", 1)[1]
-
-                                        # Make a copy of the data to avoid modifying the original
-                                        data = doc_data.copy()
-                                        # If content is missing, use content_summary as content
-                                        if (
-                                            "content" not in data
-                                            and "content_summary" in data
-                                        ):
-                                            data["content"] = data["content_summary"]
-                                        # If file_path is not in data, use document id as file path
-                                        if "file_path" not in data:
-                                            data["file_path"] = "no-file-path"
-
-                                        result[doc_id] = DocProcessingStatus(**data)
-                                except (json.JSONDecodeError, KeyError) as e:
-                                    logger.error(
-                                        f"Error processing document {key}: {e}"
-                                    )
-                                    continue
-
-                    if cursor == 0:
-                        break
+                    for doc_id, value in zip(batch, values):
+                        if not value:
+                            continue
+                        try:
+                            doc_data = json.loads(value)
+                            # The index may lag behind a concurrent status change
+                            if doc_data.get("status") == status.value:
+                                result[doc_id] = doc_status_from_dict(doc_data)
+                        except (json.JSONDecodeError, KeyError, TypeError) as e:
+                            logger.error(f"Error processing document {doc_id}: {e}")
+                            continue
             except Exception as e:
                 logger.error(f"Error getting docs by status: {e}")
 
         return result
 
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page_size: int = 50,
+        cursor: str | None = None,
+        sort_field: DocStatusSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+        include_content: bool = False,
+    ) -> DocStatusPage:
+        """Read one page from the sorted set of the sort field and status"""
+        if sort_field not in DOC_STATUS_SORT_FIELDS:
+            raise ValueError(f"Invalid sort field: {sort_field}")
+        key = self._sort_key(
+            sort_field, status_filter.value if status_filter is not None else None
+        )
+        after = None
+        if cursor:
+            sort_value, doc_id = decode_doc_status_cursor(cursor)
+            after = f"({sort_value}\0{doc_id}"
+        async with self._get_redis_connection() as redis:
+            # One member more than the page tells whether a next page exists
+            if sort_direction == "desc":
+                members = await redis.zrevrangebylex(
+                    key, after or "+", "-", start=0, num=page_size + 1
+                )
+            else:
+                members = await redis.zrangebylex(
+                    key, after or "-", "+", start=0, num=page_size + 1
+                )
+            page = [member.split("\0", 1) for member in members[:page_size]]
+            next_cursor = (
+                encode_doc_status_cursor(*page[-1])
+                if len(members) > page_size
+                else None
+            )
+            page_ids = [doc_id for _, doc_id in page]
+
+            if not page_ids:
+                docs = {}
+            elif include_content:
+                values = await redis.mget(
+                    [f"{self.namespace}:{doc_id}" for doc_id in page_ids]
+                )
+                docs = {
+                    doc_id: json.loads(value)
+                    for doc_id, value in zip(page_ids, values)
+                    if value
+                }
+            else:
+                values = await redis.hmget(self._meta_key, page_ids)
+                docs = {
+                    doc_id: json.loads(value)
+                    for doc_id, value in zip(page_ids, values)
+                    if value
+                }
+
+        documents = {}
+        for doc_id in page_ids:
+            if doc_id not in docs:
+                continue
+            try:
+                documents[doc_id] = doc_status_from_dict(docs[doc_id], include_content)
+            except (KeyError, TypeError) as e:
+                logger.error(f"Error processing document {doc_id}: {e}")
+        return DocStatusPage(documents=documents, next_cursor=next_cursor)
+
     async def index_done_callback(self) -> None:
         """Redis handles persistence automatically"""
         pass
@@ -700,9 +897,14 @@ class RedisDocStatusStorage(DocStatusStorage):
                     if "chunks_list" not in doc_data:
                         doc_data["chunks_list"] = []
 
+                # The sorted set members of the previous version are replaced
+                doc_ids = list(data)
+                old_metas = await redis.hmget(self._meta_key, doc_ids)
                 pipe = redis.pipeline()
-                for k, v in data.items():
-                    pipe.set(f"{self.namespace}:{k}", json.dumps(v))
+                for doc_id, old_meta in zip(doc_ids, old_metas):
+                    doc_data = data[doc_id]
+                    pipe.set(f"{self.namespace}:{doc_id}", json.dumps(doc_data))
+                    self._queue_index_update(pipe, doc_id, doc_data, old_meta)
                 await pipe.execute()
             except json.JSONEncodeError as e:
                 logger.error(f"JSON encode error during upsert: {e}")
@@ -723,12 +925,15 @@ class RedisDocStatusStorage(DocStatusStorage):
             return
 
         async with self._get_redis_connection() as redis:
+            old_metas = await redis.hmget(self._meta_key, doc_ids)
             pipe = redis.pipeline()
             for doc_id in doc_ids:
                 pipe.delete(f"{self.namespace}:{doc_id}")
+            for doc_id, old_meta in zip(doc_ids, old_metas):
+                self._queue_index_removal(pipe, doc_id, old_meta)
 
             results = await pipe.execute()
-            deleted_count = sum(results)
+            deleted_count = sum(results[: len(doc_ids)])
             logger.info(
                 f"Deleted {deleted_count} of {len(doc_ids)} doc status entries from {self.namespace}"
             )
@@ -755,6 +960,8 @@ class RedisDocStatusStorage(DocStatusStorage):
                     if cursor == 0:
                         break
 
+                await redis.delete(*self._index_keys())
+
                 logger.info(
                     f"Dropped {deleted_count} doc status keys from {self.namespace}"
                 )
@@ -1,6 +1,7 @@
 import os
 import sys
 import asyncio
+import zlib
 from multiprocessing.synchronize import Lock as ProcessLock
 from multiprocessing import Manager
 from typing import Any, Dict, Optional, Union, TypeVar, Generic
@@ -44,6 +45,16 @@ _data_init_lock: Optional[LockType] = None
 # async locks for coroutine synchronization in multiprocess mode
 _async_locks: Optional[Dict[str, asyncio.Lock]] = None
 
+# per-key locks for graph merges: key -> [lock, waiters] in single process mode,
+# a fixed set of lock stripes shared by all processes in multiprocess mode
+_graph_key_locks: Optional[Union[Dict[str, list], list]] = None
+_graph_key_async_locks: Optional[list] = None
+# pid -> number of merges holding graph key locks
+_graph_merges_in_flight: Optional[Dict[int, int]] = None
+
+_GRAPH_KEY_LOCK_STRIPES = 64
+_PROCESS_LOCK_POLL_INTERVAL = 0.01
+
 
 class UnifiedLock(Generic[T]):
     """Provide a unified lock interface type for asyncio.Lock and multiprocessing.Lock"""
@@ -211,6 +222,138 @@ class UnifiedLock(Generic[T]):
             raise
 
 
+async def _acquire_process_lock(lock: ProcessLock) -> None:
+    """Acquire a process lock without blocking the event loop
+
+    Graph key locks are held across LLM calls, so a blocking acquire would stall
+    every coroutine of the waiting process for that long.
+    """
+    while not lock.acquire(blocking=False):
+        await asyncio.sleep(_PROCESS_LOCK_POLL_INTERVAL)
+
+
+def _graph_merges_running() -> int:
+    return sum(_graph_merges_in_flight.values())
+
+
+class ExclusiveGraphLock(UnifiedLock):
+    """The global graph lock, which also waits for merges holding graph key locks
+
+    While it is held no new merge can take its key locks, so deletions and edits
+    see a graph and vector storages that no merge is changing.
+    """
+
+    async def __aenter__(self) -> "ExclusiveGraphLock":
+        await super().__aenter__()
+        try:
+            while _graph_merges_running() > 0:
+                await asyncio.sleep(_PROCESS_LOCK_POLL_INTERVAL)
+        except BaseException:
+            await super().__aexit__(None, None, None)
+            raise
+        return self
+
+
+class GraphKeyLock:
+    """Lock the entity names and relation keys touched by a graph merge
+
+    Merges of disjoint keys run concurrently. Keys are locked in sorted order, so
+    merges locking overlapping key sets cannot deadlock.
+    """
+
+    def __init__(self, keys: list[str], enable_logging: bool = False):
+        self._keys = sorted(set(keys))
+        self._held: list = []
+        self._pid = os.getpid()
+        self._enable_logging = enable_logging
+
+    async def _register(self) -> None:
+        # Under the global graph lock, so no merge starts while it is held
+        if _is_multiprocess:
+            async with _async_locks["graph_db_lock"]:
+                await _acquire_process_lock(_graph_db_lock)
+                try:
+                    _graph_merges_in_flight[self._pid] = (
+                        _graph_merges_in_flight.get(self._pid, 0) + 1
+                    )
+                finally:
+                    _graph_db_lock.release()
+        else:
+            async with _graph_db_lock:
+                _graph_merges_in_flight[self._pid] = (
+                    _graph_merges_in_flight.get(self._pid, 0) + 1
+                )
+
+    def _unregister(self) -> None:
+        # Only this process changes its own count
+        _graph_merges_in_flight[self._pid] -= 1
+
+    async def _acquire_all(self) -> None:
+        if _is_multiprocess:
+            stripes = sorted(
+                {
+                    zlib.crc32(key.encode("utf-8")) % _GRAPH_KEY_LOCK_STRIPES
+                    for key in self._keys
+                }
+            )
+            for stripe in stripes:
+                async_lock = _graph_key_async_locks[stripe]
+                await async_lock.acquire()
+                try:
+                    await _acquire_process_lock(_graph_key_locks[stripe])
+                except BaseException:
+                    async_lock.release()
+                    raise
+                self._held.append(stripe)
+            return
+
+        for key in self._keys:
+            entry = _graph_key_locks.setdefault(key, [asyncio.Lock(), 0])
+            entry[1] += 1
+            try:
+                await entry[0].acquire()
+            except BaseException:
+                self._drop_waiter(key, entry)
+                raise
+            self._held.append(key)
+
+    def _drop_waiter(self, key: str, entry: list) -> None:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _graph_key_locks[key]
+
+    def _release_all(self) -> None:
+        while self._held:
+            held = self._held.pop()
+            if _is_multiprocess:
+                _graph_key_locks[held].release()
+                _graph_key_async_locks[held].release()
+            else:
+                entry = _graph_key_locks[held]
+                entry[0].release()
+                self._drop_waiter(held, entry)
+
+    async def __aenter__(self) -> "GraphKeyLock":
+        await self._register()
+        try:
+            await self._acquire_all()
+        except BaseException:
+            self._release_all()
+            self._unregister()
+            raise
+        direct_log(
+            f"== Lock == Process {self._pid}: {len(self._keys)} graph keys locked",
+            enable_output=self._enable_logging,
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self._release_all()
+        finally:
+            self._unregister()
+
+
 def get_internal_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified storage lock for data consistency"""
     async_lock = _async_locks.get("internal_lock") if _is_multiprocess else None
@@ -248,9 +391,9 @@ def get_pipeline_status_lock(enable_logging: bool = False) -> UnifiedLock:
 
 
 def get_graph_db_lock(enable_logging: bool = False) -> UnifiedLock:
-    """return unified graph database lock for ensuring atomic operations"""
+    """return the global graph lock for deletions and edits, exclusive with merges"""
     async_lock = _async_locks.get("graph_db_lock") if _is_multiprocess else None
-    return UnifiedLock(
+    return ExclusiveGraphLock(
         lock=_graph_db_lock,
         is_async=not _is_multiprocess,
         name="graph_db_lock",
@@ -259,6 +402,13 @@ def get_graph_db_lock(enable_logging: bool = False) -> UnifiedLock:
     )
 
 
+def get_graph_db_key_lock(
+    keys: list[str], enable_logging: bool = False
+) -> GraphKeyLock:
+    """return a lock on the given entity names and relation keys for a graph merge"""
+    return GraphKeyLock(keys, enable_logging=enable_logging)
+
+
 def get_data_init_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified data initialization lock for ensuring atomic data initialization"""
     async_lock = _async_locks.get("data_init_lock") if _is_multiprocess else None
@@ -302,7 +452,10 @@ def initialize_share_data(workers: int = 1):
         _init_flags, \
         _initialized, \
         _update_flags, \
-        _async_locks
+        _async_locks, \
+        _graph_key_locks, \
+        _graph_key_async_locks, \
+        _graph_merges_in_flight
 
     # Check if already initialized
     if _initialized:
@@ -333,6 +486,11 @@ def initialize_share_data(workers: int = 1):
             "graph_db_lock": asyncio.Lock(),
             "data_init_lock": asyncio.Lock(),
         }
+        _graph_key_locks = [_manager.Lock() for _ in range(_GRAPH_KEY_LOCK_STRIPES)]
+        _graph_key_async_locks = [
+            asyncio.Lock() for _ in range(_GRAPH_KEY_LOCK_STRIPES)
+        ]
+        _graph_merges_in_flight = _manager.dict()
 
         direct_log(
             f"Process {os.getpid()} Shared-Data created for Multiple Process (workers={workers})"
@@ -348,6 +506,9 @@ def initialize_share_data(workers: int = 1):
         _init_flags = {}
         _update_flags = {}
         _async_locks = None  # No need for async locks in single process mode
+        _graph_key_locks = {}
+        _graph_key_async_locks = None
+        _graph_merges_in_flight = {}
         direct_log(f"Process {os.getpid()} Shared-Data created for Single Process")
 
     # Mark as initialized
@@ -535,7 +696,10 @@ def finalize_share_data():
         _init_flags, \
         _initialized, \
         _update_flags, \
-        _async_locks
+        _async_locks, \
+        _graph_key_locks, \
+        _graph_key_async_locks, \
+        _graph_merges_in_flight
 
     # Check if already initialized
     if not _initialized:
@@ -601,5 +765,8 @@ def finalize_share_data():
     _data_init_lock = None
     _update_flags = None
     _async_locks = None
+    _graph_key_locks = None
+    _graph_key_async_locks = None
+    _graph_merges_in_flight = None
 
     direct_log(f"Process {os.getpid()} storage data finalization complete")
@@ -0,0 +1,105 @@
+"""
+Bounded breadth-first subgraph extraction shared by the graph storages.
+
+The extractor walks the graph level by level from a seed node and asks the
+storage for the neighbors of a whole level at once, so a backend answers each
+level with one batched lookup or query. When a level does not fit into the
+remaining node budget, the nodes with the highest degree are kept, selected
+with a heap instead of sorting the level. Extraction stops as soon as
+`max_nodes` nodes have been visited.
+
+Levels are yielded as they are visited, so callers can stream the subgraph.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable
+
+NeighborsFunc = Callable[[list[str]], Awaitable[dict[str, list[str]]]]
+DegreesFunc = Callable[[list[str]], Awaitable[dict[str, int]]]
+
+
+class SubgraphExtractor:
+    """Degree-prioritized BFS bounded by depth and node count
+
+    Args:
+        seed: Id of the start node, which must exist
+        max_depth: Maximum number of hops from the seed
+        max_nodes: Maximum number of nodes to visit
+        neighbors: Returns the neighbor ids of each of the given nodes
+        degrees: Returns the degree of each of the given nodes, used to visit
+            each level highest degree first. Without it levels are visited
+            and cut in discovery order.
+
+    After iterating `levels()`, `visited` holds the depth of every visited node
+    in visiting order and `is_truncated` tells whether nodes within `max_depth`
+    were left out.
+    """
+
+    def __init__(
+        self,
+        seed: str,
+        max_depth: int,
+        max_nodes: int,
+        neighbors: NeighborsFunc,
+        degrees: DegreesFunc | None = None,
+    ):
+        self.seed = seed
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self._neighbors = neighbors
+        self._degrees = degrees
+        self.visited: dict[str, int] = {}
+        self.is_truncated = False
+
+    async def _visiting_order(self, frontier: deque[str], limit: int) -> list[str]:
+        """The first `limit` nodes of the frontier in visiting order"""
+        if limit <= 0:
+            return []
+        if self._degrees is None or len(frontier) == 1:
+            return [frontier[i] for i in range(min(limit, len(frontier)))]
+        degrees = await self._degrees(list(frontier))
+        # Highest degree first, ties in discovery order
+        selected = heapq.nsmallest(
+            limit,
+            enumerate(frontier),
+            key=lambda item: (-degrees.get(item[1], 0), item[0]),
+        )
+        return [node_id for _, node_id in selected]
+
+    async def levels(self) -> AsyncIterator[list[str]]:
+        """Yield the nodes visited at each depth, starting with the seed"""
+        frontier: deque[str] = deque([self.seed])
+        depth = 0
+        while frontier:
+            remaining = self.max_nodes - len(self.visited)
+            if len(frontier) > remaining:
+                self.is_truncated = True
+            level = await self._visiting_order(frontier, remaining)
+            for node_id in level:
+                self.visited[node_id] = depth
+            if level:
+                yield level
+            if self.is_truncated or depth >= self.max_depth:
+                return
+
+            neighbors = await self._neighbors(level)
+            frontier = deque()
+            queued = set()
+            for node_id in level:
+                for neighbor in neighbors.get(node_id) or ():
+                    if neighbor not in self.visited and neighbor not in queued:
+                        queued.add(neighbor)
+                        frontier.append(neighbor)
+            if frontier and len(self.visited) >= self.max_nodes:
+                self.is_truncated = True
+                return
+            depth += 1
+
+    async def run(self) -> list[str]:
+        """Visit the whole bounded subgraph and return the nodes in visiting order"""
+        async for _ in self.levels():
+            pass
+        return list(self.visited)
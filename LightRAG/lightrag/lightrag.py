@@ -3,6 +3,7 @@ from __future__ import annotations
 import traceback
 import asyncio
 import configparser
+import json
 import os
 import time
 import warnings
@@ -17,16 +18,20 @@ from typing import (
     cast,
     final,
     Literal,
+    Iterable,
     Optional,
-    List,
     Dict,
 )
 from lightrag.constants import (
     DEFAULT_MAX_GLEANING,
     DEFAULT_MAX_TOKEN_SUMMARY,
     DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE,
+    DEFAULT_EMBEDDING_BATCH_MAX_TOKENS,
+    DEFAULT_EMBEDDING_BATCH_WINDOW,
+    DEFAULT_ENTITY_EXTRACT_FORMAT,
 )
 from lightrag.utils import get_env_value
+from lightrag.extraction_parser import EXTRACTION_FORMATS
 
 from lightrag.kg import (
     STORAGES,
@@ -45,6 +50,8 @@ from .base import (
     BaseVectorStorage,
     DocProcessingStatus,
     DocStatus,
+    DocStatusPage,
+    DocStatusSortField,
     DocStatusStorage,
     QueryParam,
     StorageNameSpace,
@@ -53,7 +60,7 @@ from .base import (
 )
 from .namespace import NameSpace
 from .operate import (
-    chunking_by_token_size,
+    iter_chunks_by_token_size,
     extract_entities,
     merge_nodes_and_edges,
     kg_query,
@@ -61,19 +68,28 @@ from .operate import (
     query_with_keywords,
     _rebuild_knowledge_from_chunks,
 )
-from .constants import GRAPH_FIELD_SEP
+from .constants import (
+    GRAPH_FIELD_SEP,
+    GRAPH_SCAN_BATCH_SIZE,
+    STORAGE_SCAN_BATCH_SIZE,
+    VECTOR_REBUILD_MAX_PARALLEL,
+)
 from .utils import (
     Tokenizer,
     TiktokenTokenizer,
     EmbeddingFunc,
     always_get_an_event_loop,
     compute_mdhash_id,
+    compute_args_hash,
+    embedding_cache_wrapper,
+    get_embedding_model_name,
     convert_response_to_json,
     lazy_external_import,
     priority_limit_async_func_call,
     get_content_summary,
     clean_text,
     check_storage_env_vars,
+    llm_call_flights,
     logger,
 )
 from .types import KnowledgeGraph
@@ -134,6 +150,13 @@ class LightRAG:
     )
     """Maximum number of entity extraction attempts for ambiguous content."""
 
+    entity_extract_format: str = field(
+        default=get_env_value(
+            "ENTITY_EXTRACT_FORMAT", DEFAULT_ENTITY_EXTRACT_FORMAT, str
+        )
+    )
+    """Output format requested from the LLM for entity extraction: `delimited` records or `jsonl` (one JSON object per line)."""
+
     summary_to_max_tokens: int = field(
         default=get_env_value("MAX_TOKEN_SUMMARY", DEFAULT_MAX_TOKEN_SUMMARY, int)
     )
@@ -174,8 +197,8 @@ class LightRAG:
             int,
             int,
         ],
-        List[Dict[str, Any]],
-    ] = field(default_factory=lambda: chunking_by_token_size)
+        Iterable[Dict[str, Any]],
+    ] = field(default_factory=lambda: iter_chunks_by_token_size)
     """
     Custom chunking function for splitting text into chunks before processing.
 
@@ -188,11 +211,12 @@ class LightRAG:
         - `chunk_token_size`: The maximum number of tokens per chunk.
         - `chunk_overlap_token_size`: The number of overlapping tokens between consecutive chunks.
 
-    The function should return a list of dictionaries, where each dictionary contains the following keys:
+    The function should return (or yield) dictionaries, where each dictionary contains the following keys:
         - `tokens`: The number of tokens in the chunk.
         - `content`: The text content of the chunk.
 
-    Defaults to `chunking_by_token_size` if not specified.
+    Defaults to `iter_chunks_by_token_size` if not specified, which tokenizes each document once
+    and streams chunks into the pipeline. `chunking_by_token_size` returns the same chunks as a list.
     """
 
     # Embedding
@@ -204,11 +228,40 @@ class LightRAG:
     embedding_batch_num: int = field(default=int(os.getenv("EMBEDDING_BATCH_NUM", 32)))
     """Batch size for embedding computations."""
 
+    embedding_batch_max_tokens: int | None = field(
+        default=get_env_value(
+            "EMBEDDING_BATCH_MAX_TOKENS", DEFAULT_EMBEDDING_BATCH_MAX_TOKENS, int
+        )
+    )
+    """Token budget of an embedding batch, summed over its texts. None for no limit.
+
+    This is a limit of the embedding request, unlike the max_token_size of the
+    embedding function, which applies to each text.
+    """
+
+    embedding_batch_window: float = field(
+        default=get_env_value(
+            "EMBEDDING_BATCH_WINDOW", DEFAULT_EMBEDDING_BATCH_WINDOW, float
+        )
+    )
+    """Seconds to wait for concurrent upserts to fill an embedding batch."""
+
     embedding_func_max_async: int = field(
         default=int(os.getenv("EMBEDDING_FUNC_MAX_ASYNC", 16))
     )
     """Maximum number of concurrent embedding function calls."""
 
+    enable_embedding_cache: bool = field(
+        default=get_env_value("ENABLE_EMBEDDING_CACHE", False, bool)
+    )
+    """Enables persisting embeddings by model name and content hash, so unchanged texts are not re-embedded.
+    Requires `embedding_func.model_name`, the cache stays disabled without it."""
+
+    embedding_cache_max_entries: int = field(
+        default=get_env_value("EMBEDDING_CACHE_MAX_ENTRIES", 100000, int)
+    )
+    """Maximum number of cached embeddings; least recently used entries are evicted. 0 means unbounded."""
+
     embedding_cache_config: dict[str, Any] = field(
         default_factory=lambda: {
             "enabled": False,
@@ -216,10 +269,10 @@ class LightRAG:
             "use_llm_check": False,
         }
     )
-    """Configuration for embedding cache.
-    - enabled: If True, enables caching to avoid redundant computations.
-    - similarity_threshold: Minimum similarity score to use cached embeddings.
-    - use_llm_check: If True, validates cached embeddings using an LLM.
+    """Configuration for the semantic query cache used by kg_query and naive_query.
+    - enabled: If True, a query missing the exact cache is matched against the embeddings of cached queries.
+    - similarity_threshold: Minimum cosine similarity for reusing a cached answer.
+    - use_llm_check: If True, validates cached answers using an LLM.
     """
 
     # LLM Configuration
@@ -237,6 +290,11 @@ class LightRAG:
     llm_model_max_async: int = field(default=int(os.getenv("MAX_ASYNC", 4)))
     """Maximum number of concurrent LLM calls."""
 
+    adaptive_concurrency: bool = field(
+        default=get_env_value("ADAPTIVE_CONCURRENCY", False, bool)
+    )
+    """Adjusts LLM and embedding concurrency to the observed latency and overload errors, up to llm_model_max_async and embedding_func_max_async."""
+
     llm_model_kwargs: dict[str, Any] = field(default_factory=dict)
     """Additional keyword arguments passed to the LLM model function."""
 
@@ -252,12 +310,21 @@ class LightRAG:
     enable_llm_cache_for_entity_extract: bool = field(default=True)
     """If True, enables caching for entity extraction steps to reduce LLM costs."""
 
+    enable_query_coalescing: bool = field(
+        default=get_env_value("ENABLE_QUERY_COALESCING", True, bool)
+    )
+    """Identical queries issued while one is in flight share its result instead of running again."""
+
     # Extensions
     # ---
 
     max_parallel_insert: int = field(default=int(os.getenv("MAX_PARALLEL_INSERT", 2)))
     """Maximum number of parallel insert operations."""
 
+    pipeline_queue_size: int = field(default=int(os.getenv("PIPELINE_QUEUE_SIZE", 2)))
+    """Number of documents buffered between the stages of the ingestion pipeline
+    (chunking, entity extraction, graph merging and completion)."""
+
     max_graph_nodes: int = field(default=get_env_value("MAX_GRAPH_NODES", 1000, int))
     """Maximum number of graph nodes to return in knowledge graph queries."""
 
@@ -336,6 +403,11 @@ class LightRAG:
             # Check environment variables
             check_storage_env_vars(storage_name)
 
+        if self.entity_extract_format not in EXTRACTION_FORMATS:
+            raise ValueError(
+                f"Invalid entity_extract_format {self.entity_extract_format!r}, valid formats are: {EXTRACTION_FORMATS}"
+            )
+
         # Ensure vector_db_storage_cls_kwargs has required fields
         self.vector_db_storage_cls_kwargs = {
             "cosine_better_than_threshold": self.cosine_better_than_threshold,
@@ -356,11 +428,6 @@ class LightRAG:
         _print_config = ",\n  ".join([f"{k} = {v}" for k, v in global_config.items()])
         logger.debug(f"LightRAG init with param:\n  {_print_config}\n")
 
-        # Init Embedding
-        self.embedding_func = priority_limit_async_func_call(
-            self.embedding_func_max_async
-        )(self.embedding_func)
-
         # Initialize all storages
         self.key_string_value_json_storage_cls: type[BaseKVStorage] = (
             self._get_storage_class(self.kv_storage)
@@ -384,6 +451,20 @@ class LightRAG:
         # Initialize document status storage
         self.doc_status_storage_cls = self._get_storage_class(self.doc_status_storage)
 
+        # Cache embeddings in the KV storage so only unseen texts reach the embedding model
+        self.embedding_cache: BaseKVStorage | None = None
+        if self.enable_embedding_cache and self.embedding_func is not None:
+            self.embedding_cache = self.key_string_value_json_storage_cls(  # type: ignore
+                namespace=NameSpace.KV_STORE_EMBEDDING_CACHE,
+                workspace=self.workspace,
+                embedding_func=None,
+            )
+
+        # Init Embedding
+        self.embedding_func, self._rebuild_embedding_func = self._wrap_embedding_func(
+            self.embedding_func
+        )
+
         self.llm_response_cache: BaseKVStorage = self.key_string_value_json_storage_cls(  # type: ignore
             namespace=NameSpace.KV_STORE_LLM_RESPONSE_CACHE,
             workspace=self.workspace,
@@ -439,7 +520,9 @@ class LightRAG:
         # Directly use llm_response_cache, don't create a new object
         hashing_kv = self.llm_response_cache
 
-        self.llm_model_func = priority_limit_async_func_call(self.llm_model_max_async)(
+        self.llm_model_func = priority_limit_async_func_call(
+            self.llm_model_max_async, adaptive=self.adaptive_concurrency
+        )(
             partial(
                 self.llm_model_func,  # type: ignore
                 hashing_kv=hashing_kv,
@@ -489,6 +572,7 @@ class LightRAG:
                 self.chunk_entity_relation_graph,
                 self.llm_response_cache,
                 self.doc_status,
+                self.embedding_cache,
             ):
                 if storage:
                     tasks.append(storage.initialize())
@@ -512,6 +596,7 @@ class LightRAG:
                 self.chunk_entity_relation_graph,
                 self.llm_response_cache,
                 self.doc_status,
+                self.embedding_cache,
             ):
                 if storage:
                     tasks.append(storage.finalize())
@@ -552,6 +637,62 @@ class LightRAG:
             node_label, max_depth, max_nodes
         )
 
+    async def stream_knowledge_graph(
+        self,
+        node_label: str,
+        max_depth: int = 3,
+        max_nodes: int = None,
+    ) -> AsyncIterator[KnowledgeGraph]:
+        """Get knowledge graph for a given label in consecutive parts
+
+        Args:
+            node_label (str): Label to get knowledge graph for
+            max_depth (int): Maximum depth of graph
+            max_nodes (int, optional): Maximum number of nodes to return. Defaults to self.max_graph_nodes.
+
+        Yields:
+            KnowledgeGraph: Parts of the knowledge graph, the last one carries the is_truncated flag
+        """
+        if max_nodes is None:
+            max_nodes = self.max_graph_nodes
+        else:
+            max_nodes = min(max_nodes, self.max_graph_nodes)
+
+        async for chunk in self.chunk_entity_relation_graph.stream_knowledge_graph(
+            node_label, max_depth, max_nodes
+        ):
+            yield chunk
+
+    def _wrap_embedding_func(
+        self, embedding_func: EmbeddingFunc
+    ) -> tuple[EmbeddingFunc, EmbeddingFunc]:
+        """Embedding function with the concurrency limit and, if enabled, the cache
+
+        Returns:
+            The function to use, and a function sharing its concurrency limit that
+            only writes the cache, for rebuilds
+        """
+        # The limited function no longer carries the model name of the EmbeddingFunc
+        model_name = get_embedding_model_name(embedding_func)
+        embedding_func = priority_limit_async_func_call(
+            self.embedding_func_max_async, adaptive=self.adaptive_concurrency
+        )(embedding_func)
+        if self.embedding_cache is None:
+            return embedding_func, embedding_func
+        return (
+            embedding_cache_wrapper(
+                self.embedding_cache,
+                self.embedding_cache_max_entries,
+                model_name=model_name,
+            )(embedding_func),
+            embedding_cache_wrapper(
+                self.embedding_cache,
+                self.embedding_cache_max_entries,
+                model_name=model_name,
+                write_only=True,
+            )(embedding_func),
+        )
+
     def _get_storage_class(self, storage_name: str) -> Callable[..., Any]:
         import_path = STORAGES[storage_name]
         storage_class = lazy_external_import(import_path, storage_name)
@@ -907,266 +1048,13 @@ class LightRAG:
                 job_name = f"{path_prefix}[{total_files} files]"
                 pipeline_status["job_name"] = job_name
 
-                # Create a counter to track the number of processed files
-                processed_count = 0
-                # Create a semaphore to limit the number of concurrent file processing
-                semaphore = asyncio.Semaphore(self.max_parallel_insert)
-
-                async def process_document(
-                    doc_id: str,
-                    status_doc: DocProcessingStatus,
-                    split_by_character: str | None,
-                    split_by_character_only: bool,
-                    pipeline_status: dict,
-                    pipeline_status_lock: asyncio.Lock,
-                    semaphore: asyncio.Semaphore,
-                ) -> None:
-                    """Process single document"""
-                    file_extraction_stage_ok = False
-                    async with semaphore:
-                        nonlocal processed_count
-                        current_file_number = 0
-                        try:
-                            # Get file path from status document
-                            file_path = getattr(
-                                status_doc, "file_path", "unknown_source"
-                            )
-
-                            async with pipeline_status_lock:
-                                # Update processed file count and save current file number
-                                processed_count += 1
-                                current_file_number = (
-                                    processed_count  # Save the current file number
-                                )
-                                pipeline_status["cur_batch"] = processed_count
-
-                                log_message = f"Extracting stage {current_file_number}/{total_files}: {file_path}"
-                                logger.info(log_message)
-                                pipeline_status["history_messages"].append(log_message)
-                                log_message = f"Processing d-id: {doc_id}"
-                                logger.info(log_message)
-                                pipeline_status["latest_message"] = log_message
-                                pipeline_status["history_messages"].append(log_message)
-
-                            # Generate chunks from document
-                            chunks: dict[str, Any] = {
-                                compute_mdhash_id(dp["content"], prefix="chunk-"): {
-                                    **dp,
-                                    "full_doc_id": doc_id,
-                                    "file_path": file_path,  # Add file path to each chunk
-                                    "llm_cache_list": [],  # Initialize empty LLM cache list for each chunk
-                                }
-                                for dp in self.chunking_func(
-                                    self.tokenizer,
-                                    status_doc.content,
-                                    split_by_character,
-                                    split_by_character_only,
-                                    self.chunk_overlap_token_size,
-                                    self.chunk_token_size,
-                                )
-                            }
-
-                            if not chunks:
-                                logger.warning("No document chunks to process")
-
-                            # Process document in two stages
-                            # Stage 1: Process text chunks and docs (parallel execution)
-                            doc_status_task = asyncio.create_task(
-                                self.doc_status.upsert(
-                                    {
-                                        doc_id: {
-                                            "status": DocStatus.PROCESSING,
-                                            "chunks_count": len(chunks),
-                                            "chunks_list": list(
-                                                chunks.keys()
-                                            ),  # Save chunks list
-                                            "content": status_doc.content,
-                                            "content_summary": status_doc.content_summary,
-                                            "content_length": status_doc.content_length,
-                                            "created_at": status_doc.created_at,
-                                            "updated_at": datetime.now(
-                                                timezone.utc
-                                            ).isoformat(),
-                                            "file_path": file_path,
-                                        }
-                                    }
-                                )
-                            )
-                            chunks_vdb_task = asyncio.create_task(
-                                self.chunks_vdb.upsert(chunks)
-                            )
-                            full_docs_task = asyncio.create_task(
-                                self.full_docs.upsert(
-                                    {doc_id: {"content": status_doc.content}}
-                                )
-                            )
-                            text_chunks_task = asyncio.create_task(
-                                self.text_chunks.upsert(chunks)
-                            )
-
-                            # First stage tasks (parallel execution)
-                            first_stage_tasks = [
-                                doc_status_task,
-                                chunks_vdb_task,
-                                full_docs_task,
-                                text_chunks_task,
-                            ]
-                            entity_relation_task = None
-
-                            # Execute first stage tasks
-                            await asyncio.gather(*first_stage_tasks)
-
-                            # Stage 2: Process entity relation graph (after text_chunks are saved)
-                            entity_relation_task = asyncio.create_task(
-                                self._process_entity_relation_graph(
-                                    chunks, pipeline_status, pipeline_status_lock
-                                )
-                            )
-                            await entity_relation_task
-                            file_extraction_stage_ok = True
-
-                        except Exception as e:
-                            # Log error and update pipeline status
-                            logger.error(traceback.format_exc())
-                            error_msg = f"Failed to extract document {current_file_number}/{total_files}: {file_path}"
-                            logger.error(error_msg)
-                            async with pipeline_status_lock:
-                                pipeline_status["latest_message"] = error_msg
-                                pipeline_status["history_messages"].append(
-                                    traceback.format_exc()
-                                )
-                                pipeline_status["history_messages"].append(error_msg)
-
-                                # Cancel tasks that are not yet completed
-                                all_tasks = first_stage_tasks + (
-                                    [entity_relation_task]
-                                    if entity_relation_task
-                                    else []
-                                )
-                                for task in all_tasks:
-                                    if task and not task.done():
-                                        task.cancel()
-
-                            # Persistent llm cache
-                            if self.llm_response_cache:
-                                await self.llm_response_cache.index_done_callback()
-
-                            # Update document status to failed
-                            await self.doc_status.upsert(
-                                {
-                                    doc_id: {
-                                        "status": DocStatus.FAILED,
-                                        "error": str(e),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
-                                        "updated_at": datetime.now(
-                                            timezone.utc
-                                        ).isoformat(),
-                                        "file_path": file_path,
-                                    }
-                                }
-                            )
-
-                    # Semphore released, concurrency controlled by graph_db_lock in merge_nodes_and_edges instead
-
-                    if file_extraction_stage_ok:
-                        try:
-                            # Get chunk_results from entity_relation_task
-                            chunk_results = await entity_relation_task
-                            await merge_nodes_and_edges(
-                                chunk_results=chunk_results,  # result collected from entity_relation_task
-                                knowledge_graph_inst=self.chunk_entity_relation_graph,
-                                entity_vdb=self.entities_vdb,
-                                relationships_vdb=self.relationships_vdb,
-                                global_config=asdict(self),
-                                pipeline_status=pipeline_status,
-                                pipeline_status_lock=pipeline_status_lock,
-                                llm_response_cache=self.llm_response_cache,
-                                current_file_number=current_file_number,
-                                total_files=total_files,
-                                file_path=file_path,
-                            )
-
-                            await self.doc_status.upsert(
-                                {
-                                    doc_id: {
-                                        "status": DocStatus.PROCESSED,
-                                        "chunks_count": len(chunks),
-                                        "chunks_list": list(
-                                            chunks.keys()
-                                        ),  # 保留 chunks_list
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
-                                        "updated_at": datetime.now(
-                                            timezone.utc
-                                        ).isoformat(),
-                                        "file_path": file_path,
-                                    }
-                                }
-                            )
-
-                            # Call _insert_done after processing each file
-                            await self._insert_done()
-
-                            async with pipeline_status_lock:
-                                log_message = f"Completed processing file {current_file_number}/{total_files}: {file_path}"
-                                logger.info(log_message)
-                                pipeline_status["latest_message"] = log_message
-                                pipeline_status["history_messages"].append(log_message)
-
-                        except Exception as e:
-                            # Log error and update pipeline status
-                            logger.error(traceback.format_exc())
-                            error_msg = f"Merging stage failed in document {current_file_number}/{total_files}: {file_path}"
-                            logger.error(error_msg)
-                            async with pipeline_status_lock:
-                                pipeline_status["latest_message"] = error_msg
-                                pipeline_status["history_messages"].append(
-                                    traceback.format_exc()
-                                )
-                                pipeline_status["history_messages"].append(error_msg)
-
-                            # Persistent llm cache
-                            if self.llm_response_cache:
-                                await self.llm_response_cache.index_done_callback()
-
-                            # Update document status to failed
-                            await self.doc_status.upsert(
-                                {
-                                    doc_id: {
-                                        "status": DocStatus.FAILED,
-                                        "error": str(e),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
-                                        "updated_at": datetime.now().isoformat(),
-                                        "file_path": file_path,
-                                    }
-                                }
-                            )
-
-                # Create processing tasks for all documents
-                doc_tasks = []
-                for doc_id, status_doc in to_process_docs.items():
-                    doc_tasks.append(
-                        process_document(
-                            doc_id,
-                            status_doc,
-                            split_by_character,
-                            split_by_character_only,
-                            pipeline_status,
-                            pipeline_status_lock,
-                            semaphore,
-                        )
-                    )
-
-                # Wait for all document processing to complete
-                await asyncio.gather(*doc_tasks)
+                await self._run_ingestion_pipeline(
+                    to_process_docs,
+                    split_by_character,
+                    split_by_character_only,
+                    pipeline_status,
+                    pipeline_status_lock,
+                )
 
                 # Check if there's a pending request to process more documents (with lock)
                 has_pending_request = False
@@ -1205,6 +1093,252 @@ class LightRAG:
                 pipeline_status["latest_message"] = log_message
                 pipeline_status["history_messages"].append(log_message)
 
+    async def _run_ingestion_pipeline(
+        self,
+        to_process_docs: dict[str, DocProcessingStatus],
+        split_by_character: str | None,
+        split_by_character_only: bool,
+        pipeline_status: dict,
+        pipeline_status_lock: asyncio.Lock,
+    ) -> None:
+        """Process documents through a staged pipeline
+
+        The stages are connected by bounded queues, so different documents are in
+        different stages at the same time and the LLM, the embedding service and the
+        graph storage are kept busy together:
+        1. Chunking: split the document, save the chunks, full document and status
+        2. Extraction (max_parallel_insert workers): entity and relation extraction,
+           while the chunk embeddings are computed
+        3. Merging (max_parallel_insert workers, locking the entity and relation keys
+           of the document): merge into the graph and upsert the merged entities and
+           relations into the vector storages
+        4. Completion (one worker): mark the document as processed and persist
+        """
+        total_files = len(to_process_docs)
+        queue_size = max(1, self.pipeline_queue_size)
+        extraction_workers = max(1, self.max_parallel_insert)
+        merging_workers = max(1, self.max_parallel_insert)
+        extract_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        merge_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        done_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Create a counter to track the number of processed files
+        processed_count = 0
+
+        def doc_status_data(job: dict[str, Any], status: DocStatus, **extra) -> dict:
+            status_doc: DocProcessingStatus = job["status_doc"]
+            return {
+                job["doc_id"]: {
+                    "status": status,
+                    **extra,
+                    "content": status_doc.content,
+                    "content_summary": status_doc.content_summary,
+                    "content_length": status_doc.content_length,
+                    "created_at": status_doc.created_at,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                    "file_path": job["file_path"],
+                }
+            }
+
+        async def fail_document(job: dict[str, Any], error_msg: str, e: Exception):
+            # Log error and update pipeline status
+            logger.error(traceback.format_exc())
+            logger.error(error_msg)
+            async with pipeline_status_lock:
+                pipeline_status["latest_message"] = error_msg
+                pipeline_status["history_messages"].append(traceback.format_exc())
+                pipeline_status["history_messages"].append(error_msg)
+
+            # Persistent llm cache
+            if self.llm_response_cache:
+                await self.llm_response_cache.index_done_callback()
+
+            # Update document status to failed
+            await self.doc_status.upsert(
+                doc_status_data(job, DocStatus.FAILED, error=str(e))
+            )
+
+        async def chunking_stage():
+            for file_number, (doc_id, status_doc) in enumerate(
+                to_process_docs.items(), start=1
+            ):
+                job = {
+                    "doc_id": doc_id,
+                    "status_doc": status_doc,
+                    # Get file path from status document
+                    "file_path": getattr(status_doc, "file_path", "unknown_source"),
+                    "file_number": file_number,
+                }
+                try:
+                    # Generate chunks from document, consuming the chunker as a stream
+                    chunks: dict[str, Any] = {
+                        compute_mdhash_id(dp["content"], prefix="chunk-"): {
+                            **dp,
+                            "full_doc_id": doc_id,
+                            # Add file path to each chunk
+                            "file_path": job["file_path"],
+                            "llm_cache_list": [],  # Initialize empty LLM cache list for each chunk
+                        }
+                        for dp in self.chunking_func(
+                            self.tokenizer,
+                            status_doc.content,
+                            split_by_character,
+                            split_by_character_only,
+                            self.chunk_overlap_token_size,
+                            self.chunk_token_size,
+                        )
+                    }
+                    if not chunks:
+                        logger.warning("No document chunks to process")
+                    job["chunks"] = chunks
+
+                    # Text chunks must be saved before extraction updates their llm_cache_list
+                    await asyncio.gather(
+                        self.doc_status.upsert(
+                            doc_status_data(
+                                job,
+                                DocStatus.PROCESSING,
+                                chunks_count=len(chunks),
+                                chunks_list=list(chunks.keys()),  # Save chunks list
+                            )
+                        ),
+                        self.full_docs.upsert(
+                            {doc_id: {"content": status_doc.content}}
+                        ),
+                        self.text_chunks.upsert(chunks),
+                    )
+                except Exception as e:
+                    await fail_document(
+                        job,
+                        f"Failed to extract document {job['file_number']}/{total_files}: {job['file_path']}",
+                        e,
+                    )
+                    continue
+                await extract_queue.put(job)
+
+            for _ in range(extraction_workers):
+                await extract_queue.put(None)
+
+        async def extraction_worker():
+            nonlocal processed_count
+            while (job := await extract_queue.get()) is not None:
+                async with pipeline_status_lock:
+                    # Update processed file count
+                    processed_count += 1
+                    pipeline_status["cur_batch"] = processed_count
+
+                    log_message = f"Extracting stage {job['file_number']}/{total_files}: {job['file_path']}"
+                    logger.info(log_message)
+                    pipeline_status["history_messages"].append(log_message)
+                    log_message = f"Processing d-id: {job['doc_id']}"
+                    logger.info(log_message)
+                    pipeline_status["latest_message"] = log_message
+                    pipeline_status["history_messages"].append(log_message)
+
+                # Chunk embeddings are computed while the LLM extracts entities
+                chunks_vdb_task = asyncio.create_task(
+                    self.chunks_vdb.upsert(job["chunks"])
+                )
+                entity_relation_task = asyncio.create_task(
+                    self._process_entity_relation_graph(
+                        job["chunks"], pipeline_status, pipeline_status_lock
+                    )
+                )
+                try:
+                    await asyncio.gather(chunks_vdb_task, entity_relation_task)
+                except Exception as e:
+                    # Cancel tasks that are not yet completed
+                    for task in (chunks_vdb_task, entity_relation_task):
+                        if not task.done():
+                            task.cancel()
+                    await fail_document(
+                        job,
+                        f"Failed to extract document {job['file_number']}/{total_files}: {job['file_path']}",
+                        e,
+                    )
+                    continue
+
+                job["chunk_results"] = entity_relation_task.result()
+                await merge_queue.put(job)
+
+        async def merging_worker():
+            while (job := await merge_queue.get()) is not None:
+                try:
+                    await merge_nodes_and_edges(
+                        chunk_results=job["chunk_results"],
+                        knowledge_graph_inst=self.chunk_entity_relation_graph,
+                        entity_vdb=self.entities_vdb,
+                        relationships_vdb=self.relationships_vdb,
+                        global_config=asdict(self),
+                        pipeline_status=pipeline_status,
+                        pipeline_status_lock=pipeline_status_lock,
+                        llm_response_cache=self.llm_response_cache,
+                        current_file_number=job["file_number"],
+                        total_files=total_files,
+                        file_path=job["file_path"],
+                    )
+                except Exception as e:
+                    await fail_document(
+                        job,
+                        f"Merging stage failed in document {job['file_number']}/{total_files}: {job['file_path']}",
+                        e,
+                    )
+                    continue
+                await done_queue.put(job)
+
+        async def completion_worker():
+            while (job := await done_queue.get()) is not None:
+                try:
+                    await self.doc_status.upsert(
+                        doc_status_data(
+                            job,
+                            DocStatus.PROCESSED,
+                            chunks_count=len(job["chunks"]),
+                            chunks_list=list(job["chunks"].keys()),
+                        )
+                    )
+
+                    # Call _insert_done after processing each file
+                    await self._insert_done()
+
+                    async with pipeline_status_lock:
+                        log_message = f"Completed processing file {job['file_number']}/{total_files}: {job['file_path']}"
+                        logger.info(log_message)
+                        pipeline_status["latest_message"] = log_message
+                        pipeline_status["history_messages"].append(log_message)
+                except Exception as e:
+                    await fail_document(
+                        job,
+                        f"Failed to complete document {job['file_number']}/{total_files}: {job['file_path']}",
+                        e,
+                    )
+
+        async def extraction_stage():
+            await asyncio.gather(
+                *[extraction_worker() for _ in range(extraction_workers)]
+            )
+            for _ in range(merging_workers):
+                await merge_queue.put(None)
+
+        async def merging_stage():
+            await asyncio.gather(*[merging_worker() for _ in range(merging_workers)])
+            await done_queue.put(None)
+
+        stages = [
+            asyncio.create_task(chunking_stage()),
+            asyncio.create_task(extraction_stage()),
+            asyncio.create_task(merging_stage()),
+            asyncio.create_task(completion_worker()),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            # A stage failed outside of per-document error handling, stop the others
+            # instead of leaving them blocked on their queues
+            for task in stages:
+                if not task.done():
+                    task.cancel()
+            raise
+
     async def _process_entity_relation_graph(
         self, chunk: dict[str, Any], pipeline_status=None, pipeline_status_lock=None
     ) -> list:
@@ -1240,6 +1374,7 @@ class LightRAG:
                 self.relationships_vdb,
                 self.chunks_vdb,
                 self.chunk_entity_relation_graph,
+                self.embedding_cache,
             ]
             if storage_inst is not None
         ]
@@ -1304,6 +1439,7 @@ class LightRAG:
 
             # Insert entities into knowledge graph
             all_entities_data: list[dict[str, str]] = []
+            nodes_to_upsert: list[tuple[str, dict[str, str]]] = []
             for entity_data in custom_kg.get("entities", []):
                 entity_name = entity_data["entity_name"]
                 entity_type = entity_data.get("entity_type", "UNKNOWN")
@@ -1327,16 +1463,45 @@ class LightRAG:
                     "file_path": file_path,
                     "created_at": int(time.time()),
                 }
-                # Insert node data into the knowledge graph
-                await self.chunk_entity_relation_graph.upsert_node(
-                    entity_name, node_data=node_data
-                )
-                node_data["entity_name"] = entity_name
-                all_entities_data.append(node_data)
+                nodes_to_upsert.append((entity_name, node_data))
+                all_entities_data.append({**node_data, "entity_name": entity_name})
                 update_storage = True
 
+            # Insert node data into the knowledge graph
+            if nodes_to_upsert:
+                await self.chunk_entity_relation_graph.upsert_nodes_batch(
+                    nodes_to_upsert
+                )
+
+            # Endpoints of relationships that are not in the knowledge graph yet
+            known_nodes = {entity_name for entity_name, _ in nodes_to_upsert}
+            endpoints = [
+                node_id
+                for node_id in dict.fromkeys(
+                    node_id
+                    for relationship_data in custom_kg.get("relationships", [])
+                    for node_id in (
+                        relationship_data["src_id"],
+                        relationship_data["tgt_id"],
+                    )
+                )
+                if node_id not in known_nodes
+            ]
+            if endpoints:
+                exists = await asyncio.gather(
+                    *[
+                        self.chunk_entity_relation_graph.has_node(node_id)
+                        for node_id in endpoints
+                    ]
+                )
+                known_nodes.update(
+                    node_id for node_id, found in zip(endpoints, exists) if found
+                )
+
             # Insert relationships into knowledge graph
             all_relationships_data: list[dict[str, str]] = []
+            placeholder_nodes: list[tuple[str, dict[str, str]]] = []
+            edges_to_upsert: list[tuple[str, str, dict[str, str]]] = []
             for relationship_data in custom_kg.get("relationships", []):
                 src_id = relationship_data["src_id"]
                 tgt_id = relationship_data["tgt_id"]
@@ -1353,35 +1518,37 @@ class LightRAG:
                         f"Relationship from '{src_id}' to '{tgt_id}' has an UNKNOWN source_id. Please check the source mapping."
                     )
 
-                # Check if nodes exist in the knowledge graph
+                # Create placeholders for nodes missing from the knowledge graph
                 for need_insert_id in [src_id, tgt_id]:
-                    if not (
-                        await self.chunk_entity_relation_graph.has_node(need_insert_id)
-                    ):
-                        await self.chunk_entity_relation_graph.upsert_node(
-                            need_insert_id,
-                            node_data={
-                                "entity_id": need_insert_id,
-                                "source_id": source_id,
-                                "description": "UNKNOWN",
-                                "entity_type": "UNKNOWN",
-                                "file_path": file_path,
-                                "created_at": int(time.time()),
-                            },
+                    if need_insert_id not in known_nodes:
+                        known_nodes.add(need_insert_id)
+                        placeholder_nodes.append(
+                            (
+                                need_insert_id,
+                                {
+                                    "entity_id": need_insert_id,
+                                    "source_id": source_id,
+                                    "description": "UNKNOWN",
+                                    "entity_type": "UNKNOWN",
+                                    "file_path": file_path,
+                                    "created_at": int(time.time()),
+                                },
+                            )
                         )
 
-                # Insert edge into the knowledge graph
-                await self.chunk_entity_relation_graph.upsert_edge(
-                    src_id,
-                    tgt_id,
-                    edge_data={
-                        "weight": weight,
-                        "description": description,
-                        "keywords": keywords,
-                        "source_id": source_id,
-                        "file_path": file_path,
-                        "created_at": int(time.time()),
-                    },
+                edges_to_upsert.append(
+                    (
+                        src_id,
+                        tgt_id,
+                        {
+                            "weight": weight,
+                            "description": description,
+                            "keywords": keywords,
+                            "source_id": source_id,
+                            "file_path": file_path,
+                            "created_at": int(time.time()),
+                        },
+                    )
                 )
 
                 edge_data: dict[str, str] = {
@@ -1397,6 +1564,16 @@ class LightRAG:
                 all_relationships_data.append(edge_data)
                 update_storage = True
 
+            # Insert placeholder nodes and edges into the knowledge graph
+            if placeholder_nodes:
+                await self.chunk_entity_relation_graph.upsert_nodes_batch(
+                    placeholder_nodes
+                )
+            if edges_to_upsert:
+                await self.chunk_entity_relation_graph.upsert_edges_batch(
+                    edges_to_upsert
+                )
+
             # Insert entities into vector storage with consistent format
             data_for_vdb = {
                 compute_mdhash_id(dp["entity_name"], prefix="ent-"): {
@@ -1472,11 +1649,34 @@ class LightRAG:
 
         Returns:
             str: The result of the query execution.
+
+        Identical concurrent queries are coalesced unless enable_query_coalescing
+        is False: they wait for the first one and receive its result. A streamed
+        response is replayed to every caller.
         """
-        # If a custom model is provided in param, temporarily update global config
-        global_config = asdict(self)
         # Save original query for vector search
         param.original_query = query
+        if not self.enable_query_coalescing:
+            return await self._aquery(query, param, system_prompt)
+
+        flight_key = compute_args_hash(
+            query,
+            system_prompt,
+            json.dumps(asdict(param), ensure_ascii=False, default=repr, sort_keys=True),
+        )
+        return await llm_call_flights.do(
+            f"{id(self)}:query:{flight_key}",
+            partial(self._aquery, query, param, system_prompt),
+        )
+
+    async def _aquery(
+        self,
+        query: str,
+        param: QueryParam,
+        system_prompt: str | None,
+    ) -> str | AsyncIterator[str]:
+        # If a custom model is provided in param, temporarily update global config
+        global_config = asdict(self)
 
         if param.mode in ["local", "global", "hybrid", "mix"]:
             response = await kg_query(
@@ -1627,6 +1827,135 @@ class LightRAG:
         """Synchronous version of aclear_cache."""
         return always_get_an_event_loop().run_until_complete(self.aclear_cache(modes))
 
+    async def arebuild_vector_storages(
+        self,
+        embedding_func: EmbeddingFunc | None = None,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        max_parallel: int = VECTOR_REBUILD_MAX_PARALLEL,
+        in_place: bool = False,
+    ) -> dict[str, int]:
+        """Embed the chunks, entities and relationships again into new vector indexes
+
+        The vectors are computed from the text chunks and the knowledge graph
+        without calling the LLM, e.g. to switch to another embedding model. The
+        job holds the pipeline like document processing, and reports its progress
+        in the pipeline status. Vector storages able to build a second index
+        swap in the new one once all are complete, the others can only be rebuilt
+        in place. The embedding cache is written but not read by the rebuild, as
+        its keys may not tell two models apart. Other processes sharing the
+        storages must be restarted with the new embedding function.
+
+        Args:
+            embedding_func: Embedding function of the new indexes, e.g. of another
+                model or dimension. The current one if None.
+            batch_size: Number of records read and upserted at a time
+            max_parallel: Maximum number of batches upserted at the same time in
+                each vector storage
+            in_place: Empty and rebuild in place the vector storages unable to
+                build a second index. Queries miss their records until the
+                rebuild completes, and a failed rebuild leaves them partial.
+
+        Returns:
+            The number of records embedded in each vector storage
+
+        Raises:
+            RuntimeError: If the pipeline is busy, or a vector storage cannot
+                build a second index and in_place is False
+        """
+        from .rebuild import rebuild_vector_storages
+
+        if embedding_func is not None:
+            embedding_func, rebuild_embedding_func = self._wrap_embedding_func(
+                embedding_func
+            )
+        else:
+            embedding_func = self.embedding_func
+            rebuild_embedding_func = self._rebuild_embedding_func
+
+        pipeline_status = await get_namespace_data("pipeline_status")
+        pipeline_status_lock = get_pipeline_status_lock()
+
+        async with pipeline_status_lock:
+            if pipeline_status.get("busy", False):
+                raise RuntimeError(
+                    "Cannot rebuild the vector storages while the pipeline is busy"
+                )
+            pipeline_status.update(
+                {
+                    "busy": True,
+                    "job_name": "Rebuild vector storages",
+                    "job_start": datetime.now(timezone.utc).isoformat(),
+                    "docs": 0,
+                    "batchs": 0,
+                    "cur_batch": 0,
+                    "request_pending": False,
+                    "latest_message": "",
+                }
+            )
+            # Cleaning history_messages without breaking it as a shared list object
+            del pipeline_status["history_messages"][:]
+
+        async def progress(message: str) -> None:
+            async with pipeline_status_lock:
+                pipeline_status["latest_message"] = message
+                pipeline_status["history_messages"].append(message)
+
+        try:
+            counts = await rebuild_vector_storages(
+                self,
+                rebuild_embedding_func,
+                batch_size,
+                max_parallel,
+                progress,
+                in_place,
+            )
+            # Queries and the LLM cache now embed with the new function
+            self.embedding_func = embedding_func
+            self._rebuild_embedding_func = rebuild_embedding_func
+            for storage in (
+                self.chunks_vdb,
+                self.entities_vdb,
+                self.relationships_vdb,
+            ):
+                storage.embedding_func = embedding_func
+            for storage in (
+                self.full_docs,
+                self.text_chunks,
+                self.llm_response_cache,
+                self.chunk_entity_relation_graph,
+            ):
+                storage.embedding_func = embedding_func
+            if self.embedding_cache is not None:
+                await self.embedding_cache.index_done_callback()
+        except Exception as e:
+            log_message = f"Rebuilding vector storages failed: {e}"
+            logger.error(log_message)
+            await progress(log_message)
+            raise
+        finally:
+            async with pipeline_status_lock:
+                pipeline_status["busy"] = False
+                has_pending_request = pipeline_status.get("request_pending", False)
+
+        if has_pending_request:
+            # Documents enqueued during the rebuild
+            await self.apipeline_process_enqueue_documents()
+        return counts
+
+    def rebuild_vector_storages(
+        self,
+        embedding_func: EmbeddingFunc | None = None,
+        batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+        max_parallel: int = VECTOR_REBUILD_MAX_PARALLEL,
+        in_place: bool = False,
+    ) -> dict[str, int]:
+        """Synchronous version of arebuild_vector_storages."""
+        return always_get_an_event_loop().run_until_complete(
+            self.arebuild_vector_storages(
+                embedding_func, batch_size, max_parallel, in_place
+            )
+        )
+
     async def get_docs_by_status(
         self, status: DocStatus
     ) -> dict[str, DocProcessingStatus]:
@@ -1637,6 +1966,29 @@ class LightRAG:
         """
         return await self.doc_status.get_docs_by_status(status)
 
+    async def get_docs_paginated(
+        self,
+        status_filter: DocStatus | None = None,
+        page_size: int = 50,
+        cursor: str | None = None,
+        sort_field: DocStatusSortField = "updated_at",
+        sort_direction: Literal["asc", "desc"] = "desc",
+        include_content: bool = False,
+    ) -> DocStatusPage:
+        """Get one page of documents, see DocStatusStorage.get_docs_paginated
+
+        Returns:
+            DocStatusPage with the documents of the page and the cursor of the next page
+        """
+        return await self.doc_status.get_docs_paginated(
+            status_filter=status_filter,
+            page_size=page_size,
+            cursor=cursor,
+            sort_field=sort_field,
+            sort_direction=sort_direction,
+            include_content=include_content,
+        )
+
     async def aget_docs_by_ids(
         self, ids: str | list[str]
     ) -> dict[str, DocProcessingStatus]:
@@ -2090,6 +2442,22 @@ class LightRAG:
         """
         return await self.doc_status.get_status_counts()
 
+    def get_concurrency_metrics(self) -> dict[str, dict[str, Any]]:
+        """Get the state of the LLM and embedding concurrency limiters
+
+        Returns:
+            Dict with the metrics of the "llm" and "embedding" limiters: current
+            limit, running calls, queue depth and wait times per priority
+        """
+        return {
+            name: func.metrics()
+            for name, func in (
+                ("llm", self.llm_model_func),
+                ("embedding", self.embedding_func),
+            )
+            if hasattr(func, "metrics")
+        }
+
     async def get_entity_info(
         self, entity_name: str, include_vector_data: bool = False
     ) -> dict[str, str | None | dict[str, str]]:
@@ -2305,20 +2673,23 @@ class LightRAG:
     async def aexport_data(
         self,
         output_path: str,
-        file_format: Literal["csv", "excel", "md", "txt"] = "csv",
+        file_format: Literal["csv", "jsonl", "parquet", "excel", "md", "txt"] = "csv",
         include_vector_data: bool = False,
+        batch_size: int = GRAPH_SCAN_BATCH_SIZE,
     ) -> None:
         """
         Asynchronously exports all entities, relations, and relationships to various formats.
         Args:
             output_path: The path to the output file (including extension).
-            file_format: Output format - "csv", "excel", "md", "txt".
+            file_format: Output format - "csv", "jsonl", "parquet", "excel", "md", "txt".
                 - csv: Comma-separated values file
+                - jsonl: JSON lines, one object per row with its section in "type"
+                - parquet: Apache Parquet file with a "section" column
                 - excel: Microsoft Excel file with multiple sheets
                 - md: Markdown tables
                 - txt: Plain text formatted output
-                - table: Print formatted tables to console
             include_vector_data: Whether to include data from the vector database.
+            batch_size: Number of nodes or edges read and written per page.
         """
         from .utils import aexport_data as utils_aexport_data
 
@@ -2329,25 +2700,29 @@ class LightRAG:
             output_path,
             file_format,
             include_vector_data,
+            batch_size,
         )
 
     def export_data(
         self,
         output_path: str,
-        file_format: Literal["csv", "excel", "md", "txt"] = "csv",
+        file_format: Literal["csv", "jsonl", "parquet", "excel", "md", "txt"] = "csv",
         include_vector_data: bool = False,
+        batch_size: int = GRAPH_SCAN_BATCH_SIZE,
     ) -> None:
         """
         Synchronously exports all entities, relations, and relationships to various formats.
         Args:
             output_path: The path to the output file (including extension).
-            file_format: Output format - "csv", "excel", "md", "txt".
+            file_format: Output format - "csv", "jsonl", "parquet", "excel", "md", "txt".
                 - csv: Comma-separated values file
+                - jsonl: JSON lines, one object per row with its section in "type"
+                - parquet: Apache Parquet file with a "section" column
                 - excel: Microsoft Excel file with multiple sheets
                 - md: Markdown tables
                 - txt: Plain text formatted output
-                - table: Print formatted tables to console
             include_vector_data: Whether to include data from the vector database.
+            batch_size: Number of nodes or edges read and written per page.
         """
         try:
             loop = asyncio.get_event_loop()
@@ -2356,5 +2731,5 @@ class LightRAG:
             asyncio.set_event_loop(loop)
 
         loop.run_until_complete(
-            self.aexport_data(output_path, file_format, include_vector_data)
+            self.aexport_data(output_path, file_format, include_vector_data, batch_size)
         )
@@ -0,0 +1,396 @@
+"""
+Offline migration of the data of a LightRAG instance to other storage backends.
+
+The KV, document status, vector and graph namespaces of a source `LightRAG`
+instance are streamed batch by batch into a target instance configured with
+other storages, e.g. from the default JsonKVStorage, NanoVectorDBStorage and
+NetworkXStorage to PostgreSQL and Neo4j:
+
+    report = await migrate_storages(source_rag, target_rag, checkpoint_path="migration.json")
+
+Records are read with the `iter_batches`, `iter_node_batches` and
+`iter_edge_batches` scans. Vectors are copied with `upsert_with_vectors`, so the
+embedding model is never called. Namespaces are copied concurrently, and the
+progress of each one is saved to the checkpoint file. A resumed migration skips
+the namespaces that were completed, and continues an interrupted one after the
+last record saved to the checkpoint when the source scans records in a stable
+order (see `scan_order` of the storages), e.g. the sorted keys of the JSON
+storages, the keyset scans of PostgreSQL and Neo4j or the rows of the NanoVectorDB,
+Numpy and NetworkX storages. Other scans, e.g. Redis SCAN or unsorted MongoDB and
+Milvus queries, are copied again from their start. Upserts are idempotent, so
+records copied twice are simply overwritten.
+
+The source must not be written to during the migration, and the target should
+be empty: the record counts of both sides are compared at the end.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable
+
+from .base import BaseKVStorage
+from .constants import (
+    GRAPH_FIELD_SEP,
+    MIGRATION_CHECKPOINT_INTERVAL,
+    MIGRATION_MAX_PARALLEL,
+    STORAGE_SCAN_BATCH_SIZE,
+)
+from .utils import load_json, logger
+
+if TYPE_CHECKING:
+    from .lightrag import LightRAG
+
+# Storage attribute of LightRAG for each namespace, and its kind
+MIGRATION_NAMESPACES = {
+    "full_docs": "kv",
+    "text_chunks": "kv",
+    "llm_response_cache": "kv",
+    "embedding_cache": "kv",
+    "doc_status": "kv",
+    "entities_vdb": "vector",
+    "relationships_vdb": "vector",
+    "chunks_vdb": "vector",
+    "chunk_entity_relation_graph": "graph",
+}
+
+# Storages keeping their data in process-wide namespaces, which a source and a
+# target of the same class would share
+_SHARED_NAMESPACE_STORAGES = {"JsonKVStorage", "JsonDocStatusStorage"}
+
+# Fields of vector records that describe the stored record, not its data
+_VECTOR_RECORD_FIELDS = {
+    "id",
+    "vector",
+    "__id__",
+    "__created_at__",
+    "__vector__",
+    "workspace",
+    "create_time",
+    "update_time",
+}
+
+# Bookkeeping fields added to nodes and edges by the graph backends
+_GRAPH_INTERNAL_FIELDS = {
+    "_id",
+    "source_ids",
+    "source_node_id",
+    "target_node_id",
+    "connected_edges",
+    "edge_count",
+}
+
+
+@dataclass
+class MigrationReport:
+    """Records copied and counted for each part of a migration
+
+    A part is a namespace, or the nodes or edges of a graph namespace, e.g.
+    `chunk_entity_relation_graph.nodes`.
+    """
+
+    copied: dict[str, int] = field(default_factory=dict)
+    """Records written to the target, including those of a resumed run"""
+
+    source_counts: dict[str, int] = field(default_factory=dict)
+    target_counts: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def mismatches(self) -> dict[str, tuple[int, int]]:
+        """(source count, target count) of the parts whose counts differ"""
+        return {
+            part: (count, self.target_counts.get(part, 0))
+            for part, count in self.source_counts.items()
+            if self.target_counts.get(part, 0) != count
+        }
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+
+class MigrationCheckpoint:
+    """Number of records copied for each part and whether it is complete, saved to a JSON file
+
+    Parts scanned in a stable order also record the position of the last record
+    copied, to resume the scan from. Without a path the checkpoint is only kept
+    in memory.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._state: dict[str, dict[str, Any]] = (load_json(path) if path else {}) or {}
+        self._lock = asyncio.Lock()
+
+    def copied(self, part: str) -> int:
+        return self._state.get(part, {}).get("copied", 0)
+
+    def is_done(self, part: str) -> bool:
+        return self._state.get(part, {}).get("done", False)
+
+    def cursor(self, part: str, scan_order: str | None) -> Any:
+        """Position to resume the scan of a part from, None to start it over"""
+        state = self._state.get(part, {})
+        if scan_order is None or state.get("scan_order") != scan_order:
+            return None
+        return state.get("cursor")
+
+    async def save(
+        self,
+        part: str,
+        copied: int,
+        done: bool = False,
+        cursor: Any = None,
+        scan_order: str | None = None,
+    ) -> None:
+        async with self._lock:
+            self._state[part] = {"copied": copied, "done": done}
+            if cursor is not None and not done:
+                self._state[part].update(cursor=cursor, scan_order=scan_order)
+            if self.path is None:
+                return
+            # Replace the file at once so that an interruption leaves a valid checkpoint
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._state, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def _vector_upsert_data(record: dict[str, Any]) -> dict[str, Any]:
+    """The data to upsert for a vector record yielded by iter_batches"""
+    data = {k: v for k, v in record.items() if k not in _VECTOR_RECORD_FIELDS}
+    if "chunk_ids" in data:
+        # PostgreSQL rows keep the source chunks as a list, and the endpoints of
+        # relationships in source_id and target_id
+        chunk_ids = data.pop("chunk_ids") or []
+        if "target_id" in data:
+            data["src_id"] = data.pop("source_id")
+            data["tgt_id"] = data.pop("target_id")
+        data["source_id"] = GRAPH_FIELD_SEP.join(chunk_ids)
+    return data
+
+
+def _graph_data(data: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in data.items() if k not in _GRAPH_INTERNAL_FIELDS}
+
+
+async def _count(batches: AsyncIterator[list]) -> int:
+    return sum([len(batch) async for batch in batches])
+
+
+def _parts(kind: str, name: str) -> list[str]:
+    """Parts of a namespace, copied in order"""
+    if kind == "graph":
+        # Graph edges are copied after the nodes they connect
+        return [f"{name}.nodes", f"{name}.edges"]
+    return [name]
+
+
+def _scan(
+    kind: str,
+    part: str,
+    storage: Any,
+    batch_size: int,
+    copy: bool,
+    start_after: Any = None,
+) -> AsyncIterator[list]:
+    """Batches of a part, with all their data to copy it, or ids only to count it"""
+    # Only backends with a scan_order accept start_after
+    resume = {} if start_after is None else {"start_after": start_after}
+    if part.endswith(".nodes"):
+        return storage.iter_node_batches(batch_size, **resume)
+    if part.endswith(".edges"):
+        return storage.iter_edge_batches(batch_size, **resume)
+    if not copy:
+        return storage.iter_batches(batch_size, fields=[])
+    if kind == "vector":
+        return storage.iter_batches(batch_size, include_vector=True, **resume)
+    return storage.iter_batches(batch_size, **resume)
+
+
+def _scan_cursor(kind: str, part: str, scan_order: str, batch: list, read: int) -> Any:
+    """Position after the last record of a batch, `read` records into the scan"""
+    if scan_order == "row":
+        return read
+    last = batch[-1]
+    if part.endswith(".edges"):
+        return [last[0], last[1]]
+    if kind == "vector":
+        return last["id"]
+    return last[0]
+
+
+def _batch_writer(
+    kind: str,
+    part: str,
+    target: Any,
+    source_chunks: BaseKVStorage,
+) -> Callable[[list], Awaitable[None]]:
+    """Function writing a batch of a part to the target storage"""
+    if part.endswith(".nodes"):
+        return lambda batch: target.upsert_nodes_batch(
+            [(node_id, _graph_data(data)) for node_id, data in batch]
+        )
+    if part.endswith(".edges"):
+        return lambda batch: target.upsert_edges_batch(
+            [(src, tgt, _graph_data(data)) for src, tgt, data in batch]
+        )
+    if kind == "kv":
+        return lambda batch: target.upsert(dict(batch))
+
+    async def write_vectors(batch: list[dict[str, Any]]) -> None:
+        data = {record["id"]: _vector_upsert_data(record) for record in batch}
+        if part == "chunks_vdb":
+            # Vector storages may keep only some fields of the chunks, the
+            # others are taken from the text chunks
+            chunks = await source_chunks.get_by_ids(list(data))
+            for chunk_id, chunk in zip(list(data), chunks):
+                if chunk:
+                    data[chunk_id] = {**chunk, **data[chunk_id]}
+        await target.upsert_with_vectors(
+            data, {record["id"]: record["vector"] for record in batch}
+        )
+
+    return write_vectors
+
+
+def _check_storages(name: str, source: Any, target: Any) -> None:
+    if source is target:
+        raise ValueError(f"Source and target share the {name} storage")
+    source_cls, target_cls = type(source).__name__, type(target).__name__
+    if source_cls == target_cls and source_cls in _SHARED_NAMESPACE_STORAGES:
+        raise ValueError(
+            f"Cannot migrate {name} from {source_cls} to {target_cls} in one "
+            "process, both would share the same in-memory namespace"
+        )
+
+
+async def migrate_storages(
+    source: LightRAG,
+    target: LightRAG,
+    namespaces: list[str] | None = None,
+    batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+    max_parallel: int = MIGRATION_MAX_PARALLEL,
+    checkpoint_path: str | None = None,
+    checkpoint_interval: int = MIGRATION_CHECKPOINT_INTERVAL,
+    verify: bool = True,
+) -> MigrationReport:
+    """
+    Copy the data of the source LightRAG instance into the storages of the target.
+
+    The storages of both instances must be initialized. Vectors are copied as
+    they are, so both instances must use the same embedding model and dimension.
+
+    Args:
+        source: Instance whose storages are read
+        target: Instance whose storages are written
+        namespaces: Storage attributes of LightRAG to copy, all namespaces of
+            MIGRATION_NAMESPACES if None
+        batch_size: Number of records read and written at a time
+        max_parallel: Maximum number of namespaces copied at the same time
+        checkpoint_path: JSON file recording the progress of the migration. If it
+            exists, the parts it records as complete are skipped, and the others
+            are resumed after the last record saved if the source scans them in
+            a stable order, or copied again from their start.
+        checkpoint_interval: Number of batches copied between two checkpoints.
+            Target storages are flushed with index_done_callback at each one.
+        verify: Whether to compare the record counts of source and target
+
+    Returns:
+        The records copied, and the counts of both sides when verify is set
+    """
+    names = list(MIGRATION_NAMESPACES) if namespaces is None else namespaces
+    unknown = [name for name in names if name not in MIGRATION_NAMESPACES]
+    if unknown:
+        raise ValueError(f"Unknown namespaces: {unknown}")
+
+    storages = {}
+    for name in names:
+        source_storage = getattr(source, name, None)
+        target_storage = getattr(target, name, None)
+        if source_storage is None or target_storage is None:
+            # e.g. the embedding cache is disabled on one side
+            logger.info(f"Migration: skipping {name}, missing in source or target")
+            continue
+        _check_storages(name, source_storage, target_storage)
+        storages[name] = (source_storage, target_storage)
+
+    checkpoint = MigrationCheckpoint(checkpoint_path)
+    report = MigrationReport()
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def copy_part(
+        part: str, kind: str, source_storage: Any, target_storage: Any
+    ) -> None:
+        if checkpoint.is_done(part):
+            copied = checkpoint.copied(part)
+            logger.info(f"Migration: {part} already copied ({copied} records)")
+            report.copied[part] = copied
+            return
+        scan_order = source_storage.scan_order
+        cursor = checkpoint.cursor(part, scan_order)
+        copied = 0
+        if cursor is not None:
+            copied = checkpoint.copied(part)
+            logger.info(f"Migration: resuming {part} after {copied} records")
+        elif checkpoint.copied(part):
+            logger.info(
+                f"Migration: copying {part} again from the start, "
+                f"{checkpoint.copied(part)} records were copied before the interruption"
+            )
+
+        write = _batch_writer(kind, part, target_storage, source.text_chunks)
+        scan = _scan(
+            kind, part, source_storage, batch_size, copy=True, start_after=cursor
+        )
+        batches = 0
+        async for batch in scan:
+            await write(batch)
+            copied += len(batch)
+            batches += 1
+            if scan_order is not None:
+                cursor = _scan_cursor(kind, part, scan_order, batch, copied)
+            if batches % checkpoint_interval == 0:
+                await target_storage.index_done_callback()
+                await checkpoint.save(
+                    part, copied, cursor=cursor, scan_order=scan_order
+                )
+                logger.info(f"Migration: {part}, {copied} records copied")
+        await target_storage.index_done_callback()
+        await checkpoint.save(part, copied, done=True)
+        report.copied[part] = copied
+        logger.info(f"Migration: {part} done, {copied} records copied")
+
+    async def copy_namespace(name: str) -> None:
+        kind = MIGRATION_NAMESPACES[name]
+        async with semaphore:
+            for part in _parts(kind, name):
+                await copy_part(part, kind, *storages[name])
+
+    await asyncio.gather(*(copy_namespace(name) for name in storages))
+
+    if verify:
+
+        async def count_namespace(name: str) -> None:
+            kind = MIGRATION_NAMESPACES[name]
+            source_storage, target_storage = storages[name]
+            async with semaphore:
+                for part in _parts(kind, name):
+                    report.source_counts[part] = await _count(
+                        _scan(kind, part, source_storage, batch_size, copy=False)
+                    )
+                    report.target_counts[part] = await _count(
+                        _scan(kind, part, target_storage, batch_size, copy=False)
+                    )
+
+        await asyncio.gather(*(count_namespace(name) for name in storages))
+        for part, (source_count, target_count) in report.mismatches.items():
+            logger.warning(
+                f"Migration: {part} has {source_count} records in the source "
+                f"but {target_count} in the target"
+            )
+
+    return report
@@ -3,18 +3,17 @@ from functools import partial
 
 import asyncio
 import json
+import logging
 import re
 import os
-from typing import Any, AsyncIterator
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator
+from bisect import bisect_left, bisect_right
 from collections import Counter, defaultdict
 
 from .utils import (
     logger,
-    clean_str,
     compute_mdhash_id,
     Tokenizer,
-    is_float_regex,
-    normalize_extracted_info,
     pack_user_ass_to_openai_messages,
     split_string_by_multi_markers,
     truncate_list_by_token_size,
@@ -26,6 +25,7 @@ from .utils import (
     get_conversation_turns,
     use_llm_func_with_cache,
     update_chunk_cache_list,
+    llm_call_flights,
 )
 from .base import (
     BaseGraphStorage,
@@ -36,7 +36,10 @@ from .base import (
 )
 from .prompt import PROMPTS
 from .constants import GRAPH_FIELD_SEP
+from .tracing import trace_span
+from .extraction_parser import get_extraction_parser, json_lines_examples
 import time
+import numpy as np
 from dotenv import load_dotenv
 
 # use the .env that is inside the current folder
@@ -45,59 +48,167 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=".env", override=False)
 
 
-def chunking_by_token_size(
+def iter_chunks_by_token_size(
     tokenizer: Tokenizer,
     content: str,
     split_by_character: str | None = None,
     split_by_character_only: bool = False,
     overlap_token_size: int = 128,
     max_token_size: int = 1024,
-) -> list[dict[str, Any]]:
-    tokens = tokenizer.encode(content)
-    results: list[dict[str, Any]] = []
-    if split_by_character:
-        raw_chunks = content.split(split_by_character)
-        new_chunks = []
-        if split_by_character_only:
-            for chunk in raw_chunks:
-                _tokens = tokenizer.encode(chunk)
-                new_chunks.append((len(_tokens), chunk))
+) -> Iterator[dict[str, Any]]:
+    """Split content into token-sized chunks, yielding them one by one.
+
+    The document is tokenized once. When the tokenizer can map tokens back to
+    character offsets, chunk text is sliced straight from the original content
+    instead of decoding every token window; otherwise the token windows are
+    decoded as before.
+    """
+    if split_by_character and not tokenizer.supports_offsets:
+        # Without offsets the segments are encoded one by one, so the whole
+        # document does not need to be encoded first
+        yield from _iter_chunks_by_decoding(
+            tokenizer,
+            content,
+            None,
+            split_by_character,
+            split_by_character_only,
+            overlap_token_size,
+            max_token_size,
+        )
+        return
+
+    tokens, offsets = tokenizer.encode_with_offsets(content)
+    if offsets is None:
+        yield from _iter_chunks_by_decoding(
+            tokenizer,
+            content,
+            tokens,
+            split_by_character,
+            split_by_character_only,
+            overlap_token_size,
+            max_token_size,
+        )
+        return
+
+    total_tokens = len(tokens)
+    step = max_token_size - overlap_token_size
+
+    def char_pos(token_index: int) -> int:
+        return offsets[token_index] if token_index < total_tokens else len(content)
+
+    if not split_by_character:
+        for index, start in enumerate(range(0, total_tokens, step)):
+            end = min(start + max_token_size, total_tokens)
+            yield {
+                "tokens": end - start,
+                "content": content[char_pos(start) : char_pos(end)].strip(),
+                "chunk_order_index": index,
+            }
+        return
+
+    index = 0
+    seg_start = 0
+    sep_len = len(split_by_character)
+    while seg_start <= len(content):
+        seg_end = content.find(split_by_character, seg_start)
+        if seg_end == -1:
+            seg_end = len(content)
+        # Tokens overlapping the segment belong to it; a token merged across
+        # the separator is counted on both sides so no text is dropped
+        if seg_end > seg_start:
+            tok_start = max(bisect_right(offsets, seg_start) - 1, 0)
+            tok_end = bisect_left(offsets, seg_end)
         else:
-            for chunk in raw_chunks:
-                _tokens = tokenizer.encode(chunk)
-                if len(_tokens) > max_token_size:
-                    for start in range(
-                        0, len(_tokens), max_token_size - overlap_token_size
-                    ):
-                        chunk_content = tokenizer.decode(
-                            _tokens[start : start + max_token_size]
-                        )
-                        new_chunks.append(
-                            (min(max_token_size, len(_tokens) - start), chunk_content)
-                        )
-                else:
-                    new_chunks.append((len(_tokens), chunk))
-        for index, (_len, chunk) in enumerate(new_chunks):
-            results.append(
-                {
-                    "tokens": _len,
+            tok_start = tok_end = 0
+        seg_tokens = tok_end - tok_start
+        if split_by_character_only or seg_tokens <= max_token_size:
+            yield {
+                "tokens": seg_tokens,
+                "content": content[seg_start:seg_end].strip(),
+                "chunk_order_index": index,
+            }
+            index += 1
+        else:
+            for start in range(tok_start, tok_end, step):
+                end = min(start + max_token_size, tok_end)
+                char_start = max(char_pos(start), seg_start)
+                char_end = seg_end if end == tok_end else char_pos(end)
+                yield {
+                    "tokens": end - start,
+                    "content": content[char_start:char_end].strip(),
+                    "chunk_order_index": index,
+                }
+                index += 1
+        seg_start = seg_end + sep_len
+
+
+def _iter_chunks_by_decoding(
+    tokenizer: Tokenizer,
+    content: str,
+    tokens: list[int] | None,
+    split_by_character: str | None,
+    split_by_character_only: bool,
+    overlap_token_size: int,
+    max_token_size: int,
+) -> Iterator[dict[str, Any]]:
+    """Fallback chunking for tokenizers that cannot report token offsets.
+
+    `tokens` are the tokens of the whole document, only used when the content is
+    not split by character; they are encoded here if not given.
+    """
+    step = max_token_size - overlap_token_size
+    if split_by_character:
+        index = 0
+        for chunk in content.split(split_by_character):
+            _tokens = tokenizer.encode(chunk)
+            if split_by_character_only or len(_tokens) <= max_token_size:
+                yield {
+                    "tokens": len(_tokens),
                     "content": chunk.strip(),
                     "chunk_order_index": index,
                 }
-            )
-    else:
-        for index, start in enumerate(
-            range(0, len(tokens), max_token_size - overlap_token_size)
-        ):
-            chunk_content = tokenizer.decode(tokens[start : start + max_token_size])
-            results.append(
-                {
-                    "tokens": min(max_token_size, len(tokens) - start),
+                index += 1
+                continue
+            for start in range(0, len(_tokens), step):
+                chunk_content = tokenizer.decode(
+                    _tokens[start : start + max_token_size]
+                )
+                yield {
+                    "tokens": min(max_token_size, len(_tokens) - start),
                     "content": chunk_content.strip(),
                     "chunk_order_index": index,
                 }
-            )
-    return results
+                index += 1
+    else:
+        if tokens is None:
+            tokens = tokenizer.encode(content)
+        for index, start in enumerate(range(0, len(tokens), step)):
+            chunk_content = tokenizer.decode(tokens[start : start + max_token_size])
+            yield {
+                "tokens": min(max_token_size, len(tokens) - start),
+                "content": chunk_content.strip(),
+                "chunk_order_index": index,
+            }
+
+
+def chunking_by_token_size(
+    tokenizer: Tokenizer,
+    content: str,
+    split_by_character: str | None = None,
+    split_by_character_only: bool = False,
+    overlap_token_size: int = 128,
+    max_token_size: int = 1024,
+) -> list[dict[str, Any]]:
+    return list(
+        iter_chunks_by_token_size(
+            tokenizer,
+            content,
+            split_by_character,
+            split_by_character_only,
+            overlap_token_size,
+            max_token_size,
+        )
+    )
 
 
 async def _handle_entity_relation_summary(
@@ -149,118 +260,6 @@ async def _handle_entity_relation_summary(
     return summary
 
 
-async def _handle_single_entity_extraction(
-    record_attributes: list[str],
-    chunk_key: str,
-    file_path: str = "unknown_source",
-):
-    if len(record_attributes) < 4 or '"entity"' not in record_attributes[0]:
-        return None
-
-    # Clean and validate entity name
-    entity_name = clean_str(record_attributes[1]).strip()
-    if not entity_name:
-        logger.warning(
-            f"Entity extraction error: empty entity name in: {record_attributes}"
-        )
-        return None
-
-    # Normalize entity name
-    entity_name = normalize_extracted_info(entity_name, is_entity=True)
-
-    # Check if entity name became empty after normalization
-    if not entity_name or not entity_name.strip():
-        logger.warning(
-            f"Entity extraction error: entity name became empty after normalization. Original: '{record_attributes[1]}'"
-        )
-        return None
-
-    # Clean and validate entity type
-    entity_type = clean_str(record_attributes[2]).strip('"')
-    if not entity_type.strip() or entity_type.startswith('("'):
-        logger.warning(
-            f"Entity extraction error: invalid entity type in: {record_attributes}"
-        )
-        return None
-
-    # Clean and validate description
-    entity_description = clean_str(record_attributes[3])
-    entity_description = normalize_extracted_info(entity_description)
-
-    if not entity_description.strip():
-        logger.warning(
-            f"Entity extraction error: empty description for entity '{entity_name}' of type '{entity_type}'"
-        )
-        return None
-
-    return dict(
-        entity_name=entity_name,
-        entity_type=entity_type,
-        description=entity_description,
-        source_id=chunk_key,
-        file_path=file_path,
-    )
-
-
-async def _handle_single_relationship_extraction(
-    record_attributes: list[str],
-    chunk_key: str,
-    file_path: str = "unknown_source",
-):
-    if len(record_attributes) < 5 or '"relationship"' not in record_attributes[0]:
-        return None
-    # add this record as edge
-    source = clean_str(record_attributes[1])
-    target = clean_str(record_attributes[2])
-
-    # Normalize source and target entity names
-    source = normalize_extracted_info(source, is_entity=True)
-    target = normalize_extracted_info(target, is_entity=True)
-
-    # Check if source or target became empty after normalization
-    if not source or not source.strip():
-        logger.warning(
-            f"Relationship extraction error: source entity became empty after normalization. Original: '{record_attributes[1]}'"
-        )
-        return None
-
-    if not target or not target.strip():
-        logger.warning(
-            f"Relationship extraction error: target entity became empty after normalization. Original: '{record_attributes[2]}'"
-        )
-        return None
-
-    if source == target:
-        logger.debug(
-            f"Relationship source and target are the same in: {record_attributes}"
-        )
-        return None
-
-    edge_description = clean_str(record_attributes[3])
-    edge_description = normalize_extracted_info(edge_description)
-
-    edge_keywords = normalize_extracted_info(
-        clean_str(record_attributes[4]), is_entity=True
-    )
-    edge_keywords = edge_keywords.replace("，", ",")
-
-    edge_source_id = chunk_key
-    weight = (
-        float(record_attributes[-1].strip('"').strip("'"))
-        if is_float_regex(record_attributes[-1].strip('"').strip("'"))
-        else 1.0
-    )
-    return dict(
-        src_id=source,
-        tgt_id=target,
-        weight=weight,
-        description=edge_description,
-        keywords=edge_keywords,
-        source_id=edge_source_id,
-        file_path=file_path,
-    )
-
-
 async def _rebuild_knowledge_from_chunks(
     entities_to_rebuild: dict[str, set[str]],
     relationships_to_rebuild: dict[tuple[str, str], set[str]],
@@ -527,45 +526,9 @@ async def _parse_extraction_result(
         if chunk_data
         else "unknown_source"
     )
-    context_base = dict(
-        tuple_delimiter=PROMPTS["DEFAULT_TUPLE_DELIMITER"],
-        record_delimiter=PROMPTS["DEFAULT_RECORD_DELIMITER"],
-        completion_delimiter=PROMPTS["DEFAULT_COMPLETION_DELIMITER"],
-    )
-    maybe_nodes = defaultdict(list)
-    maybe_edges = defaultdict(list)
-
-    # Parse the extraction result using the same logic as in extract_entities
-    records = split_string_by_multi_markers(
-        extraction_result,
-        [context_base["record_delimiter"], context_base["completion_delimiter"]],
+    maybe_nodes, maybe_edges = get_extraction_parser().parse(
+        extraction_result, chunk_id, file_path
     )
-    for record in records:
-        record = re.search(r"\((.*)\)", record)
-        if record is None:
-            continue
-        record = record.group(1)
-        record_attributes = split_string_by_multi_markers(
-            record, [context_base["tuple_delimiter"]]
-        )
-
-        # Try to parse as entity
-        entity_data = await _handle_single_entity_extraction(
-            record_attributes, chunk_id, file_path
-        )
-        if entity_data is not None:
-            maybe_nodes[entity_data["entity_name"]].append(entity_data)
-            continue
-
-        # Try to parse as relationship
-        relationship_data = await _handle_single_relationship_extraction(
-            record_attributes, chunk_id, file_path
-        )
-        if relationship_data is not None:
-            maybe_edges[
-                (relationship_data["src_id"], relationship_data["tgt_id"])
-            ].append(relationship_data)
-
     return dict(maybe_nodes), dict(maybe_edges)
 
 
@@ -834,22 +797,21 @@ async def _rebuild_single_relationship(
     )
 
 
-async def _merge_nodes_then_upsert(
+async def _merge_node_data(
     entity_name: str,
     nodes_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_node: dict | None,
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
-):
-    """Get existing nodes from knowledge graph use name,if exists, merge data, else create, then upsert."""
+) -> dict:
+    """Merge extracted entity data with the existing node, if any, into the node data to upsert"""
     already_entity_types = []
     already_source_ids = []
     already_description = []
     already_file_paths = []
 
-    already_node = await knowledge_graph_inst.get_node(entity_name)
     if already_node:
         already_entity_types.append(already_node["entity_type"])
         already_source_ids.extend(
@@ -904,7 +866,7 @@ async def _merge_nodes_then_upsert(
                     pipeline_status["latest_message"] = status_message
                     pipeline_status["history_messages"].append(status_message)
 
-    node_data = dict(
+    return dict(
         entity_id=entity_name,
         entity_type=entity_type,
         description=description,
@@ -912,67 +874,63 @@ async def _merge_nodes_then_upsert(
         file_path=file_path,
         created_at=int(time.time()),
     )
-    await knowledge_graph_inst.upsert_node(
-        entity_name,
-        node_data=node_data,
-    )
-    node_data["entity_name"] = entity_name
-    return node_data
 
 
-async def _merge_edges_then_upsert(
+async def _merge_edge_data(
     src_id: str,
     tgt_id: str,
     edges_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_edge: dict | None,
+    missing_nodes: list[str],
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
-):
-    if src_id == tgt_id:
-        return None
+) -> tuple[dict, list[tuple[str, dict]]]:
+    """Merge extracted relation data with the existing edge, if any
 
+    Returns:
+        The edge data to upsert, and the placeholder nodes to create for the
+        endpoints in `missing_nodes`
+    """
     already_weights = []
     already_source_ids = []
     already_description = []
     already_keywords = []
     already_file_paths = []
 
-    if await knowledge_graph_inst.has_edge(src_id, tgt_id):
-        already_edge = await knowledge_graph_inst.get_edge(src_id, tgt_id)
-        # Handle the case where get_edge returns None or missing fields
-        if already_edge:
-            # Get weight with default 0.0 if missing
-            already_weights.append(already_edge.get("weight", 0.0))
-
-            # Get source_id with empty string default if missing or None
-            if already_edge.get("source_id") is not None:
-                already_source_ids.extend(
-                    split_string_by_multi_markers(
-                        already_edge["source_id"], [GRAPH_FIELD_SEP]
-                    )
+    # Handle the case where the edge is missing or has missing fields
+    if already_edge:
+        # Get weight with default 0.0 if missing
+        already_weights.append(already_edge.get("weight", 0.0))
+
+        # Get source_id with empty string default if missing or None
+        if already_edge.get("source_id") is not None:
+            already_source_ids.extend(
+                split_string_by_multi_markers(
+                    already_edge["source_id"], [GRAPH_FIELD_SEP]
                 )
+            )
 
-            # Get file_path with empty string default if missing or None
-            if already_edge.get("file_path") is not None:
-                already_file_paths.extend(
-                    split_string_by_multi_markers(
-                        already_edge["file_path"], [GRAPH_FIELD_SEP]
-                    )
+        # Get file_path with empty string default if missing or None
+        if already_edge.get("file_path") is not None:
+            already_file_paths.extend(
+                split_string_by_multi_markers(
+                    already_edge["file_path"], [GRAPH_FIELD_SEP]
                 )
+            )
 
-            # Get description with empty string default if missing or None
-            if already_edge.get("description") is not None:
-                already_description.append(already_edge["description"])
+        # Get description with empty string default if missing or None
+        if already_edge.get("description") is not None:
+            already_description.append(already_edge["description"])
 
-            # Get keywords with empty string default if missing or None
-            if already_edge.get("keywords") is not None:
-                already_keywords.extend(
-                    split_string_by_multi_markers(
-                        already_edge["keywords"], [GRAPH_FIELD_SEP]
-                    )
+        # Get keywords with empty string default if missing or None
+        if already_edge.get("keywords") is not None:
+            already_keywords.extend(
+                split_string_by_multi_markers(
+                    already_edge["keywords"], [GRAPH_FIELD_SEP]
                 )
+            )
 
     # Process edges_data with None checks
     weight = sum([dp["weight"] for dp in edges_data] + already_weights)
@@ -1013,29 +971,21 @@ async def _merge_edges_then_upsert(
         )
     )
 
-    for need_insert_id in [src_id, tgt_id]:
-        if not (await knowledge_graph_inst.has_node(need_insert_id)):
-            # # Discard this edge if the node does not exist
-            # if need_insert_id == src_id:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Source node missing"
-            #     )
-            # else:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Target node missing"
-            #     )
-            # return None
-            await knowledge_graph_inst.upsert_node(
-                need_insert_id,
-                node_data={
-                    "entity_id": need_insert_id,
-                    "source_id": source_id,
-                    "description": description,
-                    "entity_type": "UNKNOWN",
-                    "file_path": file_path,
-                    "created_at": int(time.time()),
-                },
-            )
+    # Placeholders for endpoints missing from the graph take the merged relation data
+    placeholder_nodes = [
+        (
+            need_insert_id,
+            {
+                "entity_id": need_insert_id,
+                "source_id": source_id,
+                "description": description,
+                "entity_type": "UNKNOWN",
+                "file_path": file_path,
+                "created_at": int(time.time()),
+            },
+        )
+        for need_insert_id in missing_nodes
+    ]
 
     force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
 
@@ -1066,30 +1016,34 @@ async def _merge_edges_then_upsert(
                     pipeline_status["latest_message"] = status_message
                     pipeline_status["history_messages"].append(status_message)
 
-    await knowledge_graph_inst.upsert_edge(
-        src_id,
-        tgt_id,
-        edge_data=dict(
-            weight=weight,
-            description=description,
-            keywords=keywords,
-            source_id=source_id,
-            file_path=file_path,
-            created_at=int(time.time()),
-        ),
-    )
-
     edge_data = dict(
-        src_id=src_id,
-        tgt_id=tgt_id,
+        weight=weight,
         description=description,
         keywords=keywords,
         source_id=source_id,
         file_path=file_path,
         created_at=int(time.time()),
     )
+    return edge_data, placeholder_nodes
+
+
+async def _gather_or_cancel(coros: list) -> list:
+    """Run coroutines concurrently, cancelling the rest as soon as one fails.
 
-    return edge_data
+    Results are returned in the order of the input coroutines.
+    """
+    if not coros:
+        return []
+    tasks = [asyncio.create_task(coro) for coro in coros]
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    for task in done:
+        if task.exception():
+            for pending_task in pending:
+                pending_task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+            raise task.exception()
+    return [task.result() for task in tasks]
 
 
 async def merge_nodes_and_edges(
@@ -1118,7 +1072,7 @@ async def merge_nodes_and_edges(
         llm_response_cache: LLM response cache
     """
     # Get lock manager from shared storage
-    from .kg.shared_storage import get_graph_db_lock
+    from .kg.shared_storage import get_graph_db_key_lock
 
     # Collect all nodes and edges from all chunks
     all_nodes = defaultdict(list)
@@ -1134,95 +1088,235 @@ async def merge_nodes_and_edges(
             sorted_edge_key = tuple(sorted(edge_key))
             all_edges[sorted_edge_key].extend(edges)
 
-    # Centralized processing of all nodes and edges
-    entities_data = []
-    relationships_data = []
+    async with pipeline_status_lock:
+        log_message = f"Merging stage {current_file_number}/{total_files}: {file_path}"
+        logger.info(log_message)
+        pipeline_status["latest_message"] = log_message
+        pipeline_status["history_messages"].append(log_message)
+
+    # Entities and relations with different keys are merged concurrently,
+    # bounded by llm_model_max_async since each merge may call the LLM for a summary.
+    # The merged data is then written with batch upserts.
+    semaphore = asyncio.Semaphore(global_config.get("llm_model_max_async", 4))
+
+    # Only the keys of this file are locked, so files sharing no entity or relation
+    # merge concurrently. Deletions and edits take the global graph lock, which
+    # waits for merges holding key locks.
+    entity_names = list(all_nodes.keys())
+    async with get_graph_db_key_lock(
+        [_node_lock_key(entity_name) for entity_name in entity_names]
+    ):
+        already_nodes = await knowledge_graph_inst.get_nodes_batch(entity_names)
+
+        async def _locked_merge_node(entity_name, entities):
+            async with semaphore:
+                return await _merge_node_data(
+                    entity_name,
+                    entities,
+                    already_nodes.get(entity_name),
+                    global_config,
+                    pipeline_status,
+                    pipeline_status_lock,
+                    llm_response_cache,
+                )
 
-    # Merge nodes and edges
-    # Use graph database lock to ensure atomic merges and updates
-    graph_db_lock = get_graph_db_lock(enable_logging=False)
-    async with graph_db_lock:
-        async with pipeline_status_lock:
-            log_message = (
-                f"Merging stage {current_file_number}/{total_files}: {file_path}"
+        # Process and update all entities at once
+        nodes_data = await _gather_or_cancel(
+            [
+                _locked_merge_node(entity_name, all_nodes[entity_name])
+                for entity_name in entity_names
+            ]
+        )
+        await knowledge_graph_inst.upsert_nodes_batch(
+            list(zip(entity_names, nodes_data))
+        )
+        entities_data = [
+            {**node_data, "entity_name": entity_name}
+            for entity_name, node_data in zip(entity_names, nodes_data)
+        ]
+        await _upsert_entities_to_vdb(
+            entities_data,
+            entity_vdb,
+            pipeline_status,
+            pipeline_status_lock,
+            current_file_number,
+            total_files,
+            file_path,
+        )
+
+    # Self-loops are discarded without creating nodes
+    edge_keys = [edge_key for edge_key in all_edges if edge_key[0] != edge_key[1]]
+    # Endpoints of this file's entities are in the graph by now; other endpoints
+    # may be created as placeholders, so they are locked with the relations
+    placeholder_candidates = list(
+        dict.fromkeys(
+            endpoint
+            for edge_key in edge_keys
+            for endpoint in edge_key
+            if endpoint not in all_nodes
+        )
+    )
+    async with get_graph_db_key_lock(
+        [_edge_lock_key(edge_key) for edge_key in edge_keys]
+        + [_node_lock_key(name) for name in placeholder_candidates]
+    ):
+        # Relations may reference entities missing from the graph, which are created
+        # as placeholders. Keep the serial behaviour: the first relation (in merge
+        # order) touching a missing entity provides the placeholder data.
+        endpoint_owners: dict[str, tuple] = {}
+        for edge_key in edge_keys:
+            for endpoint in edge_key:
+                if endpoint not in all_nodes and endpoint not in endpoint_owners:
+                    endpoint_owners[endpoint] = edge_key
+        missing_nodes = defaultdict(list)
+        if endpoint_owners:
+            endpoint_names = list(endpoint_owners.keys())
+            exists = await asyncio.gather(
+                *[knowledge_graph_inst.has_node(name) for name in endpoint_names]
             )
-            logger.info(log_message)
-            pipeline_status["latest_message"] = log_message
-            pipeline_status["history_messages"].append(log_message)
+            for name, found in zip(endpoint_names, exists):
+                if not found:
+                    missing_nodes[endpoint_owners[name]].append(name)
 
-        # Process and update all entities at once
-        for entity_name, entities in all_nodes.items():
-            entity_data = await _merge_nodes_then_upsert(
-                entity_name,
-                entities,
-                knowledge_graph_inst,
-                global_config,
-                pipeline_status,
-                pipeline_status_lock,
-                llm_response_cache,
+        already_edges = (
+            await knowledge_graph_inst.get_edges_batch(
+                [{"src": src_id, "tgt": tgt_id} for src_id, tgt_id in edge_keys]
             )
-            entities_data.append(entity_data)
+            if edge_keys
+            else {}
+        )
+
+        async def _locked_merge_edge(edge_key, edges):
+            async with semaphore:
+                return await _merge_edge_data(
+                    edge_key[0],
+                    edge_key[1],
+                    edges,
+                    already_edges.get(edge_key),
+                    missing_nodes.get(edge_key, []),
+                    global_config,
+                    pipeline_status,
+                    pipeline_status_lock,
+                    llm_response_cache,
+                )
 
         # Process and update all relationships at once
-        for edge_key, edges in all_edges.items():
-            edge_data = await _merge_edges_then_upsert(
-                edge_key[0],
-                edge_key[1],
-                edges,
-                knowledge_graph_inst,
-                global_config,
-                pipeline_status,
-                pipeline_status_lock,
-                llm_response_cache,
+        merged_edges = await _gather_or_cancel(
+            [
+                _locked_merge_edge(edge_key, all_edges[edge_key])
+                for edge_key in edge_keys
+            ]
+        )
+        placeholder_nodes = [
+            node for _, edge_placeholders in merged_edges for node in edge_placeholders
+        ]
+        if placeholder_nodes:
+            await knowledge_graph_inst.upsert_nodes_batch(placeholder_nodes)
+        await knowledge_graph_inst.upsert_edges_batch(
+            [
+                (src_id, tgt_id, edge_data)
+                for (src_id, tgt_id), (edge_data, _) in zip(edge_keys, merged_edges)
+            ]
+        )
+        relationships_data = [
+            dict(
+                src_id=src_id,
+                tgt_id=tgt_id,
+                description=edge_data["description"],
+                keywords=edge_data["keywords"],
+                source_id=edge_data["source_id"],
+                file_path=edge_data["file_path"],
+                created_at=edge_data["created_at"],
             )
-            if edge_data is not None:
-                relationships_data.append(edge_data)
+            for (src_id, tgt_id), (edge_data, _) in zip(edge_keys, merged_edges)
+        ]
+        await _upsert_relationships_to_vdb(
+            relationships_data,
+            relationships_vdb,
+            pipeline_status,
+            pipeline_status_lock,
+            current_file_number,
+            total_files,
+            file_path,
+        )
 
-        # Update total counts
-        total_entities_count = len(entities_data)
-        total_relations_count = len(relationships_data)
 
-        log_message = f"Updating {total_entities_count} entities  {current_file_number}/{total_files}: {file_path}"
-        logger.info(log_message)
-        if pipeline_status is not None:
-            async with pipeline_status_lock:
-                pipeline_status["latest_message"] = log_message
-                pipeline_status["history_messages"].append(log_message)
+def _node_lock_key(entity_name: str) -> str:
+    return f"node:{entity_name}"
 
-        # Update vector databases with all collected data
-        if entity_vdb is not None and entities_data:
-            data_for_vdb = {
-                compute_mdhash_id(dp["entity_name"], prefix="ent-"): {
-                    "entity_name": dp["entity_name"],
-                    "entity_type": dp["entity_type"],
-                    "content": f"{dp['entity_name']}\n{dp['description']}",
-                    "source_id": dp["source_id"],
-                    "file_path": dp.get("file_path", "unknown_source"),
-                }
-                for dp in entities_data
+
+def _edge_lock_key(edge_key: tuple[str, str]) -> str:
+    return f"edge:{edge_key[0]}{GRAPH_FIELD_SEP}{edge_key[1]}"
+
+
+async def _upsert_entities_to_vdb(
+    entities_data: list[dict],
+    entity_vdb: BaseVectorStorage,
+    pipeline_status: dict = None,
+    pipeline_status_lock=None,
+    current_file_number: int = 0,
+    total_files: int = 0,
+    file_path: str = "unknown_source",
+) -> None:
+    """Update the entity vector database with merged nodes
+
+    Called under the key locks of the entities, so the vector storage matches the
+    graph once a merge is complete.
+    """
+    log_message = f"Updating {len(entities_data)} entities  {current_file_number}/{total_files}: {file_path}"
+    logger.info(log_message)
+    if pipeline_status is not None:
+        async with pipeline_status_lock:
+            pipeline_status["latest_message"] = log_message
+            pipeline_status["history_messages"].append(log_message)
+
+    if entity_vdb is not None and entities_data:
+        data_for_vdb = {
+            compute_mdhash_id(dp["entity_name"], prefix="ent-"): {
+                "entity_name": dp["entity_name"],
+                "entity_type": dp["entity_type"],
+                "content": f"{dp['entity_name']}\n{dp['description']}",
+                "source_id": dp["source_id"],
+                "file_path": dp.get("file_path", "unknown_source"),
             }
-            await entity_vdb.upsert(data_for_vdb)
+            for dp in entities_data
+        }
+        await entity_vdb.upsert(data_for_vdb)
 
-        log_message = f"Updating {total_relations_count} relations {current_file_number}/{total_files}: {file_path}"
-        logger.info(log_message)
-        if pipeline_status is not None:
-            async with pipeline_status_lock:
-                pipeline_status["latest_message"] = log_message
-                pipeline_status["history_messages"].append(log_message)
 
-        if relationships_vdb is not None and relationships_data:
-            data_for_vdb = {
-                compute_mdhash_id(dp["src_id"] + dp["tgt_id"], prefix="rel-"): {
-                    "src_id": dp["src_id"],
-                    "tgt_id": dp["tgt_id"],
-                    "keywords": dp["keywords"],
-                    "content": f"{dp['src_id']}\t{dp['tgt_id']}\n{dp['keywords']}\n{dp['description']}",
-                    "source_id": dp["source_id"],
-                    "file_path": dp.get("file_path", "unknown_source"),
-                }
-                for dp in relationships_data
+async def _upsert_relationships_to_vdb(
+    relationships_data: list[dict],
+    relationships_vdb: BaseVectorStorage,
+    pipeline_status: dict = None,
+    pipeline_status_lock=None,
+    current_file_number: int = 0,
+    total_files: int = 0,
+    file_path: str = "unknown_source",
+) -> None:
+    """Update the relationship vector database with merged edges
+
+    Called under the key locks of the relations, like `_upsert_entities_to_vdb`.
+    """
+    log_message = f"Updating {len(relationships_data)} relations {current_file_number}/{total_files}: {file_path}"
+    logger.info(log_message)
+    if pipeline_status is not None:
+        async with pipeline_status_lock:
+            pipeline_status["latest_message"] = log_message
+            pipeline_status["history_messages"].append(log_message)
+
+    if relationships_vdb is not None and relationships_data:
+        data_for_vdb = {
+            compute_mdhash_id(dp["src_id"] + dp["tgt_id"], prefix="rel-"): {
+                "src_id": dp["src_id"],
+                "tgt_id": dp["tgt_id"],
+                "keywords": dp["keywords"],
+                "content": f"{dp['src_id']}\t{dp['tgt_id']}\n{dp['keywords']}\n{dp['description']}",
+                "source_id": dp["source_id"],
+                "file_path": dp.get("file_path", "unknown_source"),
             }
-            await relationships_vdb.upsert(data_for_vdb)
+            for dp in relationships_data
+        }
+        await relationships_vdb.upsert(data_for_vdb)
 
 
 async def extract_entities(
@@ -1244,13 +1338,12 @@ async def extract_entities(
     entity_types = global_config["addon_params"].get(
         "entity_types", PROMPTS["DEFAULT_ENTITY_TYPES"]
     )
+    extract_format = global_config.get("entity_extract_format", "delimited")
     example_number = global_config["addon_params"].get("example_number", None)
     if example_number and example_number < len(PROMPTS["entity_extraction_examples"]):
-        examples = "\n".join(
-            PROMPTS["entity_extraction_examples"][: int(example_number)]
-        )
+        examples = PROMPTS["entity_extraction_examples"][: int(example_number)]
     else:
-        examples = "\n".join(PROMPTS["entity_extraction_examples"])
+        examples = PROMPTS["entity_extraction_examples"]
 
     example_context_base = dict(
         tuple_delimiter=PROMPTS["DEFAULT_TUPLE_DELIMITER"],
@@ -1260,9 +1353,16 @@ async def extract_entities(
         language=language,
     )
     # add example's format
-    examples = examples.format(**example_context_base)
+    examples = [example.format(**example_context_base) for example in examples]
+    if extract_format == "jsonl":
+        examples = json_lines_examples(examples)
+        entity_extract_prompt = PROMPTS["entity_extraction_jsonl"]
+        continue_prompt = PROMPTS["entity_continue_extraction_jsonl"]
+    else:
+        entity_extract_prompt = PROMPTS["entity_extraction"]
+        continue_prompt = PROMPTS["entity_continue_extraction"]
+    examples = "\n".join(examples)
 
-    entity_extract_prompt = PROMPTS["entity_extraction"]
     context_base = dict(
         tuple_delimiter=PROMPTS["DEFAULT_TUPLE_DELIMITER"],
         record_delimiter=PROMPTS["DEFAULT_RECORD_DELIMITER"],
@@ -1272,7 +1372,7 @@ async def extract_entities(
         language=language,
     )
 
-    continue_prompt = PROMPTS["entity_continue_extraction"].format(**context_base)
+    continue_prompt = continue_prompt.format(**context_base)
     if_loop_prompt = PROMPTS["entity_if_loop_extraction"]
 
     processed_chunks = 0
@@ -1289,39 +1389,7 @@ async def extract_entities(
         Returns:
             tuple: (nodes_dict, edges_dict) containing the extracted entities and relationships
         """
-        maybe_nodes = defaultdict(list)
-        maybe_edges = defaultdict(list)
-
-        records = split_string_by_multi_markers(
-            result,
-            [context_base["record_delimiter"], context_base["completion_delimiter"]],
-        )
-
-        for record in records:
-            record = re.search(r"\((.*)\)", record)
-            if record is None:
-                continue
-            record = record.group(1)
-            record_attributes = split_string_by_multi_markers(
-                record, [context_base["tuple_delimiter"]]
-            )
-
-            if_entities = await _handle_single_entity_extraction(
-                record_attributes, chunk_key, file_path
-            )
-            if if_entities is not None:
-                maybe_nodes[if_entities["entity_name"]].append(if_entities)
-                continue
-
-            if_relation = await _handle_single_relationship_extraction(
-                record_attributes, chunk_key, file_path
-            )
-            if if_relation is not None:
-                maybe_edges[(if_relation["src_id"], if_relation["tgt_id"])].append(
-                    if_relation
-                )
-
-        return maybe_nodes, maybe_edges
+        return get_extraction_parser().parse(result, chunk_key, file_path)
 
     async def _process_single_content(chunk_key_dp: tuple[str, TextChunkSchema]):
         """Process a single chunk
@@ -1470,6 +1538,30 @@ async def extract_entities(
     return chunk_results
 
 
+# QueryParam fields that change the answer to the same query text
+_QUERY_CACHE_SCOPE_FIELDS = (
+    "response_type",
+    "top_k",
+    "max_token_for_text_unit",
+    "max_token_for_global_context",
+    "max_token_for_local_context",
+    "hl_keywords",
+    "ll_keywords",
+    "conversation_history",
+    "history_turns",
+    "ids",
+    "user_prompt",
+)
+
+
+def _query_cache_scope(query_param: QueryParam, *extra: Any) -> str:
+    """Hash of the answer-affecting query parameters, see handle_cache"""
+    values = [getattr(query_param, name) for name in _QUERY_CACHE_SCOPE_FIELDS]
+    return compute_args_hash(
+        json.dumps(values + list(extra), ensure_ascii=False, default=str)
+    )
+
+
 async def kg_query(
     query: str,
     knowledge_graph_inst: BaseGraphStorage,
@@ -1491,15 +1583,23 @@ async def kg_query(
 
     # Handle cache
     args_hash = compute_args_hash(query_param.mode, query)
-    cached_response, quantized, min_val, max_val = await handle_cache(
-        hashing_kv, args_hash, query, query_param.mode, cache_type="query"
-    )
+    cache_scope = _query_cache_scope(query_param)
+    with trace_span("cache_lookup"):
+        cached_response, quantized, min_val, max_val = await handle_cache(
+            hashing_kv,
+            args_hash,
+            query,
+            query_param.mode,
+            cache_type="query",
+            scope=cache_scope,
+        )
     if cached_response is not None:
         return cached_response
 
-    hl_keywords, ll_keywords = await get_keywords_from_query(
-        query, query_param, global_config, hashing_kv
-    )
+    with trace_span("keywords"):
+        hl_keywords, ll_keywords = await get_keywords_from_query(
+            query, query_param, global_config, hashing_kv
+        )
 
     logger.debug(f"High-level keywords: {hl_keywords}")
     logger.debug(f"Low-level  keywords: {ll_keywords}")
@@ -1525,55 +1625,59 @@ async def kg_query(
     hl_keywords_str = ", ".join(hl_keywords) if hl_keywords else ""
 
     # Build context
-    context = await _build_query_context(
-        ll_keywords_str,
-        hl_keywords_str,
-        knowledge_graph_inst,
-        entities_vdb,
-        relationships_vdb,
-        text_chunks_db,
-        query_param,
-        chunks_vdb,
-    )
+    with trace_span("build_context"):
+        context = await _build_query_context(
+            ll_keywords_str,
+            hl_keywords_str,
+            knowledge_graph_inst,
+            entities_vdb,
+            relationships_vdb,
+            text_chunks_db,
+            query_param,
+            chunks_vdb,
+        )
 
     if query_param.only_need_context:
         return context if context is not None else PROMPTS["fail_response"]
     if context is None:
         return PROMPTS["fail_response"]
 
-    # Process conversation history
-    history_context = ""
-    if query_param.conversation_history:
-        history_context = get_conversation_turns(
-            query_param.conversation_history, query_param.history_turns
-        )
+    with trace_span("build_prompt"):
+        # Process conversation history
+        history_context = ""
+        if query_param.conversation_history:
+            history_context = get_conversation_turns(
+                query_param.conversation_history, query_param.history_turns
+            )
 
-    # Build system prompt
-    user_prompt = (
-        query_param.user_prompt
-        if query_param.user_prompt
-        else PROMPTS["DEFAULT_USER_PROMPT"]
-    )
-    sys_prompt_temp = system_prompt if system_prompt else PROMPTS["rag_response"]
-    sys_prompt = sys_prompt_temp.format(
-        context_data=context,
-        response_type=query_param.response_type,
-        history=history_context,
-        user_prompt=user_prompt,
-    )
+        # Build system prompt
+        user_prompt = (
+            query_param.user_prompt
+            if query_param.user_prompt
+            else PROMPTS["DEFAULT_USER_PROMPT"]
+        )
+        sys_prompt_temp = system_prompt if system_prompt else PROMPTS["rag_response"]
+        sys_prompt = sys_prompt_temp.format(
+            context_data=context,
+            response_type=query_param.response_type,
+            history=history_context,
+            user_prompt=user_prompt,
+        )
 
     if query_param.only_need_prompt:
         return sys_prompt
 
     tokenizer: Tokenizer = global_config["tokenizer"]
-    len_of_prompts = len(tokenizer.encode(query + sys_prompt))
-    logger.debug(f"[kg_query]Prompt Tokens: {len_of_prompts}")
-
-    response = await use_model_func(
-        query,
-        system_prompt=sys_prompt,
-        stream=query_param.stream,
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        len_of_prompts = len(tokenizer.encode(query + sys_prompt))
+        logger.debug(f"[kg_query]Prompt Tokens: {len_of_prompts}")
+
+    with trace_span("llm_generate"):
+        response = await use_model_func(
+            query,
+            system_prompt=sys_prompt,
+            stream=query_param.stream,
+        )
     if isinstance(response, str) and len(response) > len(sys_prompt):
         response = (
             response.replace(sys_prompt, "")
@@ -1598,6 +1702,7 @@ async def kg_query(
                 max_val=max_val,
                 mode=query_param.mode,
                 cache_type="query",
+                scope=cache_scope,
             ),
         )
 
@@ -1646,8 +1751,28 @@ async def extract_keywords_only(
     Extract high-level and low-level keywords from the given 'text' using the LLM.
     This method does NOT build the final RAG context or provide a final answer.
     It ONLY extracts keywords (hl_keywords, ll_keywords).
+
+    Concurrent extractions for the same text and history share one cache lookup and LLM call.
     """
+    flight_key = compute_args_hash(
+        param.mode,
+        text,
+        json.dumps(param.conversation_history, ensure_ascii=False, default=str),
+        param.history_turns,
+        param.model_func,
+    )
+    return await llm_call_flights.do(
+        f"{id(hashing_kv)}:keywords:{flight_key}",
+        partial(_extract_keywords_only, text, param, global_config, hashing_kv),
+    )
+
 
+async def _extract_keywords_only(
+    text: str,
+    param: QueryParam,
+    global_config: dict[str, str],
+    hashing_kv: BaseKVStorage | None = None,
+) -> tuple[list[str], list[str]]:
     # 1. Handle cache if needed - add cache type for keywords
     args_hash = compute_args_hash(param.mode, text)
     cached_response, quantized, min_val, max_val = await handle_cache(
@@ -1689,8 +1814,9 @@ async def extract_keywords_only(
     )
 
     tokenizer: Tokenizer = global_config["tokenizer"]
-    len_of_prompts = len(tokenizer.encode(kw_prompt))
-    logger.debug(f"[kg_query]Prompt Tokens: {len_of_prompts}")
+    if logger.isEnabledFor(logging.DEBUG):
+        len_of_prompts = len(tokenizer.encode(kw_prompt))
+        logger.debug(f"[kg_query]Prompt Tokens: {len_of_prompts}")
 
     # 5. Call the LLM for keyword extraction
     if param.model_func:
@@ -1745,6 +1871,7 @@ async def _get_vector_context(
     chunks_vdb: BaseVectorStorage,
     query_param: QueryParam,
     tokenizer: Tokenizer,
+    query_embedding: np.ndarray | None = None,
 ) -> tuple[list, list, list] | None:
     """
     Retrieve vector context from the vector database.
@@ -1757,6 +1884,7 @@ async def _get_vector_context(
         chunks_vdb: Vector database containing document chunks
         query_param: Query parameters including top_k and ids
         tokenizer: Tokenizer for counting tokens
+        query_embedding: Precomputed embedding of the query, if any
 
     Returns:
         Tuple (empty_entities, empty_relations, text_units) for combine_contexts,
@@ -1764,7 +1892,10 @@ async def _get_vector_context(
     """
     try:
         results = await chunks_vdb.query(
-            query, top_k=query_param.top_k, ids=query_param.ids
+            query,
+            top_k=query_param.top_k,
+            ids=query_param.ids,
+            query_embedding=query_embedding,
         )
         if not results:
             return [], [], []
@@ -1821,6 +1952,35 @@ async def _get_vector_context(
         return [], [], []
 
 
+async def _embed_queries(
+    searches: list[tuple[BaseVectorStorage, str]],
+) -> list[np.ndarray]:
+    """Embed the queries of several vector searches with one batched call.
+
+    Queries are deduplicated and embedded with one call per embedding function,
+    which is a single call when all storages share the same one.
+
+    Returns:
+        The embedding of the query of each search, in order
+    """
+    groups: dict[int, tuple[Callable, list[str]]] = {}
+    for vdb, query in searches:
+        texts = groups.setdefault(id(vdb.embedding_func), (vdb.embedding_func, []))[1]
+        if query not in texts:
+            texts.append(query)
+
+    async def embed(embedding_func: Callable, texts: list[str]) -> dict[str, Any]:
+        # higher priority for query
+        embeddings = await embedding_func(texts, _priority=5)
+        return dict(zip(texts, embeddings))
+
+    embedded = await asyncio.gather(
+        *(embed(func, texts) for func, texts in groups.values())
+    )
+    by_func = dict(zip(groups, embedded))
+    return [by_func[id(vdb.embedding_func)][query] for vdb, query in searches]
+
+
 async def _build_query_context(
     ll_keywords: str,
     hl_keywords: str,
@@ -1831,52 +1991,99 @@ async def _build_query_context(
     query_param: QueryParam,
     chunks_vdb: BaseVectorStorage = None,  # Add chunks_vdb parameter for mix mode
 ):
+    """Retrieve the entities, relations and chunks of the query context.
+
+    The retrieval paths of the mode (entities for the low-level keywords, relations
+    for the high-level keywords and, in mix mode, chunks for the original query) run
+    concurrently. Their queries are embedded with one batched call, and chunk and
+    graph lookups are shared through per-query memos, so each chunk, node or edge
+    is fetched once.
+    """
     logger.info(f"Process {os.getpid()} building query context...")
 
+    # Chunks and graph data fetched by one path are reused by the others
+    chunk_memo: dict[str, asyncio.Future] = {}
+    graph_memo = _GraphBatchMemo(knowledge_graph_inst)
+
+    use_local = query_param.mode in ("local", "hybrid", "mix")
+    use_global = query_param.mode in ("global", "hybrid", "mix")
+    # Only get vector data if in mix mode
+    use_vector = query_param.mode == "mix" and hasattr(query_param, "original_query")
+
+    searches = []
+    if use_local:
+        searches.append((entities_vdb, ll_keywords))
+    if use_global:
+        searches.append((relationships_vdb, hl_keywords))
+    if use_vector:
+        # We need to pass the original query
+        searches.append((chunks_vdb, query_param.original_query))
+    with trace_span("embed_queries"):
+        embeddings = iter(await _embed_queries(searches))
+
+    async def local_context(query_embedding: np.ndarray):
+        with trace_span("local_context"):
+            return await _get_node_data(
+                ll_keywords,
+                knowledge_graph_inst,
+                entities_vdb,
+                text_chunks_db,
+                query_param,
+                chunk_memo,
+                graph_memo,
+                query_embedding,
+            )
+
+    async def global_context(query_embedding: np.ndarray):
+        with trace_span("global_context"):
+            return await _get_edge_data(
+                hl_keywords,
+                knowledge_graph_inst,
+                relationships_vdb,
+                text_chunks_db,
+                query_param,
+                chunk_memo,
+                graph_memo,
+                query_embedding,
+            )
+
+    async def vector_context(query_embedding: np.ndarray):
+        # Get tokenizer from text_chunks_db
+        tokenizer = text_chunks_db.global_config.get("tokenizer")
+        with trace_span("vector_context"):
+            return await _get_vector_context(
+                query_param.original_query,
+                chunks_vdb,
+                query_param,
+                tokenizer,
+                query_embedding,
+            )
+
+    paths = []
+    for enabled, path in (
+        (use_local, local_context),
+        (use_global, global_context),
+        (use_vector, vector_context),
+    ):
+        if enabled:
+            paths.append(path(next(embeddings)))
+    results = await _gather_or_cancel(paths)
+
     # Handle local and global modes as before
-    if query_param.mode == "local":
-        entities_context, relations_context, text_units_context = await _get_node_data(
-            ll_keywords,
-            knowledge_graph_inst,
-            entities_vdb,
-            text_chunks_db,
-            query_param,
-        )
-    elif query_param.mode == "global":
-        entities_context, relations_context, text_units_context = await _get_edge_data(
-            hl_keywords,
-            knowledge_graph_inst,
-            relationships_vdb,
-            text_chunks_db,
-            query_param,
-        )
+    if query_param.mode in ("local", "global"):
+        entities_context, relations_context, text_units_context = results[0]
     else:  # hybrid or mix mode
-        ll_data = await _get_node_data(
-            ll_keywords,
-            knowledge_graph_inst,
-            entities_vdb,
-            text_chunks_db,
-            query_param,
-        )
-        hl_data = await _get_edge_data(
-            hl_keywords,
-            knowledge_graph_inst,
-            relationships_vdb,
-            text_chunks_db,
-            query_param,
-        )
-
         (
             ll_entities_context,
             ll_relations_context,
             ll_text_units_context,
-        ) = ll_data
+        ) = results[0]
 
         (
             hl_entities_context,
             hl_relations_context,
             hl_text_units_context,
-        ) = hl_data
+        ) = results[1]
 
         # Initialize vector data with empty lists
         vector_entities_context, vector_relations_context, vector_text_units_context = (
@@ -1885,26 +2092,13 @@ async def _build_query_context(
             [],
         )
 
-        # Only get vector data if in mix mode
-        if query_param.mode == "mix" and hasattr(query_param, "original_query"):
-            # Get tokenizer from text_chunks_db
-            tokenizer = text_chunks_db.global_config.get("tokenizer")
-
-            # Get vector context in triple format
-            vector_data = await _get_vector_context(
-                query_param.original_query,  # We need to pass the original query
-                chunks_vdb,
-                query_param,
-                tokenizer,
-            )
-
-            # If vector_data is not None, unpack it
-            if vector_data is not None:
-                (
-                    vector_entities_context,
-                    vector_relations_context,
-                    vector_text_units_context,
-                ) = vector_data
+        # If vector_data is not None, unpack it
+        if use_vector and results[2] is not None:
+            (
+                vector_entities_context,
+                vector_relations_context,
+                vector_text_units_context,
+            ) = results[2]
 
         # Combine and deduplicate the entities, relationships, and sources
         entities_context = process_combine_contexts(
@@ -1953,14 +2147,22 @@ async def _get_node_data(
     entities_vdb: BaseVectorStorage,
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
+    chunk_memo: dict[str, asyncio.Future] | None = None,
+    graph_memo: _GraphBatchMemo | None = None,
+    query_embedding: np.ndarray | None = None,
 ):
     # get similar entities
     logger.info(
         f"Query nodes: {query}, top_k: {query_param.top_k}, cosine: {entities_vdb.cosine_better_than_threshold}"
     )
+    if graph_memo is None:
+        graph_memo = _GraphBatchMemo(knowledge_graph_inst)
 
     results = await entities_vdb.query(
-        query, top_k=query_param.top_k, ids=query_param.ids
+        query,
+        top_k=query_param.top_k,
+        ids=query_param.ids,
+        query_embedding=query_embedding,
     )
 
     if not len(results):
@@ -1971,8 +2173,8 @@ async def _get_node_data(
 
     # Call the batch node retrieval and degree functions concurrently.
     nodes_dict, degrees_dict = await asyncio.gather(
-        knowledge_graph_inst.get_nodes_batch(node_ids),
-        knowledge_graph_inst.node_degrees_batch(node_ids),
+        graph_memo.get_nodes(node_ids),
+        graph_memo.node_degrees(node_ids),
     )
 
     # Now, if you need the node data and degree in order:
@@ -1992,17 +2194,22 @@ async def _get_node_data(
         for k, n, d in zip(results, node_datas, node_degrees)
         if n is not None
     ]  # what is this text_chunks_db doing.  dont remember it in airvx.  check the diagram.
-    # get entitytext chunk
-    use_text_units = await _find_most_related_text_unit_from_entities(
-        node_datas,
-        query_param,
-        text_chunks_db,
-        knowledge_graph_inst,
-    )
-    use_relations = await _find_most_related_edges_from_entities(
-        node_datas,
-        query_param,
-        knowledge_graph_inst,
+    # get entitytext chunk and relations concurrently
+    use_text_units, use_relations = await asyncio.gather(
+        _find_most_related_text_unit_from_entities(
+            node_datas,
+            query_param,
+            text_chunks_db,
+            knowledge_graph_inst,
+            chunk_memo,
+            graph_memo,
+        ),
+        _find_most_related_edges_from_entities(
+            node_datas,
+            query_param,
+            knowledge_graph_inst,
+            graph_memo,
+        ),
     )
 
     tokenizer: Tokenizer = text_chunks_db.global_config.get("tokenizer")
@@ -2079,12 +2286,137 @@ async def _get_node_data(
     return entities_context, relations_context, text_units_context
 
 
+async def _memoized_batch(
+    memo: dict[Any, asyncio.Future],
+    keys: list,
+    fetch: Callable[[list], Awaitable[dict]],
+) -> dict:
+    """Look up keys with one batched fetch for the keys not in the memo yet.
+
+    The memo maps keys to futures of fetched batches, so keys already fetched (or
+    being fetched) by another caller sharing the memo are not requested again.
+
+    Returns:
+        Dict mapping each key found by the fetch to its value
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    missing_keys = [key for key in unique_keys if key not in memo]
+
+    if missing_keys:
+        batch_future = asyncio.get_running_loop().create_future()
+        for key in missing_keys:
+            memo[key] = batch_future
+        try:
+            batch_future.set_result(await fetch(missing_keys))
+        except BaseException as e:
+            for key in missing_keys:
+                memo.pop(key, None)
+            if isinstance(e, asyncio.CancelledError):
+                batch_future.cancel()
+            else:
+                batch_future.set_exception(e)
+                # Mark as retrieved, the exception is re-raised to this caller
+                batch_future.exception()
+            raise
+
+    results = {}
+    for key in unique_keys:
+        batch = await memo[key]
+        if key in batch:
+            results[key] = batch[key]
+    return results
+
+
+class _GraphBatchMemo:
+    """Per-query memo of the graph batch lookups of the retrieval paths.
+
+    Nodes, degrees and edges already fetched (or being fetched) by another path are
+    not requested again, so concurrent paths share deduplicated batch calls.
+    """
+
+    def __init__(self, graph: BaseGraphStorage):
+        self.graph = graph
+        self._memos: dict[str, dict[Any, asyncio.Future]] = defaultdict(dict)
+
+    async def get_nodes(self, node_ids: list[str]) -> dict[str, dict]:
+        return await _memoized_batch(
+            self._memos["nodes"], node_ids, self.graph.get_nodes_batch
+        )
+
+    async def node_degrees(self, node_ids: list[str]) -> dict[str, int]:
+        return await _memoized_batch(
+            self._memos["node_degrees"], node_ids, self.graph.node_degrees_batch
+        )
+
+    async def nodes_edges(self, node_ids: list[str]) -> dict[str, list[tuple]]:
+        return await _memoized_batch(
+            self._memos["nodes_edges"], node_ids, self.graph.get_nodes_edges_batch
+        )
+
+    async def get_edges(self, pairs: list[tuple[str, str]]) -> dict[tuple, dict]:
+        return await _memoized_batch(
+            self._memos["edges"],
+            pairs,
+            lambda missing: self.graph.get_edges_batch(
+                [{"src": src, "tgt": tgt} for src, tgt in missing]
+            ),
+        )
+
+    async def edge_degrees(self, pairs: list[tuple[str, str]]) -> dict[tuple, int]:
+        return await _memoized_batch(
+            self._memos["edge_degrees"], pairs, self.graph.edge_degrees_batch
+        )
+
+
+async def _get_text_chunks_by_ids(
+    text_chunks_db: BaseKVStorage,
+    chunk_ids: list[str],
+    chunk_memo: dict[str, asyncio.Future] | None = None,
+) -> dict[str, dict | None]:
+    """Fetch text chunks with one deduplicated get_by_ids request.
+
+    Args:
+        text_chunks_db: Text chunks storage
+        chunk_ids: Chunk IDs to fetch, duplicates are allowed
+        chunk_memo: Optional per-query memo shared by the retrieval paths. It maps
+            chunk IDs to futures of fetched batches, so chunks already fetched (or being
+            fetched) by another path are not requested again
+
+    Returns:
+        Dict mapping chunk_id -> chunk data, or None for missing chunks
+    """
+
+    async def fetch(missing_ids: list[str]) -> dict[str, dict]:
+        rows = await text_chunks_db.get_by_ids(missing_ids)
+        # Some backends return rows aligned with the ids (None for missing ones),
+        # others only return the rows found, so match rows by their id when possible
+        fetched = {}
+        for position, row in enumerate(rows or []):
+            if row is None:
+                continue
+            row_id = row.get("_id") or row.get("id")
+            if row_id is None and len(rows) == len(missing_ids):
+                row_id = missing_ids[position]
+            if row_id is not None:
+                fetched[str(row_id)] = row
+        return fetched
+
+    found = await _memoized_batch(
+        chunk_memo if chunk_memo is not None else {}, chunk_ids, fetch
+    )
+    return {c_id: found.get(c_id) for c_id in dict.fromkeys(chunk_ids)}
+
+
 async def _find_most_related_text_unit_from_entities(
     node_datas: list[dict],
     query_param: QueryParam,
     text_chunks_db: BaseKVStorage,
     knowledge_graph_inst: BaseGraphStorage,
+    chunk_memo: dict[str, asyncio.Future] | None = None,
+    graph_memo: _GraphBatchMemo | None = None,
 ):
+    if graph_memo is None:
+        graph_memo = _GraphBatchMemo(knowledge_graph_inst)
     text_units = [
         split_string_by_multi_markers(dp["source_id"], [GRAPH_FIELD_SEP])
         for dp in node_datas
@@ -2092,7 +2424,7 @@ async def _find_most_related_text_unit_from_entities(
     ]
 
     node_names = [dp["entity_name"] for dp in node_datas]
-    batch_edges_dict = await knowledge_graph_inst.get_nodes_edges_batch(node_names)
+    batch_edges_dict = await graph_memo.nodes_edges(node_names)
     # Build the edges list in the same order as node_datas.
     edges = [batch_edges_dict.get(name, []) for name in node_names]
 
@@ -2105,9 +2437,7 @@ async def _find_most_related_text_unit_from_entities(
     all_one_hop_nodes = list(all_one_hop_nodes)
 
     # Batch retrieve one-hop node data using get_nodes_batch
-    all_one_hop_nodes_data_dict = await knowledge_graph_inst.get_nodes_batch(
-        all_one_hop_nodes
-    )
+    all_one_hop_nodes_data_dict = await graph_memo.get_nodes(all_one_hop_nodes)
     all_one_hop_nodes_data = [
         all_one_hop_nodes_data_dict.get(e) for e in all_one_hop_nodes
     ]
@@ -2128,20 +2458,14 @@ async def _find_most_related_text_unit_from_entities(
                 all_text_units_lookup[c_id] = index
                 tasks.append((c_id, index, this_edges))
 
-    # Process in batches tasks at a time to avoid overwhelming resources
-    batch_size = 5
-    results = []
-
-    for i in range(0, len(tasks), batch_size):
-        batch_tasks = tasks[i : i + batch_size]
-        batch_results = await asyncio.gather(
-            *[text_chunks_db.get_by_id(c_id) for c_id, _, _ in batch_tasks]
-        )
-        results.extend(batch_results)
+    # Fetch all chunks with a single bulk request
+    chunks_dict = await _get_text_chunks_by_ids(
+        text_chunks_db, [c_id for c_id, _, _ in tasks], chunk_memo
+    )
 
-    for (c_id, index, this_edges), data in zip(tasks, results):
+    for c_id, index, this_edges in tasks:
         all_text_units_lookup[c_id] = {
-            "data": data,
+            "data": chunks_dict.get(c_id),
             "order": index,
             "relation_counts": 0,
         }
@@ -2174,6 +2498,7 @@ async def _find_most_related_text_unit_from_entities(
         key=lambda x: x["data"]["content"],
         max_token_size=query_param.max_token_for_text_unit,
         tokenizer=tokenizer,
+        token_count_key=lambda x: x["data"].get("tokens"),
     )
 
     logger.debug(
@@ -2188,9 +2513,12 @@ async def _find_most_related_edges_from_entities(
     node_datas: list[dict],
     query_param: QueryParam,
     knowledge_graph_inst: BaseGraphStorage,
+    graph_memo: _GraphBatchMemo | None = None,
 ):
+    if graph_memo is None:
+        graph_memo = _GraphBatchMemo(knowledge_graph_inst)
     node_names = [dp["entity_name"] for dp in node_datas]
-    batch_edges_dict = await knowledge_graph_inst.get_nodes_edges_batch(node_names)
+    batch_edges_dict = await graph_memo.nodes_edges(node_names)
 
     all_edges = []
     seen = set()
@@ -2203,16 +2531,10 @@ async def _find_most_related_edges_from_entities(
                 seen.add(sorted_edge)
                 all_edges.append(sorted_edge)
 
-    # Prepare edge pairs in two forms:
-    # For the batch edge properties function, use dicts.
-    edge_pairs_dicts = [{"src": e[0], "tgt": e[1]} for e in all_edges]
-    # For edge degrees, use tuples.
-    edge_pairs_tuples = list(all_edges)  # all_edges is already a list of tuples
-
     # Call the batched functions concurrently.
     edge_data_dict, edge_degrees_dict = await asyncio.gather(
-        knowledge_graph_inst.get_edges_batch(edge_pairs_dicts),
-        knowledge_graph_inst.edge_degrees_batch(edge_pairs_tuples),
+        graph_memo.get_edges(all_edges),
+        graph_memo.edge_degrees(all_edges),
     )
 
     # Reconstruct edge_datas list in the same order as the deduplicated results.
@@ -2257,28 +2579,32 @@ async def _get_edge_data(
     relationships_vdb: BaseVectorStorage,
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
+    chunk_memo: dict[str, asyncio.Future] | None = None,
+    graph_memo: _GraphBatchMemo | None = None,
+    query_embedding: np.ndarray | None = None,
 ):
     logger.info(
         f"Query edges: {keywords}, top_k: {query_param.top_k}, cosine: {relationships_vdb.cosine_better_than_threshold}"
     )
+    if graph_memo is None:
+        graph_memo = _GraphBatchMemo(knowledge_graph_inst)
 
     results = await relationships_vdb.query(
-        keywords, top_k=query_param.top_k, ids=query_param.ids
+        keywords,
+        top_k=query_param.top_k,
+        ids=query_param.ids,
+        query_embedding=query_embedding,
     )
 
     if not len(results):
         return "", "", ""
 
-    # Prepare edge pairs in two forms:
-    # For the batch edge properties function, use dicts.
-    edge_pairs_dicts = [{"src": r["src_id"], "tgt": r["tgt_id"]} for r in results]
-    # For edge degrees, use tuples.
-    edge_pairs_tuples = [(r["src_id"], r["tgt_id"]) for r in results]
+    edge_pairs = [(r["src_id"], r["tgt_id"]) for r in results]
 
     # Call the batched functions concurrently.
     edge_data_dict, edge_degrees_dict = await asyncio.gather(
-        knowledge_graph_inst.get_edges_batch(edge_pairs_dicts),
-        knowledge_graph_inst.edge_degrees_batch(edge_pairs_tuples),
+        graph_memo.get_edges(edge_pairs),
+        graph_memo.edge_degrees(edge_pairs),
     )
 
     # Reconstruct edge_datas list in the same order as results.
@@ -2318,12 +2644,14 @@ async def _get_edge_data(
             edge_datas,
             query_param,
             knowledge_graph_inst,
+            graph_memo,
         ),
         _find_related_text_unit_from_relationships(
             edge_datas,
             query_param,
             text_chunks_db,
             knowledge_graph_inst,
+            chunk_memo,
         ),
     )
     logger.info(
@@ -2392,7 +2720,10 @@ async def _find_most_related_entities_from_relationships(
     edge_datas: list[dict],
     query_param: QueryParam,
     knowledge_graph_inst: BaseGraphStorage,
+    graph_memo: _GraphBatchMemo | None = None,
 ):
+    if graph_memo is None:
+        graph_memo = _GraphBatchMemo(knowledge_graph_inst)
     entity_names = []
     seen = set()
 
@@ -2406,8 +2737,8 @@ async def _find_most_related_entities_from_relationships(
 
     # Batch approach: Retrieve nodes and their degrees concurrently with one query each.
     nodes_dict, degrees_dict = await asyncio.gather(
-        knowledge_graph_inst.get_nodes_batch(entity_names),
-        knowledge_graph_inst.node_degrees_batch(entity_names),
+        graph_memo.get_nodes(entity_names),
+        graph_memo.node_degrees(entity_names),
     )
 
     # Rebuild the list in the same order as entity_names
@@ -2442,30 +2773,34 @@ async def _find_related_text_unit_from_relationships(
     query_param: QueryParam,
     text_chunks_db: BaseKVStorage,
     knowledge_graph_inst: BaseGraphStorage,
+    chunk_memo: dict[str, asyncio.Future] | None = None,
 ):
     text_units = [
         split_string_by_multi_markers(dp["source_id"], [GRAPH_FIELD_SEP])
         for dp in edge_datas
         if dp["source_id"] is not None
     ]
-    all_text_units_lookup = {}
 
-    async def fetch_chunk_data(c_id, index):
-        if c_id not in all_text_units_lookup:
-            chunk_data = await text_chunks_db.get_by_id(c_id)
-            # Only store valid data
-            if chunk_data is not None and "content" in chunk_data:
-                all_text_units_lookup[c_id] = {
-                    "data": chunk_data,
-                    "order": index,
-                }
-
-    tasks = []
+    # Keep the first (highest ranked) relation order for each chunk
+    chunk_orders = {}
     for index, unit_list in enumerate(text_units):
         for c_id in unit_list:
-            tasks.append(fetch_chunk_data(c_id, index))
+            chunk_orders.setdefault(c_id, index)
 
-    await asyncio.gather(*tasks)
+    # Fetch all chunks with a single bulk request
+    chunks_dict = await _get_text_chunks_by_ids(
+        text_chunks_db, list(chunk_orders), chunk_memo
+    )
+
+    all_text_units_lookup = {}
+    for c_id, index in chunk_orders.items():
+        chunk_data = chunks_dict.get(c_id)
+        # Only store valid data
+        if chunk_data is not None and "content" in chunk_data:
+            all_text_units_lookup[c_id] = {
+                "data": chunk_data,
+                "order": index,
+            }
 
     if not all_text_units_lookup:
         logger.warning("No valid text chunks found")
@@ -2489,6 +2824,7 @@ async def _find_related_text_unit_from_relationships(
         key=lambda x: x["data"]["content"],
         max_token_size=query_param.max_token_for_text_unit,
         tokenizer=tokenizer,
+        token_count_key=lambda x: x["data"].get("tokens"),
     )
 
     logger.debug(
@@ -2517,17 +2853,25 @@ async def naive_query(
 
     # Handle cache
     args_hash = compute_args_hash(query_param.mode, query)
-    cached_response, quantized, min_val, max_val = await handle_cache(
-        hashing_kv, args_hash, query, query_param.mode, cache_type="query"
-    )
+    cache_scope = _query_cache_scope(query_param)
+    with trace_span("cache_lookup"):
+        cached_response, quantized, min_val, max_val = await handle_cache(
+            hashing_kv,
+            args_hash,
+            query,
+            query_param.mode,
+            cache_type="query",
+            scope=cache_scope,
+        )
     if cached_response is not None:
         return cached_response
 
     tokenizer: Tokenizer = global_config["tokenizer"]
 
-    _, _, text_units_context = await _get_vector_context(
-        query, chunks_vdb, query_param, tokenizer
-    )
+    with trace_span("build_context"):
+        _, _, text_units_context = await _get_vector_context(
+            query, chunks_vdb, query_param, tokenizer
+        )
 
     if text_units_context is None or len(text_units_context) == 0:
         return PROMPTS["fail_response"]
@@ -2566,14 +2910,16 @@ async def naive_query(
     if query_param.only_need_prompt:
         return sys_prompt
 
-    len_of_prompts = len(tokenizer.encode(query + sys_prompt))
-    logger.debug(f"[naive_query]Prompt Tokens: {len_of_prompts}")
+    if logger.isEnabledFor(logging.DEBUG):
+        len_of_prompts = len(tokenizer.encode(query + sys_prompt))
+        logger.debug(f"[naive_query]Prompt Tokens: {len_of_prompts}")
 
-    response = await use_model_func(
-        query,
-        system_prompt=sys_prompt,
-        stream=query_param.stream,
-    )
+    with trace_span("llm_generate"):
+        response = await use_model_func(
+            query,
+            system_prompt=sys_prompt,
+            stream=query_param.stream,
+        )
 
     if isinstance(response, str) and len(response) > len(sys_prompt):
         response = (
@@ -2600,6 +2946,7 @@ async def naive_query(
                 max_val=max_val,
                 mode=query_param.mode,
                 cache_type="query",
+                scope=cache_scope,
             ),
         )
 
@@ -2633,8 +2980,14 @@ async def kg_query_with_keywords(
         use_model_func = partial(use_model_func, _priority=5)
 
     args_hash = compute_args_hash(query_param.mode, query)
+    cache_scope = _query_cache_scope(query_param, hl_keywords, ll_keywords)
     cached_response, quantized, min_val, max_val = await handle_cache(
-        hashing_kv, args_hash, query, query_param.mode, cache_type="query"
+        hashing_kv,
+        args_hash,
+        query,
+        query_param.mode,
+        cache_type="query",
+        scope=cache_scope,
     )
     if cached_response is not None:
         return cached_response
@@ -2689,8 +3042,9 @@ async def kg_query_with_keywords(
         return sys_prompt
 
     tokenizer: Tokenizer = global_config["tokenizer"]
-    len_of_prompts = len(tokenizer.encode(query + sys_prompt))
-    logger.debug(f"[kg_query_with_keywords]Prompt Tokens: {len_of_prompts}")
+    if logger.isEnabledFor(logging.DEBUG):
+        len_of_prompts = len(tokenizer.encode(query + sys_prompt))
+        logger.debug(f"[kg_query_with_keywords]Prompt Tokens: {len_of_prompts}")
 
     # 6. Generate response
     response = await use_model_func(
@@ -2723,6 +3077,7 @@ async def kg_query_with_keywords(
                     max_val=max_val,
                     mode=query_param.mode,
                     cache_type="query",
+                    scope=cache_scope,
                 ),
             )
 
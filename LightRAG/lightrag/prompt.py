@@ -182,6 +182,79 @@ Format the content-level key words as ("content_keywords"{tuple_delimiter}<high_
 Add them below using the same format:\n
 """.strip()
 
+PROMPTS["entity_extraction_jsonl"] = """---Goal---
+Given a text document that is potentially relevant to this activity and a list of entity types, identify all entities of those types from the text and all relationships among the identified entities.
+Use {language} as output language.
+
+---Steps---
+1. Identify all entities. For each identified entity, extract the following information:
+- name: Name of the entity, use same language as input text. If English, capitalized the name.
+- entity_type: One of the following types: [{entity_types}]
+- description: Comprehensive description of the entity's attributes and activities
+Format each entity as a JSON object on a single line: {{"type": "entity", "name": <entity_name>, "entity_type": <entity_type>, "description": <entity_description>}}
+
+2. From the entities identified in step 1, identify all pairs of (source_entity, target_entity) that are *clearly related* to each other.
+For each pair of related entities, extract the following information:
+- source: name of the source entity, as identified in step 1
+- target: name of the target entity, as identified in step 1
+- description: explanation as to why you think the source entity and the target entity are related to each other
+- keywords: one or more high-level key words that summarize the overarching nature of the relationship, focusing on concepts or themes rather than specific details
+- strength: a numeric score indicating strength of the relationship between the source entity and target entity
+Format each relationship as a JSON object on a single line: {{"type": "relationship", "source": <source_entity>, "target": <target_entity>, "description": <relationship_description>, "keywords": <relationship_keywords>, "strength": <relationship_strength>}}
+
+3. Identify high-level key words that summarize the main concepts, themes, or topics of the entire text. These should capture the overarching ideas present in the document.
+Format the content-level key words as a JSON object on a single line: {{"type": "content_keywords", "keywords": <high_level_keywords>}}
+
+4. Return output in {language} as JSON lines: one JSON object per line for all the entities and relationships identified in steps 1 and 2, without any other text.
+
+5. When finished, output {completion_delimiter}
+
+######################
+---Examples---
+######################
+{examples}
+
+#############################
+---Real Data---
+######################
+Entity_types: [{entity_types}]
+Text:
+{input_text}
+######################
+Output:"""
+
+PROMPTS["entity_continue_extraction_jsonl"] = """
+MANY entities and relationships were missed in the last extraction.
+
+---Remember Steps---
+
+1. Identify all entities. For each identified entity, extract the following information:
+- name: Name of the entity, use same language as input text. If English, capitalized the name.
+- entity_type: One of the following types: [{entity_types}]
+- description: Comprehensive description of the entity's attributes and activities
+Format each entity as a JSON object on a single line: {{"type": "entity", "name": <entity_name>, "entity_type": <entity_type>, "description": <entity_description>}}
+
+2. From the entities identified in step 1, identify all pairs of (source_entity, target_entity) that are *clearly related* to each other.
+For each pair of related entities, extract the following information:
+- source: name of the source entity, as identified in step 1
+- target: name of the target entity, as identified in step 1
+- description: explanation as to why you think the source entity and the target entity are related to each other
+- keywords: one or more high-level key words that summarize the overarching nature of the relationship, focusing on concepts or themes rather than specific details
+- strength: a numeric score indicating strength of the relationship between the source entity and target entity
+Format each relationship as a JSON object on a single line: {{"type": "relationship", "source": <source_entity>, "target": <target_entity>, "description": <relationship_description>, "keywords": <relationship_keywords>, "strength": <relationship_strength>}}
+
+3. Identify high-level key words that summarize the main concepts, themes, or topics of the entire text. These should capture the overarching ideas present in the document.
+Format the content-level key words as a JSON object on a single line: {{"type": "content_keywords", "keywords": <high_level_keywords>}}
+
+4. Return output in {language} as JSON lines: one JSON object per line for all the entities and relationships identified in steps 1 and 2, without any other text.
+
+5. When finished, output {completion_delimiter}
+
+---Output---
+
+Add them below using the same format:\n
+""".strip()
+
 PROMPTS["entity_if_loop_extraction"] = """
 ---Goal---'
 
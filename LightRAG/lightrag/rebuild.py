@@ -0,0 +1,287 @@
+"""
+Rebuild of the vector storages of a LightRAG instance from its chunks and graph.
+
+The chunk, entity and relationship vectors are embedded again from the text
+chunks and the knowledge graph, e.g. after changing the embedding model, without
+calling the LLM:
+
+    counts = await rag.arebuild_vector_storages(new_embedding_func)
+
+Batches of records are upserted concurrently, and the embedding batcher packs
+their contents into token-budget requests, as in the indexing pipeline.
+Storages implementing `create_rebuild_storage` build the new index next to the
+current one, which keeps answering queries until all indexes are rebuilt and
+`swap_rebuild_storage` replaces it at once. The other storages are only emptied
+and rebuilt in place when asked to with `in_place=True`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable
+
+from .base import BaseVectorStorage
+from .constants import STORAGE_SCAN_BATCH_SIZE, VECTOR_REBUILD_MAX_PARALLEL
+from .utils import EmbeddingFunc, compute_mdhash_id, logger
+
+if TYPE_CHECKING:
+    from .lightrag import LightRAG
+
+
+async def _previous_records(
+    previous: BaseVectorStorage | None, ids: list[str]
+) -> dict[str, dict[str, Any]]:
+    """Records of the index being replaced, by id"""
+    if previous is None or not ids:
+        return {}
+    return {
+        record["id"]: record
+        for record in await previous.get_by_ids(ids)
+        if record and record.get("id") is not None
+    }
+
+
+async def _keep_created_at(
+    records: dict[str, dict[str, Any]], previous: BaseVectorStorage | None
+) -> dict[str, dict[str, Any]]:
+    """Give the records the creation time they have in the index being replaced"""
+    found = await _previous_records(previous, list(records))
+    for record_id, record in found.items():
+        if record.get("created_at") is not None:
+            records[record_id]["created_at"] = record["created_at"]
+    return records
+
+
+async def _chunk_records(
+    batch: list[tuple[str, dict[str, Any]]], previous: BaseVectorStorage | None
+) -> dict[str, dict[str, Any]]:
+    return await _keep_created_at(
+        {chunk_id: dict(chunk) for chunk_id, chunk in batch}, previous
+    )
+
+
+async def _entity_records(
+    batch: list[tuple[str, dict[str, Any]]], previous: BaseVectorStorage | None
+) -> dict[str, dict[str, Any]]:
+    records = {
+        compute_mdhash_id(entity_name, prefix="ent-"): {
+            "entity_name": entity_name,
+            "entity_type": node.get("entity_type", "UNKNOWN"),
+            "content": f"{entity_name}\n{node.get('description', '')}",
+            "source_id": node.get("source_id", ""),
+            "file_path": node.get("file_path", "unknown_source"),
+        }
+        for entity_name, node in batch
+    }
+    return await _keep_created_at(records, previous)
+
+
+async def _relationship_records(
+    batch: list[tuple[str, str, dict[str, Any]]], previous: BaseVectorStorage | None
+) -> dict[str, dict[str, Any]]:
+    ids = [compute_mdhash_id(src + tgt, prefix="rel-") for src, tgt, _ in batch]
+    reverse_ids = [compute_mdhash_id(tgt + src, prefix="rel-") for src, tgt, _ in batch]
+    found = await _previous_records(previous, ids + reverse_ids)
+
+    records = {}
+    for (src, tgt, edge), record_id, reverse_id in zip(batch, ids, reverse_ids):
+        if record_id not in found and reverse_id in found:
+            # Keep the direction the relationship was indexed in, graphs may
+            # return undirected edges either way
+            src, tgt, record_id = tgt, src, reverse_id
+        keywords = edge.get("keywords", "")
+        record = {
+            "src_id": src,
+            "tgt_id": tgt,
+            "keywords": keywords,
+            "content": f"{src}\t{tgt}\n{keywords}\n{edge.get('description', '')}",
+            "source_id": edge.get("source_id", ""),
+            "file_path": edge.get("file_path", "unknown_source"),
+        }
+        if found.get(record_id, {}).get("created_at") is not None:
+            record["created_at"] = found[record_id]["created_at"]
+        records[record_id] = record
+    return records
+
+
+async def _create_target(
+    name: str, live: BaseVectorStorage, embedding_func: EmbeddingFunc, in_place: bool
+) -> BaseVectorStorage | None:
+    """Storage to rebuild the records of a vector storage in, None to rebuild in place"""
+    try:
+        return await live.create_rebuild_storage(embedding_func)
+    except NotImplementedError:
+        if not in_place:
+            raise RuntimeError(
+                f"{type(live).__name__} cannot build a second index for {name}: "
+                "pass in_place=True to empty it and rebuild it in place, queries "
+                "then miss records until the rebuild completes"
+            ) from None
+        return None
+
+
+async def _rebuild_storage(
+    name: str,
+    live: BaseVectorStorage,
+    target: BaseVectorStorage,
+    batches: AsyncIterator[list],
+    build_records: Callable[
+        [list, BaseVectorStorage | None], Awaitable[dict[str, dict[str, Any]]]
+    ],
+    max_parallel: int,
+    progress: Callable[[str], Awaitable[None]],
+) -> int:
+    """Embed all records of a vector storage again into `target`
+
+    Returns:
+        The number of records embedded
+    """
+    previous = live if target is not live else None
+    count = 0
+
+    async def write(batch: list) -> None:
+        nonlocal count
+        records = await build_records(batch, previous)
+        await target.upsert(records)
+        count += len(records)
+        await progress(f"Rebuilding {name}: {count} records embedded")
+
+    pending: set[asyncio.Task] = set()
+    try:
+        async for batch in batches:
+            pending.add(asyncio.create_task(write(batch)))
+            if len(pending) >= max_parallel:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()
+        await asyncio.gather(*pending)
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        raise
+
+    if target is live:
+        await live.index_done_callback()
+    return count
+
+
+async def _discard(target: BaseVectorStorage) -> None:
+    """Drop a rebuild storage that will not be swapped in"""
+    try:
+        await target.drop()
+    finally:
+        await target.finalize()
+
+
+async def rebuild_vector_storages(
+    rag: LightRAG,
+    embedding_func: EmbeddingFunc,
+    batch_size: int = STORAGE_SCAN_BATCH_SIZE,
+    max_parallel: int = VECTOR_REBUILD_MAX_PARALLEL,
+    progress: Callable[[str], Awaitable[None]] | None = None,
+    in_place: bool = False,
+) -> dict[str, int]:
+    """
+    Embed the chunks, entities and relationships of a LightRAG instance again.
+
+    The storages of the instance must be initialized, and must not be written to
+    during the rebuild. The rebuilt indexes replace the current ones only once
+    all of them are complete: if the rebuild fails, storages rebuilt next to
+    their data are left unchanged. Storages rebuilt in place are emptied first,
+    and left partial by a failed rebuild.
+
+    Args:
+        rag: Instance whose vector storages are rebuilt
+        embedding_func: Embedding function of the rebuilt indexes, as wrapped by
+            the instance for its concurrency limit and cache
+        batch_size: Number of records read and upserted at a time
+        max_parallel: Maximum number of batches upserted at the same time in each
+            vector storage
+        progress: Coroutine function called with a message after each batch
+        in_place: Empty and rebuild in place the vector storages unable to build
+            a second index, instead of failing before any index is changed
+
+    Returns:
+        The number of records embedded in each vector storage
+
+    Raises:
+        RuntimeError: If a vector storage cannot build a second index and
+            in_place is False
+    """
+
+    async def log_progress(message: str) -> None:
+        logger.info(message)
+        if progress is not None:
+            await progress(message)
+
+    graph = rag.chunk_entity_relation_graph
+    sources = {
+        "chunks_vdb": (rag.text_chunks.iter_batches(batch_size), _chunk_records),
+        "entities_vdb": (graph.iter_node_batches(batch_size), _entity_records),
+        "relationships_vdb": (
+            graph.iter_edge_batches(batch_size),
+            _relationship_records,
+        ),
+    }
+
+    # Create all rebuild storages before touching any index
+    targets: dict[str, BaseVectorStorage | None] = {}
+    try:
+        for name in sources:
+            targets[name] = await _create_target(
+                name, getattr(rag, name), embedding_func, in_place
+            )
+    except BaseException:
+        for target in targets.values():
+            if target is not None:
+                await _discard(target)
+        raise
+
+    for name, target in targets.items():
+        if target is None:
+            live = getattr(rag, name)
+            logger.warning(
+                f"Rebuild: {type(live).__name__} cannot build a second index, "
+                f"{name} is emptied and rebuilt in place"
+            )
+            live.embedding_func = embedding_func
+            result = await live.drop()
+            if result.get("status") != "success":
+                raise RuntimeError(f"Unable to empty {name}: {result.get('message')}")
+            targets[name] = live
+
+    results = await asyncio.gather(
+        *(
+            _rebuild_storage(
+                name,
+                getattr(rag, name),
+                targets[name],
+                batches,
+                build_records,
+                max_parallel,
+                log_progress,
+            )
+            for name, (batches, build_records) in sources.items()
+        ),
+        return_exceptions=True,
+    )
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        # Drop the indexes built next to the live ones
+        for name, target in targets.items():
+            if target is not getattr(rag, name):
+                await _discard(target)
+        raise errors[0]
+
+    counts = {}
+    for name, count in zip(sources, results):
+        live, target = getattr(rag, name), targets[name]
+        if target is not live:
+            await live.swap_rebuild_storage(target)
+            await target.finalize()
+        counts[name] = count
+        await log_progress(f"Rebuilt {name}: {count} records")
+    return counts
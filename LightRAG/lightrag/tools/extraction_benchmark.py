@@ -0,0 +1,145 @@
+"""
+Micro-benchmark of the entity extraction output parser.
+
+Parses recorded extraction outputs, e.g. the `extract` entries of the LLM
+response cache of a workspace, and reports the cost of splitting outputs into
+records and of building normalized entities and relationships from them:
+
+    python -m lightrag.tools.extraction_benchmark ./rag_storage/kv_store_llm_response_cache.json
+
+Inputs are JSON files with cache entries, as written by JsonKVStorage, or JSON
+lines files with one cache entry or output string per line. With `--format
+jsonl`, the outputs are converted to JSON lines first to measure that format.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from typing import Callable
+
+from lightrag.extraction_parser import ExtractionParser, get_extraction_parser
+from lightrag.prompt import PROMPTS
+from lightrag.utils import split_string_by_multi_markers
+
+
+def load_outputs(paths: list[str]) -> list[str]:
+    """Extraction outputs recorded in the given files"""
+
+    def output_of(entry) -> str | None:
+        if isinstance(entry, str):
+            return entry
+        if isinstance(entry, dict) and entry.get("cache_type", "extract") == "extract":
+            output = entry.get("return")
+            return output if isinstance(output, str) else None
+        return None
+
+    outputs = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                entries = [json.loads(line) for line in f if line.strip()]
+            else:
+                data = json.load(f)
+                entries = list(data.values()) if isinstance(data, dict) else data
+        outputs.extend(o for o in map(output_of, entries) if o)
+    return outputs
+
+
+def legacy_records(text: str) -> list[list[str]]:
+    """Record splitting as done before the parser module, for comparison"""
+    records = []
+    for record in split_string_by_multi_markers(
+        text,
+        [PROMPTS["DEFAULT_RECORD_DELIMITER"], PROMPTS["DEFAULT_COMPLETION_DELIMITER"]],
+    ):
+        record = re.search(r"\((.*)\)", record)
+        if record is None:
+            continue
+        records.append(
+            split_string_by_multi_markers(
+                record.group(1), [PROMPTS["DEFAULT_TUPLE_DELIMITER"]]
+            )
+        )
+    return records
+
+
+def measure(func: Callable[[str], object], outputs: list[str], repeat: int) -> float:
+    """Best time in seconds of running `func` over all outputs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for output in outputs:
+            func(output)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(outputs: list[str], parser: ExtractionParser, repeat: int, legacy: bool):
+    records = sum(sum(1 for _ in parser.records(o)) for o in outputs)
+    nodes = edges = 0
+    for output in outputs:
+        maybe_nodes, maybe_edges = parser.parse(output, "chunk-benchmark")
+        nodes += sum(map(len, maybe_nodes.values()))
+        edges += sum(map(len, maybe_edges.values()))
+    size = sum(map(len, outputs))
+    print(
+        f"{len(outputs)} outputs, {size / 1024 / 1024:.1f} MiB, {records} records "
+        f"({nodes} entities, {edges} relationships)"
+    )
+
+    cases = [
+        ("split records", lambda o: list(parser.records(o))),
+        ("parse + normalize", lambda o: parser.parse(o, "chunk-benchmark")),
+    ]
+    if legacy:
+        cases.insert(1, ("split records (legacy)", legacy_records))
+    for name, func in cases:
+        seconds = measure(func, outputs, repeat)
+        per_record = seconds / records * 1e6 if records else 0.0
+        print(
+            f"{name:<24} {seconds * 1000:10.1f} ms {per_record:8.2f} us/record "
+            f"{records / seconds if seconds else 0:12,.0f} records/s"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark parsing of recorded entity extraction outputs"
+    )
+    parser.add_argument(
+        "files", nargs="+", help="LLM response cache JSON or JSON lines files"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["delimited", "jsonl"],
+        default="delimited",
+        help="Convert delimited outputs to JSON lines before parsing (default: delimited)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per case, the best is reported"
+    )
+    args = parser.parse_args(argv)
+
+    outputs = load_outputs(args.files)
+    if not outputs:
+        print("No extraction outputs found", file=sys.stderr)
+        return 1
+
+    extraction_parser = get_extraction_parser()
+    if args.format == "jsonl":
+        outputs = [
+            extraction_parser.to_json_lines(o)
+            if extraction_parser.detect_format(o) == "delimited"
+            else o
+            for o in outputs
+        ]
+    run(outputs, extraction_parser, args.repeat, legacy=args.format == "delimited")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
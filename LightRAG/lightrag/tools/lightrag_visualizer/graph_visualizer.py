@@ -23,11 +23,16 @@ import traceback
 import colorsys
 import os
 
+from lightrag.kg.networkx_snapshot import NetworkXSnapshotStore
+
 CUSTOM_FONT = "font.ttf"
 
 DEFAULT_FONT_ENG = "Geist-Regular.ttf"
 DEFAULT_FONT_CHI = "SmileySans-Oblique.ttf"
 
+# Manifest of a NetworkXStorage snapshot, e.g. graph_chunk_entity_relation.kg.json
+SNAPSHOT_MANIFEST_SUFFIX = ".kg.json"
+
 
 class Node3D:
     """Class representing a 3D node in the graph"""
@@ -512,7 +517,7 @@ class GraphViewer:
         self.sphere_index_buffer = None
 
     def load_file(self, filepath: str):
-        """Load a GraphML file with error handling"""
+        """Load a GraphML file or a NetworkXStorage snapshot with error handling"""
         try:
             # Clear existing data
             self.id_node_map.clear()
@@ -522,7 +527,14 @@ class GraphViewer:
             self.setup_buffers()
 
             # Load new graph
-            self.graph = nx.read_graphml(filepath)
+            if filepath.endswith(SNAPSHOT_MANIFEST_SUFFIX):
+                # The manifest names the current binary snapshot of the graph
+                snapshot = NetworkXSnapshotStore(
+                    filepath[: -len(SNAPSHOT_MANIFEST_SUFFIX)], "viewer"
+                )
+                self.graph = snapshot.load()
+            else:
+                self.graph = nx.read_graphml(filepath)
             self.calculate_layout()
             self.update_buffers()
             self.show_load_error = False
@@ -973,10 +985,14 @@ def generate_colors(n: int) -> List[glm.vec3]:
 
 
 def show_file_dialog() -> Optional[str]:
-    """Show a file dialog for selecting GraphML files"""
+    """Show a file dialog for selecting GraphML files or NetworkXStorage snapshots"""
     file_path = filedialog.askopenfilename(
         title="Select GraphML File",
-        filetypes=[("GraphML files", "*.graphml"), ("All files", "*.*")],
+        filetypes=[
+            ("GraphML files", "*.graphml"),
+            ("LightRAG graph snapshots", f"*{SNAPSHOT_MANIFEST_SUFFIX}"),
+            ("All files", "*.*"),
+        ],
     )
     return file_path if file_path else None
 
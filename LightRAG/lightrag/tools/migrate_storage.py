@@ -0,0 +1,190 @@
+"""
+Copy the data of a LightRAG workspace to other storage backends.
+
+Streams the KV, document status, vector and graph namespaces from a source
+storage configuration into a target one, without calling the LLM or the
+embedding model again:
+
+    lightrag-migrate --embedding-dim 1024 \\
+        --source-working-dir ./rag_storage \\
+        --target-kv-storage PGKVStorage --target-vector-storage PGVectorStorage \\
+        --target-graph-storage Neo4JStorage --target-doc-status-storage PGDocStatusStorage \\
+        --checkpoint ./migration_checkpoint.json
+
+Connection settings of the storages are read from the environment and from
+config.ini, as for the LightRAG server. Run the same command again to resume an
+interrupted migration from its checkpoint: completed namespaces are skipped, an
+interrupted one continues after the last record saved if the source storage scans
+it in a stable order, and is copied again from its start otherwise. The exit code
+is 1 if the record counts of source and target differ.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+
+from lightrag import LightRAG
+from lightrag.constants import (
+    MIGRATION_CHECKPOINT_INTERVAL,
+    MIGRATION_MAX_PARALLEL,
+    STORAGE_SCAN_BATCH_SIZE,
+)
+from lightrag.migration import MIGRATION_NAMESPACES, migrate_storages
+from lightrag.utils import EmbeddingFunc, Tokenizer, setup_logger
+
+STORAGE_OPTIONS = {
+    "kv_storage": "JsonKVStorage",
+    "vector_storage": "NanoVectorDBStorage",
+    "graph_storage": "NetworkXStorage",
+    "doc_status_storage": "JsonDocStatusStorage",
+}
+
+
+async def _no_embedding(texts, **kwargs):
+    raise RuntimeError("The storage migration copies vectors and never embeds texts")
+
+
+async def _no_llm(prompt, **kwargs):
+    raise RuntimeError("The storage migration never calls the LLM")
+
+
+class _NoTokenizer:
+    """Stands in for the default tiktoken tokenizer, which may need a download"""
+
+    def encode(self, content: str) -> list[int]:
+        raise RuntimeError("The storage migration never tokenizes texts")
+
+    def decode(self, tokens: list[int]) -> str:
+        raise RuntimeError("The storage migration never tokenizes texts")
+
+
+def build_rag(args: argparse.Namespace, side: str) -> LightRAG:
+    """LightRAG instance with the storages of the source or target side"""
+    options = {
+        name: getattr(args, f"{side}_{name}") or default
+        for name, default in STORAGE_OPTIONS.items()
+    }
+    workspace = getattr(args, f"{side}_workspace")
+    if workspace is not None:
+        options["workspace"] = workspace
+    return LightRAG(
+        working_dir=getattr(args, f"{side}_working_dir"),
+        embedding_func=EmbeddingFunc(
+            embedding_dim=args.embedding_dim,
+            max_token_size=8192,
+            func=_no_embedding,
+        ),
+        llm_model_func=_no_llm,
+        tokenizer=Tokenizer("none", _NoTokenizer()),
+        auto_manage_storages_states=False,
+        **options,
+    )
+
+
+async def run(args: argparse.Namespace) -> int:
+    source = build_rag(args, "source")
+    target = build_rag(args, "target")
+    await source.initialize_storages()
+    await target.initialize_storages()
+    try:
+        report = await migrate_storages(
+            source,
+            target,
+            namespaces=args.namespaces,
+            batch_size=args.batch_size,
+            max_parallel=args.max_parallel,
+            checkpoint_path=args.checkpoint,
+            checkpoint_interval=args.checkpoint_interval,
+            verify=not args.no_verify,
+        )
+    finally:
+        await source.finalize_storages()
+        await target.finalize_storages()
+
+    for part, copied in sorted(report.copied.items()):
+        line = f"{part:<40} {copied:>10} copied"
+        if part in report.source_counts:
+            line += (
+                f" {report.source_counts[part]:>10} in source"
+                f" {report.target_counts[part]:>10} in target"
+            )
+        print(line)
+    if not report.ok:
+        print(
+            "Record counts differ for: " + ", ".join(sorted(report.mismatches)),
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Copy the data of a LightRAG workspace to other storage backends"
+    )
+    for side in ("source", "target"):
+        group = parser.add_argument_group(f"{side} storages")
+        group.add_argument(
+            f"--{side}-working-dir",
+            default="./rag_storage",
+            help="Working directory of file based storages (default: ./rag_storage)",
+        )
+        group.add_argument(
+            f"--{side}-workspace",
+            help="Workspace of the storages (default: WORKSPACE environment variable)",
+        )
+        for name, default in STORAGE_OPTIONS.items():
+            group.add_argument(
+                f"--{side}-{name.replace('_', '-')}",
+                help=f"Storage implementation (default: {default})",
+            )
+    parser.add_argument(
+        "--embedding-dim",
+        type=int,
+        required=True,
+        help="Dimension of the stored vectors",
+    )
+    parser.add_argument(
+        "--namespaces",
+        nargs="+",
+        choices=list(MIGRATION_NAMESPACES),
+        help="Namespaces to copy (default: all)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=STORAGE_SCAN_BATCH_SIZE,
+        help=f"Records read and written at a time (default: {STORAGE_SCAN_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--max-parallel",
+        type=int,
+        default=MIGRATION_MAX_PARALLEL,
+        help=f"Namespaces copied at the same time (default: {MIGRATION_MAX_PARALLEL})",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Checkpoint file to record the progress, and to resume from if it exists",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=MIGRATION_CHECKPOINT_INTERVAL,
+        help=f"Batches copied between two checkpoints (default: {MIGRATION_CHECKPOINT_INTERVAL})",
+    )
+    parser.add_argument(
+        "--no-verify",
+        action="store_true",
+        help="Do not compare the record counts of source and target",
+    )
+    args = parser.parse_args(argv)
+
+    # Report the progress of each namespace on the console
+    setup_logger("lightrag", level="INFO", enable_file_logging=False)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
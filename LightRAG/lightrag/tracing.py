@@ -0,0 +1,175 @@
+"""
+Lightweight latency tracing for LightRAG query processing.
+
+A trace collects timed spans for the current task and every task it spawns, using a
+context variable as the collector. Spans are no-ops when no trace is active, so the
+instrumentation in operate.py, the storage base classes and EmbeddingFunc costs a
+context variable lookup per call.
+
+Usage:
+    with start_trace() as trace:
+        response = await rag.aquery("...")
+    print(trace.report())
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Iterator
+
+logger = logging.getLogger("lightrag")
+
+
+@dataclass
+class Span:
+    """A timed stage of a trace, times are in seconds"""
+
+    name: str
+    start: float
+    """Offset from the start of the trace"""
+    duration: float = 0.0
+    depth: int = 0
+    """Nesting level, 0 for top-level stages"""
+    error: bool = False
+
+
+@dataclass
+class QueryTrace:
+    """Collector for the spans recorded while the trace is active"""
+
+    started_at: float = field(default_factory=time.perf_counter)
+    spans: list[Span] = field(default_factory=list)
+    total: float = 0.0
+
+    def report(self) -> dict[str, Any]:
+        """Build a JSON serializable timing breakdown
+
+        Returns:
+            dict with the total time, the time per stage name (spans with the same
+            name are summed) and the individual spans in start order. Times are in ms.
+        """
+        stages: dict[str, dict[str, Any]] = {}
+        for span in self.spans:
+            stage = stages.setdefault(span.name, {"count": 0, "total_ms": 0.0})
+            stage["count"] += 1
+            stage["total_ms"] += span.duration * 1000
+        for stage in stages.values():
+            stage["total_ms"] = round(stage["total_ms"], 3)
+
+        return {
+            "total_ms": round(self.total * 1000, 3),
+            "stages": stages,
+            "spans": [
+                {
+                    "name": span.name,
+                    "start_ms": round(span.start * 1000, 3),
+                    "duration_ms": round(span.duration * 1000, 3),
+                    "depth": span.depth,
+                    **({"error": True} if span.error else {}),
+                }
+                for span in sorted(self.spans, key=lambda s: s.start)
+            ],
+        }
+
+
+_current_trace: ContextVar[QueryTrace | None] = ContextVar(
+    "lightrag_current_trace", default=None
+)
+_current_depth: ContextVar[int] = ContextVar("lightrag_trace_depth", default=0)
+_trace_listeners: list[Callable[[QueryTrace], None]] = []
+
+
+def get_current_trace() -> QueryTrace | None:
+    """Return the trace active in the current context, if any"""
+    return _current_trace.get()
+
+
+def add_trace_listener(listener: Callable[[QueryTrace], None]) -> None:
+    """Register a callback invoked with every trace once it is finished"""
+    if listener not in _trace_listeners:
+        _trace_listeners.append(listener)
+
+
+def remove_trace_listener(listener: Callable[[QueryTrace], None]) -> None:
+    if listener in _trace_listeners:
+        _trace_listeners.remove(listener)
+
+
+@contextmanager
+def start_trace() -> Iterator[QueryTrace]:
+    """Collect spans until the block exits
+
+    A nested start_trace joins the enclosing trace instead of starting a new one.
+    """
+    active = _current_trace.get()
+    if active is not None:
+        yield active
+        return
+
+    trace = QueryTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.total = time.perf_counter() - trace.started_at
+        _current_trace.reset(token)
+        for listener in list(_trace_listeners):
+            try:
+                listener(trace)
+            except Exception as e:
+                logger.warning(f"Trace listener failed: {e}")
+
+
+def untraced_context() -> Context:
+    """A copy of the current context without the active trace
+
+    Long-lived tasks and work shared by several callers, e.g. limiter workers or
+    an embedding batch, are started in it so that their spans are not appended
+    to the trace of whichever caller happened to start them.
+    """
+    context = copy_context()
+    context.run(_current_trace.set, None)
+    context.run(_current_depth.set, 0)
+    return context
+
+
+@contextmanager
+def trace_span(name: str) -> Iterator[None]:
+    """Time the enclosed block as a span of the active trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    depth = _current_depth.get()
+    started = time.perf_counter()
+    span = Span(name=name, start=started - trace.started_at, depth=depth)
+    trace.spans.append(span)
+    token = _current_depth.set(depth + 1)
+    try:
+        yield
+    except BaseException:
+        span.error = True
+        raise
+    finally:
+        span.duration = time.perf_counter() - started
+        _current_depth.reset(token)
+
+
+def traced_storage_method(func: Callable) -> Callable:
+    """Wrap a storage coroutine method in a span named "<namespace>.<method>" """
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if _current_trace.get() is None:
+            return await func(self, *args, **kwargs)
+        with trace_span(f"{self.namespace}.{func.__name__}"):
+            return await func(self, *args, **kwargs)
+
+    wrapper.__traced__ = True
+    return wrapper
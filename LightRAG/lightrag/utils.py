@@ -3,22 +3,35 @@ import weakref
 
 import asyncio
 import html
-import csv
 import json
 import logging
 import logging.handlers
 import os
 import re
+import time
+from collections import OrderedDict
+from contextvars import copy_context
 from dataclasses import dataclass
-from functools import wraps
+from functools import lru_cache, wraps
 from hashlib import md5
-from typing import Any, Protocol, Callable, TYPE_CHECKING, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Protocol,
+    Callable,
+    TYPE_CHECKING,
+    List,
+)
 import numpy as np
 from dotenv import load_dotenv
+from lightrag.tracing import trace_span, untraced_context
 from lightrag.constants import (
     DEFAULT_LOG_MAX_BYTES,
     DEFAULT_LOG_BACKUP_COUNT,
     DEFAULT_LOG_FILENAME,
+    DEFAULT_TOKEN_COUNT_CACHE_SIZE,
+    GRAPH_SCAN_BATCH_SIZE,
 )
 
 
@@ -234,10 +247,13 @@ class EmbeddingFunc:
     embedding_dim: int
     max_token_size: int
     func: callable
+    # Name of the model behind func, scopes the embedding cache keys
+    model_name: str | None = None
     # concurrent_limit: int = 16
 
     async def __call__(self, *args, **kwargs) -> np.ndarray:
-        return await self.func(*args, **kwargs)
+        with trace_span("embedding"):
+            return await self.func(*args, **kwargs)
 
 
 def locate_json_string_body_from_string(content: str) -> str | None:
@@ -338,13 +354,207 @@ class QueueFullError(Exception):
     pass
 
 
-def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
+def is_overload_error(error: BaseException) -> bool:
+    """Whether an error signals an overloaded server: rate limits, 502-504 or timeouts"""
+    # tenacity.RetryError wraps the error of the last attempt
+    last_attempt = getattr(error, "last_attempt", None)
+    if last_attempt is not None and last_attempt.exception() is not None:
+        error = last_attempt.exception()
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status in (429, 502, 503, 504):
+        return True
+    name = type(error).__name__
+    return any(marker in name for marker in ("RateLimit", "Timeout", "Overloaded"))
+
+
+class AdaptiveConcurrencyLimit:
+    """AIMD concurrency limit driven by call latency and overload errors
+
+    While all slots are in use the limit grows by about one slot per round trip.
+    Overload errors (see is_overload_error) shrink it by `overload_backoff`, and
+    a sustained rise of latency by `latency_backoff`. Other errors do not change
+    the limit. After a decrease the limit holds until a window of calls shows
+    normal latency.
+
+    Latency is judged on the median of windows of `latency_window` calls rather
+    than on single calls, since LLM latency varies a lot with the output length
+    regardless of the load. A window whose median exceeds `latency_tolerance`
+    times the baseline median counts as congestion. Baselines are kept per
+    priority, as queries, summaries and extraction send prompts of very different
+    sizes, together with the limit of their first window. They follow the window
+    medians as a moving average, but only down while the limit is above that of
+    their first window, where latency may rise with the concurrency. Slow windows
+    at or below that limit are not caused by concurrency, e.g. longer prompts,
+    and replace the baseline.
+
+    Only calls started after the last decrease count towards a window, so the
+    latency measured at the previous limit shrinks it only once.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial_limit: int | None = None,
+        latency_tolerance: float = 1.5,
+        latency_backoff: float = 0.9,
+        overload_backoff: float = 0.5,
+        latency_window: int = 20,
+        baseline_smoothing: float = 0.05,
+    ):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        if initial_limit is None:
+            initial_limit = max(self.min_limit, self.max_limit // 4)
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.latency_backoff = latency_backoff
+        self.overload_backoff = overload_backoff
+        self.latency_window = max(1, latency_window)
+        self.baseline_smoothing = baseline_smoothing
+        self.decreases = 0
+        self.overloads = 0
+        self._slots = 0
+        self._slot_available = asyncio.Condition()
+        # Baseline latency median by priority, with the limit it was measured at
+        self._baselines: dict[int, tuple[float, int]] = {}
+        self._windows: dict[int, list[float]] = {}
+        self._last_decrease = 0.0
+        # No increase between a decrease and the next window of normal latency
+        self._holding = False
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    async def acquire(self) -> None:
+        """Wait for a free slot below the current limit"""
+        async with self._slot_available:
+            await self._slot_available.wait_for(lambda: self._slots < self.limit)
+            self._slots += 1
+
+    async def release(self) -> None:
+        async with self._slot_available:
+            self._slots -= 1
+            self._slot_available.notify()
+
+    def _judge_latency(self, priority: int, latency: float) -> bool | None:
+        """Add a latency to the window of its priority
+
+        Returns:
+            Whether the window is congested once it is full, None before
+        """
+        window = self._windows.setdefault(priority, [])
+        window.append(latency)
+        if len(window) < self.latency_window:
+            return None
+        median = float(np.median(window))
+        window.clear()
+
+        if priority not in self._baselines:
+            self._baselines[priority] = (median, self.limit)
+            return False
+        baseline, measured_at = self._baselines[priority]
+        # Latency may only rise with the concurrency above the limit the
+        # baseline was measured at, or at the bounds of the limit
+        concurrency_unchanged = self.limit <= measured_at or self.limit in (
+            self.min_limit,
+            self.max_limit,
+        )
+        if median > baseline * self.latency_tolerance:
+            if self.limit > measured_at:
+                return True
+            self._baselines[priority] = (median, self.limit)
+        elif median < baseline or concurrency_unchanged:
+            baseline += (median - baseline) * self.baseline_smoothing
+            self._baselines[priority] = (baseline, measured_at)
+        return False
+
+    async def record(
+        self,
+        priority: int,
+        started: float,
+        latency: float,
+        saturated: bool,
+        error: BaseException | None = None,
+    ) -> None:
+        """Adjust the limit after a call started at `started` (time.monotonic)
+
+        Args:
+            priority: Priority of the call, selects the latency baseline
+            started: When the call started
+            latency: Duration of the call in seconds
+            saturated: Whether all slots were in use or calls were waiting for
+                one when the call started
+            error: Exception raised by the call, if any
+        """
+        overload = error is not None and is_overload_error(error)
+        if overload:
+            self.overloads += 1
+        elif error is not None:
+            return
+        if started < self._last_decrease:
+            # Started at the previous limit
+            return
+
+        congested = overload
+        if not overload:
+            judged = self._judge_latency(priority, latency)
+            if judged is not None:
+                congested = judged
+                self._holding = judged
+        previous = self.limit
+        if congested:
+            backoff = self.overload_backoff if overload else self.latency_backoff
+            self._limit = max(float(self.min_limit), self._limit * backoff)
+            self._last_decrease = time.monotonic()
+            self.decreases += 1
+            self._holding = True
+            # Windows measured at the previous limit are stale
+            for window in self._windows.values():
+                window.clear()
+        elif saturated and not self._holding:
+            self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+
+        if self.limit != previous:
+            logger.debug(
+                f"limit_async: concurrency limit {previous} -> {self.limit}"
+                f" ({'overload' if overload else 'latency' if congested else 'saturated'})"
+            )
+            if self.limit > previous:
+                async with self._slot_available:
+                    self._slot_available.notify(self.limit - previous)
+
+
+def priority_limit_async_func_call(
+    max_size: int,
+    max_queue_size: int = 1000,
+    adaptive: bool = False,
+    min_size: int = 1,
+    urgent_priority: int = 5,
+):
     """
     Enhanced priority-limited asynchronous function call decorator
 
+    In adaptive mode the number of concurrent calls is adjusted between min_size
+    and max_size by an AdaptiveConcurrencyLimit. While all slots are busy, calls
+    with a priority of at most urgent_priority (queries) run right away on a
+    reserve of max(1, max_size // 4) extra slots instead of waiting for a slot or
+    for room in a full queue.
+
+    The decorated function exposes `metrics()`, returning the current limit, the
+    number of running calls, the queue depth and wait times per priority.
+
     Args:
         max_size: Maximum number of concurrent calls
         max_queue_size: Maximum queue capacity to prevent memory overflow
+        adaptive: Adjust the concurrency limit to the observed latency and errors
+        min_size: Lowest concurrency limit in adaptive mode
+        urgent_priority: Highest priority value that may use the reserve slots
     Returns:
         Decorator function
     """
@@ -365,48 +575,96 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
         active_futures = weakref.WeakSet()
         reinit_count = 0  # Reinitialization counter to track system health
 
+        controller = (
+            AdaptiveConcurrencyLimit(max_size, min_limit=min_size) if adaptive else None
+        )
+        reserved_size = max(1, max_size // 4)
+        running = 0
+        reserved_running = 0
+        # Queue wait per priority: [count, total seconds, max seconds]
+        wait_stats: dict[int, list[float]] = {}
+
+        def record_wait(priority: int, waited: float) -> None:
+            stats = wait_stats.setdefault(priority, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += waited
+            stats[2] = max(stats[2], waited)
+
         # Worker function to process tasks in the queue
         async def worker():
             """Worker that processes tasks in the priority queue"""
+            nonlocal running
             try:
                 while not shutdown_event.is_set():
                     try:
-                        # Use timeout to get tasks, allowing periodic checking of shutdown signal
+                        # In adaptive mode only workers holding a slot take tasks
+                        if controller is not None:
+                            await controller.acquire()
                         try:
-                            (
-                                priority,
-                                count,
-                                future,
-                                args,
-                                kwargs,
-                            ) = await asyncio.wait_for(queue.get(), timeout=1.0)
-                        except asyncio.TimeoutError:
-                            # Timeout is just to check shutdown signal, continue to next iteration
-                            continue
-
-                        # If future is cancelled, skip execution
-                        if future.cancelled():
-                            queue.task_done()
-                            continue
-
-                        try:
-                            # Execute function
-                            result = await func(*args, **kwargs)
-                            # If future is not done, set the result
-                            if not future.done():
-                                future.set_result(result)
-                        except asyncio.CancelledError:
-                            if not future.done():
-                                future.cancel()
-                            logger.debug("limit_async: Task cancelled during execution")
-                        except Exception as e:
-                            logger.error(
-                                f"limit_async: Error in decorated function: {str(e)}"
+                            # Use timeout to get tasks, allowing periodic checking of shutdown signal
+                            try:
+                                (
+                                    priority,
+                                    count,
+                                    future,
+                                    args,
+                                    kwargs,
+                                    enqueued_at,
+                                    context,
+                                ) = await asyncio.wait_for(queue.get(), timeout=1.0)
+                            except asyncio.TimeoutError:
+                                # Timeout is just to check shutdown signal, continue to next iteration
+                                continue
+
+                            # If future is cancelled, skip execution
+                            if future.cancelled():
+                                queue.task_done()
+                                continue
+
+                            started = time.monotonic()
+                            record_wait(priority, started - enqueued_at)
+                            running += 1
+                            # All slots are in use or calls are left waiting
+                            saturated = controller is not None and (
+                                running >= controller.limit or not queue.empty()
                             )
-                            if not future.done():
-                                future.set_exception(e)
+                            error = None
+                            try:
+                                # Execute function in the context of the caller,
+                                # so that its spans go to the caller's trace
+                                result = await context.run(
+                                    asyncio.create_task, func(*args, **kwargs)
+                                )
+                                # If future is not done, set the result
+                                if not future.done():
+                                    future.set_result(result)
+                            except asyncio.CancelledError:
+                                if not future.done():
+                                    future.cancel()
+                                logger.debug(
+                                    "limit_async: Task cancelled during execution"
+                                )
+                            except Exception as e:
+                                error = e
+                                logger.error(
+                                    f"limit_async: Error in decorated function: {str(e)}"
+                                )
+                                if not future.done():
+                                    future.set_exception(e)
+                            finally:
+                                running -= 1
+                                queue.task_done()
+                                if controller is not None:
+                                    await controller.record(
+                                        priority,
+                                        started,
+                                        time.monotonic() - started,
+                                        saturated,
+                                        error,
+                                    )
                         finally:
-                            queue.task_done()
+                            if controller is not None:
+                                await controller.release()
                     except Exception as e:
                         # Catch all exceptions in worker loop to prevent worker termination
                         logger.error(f"limit_async: Critical error in worker: {str(e)}")
@@ -437,7 +695,7 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                         )
                         new_tasks = set()
                         for _ in range(workers_needed):
-                            task = asyncio.create_task(worker())
+                            task = untraced_context().run(asyncio.create_task, worker())
                             new_tasks.add(task)
                             task.add_done_callback(tasks.discard)
                         # Update task set in one operation
@@ -488,12 +746,15 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                 # Create initial worker tasks, only adding the number needed
                 workers_needed = max_size - active_tasks_count
                 for _ in range(workers_needed):
-                    task = asyncio.create_task(worker())
+                    # Workers outlive the call starting them, keep them out of its trace
+                    task = untraced_context().run(asyncio.create_task, worker())
                     tasks.add(task)
                     task.add_done_callback(tasks.discard)
 
                 # Start health check
-                worker_health_check_task = asyncio.create_task(health_check())
+                worker_health_check_task = untraced_context().run(
+                    asyncio.create_task, health_check()
+                )
 
                 initialized = True
                 logger.info(f"limit_async: {workers_needed} new workers initialized")
@@ -537,6 +798,53 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
 
             logger.info("limit_async: Priority queue workers shutdown complete")
 
+        async def run_reserved(priority, timeout, args, kwargs):
+            """Run an urgent call right away on a reserve slot"""
+            nonlocal reserved_running
+            reserved_running += 1
+            record_wait(priority, 0.0)
+            started = time.monotonic()
+            error = None
+            try:
+                if timeout is not None:
+                    try:
+                        return await asyncio.wait_for(func(*args, **kwargs), timeout)
+                    except asyncio.TimeoutError:
+                        raise TimeoutError(
+                            f"limit_async: Task timed out after {timeout} seconds"
+                        )
+                return await func(*args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                reserved_running -= 1
+                await controller.record(
+                    priority, started, time.monotonic() - started, True, error
+                )
+
+        def metrics() -> dict[str, Any]:
+            """Current limit, running calls, queue depth and wait times per priority"""
+            return {
+                "adaptive": controller is not None,
+                "limit": controller.limit if controller is not None else max_size,
+                "max_limit": max_size,
+                "running": running,
+                "reserved_running": reserved_running,
+                "queue_depth": queue.qsize(),
+                "limit_decreases": controller.decreases if controller else 0,
+                "overload_errors": controller.overloads if controller else 0,
+                "wait": {
+                    priority: {
+                        "count": int(count),
+                        "total_ms": total * 1000,
+                        "avg_ms": total * 1000 / count,
+                        "max_ms": longest * 1000,
+                    }
+                    for priority, (count, total, longest) in sorted(wait_stats.items())
+                },
+            }
+
         @wraps(func)
         async def wait_func(
             *args, _priority=10, _timeout=None, _queue_timeout=None, **kwargs
@@ -559,6 +867,14 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
             # Ensure worker system is initialized
             await ensure_workers()
 
+            if (
+                controller is not None
+                and _priority <= urgent_priority
+                and (running >= controller.limit or queue.full())
+                and reserved_running < reserved_size
+            ):
+                return await run_reserved(_priority, _timeout, args, kwargs)
+
             # Create a future for the result
             future = asyncio.Future()
             active_futures.add(future)
@@ -575,7 +891,17 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                     try:
                         await asyncio.wait_for(
                             # current_count is used to ensure FIFO order
-                            queue.put((_priority, current_count, future, args, kwargs)),
+                            queue.put(
+                                (
+                                    _priority,
+                                    current_count,
+                                    future,
+                                    args,
+                                    kwargs,
+                                    time.monotonic(),
+                                    copy_context(),
+                                )
+                            ),
                             timeout=_queue_timeout,
                         )
                     except asyncio.TimeoutError:
@@ -585,7 +911,17 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                 else:
                     # No timeout, may wait indefinitely
                     # current_count is used to ensure FIFO order
-                    await queue.put((_priority, current_count, future, args, kwargs))
+                    await queue.put(
+                        (
+                            _priority,
+                            current_count,
+                            future,
+                            args,
+                            kwargs,
+                            time.monotonic(),
+                            copy_context(),
+                        )
+                    )
             except Exception as e:
                 # Clean up the future
                 if not future.done():
@@ -614,6 +950,7 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
 
         # Add the shutdown method to the decorated function
         wait_func.shutdown = shutdown
+        wait_func.metrics = metrics
 
         return wait_func
 
@@ -630,6 +967,150 @@ def wrap_embedding_func_with_attrs(**kwargs):
     return final_decro
 
 
+def get_embedding_model_name(embedding_func: Any) -> str | None:
+    """Name of the model behind an embedding function, used to scope cached vectors
+
+    Taken from `EmbeddingFunc.model_name` or the `model`/`embed_model` argument of
+    a `functools.partial`. None when the model is not known.
+    """
+    model_name = getattr(embedding_func, "model_name", None)
+    if model_name:
+        return str(model_name)
+    func = getattr(embedding_func, "func", embedding_func)
+    keywords = getattr(func, "keywords", None) or {}
+    model_name = keywords.get("model") or keywords.get("embed_model")
+    if model_name:
+        return str(model_name)
+    return None
+
+
+def embedding_cache_wrapper(
+    cache_storage: BaseKVStorage,
+    max_entries: int = 0,
+    model_name: str | None = None,
+    write_only: bool = False,
+):
+    """
+    Cache embeddings in a KV storage, keyed by model name and content hash.
+
+    Only texts missing from the cache are passed to the wrapped embedding function,
+    so re-embedding unchanged chunks, entities or relations costs a cache lookup.
+    Vectors are stored as float32 hex strings. When max_entries > 0, the least
+    recently used entries beyond that bound are evicted from the storage.
+
+    Args:
+        cache_storage: KV storage holding the cached vectors
+        max_entries: Maximum number of cached vectors, 0 for unbounded
+        model_name: Model name used in cache keys, derived from the function if None.
+            Without a known model name the function is returned without the cache,
+            since vectors of different models would share keys.
+        write_only: Embed every text and overwrite the cached vectors, e.g. when
+            rebuilding after the model behind a name changed
+    Returns:
+        Decorator function
+    """
+
+    def final_decro(func):
+        name = model_name or get_embedding_model_name(func)
+        if name is None:
+            logger.warning(
+                "Embedding cache disabled: set model_name on the EmbeddingFunc to enable it"
+            )
+            return func
+        # Recency order of cached keys in this process, seeded from storage on first use
+        lru: OrderedDict[str, None] = OrderedDict()
+        lru_lock = asyncio.Lock()
+        lru_loaded = False
+
+        async def load_lru():
+            nonlocal lru_loaded
+            if lru_loaded or max_entries <= 0:
+                return
+            async with lru_lock:
+                if lru_loaded:
+                    return
+                existing = []
+                try:
+                    async for batch in cache_storage.iter_batches(
+                        fields=["update_time"]
+                    ):
+                        existing.extend(batch)
+                except Exception as e:
+                    logger.warning(f"Embedding cache: unable to load cache keys: {e}")
+                    existing = []
+                for key, _ in sorted(
+                    existing, key=lambda item: item[1].get("update_time", 0) or 0
+                ):
+                    lru[key] = None
+                lru_loaded = True
+
+        async def touch_and_evict(keys: list[str]):
+            if max_entries <= 0:
+                return
+            async with lru_lock:
+                for key in keys:
+                    lru[key] = None
+                    lru.move_to_end(key)
+                evicted = []
+                while len(lru) > max_entries:
+                    evicted.append(lru.popitem(last=False)[0])
+            if evicted:
+                logger.debug(f"Embedding cache: evicting {len(evicted)} entries")
+                await cache_storage.delete(evicted)
+
+        @wraps(func)
+        async def wait_func(texts, *args, **kwargs):
+            if isinstance(texts, str):
+                texts = [texts]
+            if not texts:
+                return await func(texts, *args, **kwargs)
+            await load_lru()
+
+            keys = [
+                compute_mdhash_id(f"{name}:{text}", prefix="emb-") for text in texts
+            ]
+            unique_keys = list(dict.fromkeys(keys))
+            cached = [] if write_only else await cache_storage.get_by_ids(unique_keys)
+            vectors: dict[str, np.ndarray] = {}
+            # Not every backend keeps get_by_ids results aligned with the ids
+            for record in cached:
+                if not record or not record.get("embedding"):
+                    continue
+                key = record.get("cache_key") or record.get("_id") or record.get("id")
+                if key:
+                    vectors[key] = np.frombuffer(
+                        bytes.fromhex(record["embedding"]), dtype=np.float32
+                    )
+
+            miss_texts: dict[str, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in vectors and key not in miss_texts:
+                    miss_texts[key] = text
+
+            if miss_texts:
+                embeddings = await func(list(miss_texts.values()), *args, **kwargs)
+                new_records = {}
+                for key, embedding in zip(miss_texts.keys(), embeddings):
+                    vector = np.asarray(embedding, dtype=np.float32)
+                    vectors[key] = vector
+                    new_records[key] = {
+                        "cache_key": key,
+                        "embedding": vector.tobytes().hex(),
+                        "model": name,
+                    }
+                await cache_storage.upsert(new_records)
+
+            logger.debug(
+                f"Embedding cache: {len(unique_keys) - len(miss_texts)} hits, {len(miss_texts)} misses"
+            )
+            await touch_and_evict(unique_keys)
+            return np.array([vectors[key] for key in keys])
+
+        return wait_func
+
+    return final_decro
+
+
 def load_json(file_name):
     if not os.path.exists(file_name):
         return None
@@ -671,6 +1152,10 @@ class Tokenizer:
         """
         self.model_name: str = model_name
         self.tokenizer: TokenizerInterface = tokenizer
+        self._count_cache: OrderedDict[bytes, int] = OrderedDict()
+        self._count_cache_size: int = int(
+            os.getenv("TOKEN_COUNT_CACHE_SIZE", DEFAULT_TOKEN_COUNT_CACHE_SIZE)
+        )
 
     def encode(self, content: str) -> List[int]:
         """
@@ -696,6 +1181,73 @@ class Tokenizer:
         """
         return self.tokenizer.decode(tokens)
 
+    def __deepcopy__(self, memo: dict) -> "Tokenizer":
+        # global_config is built with dataclasses.asdict, which deep-copies fields.
+        # Share the tokenizer instead, so its token count cache is kept across calls.
+        return self
+
+    def count_tokens(self, content: str) -> int:
+        """
+        Counts the tokens of a string, memoizing the result in an LRU cache.
+
+        Entity descriptions, relation descriptions and chunks are counted again on
+        every query, so the counts are cached by content hash instead of encoding the
+        same text repeatedly. The cache size is set by TOKEN_COUNT_CACHE_SIZE, 0
+        disables it.
+
+        Args:
+            content: The string to count.
+
+        Returns:
+            The number of tokens in the string.
+        """
+        if self._count_cache_size <= 0:
+            return len(self.tokenizer.encode(content))
+
+        key = md5(content.encode("utf-8")).digest()
+        count = self._count_cache.get(key)
+        if count is not None:
+            self._count_cache.move_to_end(key)
+            return count
+
+        count = len(self.tokenizer.encode(content))
+        self._count_cache[key] = count
+        if len(self._count_cache) > self._count_cache_size:
+            self._count_cache.popitem(last=False)
+        return count
+
+    @property
+    def supports_offsets(self) -> bool:
+        """Whether the underlying tokenizer can map tokens back to character offsets."""
+        return hasattr(self.tokenizer, "decode_with_offsets")
+
+    def encode_with_offsets(self, content: str) -> tuple[List[int], List[int] | None]:
+        """
+        Encodes a string and maps every token back to its start position in the string.
+
+        The offsets allow callers to slice the original text by token windows
+        instead of decoding each window again. Tokenizers that cannot provide
+        offsets return None for them, and callers should fall back to `decode`.
+
+        Args:
+            content: The string to encode.
+
+        Returns:
+            A tuple of (tokens, offsets), where offsets[i] is the character index
+            at which tokens[i] starts, or None if offsets are not available.
+        """
+        tokens = self.tokenizer.encode(content)
+        if not self.supports_offsets:
+            return tokens, None
+        try:
+            text, offsets = self.tokenizer.decode_with_offsets(tokens)
+        except Exception:
+            return tokens, None
+        # Offsets are only meaningful if the tokenizer round-trips losslessly
+        if text != content:
+            return tokens, None
+        return tokens, offsets
+
 
 class TiktokenTokenizer(Tokenizer):
     """
@@ -734,13 +1286,18 @@ def pack_user_ass_to_openai_messages(*args: str):
     ]
 
 
+@lru_cache(maxsize=64)
+def _markers_pattern(markers: tuple[str, ...]) -> re.Pattern:
+    return re.compile("|".join(re.escape(marker) for marker in markers))
+
+
 def split_string_by_multi_markers(content: str, markers: list[str]) -> list[str]:
     """Split a string by multiple markers"""
     if not markers:
         return [content]
     content = content if content is not None else ""
-    results = re.split("|".join(re.escape(marker) for marker in markers), content)
-    return [r.strip() for r in results if r.strip()]
+    results = _markers_pattern(tuple(markers)).split(content)
+    return [r for r in (r.strip() for r in results) if r]
 
 
 # Refer the utils functions of the official GraphRAG implementation:
@@ -753,11 +1310,15 @@ def clean_str(input: Any) -> str:
 
     result = html.unescape(input.strip())
     # https://stackoverflow.com/questions/4324790/removing-control-characters-from-a-string-in-python
-    return re.sub(r"[\x00-\x1f\x7f-\x9f]", "", result)
+    return _CONTROL_CHARS.sub("", result)
+
+
+_CONTROL_CHARS = re.compile(r"[\x00-\x1f\x7f-\x9f]")
+_FLOAT = re.compile(r"^[-+]?[0-9]*\.?[0-9]+$")
 
 
 def is_float_regex(value: str) -> bool:
-    return bool(re.match(r"^[-+]?[0-9]*\.?[0-9]+$", value))
+    return bool(_FLOAT.match(value))
 
 
 def truncate_list_by_token_size(
@@ -765,16 +1326,26 @@ def truncate_list_by_token_size(
     key: Callable[[Any], str],
     max_token_size: int,
     tokenizer: Tokenizer,
+    token_count_key: Callable[[Any], int | None] | None = None,
 ) -> list[int]:
-    """Truncate a list of data by token size"""
+    """Truncate a list of data by token size
+
+    Items are counted with the tokenizer's memoized count_tokens, or with the count
+    returned by token_count_key (e.g. the stored "tokens" of a chunk) when it is not
+    None. The running prefix sum stops at the first item exceeding the budget.
+    """
     if max_token_size <= 0:
         return []
-    tokens = 0
-    for i, data in enumerate(list_data):
-        tokens += len(tokenizer.encode(key(data)))
-        if tokens > max_token_size:
-            return list_data[:i]
-    return list_data
+    with trace_span("truncate"):
+        tokens = 0
+        for i, data in enumerate(list_data):
+            count = token_count_key(data) if token_count_key is not None else None
+            if count is None:
+                count = tokenizer.count_tokens(key(data))
+            tokens += count
+            if tokens > max_token_size:
+                return list_data[:i]
+        return list_data
 
 
 def process_combine_contexts(*context_lists):
@@ -850,14 +1421,325 @@ def dequantize_embedding(
     return (quantized * scale + min_val).astype(np.float32)
 
 
+class QueryEmbeddingIndex:
+    """In-memory matrix of quantized query embeddings for one cache mode.
+
+    Rows are kept as uint8 codes with a per-row min value and scale, so the matrix stays
+    compact. Cosine similarity against all rows is computed in one vectorized pass
+    without dequantizing: q·v = scale * (codes·v) + min * sum(v).
+    """
+
+    def __init__(self, bits: int = 8):
+        self.bits = bits
+        self.keys: list[str] = []
+        self._key_pos: dict[str, int] = {}
+        self._codes: np.ndarray | None = None
+        self._mins = np.empty(0, dtype=np.float32)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, key: str, quantized: np.ndarray, min_val: float, max_val: float):
+        codes = np.asarray(quantized, dtype=np.uint8).reshape(-1)
+        min_val = float(min_val)
+        scale = (
+            0.0
+            if max_val == min_val
+            else (float(max_val) - min_val) / (2**self.bits - 1)
+        )
+        restored = codes.astype(np.float32) * scale + min_val
+        norm = float(np.linalg.norm(restored))
+
+        if self._codes is not None and codes.shape[0] != self._codes.shape[1]:
+            # Embedding dimension changed, previous entries are no longer comparable
+            self.__init__(self.bits)
+
+        pos = self._key_pos.get(key)
+        if pos is None:
+            if self._codes is None or self._size == self._codes.shape[0]:
+                # Grow capacity geometrically to keep appends amortized O(1)
+                capacity = max(16, self._size * 2)
+                codes_matrix = np.empty((capacity, codes.shape[0]), dtype=np.uint8)
+                if self._codes is not None:
+                    codes_matrix[: self._size] = self._codes[: self._size]
+                self._codes = codes_matrix
+                self._mins = np.resize(self._mins, capacity)
+                self._scales = np.resize(self._scales, capacity)
+                self._norms = np.resize(self._norms, capacity)
+            pos = self._size
+            self._size += 1
+            self._key_pos[key] = pos
+            self.keys.append(key)
+        self._codes[pos] = codes
+        self._mins[pos] = min_val
+        self._scales[pos] = scale
+        self._norms[pos] = norm
+
+    def remove(self, key: str):
+        pos = self._key_pos.pop(key, None)
+        if pos is None:
+            return
+        last = self._size - 1
+        if pos != last:
+            last_key = self.keys[last]
+            self._codes[pos] = self._codes[last]
+            self._mins[pos] = self._mins[last]
+            self._scales[pos] = self._scales[last]
+            self._norms[pos] = self._norms[last]
+            self.keys[pos] = last_key
+            self._key_pos[last_key] = pos
+        self.keys.pop()
+        self._size -= 1
+
+    def search(self, embedding: np.ndarray) -> tuple[str | None, float]:
+        """Return the key with the highest cosine similarity and its score"""
+        if self._size == 0:
+            return None, 0.0
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self._codes.shape[1]:
+            return None, 0.0
+        vector_norm = float(np.linalg.norm(vector))
+        if vector_norm == 0:
+            return None, 0.0
+        n = self._size
+        dots = self._scales[:n] * (self._codes[:n] @ vector) + self._mins[:n] * float(
+            vector.sum()
+        )
+        denom = self._norms[:n] * vector_norm
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarities = np.where(denom > 0, dots / denom, 0.0)
+        best = int(np.argmax(similarities))
+        return self.keys[best], float(similarities[best])
+
+
+async def _get_query_embedding_index(
+    hashing_kv, mode: str, scope: str | None
+) -> QueryEmbeddingIndex:
+    """Get the query embedding index of a cache mode and scope
+
+    The embeddings of a mode are loaded from storage on first use, into one index
+    per scope.
+    """
+    indexes = getattr(hashing_kv, "_query_embedding_indexes", None)
+    if indexes is None:
+        indexes = {}
+        setattr(hashing_kv, "_query_embedding_indexes", indexes)
+    scoped = indexes.get(mode)
+    if scoped is None:
+        scoped = await _load_query_embedding_indexes(hashing_kv, mode)
+        indexes[mode] = scoped
+    return scoped.setdefault(scope, QueryEmbeddingIndex())
+
+
+async def _load_query_embedding_indexes(
+    hashing_kv, mode: str
+) -> dict[str | None, QueryEmbeddingIndex]:
+    scoped: dict[str | None, QueryEmbeddingIndex] = {}
+    prefix = f"{mode}:query:"
+    entries = []
+    try:
+        async for batch in hashing_kv.iter_batches(
+            fields=["embedding", "embedding_min", "embedding_max", "scope"]
+        ):
+            entries.extend(item for item in batch if item[0].startswith(prefix))
+    except Exception as e:
+        logger.warning(f"Unable to load query embeddings from cache: {e}")
+        entries = []
+    count = 0
+    for key, entry in entries:
+        if not entry.get("embedding") or entry.get("embedding_min") is None:
+            continue
+        try:
+            quantized = np.frombuffer(bytes.fromhex(entry["embedding"]), dtype=np.uint8)
+            index = scoped.setdefault(entry.get("scope"), QueryEmbeddingIndex())
+            index.add(key, quantized, entry["embedding_min"], entry["embedding_max"])
+            count += 1
+        except (ValueError, TypeError):
+            continue
+    logger.debug(f"Loaded {count} query embeddings for cache mode {mode}")
+    return scoped
+
+
+async def get_best_cached_response(
+    hashing_kv,
+    current_embedding: np.ndarray,
+    mode: str,
+    similarity_threshold: float = 0.95,
+    use_llm_check: bool = False,
+    original_prompt: str | None = None,
+    scope: str | None = None,
+) -> str | None:
+    """Find the cached query response most similar to the current query embedding
+
+    Args:
+        hashing_kv: LLM response cache storage
+        current_embedding: Embedding of the current query
+        mode: Query mode, only responses cached under the same mode are considered
+        similarity_threshold: Minimum cosine similarity for a cache hit
+        use_llm_check: If True, let the LLM confirm that the cached answer can be reused
+        original_prompt: The current query, required for the LLM check
+        scope: Hash of the other query parameters that affect the answer, only
+            responses cached under the same scope are considered
+    Returns:
+        The cached response, or None if no sufficiently similar query was cached
+    """
+    index = await _get_query_embedding_index(hashing_kv, mode, scope)
+    best_key, best_similarity = index.search(current_embedding)
+    if best_key is None or best_similarity < similarity_threshold:
+        return None
+
+    cache_entry = await hashing_kv.get_by_id(best_key)
+    if not cache_entry:
+        # Entry was dropped from storage, forget it
+        index.remove(best_key)
+        return None
+
+    if use_llm_check and original_prompt and cache_entry.get("original_prompt"):
+        from lightrag.prompt import PROMPTS
+
+        llm_model_func = hashing_kv.global_config.get("llm_model_func")
+        if llm_model_func is not None:
+            compare_prompt = PROMPTS["similarity_check"].format(
+                original_prompt=original_prompt,
+                cached_prompt=cache_entry["original_prompt"],
+            )
+            try:
+                llm_result = await llm_model_func(compare_prompt)
+                llm_similarity = float(str(llm_result).strip())
+            except Exception as e:
+                logger.warning(f"LLM similarity check failed: {e}")
+                return None
+            if llm_similarity < similarity_threshold:
+                logger.debug(
+                    f"LLM similarity check rejected cache hit: {llm_similarity:.4f}"
+                )
+                return None
+
+    logger.info(
+        f"Embedding cache hit(mode:{mode} similarity:{best_similarity:.4f} key:{best_key})"
+    )
+    return cache_entry["return"]
+
+
+class StreamFanout:
+    """Replay one async iterator to any number of subscribers
+
+    The source is drained by a single task once the first subscriber starts
+    reading. Chunks are buffered, so subscribers joining later get the whole
+    stream from its start.
+    """
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self._source = source
+        self._chunks: list[Any] = []
+        self._done = False
+        self._error: BaseException | None = None
+        self._changed = asyncio.Event()
+        self._drain_task: asyncio.Task | None = None
+
+    def subscribe(self) -> AsyncIterator[Any]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Any]:
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain())
+        position = 0
+        while True:
+            if position < len(self._chunks):
+                yield self._chunks[position]
+                position += 1
+            elif self._done:
+                if self._error is not None:
+                    raise self._error
+                return
+            else:
+                await self._changed.wait()
+
+    async def _drain(self) -> None:
+        try:
+            async for chunk in self._source:
+                self._chunks.append(chunk)
+                self._notify()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done = True
+            self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution
+
+    The first caller for a key starts the call, callers arriving before it has
+    finished await the same result instead of repeating the work. The call runs
+    in its own task, so a caller that is cancelled does not cancel it for the
+    others. Async iterator results, like streamed LLM responses, are fanned out
+    so every caller receives the full stream.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(key, func))
+            task.add_done_callback(_consume_task_exception)
+            self._flights[key] = task
+            result = await asyncio.shield(task)
+        else:
+            logger.debug(f"Joining in-flight call {key}")
+            with trace_span("coalesced"):
+                result = await asyncio.shield(task)
+        if isinstance(result, StreamFanout):
+            return result.subscribe()
+        return result
+
+    async def _run(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await func()
+            if hasattr(result, "__aiter__"):
+                result = StreamFanout(result)
+            return result
+        finally:
+            if self._flights.get(key) is asyncio.current_task():
+                del self._flights[key]
+
+
+def _consume_task_exception(task: asyncio.Task) -> None:
+    # Retrieved here so an exception is not reported when every caller was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+# Shared by all LLM calls going through use_llm_func_with_cache
+llm_call_flights = SingleFlight()
+
+
 async def handle_cache(
     hashing_kv,
     args_hash,
     prompt,
     mode="default",
     cache_type=None,
+    scope=None,
 ):
-    """Generic cache handling function with flattened cache keys"""
+    """Generic cache handling function with flattened cache keys
+
+    For queries with embedding_cache_config enabled, a miss on the exact key falls back to
+    the most similar cached query of the same mode and scope. The scope is a hash of the
+    query parameters other than the query text that change the answer, so a similar
+    query asked with e.g. another response type or history does not reuse the answer.
+    The quantized query embedding is returned so save_to_cache can store it with the
+    new response.
+    """
     if hashing_kv is None:
         return None, None, None, None
 
@@ -875,6 +1757,33 @@ async def handle_cache(
         logger.debug(f"Flattened cache hit(key:{flattened_key})")
         return cache_entry["return"], None, None, None
 
+    embedding_cache_config = (
+        hashing_kv.global_config.get("embedding_cache_config") or {}
+    )
+    if (
+        mode != "default"
+        and cache_type == "query"
+        and embedding_cache_config.get("enabled")
+        and hashing_kv.embedding_func is not None
+    ):
+        current_embedding = (await hashing_kv.embedding_func([prompt], _priority=5))[0]
+        quantized, min_val, max_val = quantize_embedding(current_embedding)
+        best_cached_response = await get_best_cached_response(
+            hashing_kv,
+            current_embedding,
+            mode,
+            similarity_threshold=embedding_cache_config.get(
+                "similarity_threshold", 0.95
+            ),
+            use_llm_check=embedding_cache_config.get("use_llm_check", False),
+            original_prompt=prompt,
+            scope=scope,
+        )
+        if best_cached_response is not None:
+            return best_cached_response, None, None, None
+        logger.debug(f"Cache missed(mode:{mode} type:{cache_type})")
+        return None, quantized, float(min_val), float(max_val)
+
     logger.debug(f"Cache missed(mode:{mode} type:{cache_type})")
     return None, None, None, None
 
@@ -890,6 +1799,7 @@ class CacheData:
     mode: str = "default"
     cache_type: str = "query"
     chunk_id: str | None = None
+    scope: str | None = None
 
 
 async def save_to_cache(hashing_kv, cache_data: CacheData):
@@ -935,6 +1845,7 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
         "embedding_min": cache_data.min_val,
         "embedding_max": cache_data.max_val,
         "original_prompt": cache_data.prompt,
+        "scope": cache_data.scope,
     }
 
     logger.info(f" == LLM cache == saving: {flattened_key}")
@@ -942,6 +1853,18 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
     # Save using flattened key
     await hashing_kv.upsert({flattened_key: cache_entry})
 
+    # Keep the in-memory query embedding index in sync once it has been loaded
+    if cache_data.quantized is not None and cache_data.cache_type == "query":
+        indexes = getattr(hashing_kv, "_query_embedding_indexes", None)
+        if indexes is not None and cache_data.mode in indexes:
+            scoped = indexes[cache_data.mode]
+            scoped.setdefault(cache_data.scope, QueryEmbeddingIndex()).add(
+                flattened_key,
+                cache_data.quantized,
+                cache_data.min_val,
+                cache_data.max_val,
+            )
+
 
 def safe_unicode_decode(content):
     # Regular expression to find all Unicode escape sequences of the form \uXXXX
@@ -1066,301 +1989,39 @@ async def aexport_data(
     output_path: str,
     file_format: str = "csv",
     include_vector_data: bool = False,
+    batch_size: int = GRAPH_SCAN_BATCH_SIZE,
 ) -> None:
     """
     Asynchronously exports all entities, relations, and relationships to various formats.
 
+    The graph is read and written one page at a time, see `lightrag.export`.
+
     Args:
         chunk_entity_relation_graph: Graph storage instance for entities and relations
         entities_vdb: Vector database storage for entities
         relationships_vdb: Vector database storage for relationships
         output_path: The path to the output file (including extension).
-        file_format: Output format - "csv", "excel", "md", "txt".
+        file_format: Output format - "csv", "jsonl", "parquet", "excel", "md", "txt".
             - csv: Comma-separated values file
+            - jsonl: JSON lines, one object per row with its section in "type"
+            - parquet: Apache Parquet file with a "section" column
             - excel: Microsoft Excel file with multiple sheets
             - md: Markdown tables
             - txt: Plain text formatted output
         include_vector_data: Whether to include data from the vector database.
+        batch_size: Number of nodes or edges read and written per page.
     """
-    # Collect data
-    entities_data = []
-    relations_data = []
-    relationships_data = []
-
-    # --- Entities ---
-    all_entities = await chunk_entity_relation_graph.get_all_labels()
-    for entity_name in all_entities:
-        # Get entity information from graph
-        node_data = await chunk_entity_relation_graph.get_node(entity_name)
-        source_id = node_data.get("source_id") if node_data else None
-
-        entity_info = {
-            "graph_data": node_data,
-            "source_id": source_id,
-        }
-
-        # Optional: Get vector database information
-        if include_vector_data:
-            entity_id = compute_mdhash_id(entity_name, prefix="ent-")
-            vector_data = await entities_vdb.get_by_id(entity_id)
-            entity_info["vector_data"] = vector_data
-
-        entity_row = {
-            "entity_name": entity_name,
-            "source_id": source_id,
-            "graph_data": str(
-                entity_info["graph_data"]
-            ),  # Convert to string to ensure compatibility
-        }
-        if include_vector_data and "vector_data" in entity_info:
-            entity_row["vector_data"] = str(entity_info["vector_data"])
-        entities_data.append(entity_row)
-
-    # --- Relations ---
-    for src_entity in all_entities:
-        for tgt_entity in all_entities:
-            if src_entity == tgt_entity:
-                continue
-
-            edge_exists = await chunk_entity_relation_graph.has_edge(
-                src_entity, tgt_entity
-            )
-            if edge_exists:
-                # Get edge information from graph
-                edge_data = await chunk_entity_relation_graph.get_edge(
-                    src_entity, tgt_entity
-                )
-                source_id = edge_data.get("source_id") if edge_data else None
-
-                relation_info = {
-                    "graph_data": edge_data,
-                    "source_id": source_id,
-                }
-
-                # Optional: Get vector database information
-                if include_vector_data:
-                    rel_id = compute_mdhash_id(src_entity + tgt_entity, prefix="rel-")
-                    vector_data = await relationships_vdb.get_by_id(rel_id)
-                    relation_info["vector_data"] = vector_data
-
-                relation_row = {
-                    "src_entity": src_entity,
-                    "tgt_entity": tgt_entity,
-                    "source_id": relation_info["source_id"],
-                    "graph_data": str(relation_info["graph_data"]),  # Convert to string
-                }
-                if include_vector_data and "vector_data" in relation_info:
-                    relation_row["vector_data"] = str(relation_info["vector_data"])
-                relations_data.append(relation_row)
-
-    # --- Relationships (from VectorDB) ---
-    all_relationships = await relationships_vdb.client_storage
-    for rel in all_relationships["data"]:
-        relationships_data.append(
-            {
-                "relationship_id": rel["__id__"],
-                "data": str(rel),  # Convert to string for compatibility
-            }
-        )
-
-    # Export based on format
-    if file_format == "csv":
-        # CSV export
-        with open(output_path, "w", newline="", encoding="utf-8") as csvfile:
-            # Entities
-            if entities_data:
-                csvfile.write("# ENTITIES\n")
-                writer = csv.DictWriter(csvfile, fieldnames=entities_data[0].keys())
-                writer.writeheader()
-                writer.writerows(entities_data)
-                csvfile.write("\n\n")
-
-            # Relations
-            if relations_data:
-                csvfile.write("# RELATIONS\n")
-                writer = csv.DictWriter(csvfile, fieldnames=relations_data[0].keys())
-                writer.writeheader()
-                writer.writerows(relations_data)
-                csvfile.write("\n\n")
-
-            # Relationships
-            if relationships_data:
-                csvfile.write("# RELATIONSHIPS\n")
-                writer = csv.DictWriter(
-                    csvfile, fieldnames=relationships_data[0].keys()
-                )
-                writer.writeheader()
-                writer.writerows(relationships_data)
-
-    elif file_format == "excel":
-        # Excel export
-        import pandas as pd
-
-        entities_df = pd.DataFrame(entities_data) if entities_data else pd.DataFrame()
-        relations_df = (
-            pd.DataFrame(relations_data) if relations_data else pd.DataFrame()
-        )
-        relationships_df = (
-            pd.DataFrame(relationships_data) if relationships_data else pd.DataFrame()
-        )
-
-        with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
-            if not entities_df.empty:
-                entities_df.to_excel(writer, sheet_name="Entities", index=False)
-            if not relations_df.empty:
-                relations_df.to_excel(writer, sheet_name="Relations", index=False)
-            if not relationships_df.empty:
-                relationships_df.to_excel(
-                    writer, sheet_name="Relationships", index=False
-                )
-
-    elif file_format == "md":
-        # Markdown export
-        with open(output_path, "w", encoding="utf-8") as mdfile:
-            mdfile.write("# LightRAG Data Export\n\n")
-
-            # Entities
-            mdfile.write("## Entities\n\n")
-            if entities_data:
-                # Write header
-                mdfile.write("| " + " | ".join(entities_data[0].keys()) + " |\n")
-                mdfile.write(
-                    "| " + " | ".join(["---"] * len(entities_data[0].keys())) + " |\n"
-                )
-
-                # Write rows
-                for entity in entities_data:
-                    mdfile.write(
-                        "| " + " | ".join(str(v) for v in entity.values()) + " |\n"
-                    )
-                mdfile.write("\n\n")
-            else:
-                mdfile.write("*No entity data available*\n\n")
-
-            # Relations
-            mdfile.write("## Relations\n\n")
-            if relations_data:
-                # Write header
-                mdfile.write("| " + " | ".join(relations_data[0].keys()) + " |\n")
-                mdfile.write(
-                    "| " + " | ".join(["---"] * len(relations_data[0].keys())) + " |\n"
-                )
-
-                # Write rows
-                for relation in relations_data:
-                    mdfile.write(
-                        "| " + " | ".join(str(v) for v in relation.values()) + " |\n"
-                    )
-                mdfile.write("\n\n")
-            else:
-                mdfile.write("*No relation data available*\n\n")
-
-            # Relationships
-            mdfile.write("## Relationships\n\n")
-            if relationships_data:
-                # Write header
-                mdfile.write("| " + " | ".join(relationships_data[0].keys()) + " |\n")
-                mdfile.write(
-                    "| "
-                    + " | ".join(["---"] * len(relationships_data[0].keys()))
-                    + " |\n"
-                )
-
-                # Write rows
-                for relationship in relationships_data:
-                    mdfile.write(
-                        "| "
-                        + " | ".join(str(v) for v in relationship.values())
-                        + " |\n"
-                    )
-            else:
-                mdfile.write("*No relationship data available*\n\n")
-
-    elif file_format == "txt":
-        # Plain text export
-        with open(output_path, "w", encoding="utf-8") as txtfile:
-            txtfile.write("LIGHTRAG DATA EXPORT\n")
-            txtfile.write("=" * 80 + "\n\n")
-
-            # Entities
-            txtfile.write("ENTITIES\n")
-            txtfile.write("-" * 80 + "\n")
-            if entities_data:
-                # Create fixed width columns
-                col_widths = {
-                    k: max(len(k), max(len(str(e[k])) for e in entities_data))
-                    for k in entities_data[0]
-                }
-                header = "  ".join(k.ljust(col_widths[k]) for k in entities_data[0])
-                txtfile.write(header + "\n")
-                txtfile.write("-" * len(header) + "\n")
-
-                # Write rows
-                for entity in entities_data:
-                    row = "  ".join(
-                        str(v).ljust(col_widths[k]) for k, v in entity.items()
-                    )
-                    txtfile.write(row + "\n")
-                txtfile.write("\n\n")
-            else:
-                txtfile.write("No entity data available\n\n")
-
-            # Relations
-            txtfile.write("RELATIONS\n")
-            txtfile.write("-" * 80 + "\n")
-            if relations_data:
-                # Create fixed width columns
-                col_widths = {
-                    k: max(len(k), max(len(str(r[k])) for r in relations_data))
-                    for k in relations_data[0]
-                }
-                header = "  ".join(k.ljust(col_widths[k]) for k in relations_data[0])
-                txtfile.write(header + "\n")
-                txtfile.write("-" * len(header) + "\n")
-
-                # Write rows
-                for relation in relations_data:
-                    row = "  ".join(
-                        str(v).ljust(col_widths[k]) for k, v in relation.items()
-                    )
-                    txtfile.write(row + "\n")
-                txtfile.write("\n\n")
-            else:
-                txtfile.write("No relation data available\n\n")
-
-            # Relationships
-            txtfile.write("RELATIONSHIPS\n")
-            txtfile.write("-" * 80 + "\n")
-            if relationships_data:
-                # Create fixed width columns
-                col_widths = {
-                    k: max(len(k), max(len(str(r[k])) for r in relationships_data))
-                    for k in relationships_data[0]
-                }
-                header = "  ".join(
-                    k.ljust(col_widths[k]) for k in relationships_data[0]
-                )
-                txtfile.write(header + "\n")
-                txtfile.write("-" * len(header) + "\n")
-
-                # Write rows
-                for relationship in relationships_data:
-                    row = "  ".join(
-                        str(v).ljust(col_widths[k]) for k, v in relationship.items()
-                    )
-                    txtfile.write(row + "\n")
-            else:
-                txtfile.write("No relationship data available\n\n")
-
-    else:
-        raise ValueError(
-            f"Unsupported file format: {file_format}. "
-            f"Choose from: csv, excel, md, txt"
-        )
-    if file_format is not None:
-        print(f"Data exported to: {output_path} with format: {file_format}")
-    else:
-        print("Data displayed as table format")
+    from .export import aexport_data as stream_export_data
+
+    await stream_export_data(
+        chunk_entity_relation_graph,
+        entities_vdb,
+        relationships_vdb,
+        output_path,
+        file_format,
+        include_vector_data,
+        batch_size,
+    )
 
 
 def export_data(
@@ -1370,6 +2031,7 @@ def export_data(
     output_path: str,
     file_format: str = "csv",
     include_vector_data: bool = False,
+    batch_size: int = GRAPH_SCAN_BATCH_SIZE,
 ) -> None:
     """
     Synchronously exports all entities, relations, and relationships to various formats.
@@ -1379,12 +2041,15 @@ def export_data(
         entities_vdb: Vector database storage for entities
         relationships_vdb: Vector database storage for relationships
         output_path: The path to the output file (including extension).
-        file_format: Output format - "csv", "excel", "md", "txt".
+        file_format: Output format - "csv", "jsonl", "parquet", "excel", "md", "txt".
             - csv: Comma-separated values file
+            - jsonl: JSON lines, one object per row with its section in "type"
+            - parquet: Apache Parquet file with a "section" column
             - excel: Microsoft Excel file with multiple sheets
             - md: Markdown tables
             - txt: Plain text formatted output
         include_vector_data: Whether to include data from the vector database.
+        batch_size: Number of nodes or edges read and written per page.
     """
     try:
         loop = asyncio.get_event_loop()
@@ -1400,6 +2065,7 @@ def export_data(
             output_path,
             file_format,
             include_vector_data,
+            batch_size,
         )
     )
 
@@ -1505,48 +2171,54 @@ async def use_llm_func_with_cache(
         # Generate cache key for this LLM call
         cache_key = generate_cache_key("default", cache_type, arg_hash)
 
-        cached_return, _1, _2, _3 = await handle_cache(
-            llm_response_cache,
-            arg_hash,
-            _prompt,
-            "default",
-            cache_type=cache_type,
-        )
-        if cached_return:
-            logger.debug(f"Found cache for {arg_hash}")
-            statistic_data["llm_cache"] += 1
-
-            # Add cache key to collector if provided
-            if cache_keys_collector is not None:
-                cache_keys_collector.append(cache_key)
-
-            return cached_return
-        statistic_data["llm_call"] += 1
-
-        # Call LLM
-        kwargs = {}
-        if history_messages:
-            kwargs["history_messages"] = history_messages
-        if max_tokens is not None:
-            kwargs["max_tokens"] = max_tokens
-
-        res: str = await use_llm_func(input_text, **kwargs)
-
-        if llm_response_cache.global_config.get("enable_llm_cache_for_entity_extract"):
-            await save_to_cache(
+        async def load_or_call() -> tuple[str, bool]:
+            cached_return, _1, _2, _3 = await handle_cache(
                 llm_response_cache,
-                CacheData(
-                    args_hash=arg_hash,
-                    content=res,
-                    prompt=_prompt,
-                    cache_type=cache_type,
-                    chunk_id=chunk_id,
-                ),
+                arg_hash,
+                _prompt,
+                "default",
+                cache_type=cache_type,
             )
+            if cached_return:
+                logger.debug(f"Found cache for {arg_hash}")
+                statistic_data["llm_cache"] += 1
+                return cached_return, True
+            statistic_data["llm_call"] += 1
+
+            # Call LLM
+            kwargs = {}
+            if history_messages:
+                kwargs["history_messages"] = history_messages
+            if max_tokens is not None:
+                kwargs["max_tokens"] = max_tokens
+
+            res: str = await use_llm_func(input_text, **kwargs)
+
+            cached = False
+            if llm_response_cache.global_config.get(
+                "enable_llm_cache_for_entity_extract"
+            ):
+                await save_to_cache(
+                    llm_response_cache,
+                    CacheData(
+                        args_hash=arg_hash,
+                        content=res,
+                        prompt=_prompt,
+                        cache_type=cache_type,
+                        chunk_id=chunk_id,
+                    ),
+                )
+                cached = True
+            return res, cached
+
+        # Identical prompts in flight at the same time share one cache lookup and LLM call
+        res, cached = await llm_call_flights.do(
+            f"{id(llm_response_cache)}:{cache_key}", load_or_call
+        )
 
-            # Add cache key to collector if provided
-            if cache_keys_collector is not None:
-                cache_keys_collector.append(cache_key)
+        # Add cache key to collector if provided
+        if cached and cache_keys_collector is not None:
+            cache_keys_collector.append(cache_key)
 
         return res
 
@@ -1600,20 +2272,16 @@ def normalize_extracted_info(name: str, is_entity=False) -> str:
     # Replace Chinese dash with English dash
     name = name.replace("—", "-").replace("－", "-")
 
-    # Use regex to remove spaces between Chinese characters
-    # Regex explanation:
-    # (?<=[\u4e00-\u9fa5]): Positive lookbehind for Chinese character
-    # \s+: One or more whitespace characters
-    # (?=[\u4e00-\u9fa5]): Positive lookahead for Chinese character
-    name = re.sub(r"(?<=[\u4e00-\u9fa5])\s+(?=[\u4e00-\u9fa5])", "", name)
+    # The regex rules below only apply around Chinese characters
+    has_chinese = _CHINESE_CHAR.search(name) is not None
 
-    # Remove spaces between Chinese and English/numbers/symbols
-    name = re.sub(
-        r"(?<=[\u4e00-\u9fa5])\s+(?=[a-zA-Z0-9\(\)\[\]@#$%!&\*\-=+_])", "", name
-    )
-    name = re.sub(
-        r"(?<=[a-zA-Z0-9\(\)\[\]@#$%!&\*\-=+_])\s+(?=[\u4e00-\u9fa5])", "", name
-    )
+    if has_chinese:
+        # Remove spaces between Chinese characters
+        name = _SPACE_BETWEEN_CHINESE.sub("", name)
+
+        # Remove spaces between Chinese and English/numbers/symbols
+        name = _SPACE_AFTER_CHINESE.sub("", name)
+        name = _SPACE_BEFORE_CHINESE.sub("", name)
 
     # Remove English quotation marks from the beginning and end
     if len(name) >= 2 and name.startswith('"') and name.endswith('"'):
@@ -1625,12 +2293,29 @@ def normalize_extracted_info(name: str, is_entity=False) -> str:
         # remove Chinese quotes
         name = name.replace("“", "").replace("”", "").replace("‘", "").replace("’", "")
         # remove English queotes in and around chinese
-        name = re.sub(r"['\"]+(?=[\u4e00-\u9fa5])", "", name)
-        name = re.sub(r"(?<=[\u4e00-\u9fa5])['\"]+", "", name)
+        if has_chinese:
+            name = _QUOTES_BEFORE_CHINESE.sub("", name)
+            name = _QUOTES_AFTER_CHINESE.sub("", name)
 
     return name
 
 
+# Regex explanation:
+# (?<=[\u4e00-\u9fa5]): Positive lookbehind for Chinese character
+# \s+: One or more whitespace characters
+# (?=[\u4e00-\u9fa5]): Positive lookahead for Chinese character
+_CHINESE_CHAR = re.compile(r"[\u4e00-\u9fa5]")
+_SPACE_BETWEEN_CHINESE = re.compile(r"(?<=[\u4e00-\u9fa5])\s+(?=[\u4e00-\u9fa5])")
+_SPACE_AFTER_CHINESE = re.compile(
+    r"(?<=[\u4e00-\u9fa5])\s+(?=[a-zA-Z0-9\(\)\[\]@#$%!&\*\-=+_])"
+)
+_SPACE_BEFORE_CHINESE = re.compile(
+    r"(?<=[a-zA-Z0-9\(\)\[\]@#$%!&\*\-=+_])\s+(?=[\u4e00-\u9fa5])"
+)
+_QUOTES_BEFORE_CHINESE = re.compile(r"['\"]+(?=[\u4e00-\u9fa5])")
+_QUOTES_AFTER_CHINESE = re.compile(r"(?<=[\u4e00-\u9fa5])['\"]+")
+
+
 def clean_text(text: str) -> str:
     """Clean text by removing null bytes (0x00) and whitespace
 
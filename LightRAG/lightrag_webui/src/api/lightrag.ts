@@ -141,6 +141,20 @@ export type DocsStatusesResponse = {
   statuses: Record<DocStatus, DocStatusResponse[]>
 }
 
+export type DocsPaginatedRequest = {
+  status_filter?: DocStatus
+  page_size?: number
+  cursor?: string | null
+  sort_field?: 'created_at' | 'updated_at' | 'id' | 'file_path'
+  sort_direction?: 'asc' | 'desc'
+}
+
+export type DocsPaginatedResponse = {
+  documents: DocStatusResponse[]
+  next_cursor: string | null
+  status_counts: Record<DocStatus, number>
+}
+
 export type AuthStatusResponse = {
   auth_configured: boolean
   access_token?: string
@@ -240,6 +254,65 @@ export const queryGraphs = async (
   return response.data
 }
 
+/**
+ * Stream the subgraph of queryGraphs in parts, for progressive rendering.
+ * Each part holds new nodes and the edges between nodes received so far;
+ * the is_truncated flag of the last part applies to the whole subgraph.
+ */
+export const queryGraphsStream = async (
+  label: string,
+  maxDepth: number,
+  maxNodes: number,
+  onChunk: (chunk: LightragGraphType) => void
+): Promise<void> => {
+  const apiKey = useSettingsStore.getState().apiKey;
+  const token = localStorage.getItem('LIGHTRAG-API-TOKEN');
+  const headers: HeadersInit = {
+    'Accept': 'application/x-ndjson',
+  };
+  if (token) {
+    headers['Authorization'] = `Bearer ${token}`;
+  }
+  if (apiKey) {
+    headers['X-API-Key'] = apiKey;
+  }
+
+  const url = `${backendBaseUrl}/graphs/stream?label=${encodeURIComponent(label)}&max_depth=${maxDepth}&max_nodes=${maxNodes}`
+  const response = await fetch(url, { headers })
+  if (!response.ok) {
+    if (response.status === 401) {
+      navigationService.navigateToLogin();
+      throw new Error('Authentication required');
+    }
+    throw new Error(`${response.status} ${response.statusText}\n${await response.text()}\n${url}`)
+  }
+  if (!response.body) {
+    throw new Error('Response body is null');
+  }
+
+  const handleLine = (line: string) => {
+    if (!line.trim()) return
+    const parsed = JSON.parse(line)
+    if (parsed.error) {
+      throw new Error(parsed.error)
+    }
+    onChunk(parsed)
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop() || '';
+    lines.forEach(handleLine)
+  }
+  handleLine(buffer)
+}
+
 export const getGraphLabels = async (): Promise<string[]> => {
   const response = await axiosInstance.get('/graph/label/list')
   return response.data
@@ -264,6 +337,22 @@ export const getDocuments = async (): Promise<DocsStatusesResponse> => {
   return response.data
 }
 
+export const getDocumentsPaginated = async (
+  request: DocsPaginatedRequest = {}
+): Promise<DocsPaginatedResponse> => {
+  const response = await axiosInstance.get('/documents/paginated', {
+    params: Object.fromEntries(
+      Object.entries(request).filter(([, value]) => value !== undefined && value !== null)
+    )
+  })
+  return response.data
+}
+
+export const getDocumentStatusCounts = async (): Promise<{ status_counts: Record<DocStatus, number> }> => {
+  const response = await axiosInstance.get('/documents/status_counts')
+  return response.data
+}
+
 export const scanNewDocuments = async (): Promise<{ status: string }> => {
   const response = await axiosInstance.post('/documents/scan')
   return response.data
@@ -19,16 +19,19 @@ import ClearDocumentsDialog from '@/components/documents/ClearDocumentsDialog'
 import DeleteDocumentsDialog from '@/components/documents/DeleteDocumentsDialog'
 import DeselectDocumentsDialog from '@/components/documents/DeselectDocumentsDialog'
 
-import { getDocuments, scanNewDocuments, DocsStatusesResponse, DocStatus, DocStatusResponse } from '@/api/lightrag'
+import { getDocumentsPaginated, scanNewDocuments, DocStatus, DocStatusResponse } from '@/api/lightrag'
 import { errorMessage } from '@/lib/utils'
 import { toast } from 'sonner'
 import { useBackendState } from '@/stores/state'
 
-import { RefreshCwIcon, ActivityIcon, ArrowUpIcon, ArrowDownIcon, FilterIcon } from 'lucide-react'
+import { RefreshCwIcon, ActivityIcon, ArrowUpIcon, ArrowDownIcon, FilterIcon, ChevronLeftIcon, ChevronRightIcon } from 'lucide-react'
 import PipelineStatusDialog from '@/components/documents/PipelineStatusDialog'
 
 type StatusFilter = DocStatus | 'all';
 
+// Number of documents fetched per page of the document list
+const PAGE_SIZE = 100;
+
 
 const getDisplayFileName = (doc: DocStatusResponse, maxLength: number = 20): string => {
   // Check if file_path exists and is a non-empty string
@@ -164,7 +167,12 @@ export default function DocumentManager() {
   const { t, i18n } = useTranslation()
   const health = useBackendState.use.health()
   const pipelineBusy = useBackendState.use.pipelineBusy()
-  const [docs, setDocs] = useState<DocsStatusesResponse | null>(null)
+  // Documents of the current page, in the order returned by the server
+  const [docs, setDocs] = useState<DocStatusResponse[] | null>(null)
+  const [statusCounts, setStatusCounts] = useState<Partial<Record<DocStatus, number>>>({})
+  // Cursors of the pages visited so far, the last one is the current page
+  const [pageCursors, setPageCursors] = useState<(string | null)[]>([null])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const currentTab = useSettingsStore.use.currentTab()
   const showFileName = useSettingsStore.use.showFileName()
   const setShowFileName = useSettingsStore.use.setShowFileName()
@@ -208,87 +216,22 @@ export default function DocumentManager() {
     }
   }
 
-  // Sort documents based on current sort field and direction
-  const sortDocuments = useCallback((documents: DocStatusResponse[]) => {
-    return [...documents].sort((a, b) => {
-      let valueA, valueB;
-
-      // Special handling for ID field based on showFileName setting
-      if (sortField === 'id' && showFileName) {
-        valueA = getDisplayFileName(a);
-        valueB = getDisplayFileName(b);
-      } else if (sortField === 'id') {
-        valueA = a.id;
-        valueB = b.id;
-      } else {
-        // Date fields
-        valueA = new Date(a[sortField]).getTime();
-        valueB = new Date(b[sortField]).getTime();
-      }
-
-      // Apply sort direction
-      const sortMultiplier = sortDirection === 'asc' ? 1 : -1;
-
-      // Compare values
-      if (typeof valueA === 'string' && typeof valueB === 'string') {
-        return sortMultiplier * valueA.localeCompare(valueB);
-      } else {
-        return sortMultiplier * (valueA > valueB ? 1 : valueA < valueB ? -1 : 0);
-      }
-    });
-  }, [sortField, sortDirection, showFileName]);
-
-  // Define a new type that includes status information
-  type DocStatusWithStatus = DocStatusResponse & { status: DocStatus };
-
-  const filteredAndSortedDocs = useMemo(() => {
-    if (!docs) return null;
-
-    // Create a flat array of documents with status information
-    const allDocuments: DocStatusWithStatus[] = [];
-
-    if (statusFilter === 'all') {
-      // When filter is 'all', include documents from all statuses
-      Object.entries(docs.statuses).forEach(([status, documents]) => {
-        documents.forEach(doc => {
-          allDocuments.push({
-            ...doc,
-            status: status as DocStatus
-          });
-        });
-      });
-    } else {
-      // When filter is specific status, only include documents from that status
-      const documents = docs.statuses[statusFilter] || [];
-      documents.forEach(doc => {
-        allDocuments.push({
-          ...doc,
-          status: statusFilter
-        });
-      });
-    }
-
-    // Sort all documents together if sort field and direction are specified
-    if (sortField && sortDirection) {
-      return sortDocuments(allDocuments);
-    }
-
-    return allDocuments;
-  }, [docs, sortField, sortDirection, statusFilter, sortDocuments]);
+  // Documents are sorted and filtered by the server, a new order starts at the first page
+  useEffect(() => {
+    setPageCursors(prev => (prev.length === 1 && prev[0] === null ? prev : [null]))
+  }, [sortField, sortDirection, statusFilter, showFileName])
 
   // Calculate document counts for each status
   const documentCounts = useMemo(() => {
-    if (!docs) return { all: 0 } as Record<string, number>;
-
     const counts: Record<string, number> = { all: 0 };
 
-    Object.entries(docs.statuses).forEach(([status, documents]) => {
-      counts[status as DocStatus] = documents.length;
-      counts.all += documents.length;
+    Object.entries(statusCounts).forEach(([status, count]) => {
+      counts[status as DocStatus] = count;
+      counts.all += count;
     });
 
     return counts;
-  }, [docs]);
+  }, [statusCounts]);
 
   // Store previous status counts
   const prevStatusCounts = useRef({
@@ -378,27 +321,26 @@ export default function DocumentManager() {
       // Check if component is still mounted before starting the request
       if (!isMountedRef.current) return;
 
-      const docs = await getDocuments();
+      const page = await getDocumentsPaginated({
+        status_filter: statusFilter === 'all' ? undefined : statusFilter,
+        page_size: PAGE_SIZE,
+        cursor: pageCursors[pageCursors.length - 1],
+        // The ID column shows file names when they are enabled
+        sort_field: sortField === 'id' && showFileName ? 'file_path' : sortField,
+        sort_direction: sortDirection
+      });
 
       // Check again if component is still mounted after the request completes
       if (!isMountedRef.current) return;
 
       // Only update state if component is still mounted
       if (isMountedRef.current) {
-        // Update docs state
-        if (docs && docs.statuses) {
-          const numDocuments = Object.values(docs.statuses).reduce(
-            (acc, status) => acc + status.length,
-            0
-          )
-          if (numDocuments > 0) {
-            setDocs(docs)
-          } else {
-            setDocs(null)
-          }
-        } else {
-          setDocs(null)
-        }
+        const counts = page.status_counts
+        const numDocuments = Object.values(counts).reduce((acc, count) => acc + count, 0)
+        setStatusCounts(counts)
+        setNextCursor(page.next_cursor)
+        // Documents in other statuses are counted, even if none match the filter
+        setDocs(numDocuments > 0 ? page.documents : null)
       }
     } catch (err) {
       // Only show error if component is still mounted
@@ -406,7 +348,17 @@ export default function DocumentManager() {
         toast.error(t('documentPanel.documentManager.errors.loadFailed', { error: errorMessage(err) }))
       }
     }
-  }, [setDocs, t])
+  }, [statusFilter, pageCursors, sortField, sortDirection, showFileName, t])
+
+  const goToNextPage = useCallback(() => {
+    if (nextCursor) {
+      setPageCursors(prev => [...prev, nextCursor])
+    }
+  }, [nextCursor])
+
+  const goToPreviousPage = useCallback(() => {
+    setPageCursors(prev => prev.length > 1 ? prev.slice(0, -1) : prev)
+  }, [])
 
   // Fetch documents when the tab becomes visible
   useEffect(() => {
@@ -465,10 +417,10 @@ export default function DocumentManager() {
 
     // Get new status counts
     const newStatusCounts = {
-      processed: docs?.statuses?.processed?.length || 0,
-      processing: docs?.statuses?.processing?.length || 0,
-      pending: docs?.statuses?.pending?.length || 0,
-      failed: docs?.statuses?.failed?.length || 0
+      processed: statusCounts.processed || 0,
+      processing: statusCounts.processing || 0,
+      pending: statusCounts.pending || 0,
+      failed: statusCounts.failed || 0
     }
 
     // Check if any status count has changed
@@ -483,7 +435,7 @@ export default function DocumentManager() {
 
     // Update previous status counts
     prevStatusCounts.current = newStatusCounts
-  }, [docs]);
+  }, [docs, statusCounts]);
 
   // Handle documents deleted callback
   const handleDocumentsDeleted = useCallback(async () => {
@@ -491,11 +443,6 @@ export default function DocumentManager() {
     await fetchDocuments()
   }, [fetchDocuments])
 
-  // Add dependency on sort state to re-render when sort changes
-  useEffect(() => {
-    // This effect ensures the component re-renders when sort state changes
-  }, [sortField, sortDirection]);
-
   return (
     <Card className="!rounded-none !overflow-hidden flex flex-col h-full min-h-0">
       <CardHeader className="py-2 px-6">
@@ -700,7 +647,7 @@ export default function DocumentManager() {
                       </TableRow>
                     </TableHeader>
                     <TableBody className="text-sm overflow-auto">
-                      {filteredAndSortedDocs && filteredAndSortedDocs.map((doc) => (
+                      {docs.map((doc) => (
                         <TableRow key={doc.id}>
                           <TableCell className="truncate font-mono overflow-visible max-w-[250px]">
                             {showFileName ? (
@@ -779,6 +726,29 @@ export default function DocumentManager() {
               </div>
             )}
           </CardContent>
+          {docs && (pageCursors.length > 1 || nextCursor) && (
+            <div className="flex-none flex items-center justify-end gap-2 px-4 py-2">
+              <Button
+                variant="outline"
+                size="sm"
+                onClick={goToPreviousPage}
+                disabled={pageCursors.length <= 1}
+              >
+                <ChevronLeftIcon /> {t('documentPanel.documentManager.pagination.previous', 'Previous')}
+              </Button>
+              <span className="text-sm text-gray-500">
+                {t('documentPanel.documentManager.pagination.page', { page: pageCursors.length, defaultValue: 'Page {{page}}' })}
+              </span>
+              <Button
+                variant="outline"
+                size="sm"
+                onClick={goToNextPage}
+                disabled={!nextCursor}
+              >
+                {t('documentPanel.documentManager.pagination.next', 'Next')} <ChevronRightIcon />
+              </Button>
+            </div>
+          )}
         </Card>
       </CardContent>
     </Card>
@@ -0,0 +1,75 @@
+import asyncio
+import random
+import time
+
+from lightrag.utils import AdaptiveConcurrencyLimit, priority_limit_async_func_call
+
+
+async def _simulate(controller: AdaptiveConcurrencyLimit, calls: int, latency) -> None:
+    rng = random.Random(0)
+    for _ in range(calls):
+        await controller.record(
+            10, time.monotonic(), latency(rng, controller.limit), saturated=True
+        )
+
+
+def test_limit_reaches_max_under_load_independent_jitter():
+    controller = AdaptiveConcurrencyLimit(16)
+    asyncio.run(_simulate(controller, 3000, lambda rng, limit: rng.uniform(0.02, 0.1)))
+    assert controller.limit == 16
+    assert controller.decreases == 0
+
+
+def test_limit_shrinks_when_latency_grows_with_concurrency():
+    controller = AdaptiveConcurrencyLimit(64, initial_limit=4)
+    # The server handles 8 calls at a time, the others queue behind them
+    asyncio.run(
+        _simulate(
+            controller,
+            3000,
+            lambda rng, limit: rng.uniform(0.02, 0.04) * max(1.0, limit / 8),
+        )
+    )
+    assert controller.decreases > 0
+    assert controller.limit < 20
+
+
+def test_limit_recovers_after_load_independent_latency_step():
+    controller = AdaptiveConcurrencyLimit(16)
+    # Calls get three times slower, e.g. longer prompts, at any concurrency
+    asyncio.run(_simulate(controller, 1000, lambda rng, limit: rng.uniform(0.02, 0.1)))
+    asyncio.run(_simulate(controller, 1000, lambda rng, limit: rng.uniform(0.06, 0.3)))
+    assert controller.limit == 16
+
+
+def test_overload_error_halves_limit():
+    controller = AdaptiveConcurrencyLimit(16, initial_limit=16)
+    error = TimeoutError()
+
+    async def main():
+        started = time.monotonic()
+        await controller.record(10, started, 0.1, True, error)
+        # A call started before the decrease does not shrink the limit again
+        await controller.record(10, started, 0.1, True, error)
+
+    asyncio.run(main())
+    assert controller.limit == 8
+    assert controller.decreases == 1
+    assert controller.overloads == 2
+
+
+def test_limiter_keeps_max_concurrency_with_jittery_calls():
+    rng = random.Random(0)
+
+    @priority_limit_async_func_call(8, adaptive=True)
+    async def call():
+        await asyncio.sleep(rng.uniform(0.002, 0.01))
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(800)))
+        metrics = call.metrics()
+        await call.shutdown()
+        return metrics
+
+    metrics = asyncio.run(main())
+    assert metrics["limit"] == 8
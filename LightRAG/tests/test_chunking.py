@@ -0,0 +1,115 @@
+from typing import Any
+
+import pytest
+
+from lightrag.operate import chunking_by_token_size, iter_chunks_by_token_size
+from lightrag.utils import Tokenizer
+
+
+class CharTokenizer:
+    def __init__(self):
+        self.encoded: list[str] = []
+
+    def encode(self, content: str) -> list[int]:
+        self.encoded.append(content)
+        return [ord(char) for char in content]
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(chr(token) for token in tokens)
+
+
+class OffsetCharTokenizer(CharTokenizer):
+    def decode_with_offsets(self, tokens: list[int]) -> tuple[str, list[int]]:
+        return self.decode(tokens), list(range(len(tokens)))
+
+
+def reference_chunks(
+    tokenizer: Tokenizer,
+    content: str,
+    split_by_character: str | None,
+    split_by_character_only: bool,
+    overlap_token_size: int,
+    max_token_size: int,
+) -> list[dict[str, Any]]:
+    """Chunking as done before the document was tokenized only once"""
+    step = max_token_size - overlap_token_size
+    chunks = []
+    if split_by_character:
+        for segment in content.split(split_by_character):
+            tokens = tokenizer.encode(segment)
+            if split_by_character_only or len(tokens) <= max_token_size:
+                chunks.append((len(tokens), segment))
+                continue
+            for start in range(0, len(tokens), step):
+                chunks.append(
+                    (
+                        min(max_token_size, len(tokens) - start),
+                        tokenizer.decode(tokens[start : start + max_token_size]),
+                    )
+                )
+    else:
+        tokens = tokenizer.encode(content)
+        for start in range(0, len(tokens), step):
+            chunks.append(
+                (
+                    min(max_token_size, len(tokens) - start),
+                    tokenizer.decode(tokens[start : start + max_token_size]),
+                )
+            )
+    return [
+        {"tokens": size, "content": chunk.strip(), "chunk_order_index": index}
+        for index, (size, chunk) in enumerate(chunks)
+    ]
+
+
+CONTENT = (
+    "\n\nShort intro.\n\n"
+    + "A long paragraph that has to be cut into several windows. " * 3
+    + "\n\n\n\nTail paragraph with trailing spaces.   \n\n"
+)
+
+
+@pytest.mark.parametrize("tokenizer_cls", [CharTokenizer, OffsetCharTokenizer])
+@pytest.mark.parametrize(
+    "split_by_character, split_by_character_only",
+    [(None, False), ("\n\n", False), ("\n\n", True), ("paragraph", False)],
+)
+@pytest.mark.parametrize("overlap_token_size, max_token_size", [(0, 40), (10, 40)])
+def test_chunks_match_the_reference(
+    tokenizer_cls,
+    split_by_character,
+    split_by_character_only,
+    overlap_token_size,
+    max_token_size,
+):
+    tokenizer = Tokenizer("chars", tokenizer_cls())
+    args = (
+        CONTENT,
+        split_by_character,
+        split_by_character_only,
+        overlap_token_size,
+        max_token_size,
+    )
+    expected = reference_chunks(tokenizer, *args)
+    chunks = list(iter_chunks_by_token_size(tokenizer, *args))
+    assert chunks == expected
+    assert chunking_by_token_size(tokenizer, *args) == expected
+
+
+def test_overlapping_windows_share_tokens():
+    tokenizer = Tokenizer("chars", OffsetCharTokenizer())
+    content = "".join(chr(ord("a") + i % 26) for i in range(100))
+    chunks = chunking_by_token_size(
+        tokenizer, content, overlap_token_size=10, max_token_size=40
+    )
+    assert [chunk["tokens"] for chunk in chunks] == [40, 40, 40, 10]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous["content"][-10:] == chunk["content"][:10]
+
+
+def test_segments_are_encoded_once_without_offsets():
+    chars = CharTokenizer()
+    tokenizer = Tokenizer("chars", chars)
+    list(iter_chunks_by_token_size(tokenizer, CONTENT, "\n\n", max_token_size=40))
+    # Each segment is encoded on its own, the whole document never is
+    assert chars.encoded == CONTENT.split("\n\n")
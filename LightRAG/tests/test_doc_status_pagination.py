@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from lightrag.base import DocStatus, DocStatusStorage
+from lightrag.kg.json_doc_status_impl import JsonDocStatusStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    initialize_share_data()
+    yield
+    finalize_share_data()
+
+
+def make_json_storage(working_dir) -> DocStatusStorage:
+    return JsonDocStatusStorage(
+        namespace="doc_status",
+        workspace="",
+        global_config={"working_dir": str(working_dir)},
+        embedding_func=None,
+    )
+
+
+def make_redis_storage(working_dir) -> DocStatusStorage:
+    fakeredis = pytest.importorskip("fakeredis")
+    from lightrag.kg.redis_impl import RedisDocStatusStorage
+
+    storage = RedisDocStatusStorage(
+        namespace="doc_status",
+        workspace="",
+        global_config={"working_dir": str(working_dir)},
+        embedding_func=None,
+    )
+    storage._redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return storage
+
+
+def doc(i: int, status: DocStatus) -> dict:
+    return {
+        "status": status.value,
+        "content": f"content {i}",
+        "content_summary": f"summary {i}",
+        "content_length": 9,
+        # Pairs of documents share a timestamp, the id breaks the tie
+        "created_at": f"2025-01-01T00:00:{i // 2:02d}",
+        "updated_at": f"2025-01-02T00:00:{i // 2:02d}",
+        "file_path": f"file{i % 7}.txt",
+    }
+
+
+async def list_all(storage: DocStatusStorage, page_size: int, **kwargs) -> list[str]:
+    doc_ids = []
+    cursor = None
+    while True:
+        page = await storage.get_docs_paginated(
+            page_size=page_size, cursor=cursor, **kwargs
+        )
+        assert len(page.documents) <= page_size
+        doc_ids.extend(page.documents)
+        cursor = page.next_cursor
+        if cursor is None:
+            return doc_ids
+
+
+@pytest.mark.parametrize("make_storage", [make_json_storage, make_redis_storage])
+def test_cursor_pages_follow_sort_order(tmp_path, make_storage):
+    docs = {
+        f"doc-{i:02d}": doc(i, DocStatus.PROCESSED if i % 3 else DocStatus.FAILED)
+        for i in range(25)
+    }
+
+    def expected(sort_field: str, descending: bool, status=None) -> list[str]:
+        keys = sorted(
+            (data[sort_field] if sort_field != "id" else doc_id, doc_id)
+            for doc_id, data in docs.items()
+            if status is None or data["status"] == status.value
+        )
+        if descending:
+            keys.reverse()
+        return [doc_id for _, doc_id in keys]
+
+    async def main():
+        storage = make_storage(tmp_path)
+        await storage.initialize()
+        await storage.upsert({doc_id: dict(data) for doc_id, data in docs.items()})
+        for sort_field in ("created_at", "file_path", "id"):
+            for direction in ("asc", "desc"):
+                listed = await list_all(
+                    storage, 4, sort_field=sort_field, sort_direction=direction
+                )
+                assert listed == expected(sort_field, direction == "desc")
+        listed = await list_all(
+            storage, 3, status_filter=DocStatus.FAILED, sort_field="updated_at"
+        )
+        assert listed == expected("updated_at", True, DocStatus.FAILED)
+
+        # A status change moves the document between the status listings
+        changed = dict(docs["doc-00"], status=DocStatus.PROCESSED.value)
+        changed["updated_at"] = "2025-01-03T00:00:00"
+        await storage.upsert({"doc-00": changed})
+        docs["doc-00"] = changed
+        await storage.delete(["doc-03"])
+        del docs["doc-03"]
+        listed = await list_all(storage, 3, status_filter=DocStatus.FAILED)
+        assert listed == expected("updated_at", True, DocStatus.FAILED)
+        listed = await list_all(storage, 5)
+        assert listed == expected("updated_at", True)
+        assert listed[0] == "doc-00"
+
+        first = await storage.get_docs_paginated(page_size=1, include_content=True)
+        assert first.documents["doc-00"].content == "content 0"
+
+    asyncio.run(main())
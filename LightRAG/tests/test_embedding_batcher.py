@@ -0,0 +1,75 @@
+import asyncio
+
+import numpy as np
+
+from lightrag.constants import DEFAULT_EMBEDDING_BATCH_MAX_TOKENS
+from lightrag.embedding_batcher import EmbeddingBatcher, get_embedding_batcher
+from lightrag.utils import EmbeddingFunc, Tokenizer
+
+
+class CharTokenizer:
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, content: str) -> list[int]:
+        self.encoded += 1
+        return [ord(char) for char in content]
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(chr(token) for token in tokens)
+
+
+def recording_embed(batches: list[list[str]]):
+    async def embed(texts: list[str]) -> np.ndarray:
+        batches.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    return embed
+
+
+def test_texts_are_packed_by_token_budget():
+    batches = []
+    embed = recording_embed(batches)
+    first_texts = ["a" * n for n in (2, 1)]
+    second_texts = ["a" * n for n in (6, 12, 1, 4, 3)]
+
+    async def main():
+        batcher = EmbeddingBatcher(
+            embed, len, max_batch_size=3, max_batch_tokens=10, window=0.01
+        )
+        # The first caller waits for the window, the second fills it and both
+        # callers' texts are packed together
+        return await asyncio.gather(
+            batcher.embed(first_texts), batcher.embed(second_texts)
+        )
+
+    first, second = asyncio.run(main())
+    # Vectors come back in input order for each caller
+    assert [int(v[0]) for v in first] == [2, 1]
+    assert [int(v[0]) for v in second] == [6, 12, 1, 4, 3]
+
+    sizes = [[len(text) for text in batch] for batch in batches]
+    # Sorted by length, closed by the text count or the token budget, and a
+    # text over the budget is embedded on its own
+    assert sizes == [[1, 1, 2], [3, 4], [6], [12]]
+
+
+def test_shared_batcher_uses_token_count_cache_and_own_budget():
+    batches = []
+    tokenizer = Tokenizer("chars", CharTokenizer())
+    embedding_func = EmbeddingFunc(
+        embedding_dim=2, max_token_size=4, func=recording_embed(batches)
+    )
+
+    async def main():
+        batcher = get_embedding_batcher(embedding_func, {"tokenizer": tokenizer})
+        await batcher.embed(["hello world"] * 3)
+        await batcher.embed(["hello world"] * 3)
+        return batcher
+
+    batcher = asyncio.run(main())
+    # The per-text max_token_size of the embedding function is not the budget
+    assert batcher.max_batch_tokens == DEFAULT_EMBEDDING_BATCH_MAX_TOKENS
+    assert [len(batch) for batch in batches] == [3, 3]
+    # Repeated texts are counted once
+    assert tokenizer.tokenizer.encoded == 1
@@ -0,0 +1,70 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from lightrag.kg.json_kv_impl import JsonKVStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+from lightrag.utils import EmbeddingFunc, embedding_cache_wrapper
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    initialize_share_data()
+    yield
+    finalize_share_data()
+
+
+def make_cache(working_dir) -> JsonKVStorage:
+    return JsonKVStorage(
+        namespace="embedding_cache",
+        workspace="",
+        global_config={"working_dir": str(working_dir)},
+        embedding_func=None,
+    )
+
+
+def model(value: float, calls: list[str], model_name: str | None) -> EmbeddingFunc:
+    async def embed(texts: list[str]) -> np.ndarray:
+        calls.extend(texts)
+        return np.full((len(texts), 2), value, dtype=np.float32)
+
+    return EmbeddingFunc(
+        embedding_dim=2, max_token_size=8192, func=embed, model_name=model_name
+    )
+
+
+def test_models_with_the_same_dimension_do_not_share_vectors(tmp_path):
+    calls = []
+
+    async def main():
+        cache = make_cache(tmp_path)
+        await cache.initialize()
+        first = embedding_cache_wrapper(cache)(model(1.0, calls, "model-a"))
+        second = embedding_cache_wrapper(cache)(model(2.0, calls, "model-b"))
+        await first(["text"])
+        cached = await first(["text"])
+        switched = await second(["text"])
+        return cached, switched
+
+    cached, switched = asyncio.run(main())
+    assert calls == ["text", "text"]
+    assert cached.tolist() == [[1.0, 1.0]]
+    assert switched.tolist() == [[2.0, 2.0]]
+
+
+def test_cache_is_disabled_without_a_model_name(tmp_path):
+    calls = []
+
+    async def main():
+        cache = make_cache(tmp_path)
+        await cache.initialize()
+        func = model(1.0, calls, None)
+        wrapped = embedding_cache_wrapper(cache)(func)
+        assert wrapped is func
+        await wrapped(["text"])
+        await wrapped(["text"])
+        return await cache.get_all()
+
+    assert asyncio.run(main()) == {}
+    assert calls == ["text", "text"]
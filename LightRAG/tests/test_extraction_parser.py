@@ -0,0 +1,159 @@
+import json
+import re
+from collections import defaultdict
+
+import pytest
+
+from lightrag.extraction_parser import (
+    get_extraction_parser,
+    json_lines_examples,
+    parse_entity_record,
+    parse_relationship_record,
+)
+from lightrag.prompt import PROMPTS
+from lightrag.utils import split_string_by_multi_markers
+
+TUPLE = PROMPTS["DEFAULT_TUPLE_DELIMITER"]
+RECORD = PROMPTS["DEFAULT_RECORD_DELIMITER"]
+COMPLETION = PROMPTS["DEFAULT_COMPLETION_DELIMITER"]
+
+EXAMPLES = [
+    example.format(
+        tuple_delimiter=TUPLE,
+        record_delimiter=RECORD,
+        completion_delimiter=COMPLETION,
+        entity_types="person, organization, location, event",
+        language="English",
+    )
+    for example in PROMPTS["entity_extraction_examples"]
+]
+
+
+def output_of(example: str) -> str:
+    return example.partition("Output:\n")[2]
+
+
+def reference_parse(text: str, chunk_key: str, file_path: str):
+    """Parsing as done before the extraction parser, one regex split per record"""
+    maybe_nodes = defaultdict(list)
+    maybe_edges = defaultdict(list)
+    for record in split_string_by_multi_markers(text, [RECORD, COMPLETION]):
+        record = re.search(r"\((.*)\)", record)
+        if record is None:
+            continue
+        record_attributes = split_string_by_multi_markers(record.group(1), [TUPLE])
+        entity = parse_entity_record(record_attributes, chunk_key, file_path)
+        if entity is not None:
+            maybe_nodes[entity["entity_name"]].append(entity)
+            continue
+        relation = parse_relationship_record(record_attributes, chunk_key, file_path)
+        if relation is not None:
+            maybe_edges[(relation["src_id"], relation["tgt_id"])].append(relation)
+    return maybe_nodes, maybe_edges
+
+
+@pytest.mark.parametrize("example", EXAMPLES)
+def test_examples_parse_as_before(example):
+    output = output_of(example)
+    nodes, edges = get_extraction_parser().parse(output, "chunk-1", "doc.txt")
+    assert nodes and edges
+    assert (nodes, edges) == reference_parse(output, "chunk-1", "doc.txt")
+
+
+@pytest.mark.parametrize("index", range(len(EXAMPLES)))
+def test_json_lines_examples_parse_like_the_delimited_ones(index):
+    parser = get_extraction_parser()
+    converted = output_of(json_lines_examples(EXAMPLES)[index])
+    assert parser.detect_format(converted) == "jsonl"
+    assert parser.parse(converted, "chunk-1") == parser.parse(
+        output_of(EXAMPLES[index]), "chunk-1"
+    )
+
+
+def test_json_records_skip_invalid_and_unknown_lines():
+    lines = [
+        json.dumps(
+            {
+                "type": "entity",
+                "name": "Alice",
+                "entity_type": "person",
+                "description": "An engineer",
+            }
+        ),
+        "Some prose the model added",
+        '{"type": "entity", "name": "Broken"',
+        "[1, 2, 3]",
+        json.dumps({"type": "comment", "text": "ignored"}),
+        json.dumps(
+            {"type": "entity", "name": "Nobody", "entity_type": None, "description": ""}
+        ),
+        json.dumps(
+            {
+                "type": "Relationship",
+                "source": "Alice",
+                "target": "Bob",
+                "description": "Alice works with Bob",
+                "keywords": "colleagues",
+                "strength": 7,
+            }
+        ),
+        json.dumps({"type": "content_keywords", "keywords": "work"}),
+        COMPLETION,
+    ]
+    parser = get_extraction_parser()
+    text = "\n".join(lines)
+    assert list(parser.records(text)) == [
+        ['"entity"', "Alice", "person", "An engineer"],
+        ['"entity"', "Nobody", "", ""],
+        [
+            '"relationship"',
+            "Alice",
+            "Bob",
+            "Alice works with Bob",
+            "colleagues",
+            "7",
+        ],
+        ['"content_keywords"', "work"],
+    ]
+
+    nodes, edges = parser.parse(text, "chunk-1")
+    assert list(nodes) == ["Alice"]
+    assert nodes["Alice"][0]["entity_type"] == "person"
+    assert list(edges) == [("Alice", "Bob")]
+    assert edges[("Alice", "Bob")][0]["weight"] == 7.0
+
+
+def test_delimited_records_skip_text_outside_records():
+    text = (
+        "Here are the entities:\n"
+        f'("entity"{TUPLE}"Alice"{TUPLE}"person"{TUPLE}"An engineer"){RECORD}\n'
+        f"not a record{RECORD}\n"
+        f'("relationship"{TUPLE}"Alice"{TUPLE}"Bob"{TUPLE}"Works with"'
+        f'{TUPLE}"colleagues"{TUPLE}oops){RECORD}\n'
+        # A missing completion delimiter still ends the last record
+        f'("entity"{TUPLE}"Bob"{TUPLE}"person"{TUPLE}"A manager")'
+    )
+    nodes, edges = get_extraction_parser().parse(text, "chunk-1")
+    assert (nodes, edges) == reference_parse(text, "chunk-1", "unknown_source")
+    assert list(nodes) == ["Alice", "Bob"]
+    # A strength that is not a number falls back to the default weight
+    assert edges[("Alice", "Bob")][0]["weight"] == 1.0
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (f'("entity"{TUPLE}"Alice"{TUPLE}"person"{TUPLE}"x")', "delimited"),
+        ('{"type": "entity", "name": "Alice"}', "jsonl"),
+        ('Output:\n  {"type": "entity", "name": "Alice"}', "jsonl"),
+        (f'Output:\n("entity"{TUPLE}"{{x}}"{TUPLE}"person"{TUPLE}"x")', "delimited"),
+        ("no records at all", "delimited"),
+        ("", "delimited"),
+    ],
+)
+def test_detect_format(text, expected):
+    assert get_extraction_parser().detect_format(text) == expected
+
+
+def test_empty_output_has_no_records():
+    assert get_extraction_parser().parse("", "chunk-1") == ({}, {})
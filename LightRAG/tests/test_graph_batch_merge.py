@@ -0,0 +1,213 @@
+import asyncio
+
+import pytest
+
+from lightrag.base import BaseGraphStorage
+from lightrag.constants import GRAPH_FIELD_SEP
+from lightrag.kg.networkx_impl import NetworkXStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+from lightrag.operate import _merge_edge_data, _merge_node_data, merge_nodes_and_edges
+
+GLOBAL_CONFIG = {"force_llm_summary_on_merge": 100, "llm_model_max_async": 4}
+
+
+class SerialUpsertNetworkXStorage(NetworkXStorage):
+    """Batch upserts through the one-by-one default of BaseGraphStorage"""
+
+    upsert_nodes_batch = BaseGraphStorage.upsert_nodes_batch
+    upsert_edges_batch = BaseGraphStorage.upsert_edges_batch
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    initialize_share_data()
+    yield
+    finalize_share_data()
+
+
+def entity(name: str, entity_type: str, description: str, chunk: str) -> dict:
+    return {
+        "entity_name": name,
+        "entity_type": entity_type,
+        "description": description,
+        "source_id": chunk,
+        "file_path": "doc.txt",
+    }
+
+
+def relation(src: str, tgt: str, description: str, chunk: str) -> dict:
+    return {
+        "src_id": src,
+        "tgt_id": tgt,
+        "weight": 1.0,
+        "description": description,
+        "keywords": f"{src.lower()}, {tgt.lower()}",
+        "source_id": chunk,
+        "file_path": "doc.txt",
+    }
+
+
+def extraction() -> list:
+    """Chunk results touching existing data, with relations to unknown entities"""
+    return [
+        (
+            {
+                "Alice": [entity("Alice", "person", "Alice is an engineer", "c1")],
+                "Bob": [entity("Bob", "person", "Bob is a manager", "c1")],
+            },
+            {
+                ("Alice", "Bob"): [
+                    relation("Alice", "Bob", "Alice reports to Bob", "c1")
+                ],
+                # Unknown endpoints become placeholders, the first relation wins
+                ("Carol", "Bob"): [relation("Carol", "Bob", "Carol hired Bob", "c1")],
+                ("Alice", "Alice"): [relation("Alice", "Alice", "self", "c1")],
+            },
+        ),
+        (
+            {
+                "Alice": [entity("Alice", "organization", "Alice leads a team", "c2")],
+                "Dave": [entity("Dave", "person", "Dave is new", "c2")],
+            },
+            {
+                ("Bob", "Alice"): [relation("Bob", "Alice", "Bob mentors Alice", "c2")],
+                ("Carol", "Dave"): [
+                    relation("Carol", "Dave", "Carol knows Dave", "c2")
+                ],
+                ("Eve", "Zoe"): [relation("Eve", "Zoe", "Eve met Zoe", "c2")],
+            },
+        ),
+    ]
+
+
+async def seed(storage: NetworkXStorage) -> None:
+    await storage.initialize()
+    await storage.upsert_node(
+        "Alice",
+        {
+            "entity_id": "Alice",
+            "entity_type": "person",
+            "description": "Alice was hired in 2020",
+            "source_id": "c0",
+            "file_path": "old.txt",
+            "created_at": 0,
+        },
+    )
+    await storage.upsert_node(
+        "Bob",
+        {
+            "entity_id": "Bob",
+            "entity_type": "person",
+            "description": "Bob joined early",
+            "source_id": "c0",
+            "file_path": "old.txt",
+            "created_at": 0,
+        },
+    )
+    await storage.upsert_edge(
+        "Alice",
+        "Bob",
+        {
+            "weight": 2.0,
+            "description": "Alice and Bob work together",
+            "keywords": "colleagues",
+            "source_id": "c0",
+            "file_path": "old.txt",
+            "created_at": 0,
+        },
+    )
+
+
+async def serial_merge(storage: NetworkXStorage, chunk_results: list) -> None:
+    """One entity, then one relation at a time, with single node and edge upserts"""
+    all_nodes: dict[str, list] = {}
+    all_edges: dict[tuple, list] = {}
+    for maybe_nodes, maybe_edges in chunk_results:
+        for name, entities in maybe_nodes.items():
+            all_nodes.setdefault(name, []).extend(entities)
+        for edge_key, edges in maybe_edges.items():
+            all_edges.setdefault(tuple(sorted(edge_key)), []).extend(edges)
+
+    for name, entities in all_nodes.items():
+        node_data = await _merge_node_data(
+            name, entities, await storage.get_node(name), GLOBAL_CONFIG
+        )
+        await storage.upsert_node(name, node_data)
+    for (src, tgt), edges in all_edges.items():
+        if src == tgt:
+            continue
+        missing = [node for node in (src, tgt) if not await storage.has_node(node)]
+        edge_data, placeholders = await _merge_edge_data(
+            src, tgt, edges, await storage.get_edge(src, tgt), missing, GLOBAL_CONFIG
+        )
+        for node_id, node_data in placeholders:
+            await storage.upsert_node(node_id, node_data)
+        await storage.upsert_edge(src, tgt, edge_data)
+
+
+def normalized(data: dict) -> dict:
+    # Timestamps differ between runs, joined sets have no fixed order
+    return {
+        key: sorted(value.split(GRAPH_FIELD_SEP))
+        if key in ("source_id", "file_path")
+        else value
+        for key, value in data.items()
+        if key != "created_at"
+    }
+
+
+def snapshot(storage: NetworkXStorage) -> tuple[dict, dict]:
+    graph = storage._graph
+    nodes = {node: normalized(data) for node, data in graph.nodes(data=True)}
+    edges = {
+        tuple(sorted((src, tgt))): normalized(data)
+        for src, tgt, data in graph.edges(data=True)
+    }
+    return nodes, edges
+
+
+def test_batch_merge_matches_serial_upserts(tmp_path):
+    def make(cls, workspace: str) -> NetworkXStorage:
+        return cls(
+            namespace="chunk_entity_relation",
+            workspace=workspace,
+            global_config={"working_dir": str(tmp_path)},
+            embedding_func=None,
+        )
+
+    async def batch_merge(storage: NetworkXStorage) -> None:
+        await merge_nodes_and_edges(
+            extraction(),
+            storage,
+            None,
+            None,
+            GLOBAL_CONFIG,
+            pipeline_status={"history_messages": []},
+            pipeline_status_lock=asyncio.Lock(),
+        )
+
+    async def main():
+        batch = make(NetworkXStorage, "batch")
+        serial_upserts = make(SerialUpsertNetworkXStorage, "serial_upserts")
+        serial = make(NetworkXStorage, "serial")
+        for storage in (batch, serial_upserts, serial):
+            await seed(storage)
+        await batch_merge(batch)
+        await batch_merge(serial_upserts)
+        await serial_merge(serial, extraction())
+        return snapshot(batch), snapshot(serial_upserts), snapshot(serial)
+
+    batch, serial_upserts, serial = asyncio.run(main())
+    assert batch == serial_upserts == serial
+
+    nodes, edges = batch
+    assert sorted(nodes) == ["Alice", "Bob", "Carol", "Dave", "Eve", "Zoe"]
+    # Merged with the existing node, the most frequent type wins
+    assert nodes["Alice"]["entity_type"] == "person"
+    assert nodes["Alice"]["source_id"] == ["c0", "c1", "c2"]
+    # Placeholders take the data of the first relation creating them
+    assert nodes["Carol"]["entity_type"] == "UNKNOWN"
+    assert nodes["Carol"]["description"] == "Carol hired Bob"
+    assert nodes["Zoe"]["description"] == "Eve met Zoe"
+    assert edges[("Alice", "Bob")]["weight"] == 4.0
+    assert ("Alice", "Alice") not in edges
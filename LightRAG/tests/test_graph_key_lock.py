@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from lightrag.kg.shared_storage import (
+    finalize_share_data,
+    get_graph_db_key_lock,
+    get_graph_db_lock,
+    initialize_share_data,
+)
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    initialize_share_data()
+    yield
+    finalize_share_data()
+
+
+def test_only_overlapping_keys_wait():
+    events = []
+
+    async def merge(name: str, keys: list[str]):
+        async with get_graph_db_key_lock(keys):
+            events.append(f"{name} start")
+            await asyncio.sleep(0.02)
+            events.append(f"{name} end")
+
+    async def main():
+        await asyncio.gather(
+            merge("a", ["node:A", "node:B"]),
+            merge("b", ["node:C"]),
+            # Listed in another order, still locked in sorted order
+            merge("c", ["node:B", "node:A"]),
+        )
+
+    asyncio.run(main())
+    # Disjoint keys overlap in time, a shared key waits for the first merge
+    assert events[:2] == ["a start", "b start"]
+    assert events.index("c start") > events.index("a end")
+
+
+def test_graph_lock_waits_for_merges_and_blocks_new_ones():
+    events = []
+
+    async def merge(name: str, delay: float):
+        await asyncio.sleep(delay)
+        async with get_graph_db_key_lock([f"node:{name}"]):
+            events.append(f"{name} start")
+            await asyncio.sleep(0.03)
+            events.append(f"{name} end")
+
+    async def delete():
+        await asyncio.sleep(0.01)
+        async with get_graph_db_lock():
+            events.append("delete start")
+            await asyncio.sleep(0.03)
+            events.append("delete end")
+
+    async def main():
+        await asyncio.gather(merge("A", 0), delete(), merge("B", 0.02))
+
+    asyncio.run(main())
+    assert events == [
+        "A start",
+        "A end",
+        "delete start",
+        "delete end",
+        "B start",
+        "B end",
+    ]
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from lightrag.kg.json_wal import JsonWriteAheadLog
+
+
+def make_wal(tmp_path) -> JsonWriteAheadLog:
+    return JsonWriteAheadLog(str(tmp_path / "kv_store_test.json"), "test")
+
+
+def upsert(wal: JsonWriteAheadLog, data: dict, changes: dict) -> None:
+    data.update(changes)
+    wal.record_changes(changes)
+    asyncio.run(wal.flush(data))
+
+
+def delete(wal: JsonWriteAheadLog, data: dict, ids: list[str]) -> None:
+    for id in ids:
+        data.pop(id, None)
+    wal.record_changes(ids)
+    asyncio.run(wal.flush(data))
+
+
+def test_replay_applies_records_in_order(tmp_path):
+    wal = make_wal(tmp_path)
+    data = {"a": {"v": 0}, "b": {"v": 0}}
+    with open(wal.snapshot_file, "w") as f:
+        json.dump(data, f)
+    upsert(wal, data, {"a": {"v": 1}, "c": {"v": 1}})
+    delete(wal, data, ["b"])
+    upsert(wal, data, {"a": {"v": 2}})
+
+    assert wal.load() == {"a": {"v": 2}, "c": {"v": 1}}
+
+    data.clear()
+    wal.record_clear()
+    upsert(wal, data, {"d": {"v": 3}})
+    assert wal.load() == {"d": {"v": 3}}
+
+
+def test_changes_are_written_once_per_flush(tmp_path):
+    wal = make_wal(tmp_path)
+    data = {}
+    for v in range(3):
+        data["a"] = {"v": v}
+        wal.record_changes(["a"])
+    data["b"] = {"v": 0}
+    wal.record_changes(["b"])
+    del data["b"]
+    wal.record_changes(["b"])
+    assert not os.path.exists(wal.log_file)
+
+    asyncio.run(wal.flush(data))
+    with open(wal.log_file) as f:
+        records = [json.loads(line) for line in f]
+    # The last value of each changed id, deleted ids as one delete record
+    assert records == [
+        {"op": "upsert", "data": {"a": {"v": 2}}},
+        {"op": "delete", "ids": ["b"]},
+    ]
+    assert not wal.has_pending_changes()
+
+
+def test_failed_flush_keeps_changes(tmp_path, monkeypatch):
+    wal = make_wal(tmp_path)
+    data = {"a": {"v": 1}}
+    wal.record_changes(["a"])
+
+    def fail(text):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(wal, "_append", fail)
+    with pytest.raises(OSError):
+        asyncio.run(wal.flush(data))
+    monkeypatch.undo()
+    asyncio.run(wal.flush(data))
+    assert wal.load() == data
+
+
+def test_replay_drops_torn_tail(tmp_path):
+    wal = make_wal(tmp_path)
+    data = {}
+    upsert(wal, data, {"a": {"v": 1}})
+    with open(wal.log_file, "a") as f:
+        f.write('{"op": "upsert", "data": {"b"')
+
+    assert wal.load() == {"a": {"v": 1}}
+    # The next append starts on a new line
+    upsert(wal, data, {"c": {"v": 1}})
+    assert wal.load() == {"a": {"v": 1}, "c": {"v": 1}}
+
+
+def test_compaction_folds_log_into_snapshot(tmp_path):
+    wal = make_wal(tmp_path)
+    data = {}
+    upsert(wal, data, {"a": {"v": 1}, "b": {"v": 2}})
+
+    asyncio.run(wal.compact(asyncio.Lock(), data, force=True))
+
+    assert not os.path.exists(wal.log_file)
+    assert not os.path.exists(wal.compacting_file)
+    with open(wal.snapshot_file) as f:
+        assert json.load(f) == data
+    assert wal.load() == data
+
+
+def test_failed_compaction_is_retried_with_later_records(tmp_path):
+    wal = make_wal(tmp_path)
+    data = {}
+    upsert(wal, data, {"a": {"v": 1}})
+
+    write_snapshot = wal.write_snapshot
+
+    def fail(snapshot):
+        raise OSError("disk full")
+
+    wal.write_snapshot = fail
+    asyncio.run(wal.compact(asyncio.Lock(), data, force=True))
+    assert os.path.exists(wal.compacting_file)
+
+    upsert(wal, data, {"b": {"v": 2}})
+    assert wal.load() == data
+    assert wal.needs_compaction()
+
+    wal.write_snapshot = write_snapshot
+    asyncio.run(wal.compact(asyncio.Lock(), data))
+
+    assert not os.path.exists(wal.log_file)
+    assert not os.path.exists(wal.compacting_file)
+    assert wal.load() == data
+
+
+def test_rotate_skips_compaction_of_another_process(tmp_path):
+    wal = make_wal(tmp_path)
+    upsert(wal, {}, {"a": {"v": 1}})
+    with open(wal.compacting_file, "w") as f:
+        f.write('{"op": "upsert", "data": {"z": {"v": 0}}}\n')
+
+    assert not wal.rotate()
+    assert wal.load() == {"z": {"v": 0}, "a": {"v": 1}}
+
+
+def test_storage_log_is_opt_in(tmp_path, monkeypatch):
+    from lightrag.kg.json_kv_impl import JsonKVStorage
+    from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+
+    def make_storage():
+        return JsonKVStorage(
+            namespace="full_docs",
+            workspace="",
+            global_config={"working_dir": str(tmp_path)},
+            embedding_func=None,
+        )
+
+    async def write(key: str):
+        initialize_share_data()
+        try:
+            storage = make_storage()
+            await storage.initialize()
+            await storage.upsert({key: {"content": key}})
+            await storage.index_done_callback()
+            return storage
+        finally:
+            finalize_share_data()
+
+    async def read():
+        initialize_share_data()
+        try:
+            storage = make_storage()
+            await storage.initialize()
+            return await storage.get_by_ids(["a", "b"])
+        finally:
+            finalize_share_data()
+
+    monkeypatch.setenv("JSON_STORAGE_WAL", "true")
+    storage = asyncio.run(write("a"))
+    assert os.path.exists(storage._wal.log_file)
+    assert not os.path.exists(storage._file_name)
+
+    # Without the log, records left in it are folded into the JSON file
+    monkeypatch.delenv("JSON_STORAGE_WAL")
+    storage = asyncio.run(write("b"))
+    assert storage._wal is None
+    assert not os.path.exists(tmp_path / "kv_store_full_docs.wal.jsonl")
+    with open(storage._file_name) as f:
+        assert set(json.load(f)) == {"a", "b"}
+    assert [doc["content"] for doc in asyncio.run(read())] == ["a", "b"]
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+
+import numpy as np
+import pytest
+
+from lightrag import LightRAG
+from lightrag.kg.json_kv_impl import JsonKVStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+from lightrag.migration import migrate_storages
+from lightrag.utils import EmbeddingFunc, Tokenizer
+
+
+class CharTokenizer:
+    def encode(self, content: str) -> list[int]:
+        return [ord(char) for char in content]
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(chr(token) for token in tokens)
+
+
+async def llm(prompt, system_prompt=None, history_messages=[], **kwargs) -> str:
+    return ""
+
+
+async def embed(texts: list[str]) -> np.ndarray:
+    return np.array(
+        [
+            [byte / 255 for byte in hashlib.sha256(text.encode()).digest()[:8]]
+            for text in texts
+        ],
+        dtype=np.float32,
+    )
+
+
+async def make_rag(working_dir, **kwargs) -> LightRAG:
+    rag = LightRAG(
+        working_dir=str(working_dir),
+        llm_model_func=llm,
+        embedding_func=EmbeddingFunc(embedding_dim=8, max_token_size=8192, func=embed),
+        tokenizer=Tokenizer("chars", CharTokenizer()),
+        **kwargs,
+    )
+    await rag.initialize_storages()
+    return rag
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    yield
+    finalize_share_data()
+
+
+def test_interrupted_part_is_copied_again_from_the_start(tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    # An earlier run stopped after some records, without a position to resume from
+    checkpoint_path.write_text(json.dumps({"chunks_vdb": {"copied": 6, "done": False}}))
+
+    async def main():
+        source = await make_rag(tmp_path / "source")
+        await source.chunks_vdb.upsert(
+            {
+                f"chunk-{i}": {
+                    "content": f"content {i}",
+                    "full_doc_id": "doc-1",
+                    "file_path": "doc1.txt",
+                }
+                for i in range(10)
+            }
+        )
+        await source.chunks_vdb.index_done_callback()
+        target = await make_rag(
+            tmp_path / "target", vector_storage="NumpyVectorDBStorage"
+        )
+        report = await migrate_storages(
+            source,
+            target,
+            namespaces=["chunks_vdb"],
+            batch_size=4,
+            checkpoint_path=str(checkpoint_path),
+        )
+        await source.finalize_storages()
+        await target.finalize_storages()
+        return report
+
+    report = asyncio.run(main())
+    assert report.copied == {"chunks_vdb": 10}
+    assert report.target_counts == {"chunks_vdb": 10}
+    assert report.ok
+    assert json.loads(checkpoint_path.read_text())["chunks_vdb"] == {
+        "copied": 10,
+        "done": True,
+    }
+
+
+def interrupt(storage, method: str, calls: int) -> None:
+    """Make a method of the storage fail after the given number of calls"""
+    original = getattr(storage, method)
+    done = []
+
+    async def failing(*args, **kwargs):
+        if len(done) == calls:
+            raise RuntimeError("connection lost")
+        done.append(1)
+        return await original(*args, **kwargs)
+
+    setattr(storage, method, failing)
+
+
+def record_scans(storage, method: str, scans: list) -> None:
+    """Record the start_after argument and the number of records of each scan"""
+    original = getattr(storage, method)
+
+    async def scan(*args, **kwargs):
+        read = 0
+        async for batch in original(*args, **kwargs):
+            read += len(batch)
+            yield batch
+        scans.append((kwargs.get("start_after"), read))
+
+    setattr(storage, method, scan)
+
+
+@pytest.mark.parametrize(
+    "namespace, part, write_method, scan_method, records",
+    [
+        ("chunks_vdb", "chunks_vdb", "upsert_with_vectors", "iter_batches", 10),
+        (
+            "chunk_entity_relation_graph",
+            "chunk_entity_relation_graph.nodes",
+            "upsert_nodes_batch",
+            "iter_node_batches",
+            11,
+        ),
+        (
+            "chunk_entity_relation_graph",
+            "chunk_entity_relation_graph.edges",
+            "upsert_edges_batch",
+            "iter_edge_batches",
+            10,
+        ),
+    ],
+)
+def test_interrupted_part_resumes_after_the_last_checkpoint(
+    tmp_path, namespace, part, write_method, scan_method, records
+):
+    checkpoint_path = tmp_path / "checkpoint.json"
+
+    async def main():
+        source = await make_rag(tmp_path / "source")
+        await source.chunks_vdb.upsert(
+            {
+                f"chunk-{i}": {
+                    "content": f"content {i}",
+                    "full_doc_id": "doc-1",
+                    "file_path": "doc1.txt",
+                }
+                for i in range(10)
+            }
+        )
+        await source.chunks_vdb.index_done_callback()
+        graph = source.chunk_entity_relation_graph
+        await graph.upsert_nodes_batch(
+            [(f"node-{i}", {"entity_id": f"node-{i}"}) for i in range(11)]
+        )
+        await graph.upsert_edges_batch(
+            [(f"node-{i}", f"node-{i + 1}", {"weight": 1.0}) for i in range(10)]
+        )
+        await graph.index_done_callback()
+        target = await make_rag(
+            tmp_path / "target", vector_storage="NumpyVectorDBStorage"
+        )
+
+        def migrate():
+            return migrate_storages(
+                source,
+                target,
+                namespaces=[namespace],
+                batch_size=3,
+                checkpoint_path=str(checkpoint_path),
+                checkpoint_interval=1,
+            )
+
+        target_storage = getattr(target, namespace)
+        interrupt(target_storage, write_method, 2)
+        with pytest.raises(RuntimeError, match="connection lost"):
+            await migrate()
+        interrupted = json.loads(checkpoint_path.read_text())[part]
+
+        del target_storage.__dict__[write_method]
+        scans = []
+        record_scans(getattr(source, namespace), scan_method, scans)
+        report = await migrate()
+        await source.finalize_storages()
+        await target.finalize_storages()
+        return interrupted, scans, report
+
+    interrupted, scans, report = asyncio.run(main())
+    # Two batches of 3 records were copied before the third write failed
+    assert interrupted == {"copied": 6, "done": False, "cursor": 6, "scan_order": "row"}
+    # Only the records after the checkpoint are read again
+    assert scans[0] == (6, records - 6)
+    assert report.copied[part] == records
+    assert report.ok
+
+
+def test_json_scan_resumes_after_a_key(tmp_path):
+    initialize_share_data()
+
+    async def main():
+        storage = JsonKVStorage(
+            namespace="full_docs",
+            workspace="",
+            global_config={"working_dir": str(tmp_path)},
+            embedding_func=None,
+        )
+        await storage.initialize()
+        await storage.upsert({f"doc-{i}": {"content": str(i)} for i in (3, 1, 4, 0, 2)})
+        return [
+            [key for key, _ in batch]
+            async for batch in storage.iter_batches(2, start_after="doc-1")
+        ]
+
+    assert JsonKVStorage.scan_order == "key"
+    assert asyncio.run(main()) == [["doc-2", "doc-3"], ["doc-4"]]
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from lightrag.kg.networkx_impl import NetworkXStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    initialize_share_data()
+    yield
+    finalize_share_data()
+
+
+EDGES = [("A", "B"), ("A", "C"), ("B", "C"), ("C", "D"), ("D", "D")]
+NODES = ["A", "B", "C", "D", "E"]
+QUERIED = ["C", "missing", "A", "E", "D"]
+
+
+async def graph_results(working_dir, csr: bool, monkeypatch, build: bool) -> dict:
+    monkeypatch.setenv("NETWORKX_CSR_SNAPSHOT", str(csr).lower())
+    storage = NetworkXStorage(
+        namespace="chunk_entity_relation",
+        workspace="csr" if csr else "dict",
+        global_config={"working_dir": str(working_dir)},
+        embedding_func=None,
+    )
+    await storage.initialize()
+    if build:
+        await storage.upsert_nodes_batch(
+            [(node, {"entity_id": node}) for node in NODES]
+        )
+        await storage.upsert_edges_batch([(s, t, {"weight": 1.0}) for s, t in EDGES])
+        # The CSR view is rebuilt once the graph is saved
+        await storage.index_done_callback()
+    assert (storage._csr is not None) == csr
+    return {
+        "degrees": await storage.node_degrees_batch(QUERIED),
+        "edge_degrees": await storage.edge_degrees_batch(
+            [("A", "B"), ("missing", "C"), ("D", "E")]
+        ),
+        "edges": await storage.get_nodes_edges_batch(QUERIED),
+        "top": storage._top_degree_nodes(3),
+        "neighbors": await storage._neighbors_batch(QUERIED),
+    }
+
+
+@pytest.mark.parametrize("build", [False, True], ids=["empty", "graph"])
+def test_csr_view_matches_graph(tmp_path, monkeypatch, build):
+    async def main():
+        with_csr = await graph_results(tmp_path, True, monkeypatch, build)
+        without_csr = await graph_results(tmp_path, False, monkeypatch, build)
+        return with_csr, without_csr
+
+    with_csr, without_csr = asyncio.run(main())
+    assert with_csr == without_csr
+    if build:
+        assert with_csr["degrees"] == {"C": 3, "missing": 0, "A": 2, "E": 0, "D": 3}
+        assert with_csr["top"] == ["C", "D", "A"]
+    else:
+        assert with_csr["degrees"] == dict.fromkeys(QUERIED, 0)
+        assert with_csr["top"] == []
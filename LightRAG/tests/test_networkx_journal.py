@@ -0,0 +1,130 @@
+import asyncio
+
+import networkx as nx
+import pytest
+
+from lightrag.kg.networkx_impl import NetworkXStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+
+
+def make_storage(working_dir) -> NetworkXStorage:
+    return NetworkXStorage(
+        namespace="chunk_entity_relation",
+        workspace="",
+        global_config={"working_dir": str(working_dir)},
+        embedding_func=None,
+    )
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    initialize_share_data()
+    yield
+    finalize_share_data()
+
+
+async def load(working_dir) -> nx.Graph:
+    storage = make_storage(working_dir)
+    await storage.initialize()
+    return await storage._get_graph()
+
+
+def snapshot_dirs(working_dir) -> list[str]:
+    return sorted(path.name for path in working_dir.iterdir() if path.is_dir())
+
+
+def test_journal_replay_restores_changes(tmp_path):
+    async def main():
+        storage = make_storage(tmp_path)
+        await storage.initialize()
+        await storage.upsert_node("A", {"entity_id": "A", "description": "first"})
+        await storage.upsert_edge("A", "B", {"weight": 1.0})
+        await storage.upsert_edge("B", "C", {"weight": 2.0})
+        assert await storage.index_done_callback()
+
+        await storage.upsert_node("A", {"entity_id": "A", "description": "second"})
+        await storage.remove_edges([("B", "C")])
+        await storage.delete_node("C")
+        assert await storage.index_done_callback()
+        return await load(tmp_path), storage._snapshot.journal_offset
+
+    graph, journal_offset = asyncio.run(main())
+    assert journal_offset > 0
+    assert sorted(graph.nodes()) == ["A", "B"]
+    assert graph.nodes["A"]["description"] == "second"
+    assert graph.edges["A", "B"]["weight"] == 1.0
+
+
+def test_failed_append_keeps_pending_changes(tmp_path, monkeypatch):
+    async def main():
+        storage = make_storage(tmp_path)
+        await storage.initialize()
+        await storage.upsert_node("A", {"entity_id": "A"})
+        assert await storage.index_done_callback()
+
+        def fail(records):
+            raise OSError("disk full")
+
+        await storage.upsert_edge("A", "B", {"weight": 1.0})
+        monkeypatch.setattr(storage._snapshot, "append", fail)
+        assert not await storage.index_done_callback()
+        monkeypatch.undo()
+        assert await storage.index_done_callback()
+        return await load(tmp_path)
+
+    graph = asyncio.run(main())
+    assert graph.has_edge("A", "B")
+
+
+def test_snapshot_keeps_previous_generation(tmp_path):
+    async def main():
+        storage = make_storage(tmp_path)
+        await storage.initialize()
+        await storage.upsert_node("A", {"entity_id": "A"})
+        await storage.index_done_callback()
+        generations = [storage._snapshot.generation]
+        # Every drop writes a new, empty snapshot generation
+        for _ in range(2):
+            await storage.drop()
+            generations.append(storage._snapshot.generation)
+        return generations
+
+    generations = asyncio.run(main())
+    assert snapshot_dirs(tmp_path) == [
+        f"graph_chunk_entity_relation.kg.{generation}" for generation in generations[1:]
+    ]
+
+
+def test_legacy_graphml_is_converted_on_initialize(tmp_path):
+    graph = nx.Graph()
+    graph.add_edge("A", "B", weight=1.0)
+    nx.write_graphml(graph, tmp_path / "graph_chunk_entity_relation.graphml")
+
+    async def main():
+        storage = make_storage(tmp_path)
+        # Nothing is written before the storage lock is available
+        assert snapshot_dirs(tmp_path) == []
+        await storage.initialize()
+        return await storage._get_graph()
+
+    loaded = asyncio.run(main())
+    assert loaded.has_edge("A", "B")
+    assert len(snapshot_dirs(tmp_path)) == 1
+    assert (tmp_path / "graph_chunk_entity_relation.graphml.bak").exists()
+
+
+def test_export_graphml_writes_the_current_graph(tmp_path):
+    async def main():
+        storage = make_storage(tmp_path)
+        await storage.initialize()
+        await storage.upsert_node("A", {"entity_id": "A", "description": "first"})
+        await storage.upsert_edge("A", "B", {"weight": 1.0})
+        await storage.index_done_callback()
+        # A separate reader, like the visualization examples
+        reader = make_storage(tmp_path)
+        await reader.initialize()
+        return await reader.export_graphml()
+
+    exported = nx.read_graphml(asyncio.run(main()))
+    assert exported.nodes["A"]["description"] == "first"
+    assert exported.has_edge("A", "B")
@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+from lightrag.kg.numpy_vector_db_impl import NumpyVectorDBStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+from lightrag.utils import EmbeddingFunc
+
+
+async def embed(texts: list[str]) -> np.ndarray:
+    return np.array(
+        [
+            [byte / 255 for byte in hashlib.sha256(text.encode()).digest()[:8]]
+            for text in texts
+        ],
+        dtype=np.float32,
+    )
+
+
+def make_storage(working_dir) -> NumpyVectorDBStorage:
+    return NumpyVectorDBStorage(
+        namespace="chunks",
+        workspace="",
+        global_config={
+            "working_dir": str(working_dir),
+            "vector_db_storage_cls_kwargs": {"cosine_better_than_threshold": 0.2},
+        },
+        embedding_func=EmbeddingFunc(embedding_dim=8, max_token_size=8192, func=embed),
+        meta_fields={"content"},
+    )
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    initialize_share_data()
+    yield
+    finalize_share_data()
+
+
+async def fill(storage: NumpyVectorDBStorage, count: int) -> None:
+    await storage.initialize()
+    await storage.upsert({f"id-{i}": {"content": f"content {i}"} for i in range(count)})
+    await storage.index_done_callback()
+
+
+def test_compaction_switches_matrix_and_metadata_together(tmp_path):
+    async def main():
+        storage = make_storage(tmp_path)
+        await fill(storage, 2000)
+        await storage.delete([f"id-{i}" for i in range(1500)])
+        await storage.index_done_callback()
+        reloaded = make_storage(tmp_path)
+        await reloaded.initialize()
+        return reloaded, await reloaded.get_by_id("id-1999")
+
+    reloaded, record = asyncio.run(main())
+    assert reloaded._persisted_rows == 500
+    assert record["content"] == "content 1999"
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".npy")] == [
+        os.path.basename(reloaded._matrix_file)
+    ]
+
+
+def test_interrupted_compaction_keeps_previous_generation(tmp_path, monkeypatch):
+    async def main():
+        storage = make_storage(tmp_path)
+        await fill(storage, 2000)
+
+        def crash(*args, **kwargs):
+            raise OSError("crash before the metadata log is replaced")
+
+        # The new matrix is written, the metadata log naming it is not
+        monkeypatch.setattr(storage, "_commit_generation", crash)
+        await storage.delete([f"id-{i}" for i in range(1500)])
+        assert not await storage.index_done_callback()
+        monkeypatch.undo()
+
+        reloaded = make_storage(tmp_path)
+        await reloaded.initialize()
+        return (
+            reloaded,
+            await reloaded.get_by_id("id-0"),
+            await reloaded.get_by_id("id-1999"),
+        )
+
+    reloaded, deleted, kept = asyncio.run(main())
+    assert reloaded._persisted_rows == 2000
+    # The deletions were logged before the compaction
+    assert deleted is None
+    assert kept["content"] == "content 1999"
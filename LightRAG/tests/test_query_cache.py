@@ -0,0 +1,83 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from lightrag.kg.json_kv_impl import JsonKVStorage
+from lightrag.kg.shared_storage import finalize_share_data, initialize_share_data
+from lightrag.utils import (
+    CacheData,
+    EmbeddingFunc,
+    compute_args_hash,
+    handle_cache,
+    save_to_cache,
+)
+
+
+async def embed(texts: list[str], **kwargs) -> np.ndarray:
+    # Queries differing only in letter case are near duplicates
+    return np.array(
+        [[len(text), text.lower().count("a") + 1, 1.0] for text in texts],
+        dtype=np.float32,
+    )
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    initialize_share_data()
+    yield
+    finalize_share_data()
+
+
+def make_cache(working_dir) -> JsonKVStorage:
+    return JsonKVStorage(
+        namespace="llm_response_cache",
+        workspace="",
+        global_config={
+            "working_dir": str(working_dir),
+            "enable_llm_cache": True,
+            "embedding_cache_config": {"enabled": True, "similarity_threshold": 0.99},
+        },
+        embedding_func=EmbeddingFunc(embedding_dim=3, max_token_size=8192, func=embed),
+    )
+
+
+async def lookup(cache: JsonKVStorage, query: str, scope: str):
+    args_hash = compute_args_hash("local", query)
+    return await handle_cache(
+        cache, args_hash, query, "local", cache_type="query", scope=scope
+    )
+
+
+def test_similar_query_only_hits_within_scope(tmp_path):
+    async def main():
+        cache = make_cache(tmp_path)
+        await cache.initialize()
+        # Load the (empty) index before the save, so the save updates it in memory
+        _, quantized, min_val, max_val = await lookup(cache, "What is a graph?", "s1")
+        await save_to_cache(
+            cache,
+            CacheData(
+                args_hash=compute_args_hash("local", "What is a graph?"),
+                content="answer in scope s1",
+                prompt="What is a graph?",
+                quantized=quantized,
+                min_val=min_val,
+                max_val=max_val,
+                mode="local",
+                cache_type="query",
+                scope="s1",
+            ),
+        )
+        same_scope = await lookup(cache, "WHAT IS A GRAPH?", "s1")
+        other_scope = await lookup(cache, "WHAT IS A GRAPH?", "s2")
+
+        # A new process loads the scopes from storage
+        setattr(cache, "_query_embedding_indexes", None)
+        reloaded = await lookup(cache, "WHAT IS A GRAPH?", "s1")
+        return same_scope[0], other_scope[0], reloaded[0]
+
+    same_scope, other_scope, reloaded = asyncio.run(main())
+    assert same_scope == "answer in scope s1"
+    assert other_scope is None
+    assert reloaded == "answer in scope s1"
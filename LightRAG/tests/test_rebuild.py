@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+
+import numpy as np
+import pytest
+
+from lightrag import LightRAG
+from lightrag.kg.shared_storage import finalize_share_data, initialize_pipeline_status
+from lightrag.utils import EmbeddingFunc, Tokenizer
+
+
+class CharTokenizer:
+    def encode(self, content: str) -> list[int]:
+        return [ord(char) for char in content]
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(chr(token) for token in tokens)
+
+
+async def llm(prompt, system_prompt=None, history_messages=[], **kwargs) -> str:
+    return ""
+
+
+def embedding(dim: int, calls: list[str], fail_after: int | None = None):
+    async def embed(texts: list[str]) -> np.ndarray:
+        if fail_after is not None and len(calls) >= fail_after:
+            raise RuntimeError("embedding failed")
+        calls.extend(texts)
+        return np.array(
+            [
+                [byte / 255 for byte in hashlib.sha256(text.encode()).digest()[:dim]]
+                for text in texts
+            ],
+            dtype=np.float32,
+        )
+
+    return EmbeddingFunc(
+        embedding_dim=dim, max_token_size=8192, func=embed, model_name="test-embed"
+    )
+
+
+async def make_rag(working_dir, **kwargs) -> LightRAG:
+    rag = LightRAG(
+        working_dir=str(working_dir),
+        llm_model_func=llm,
+        embedding_func=embedding(16, []),
+        tokenizer=Tokenizer("chars", CharTokenizer()),
+        **kwargs,
+    )
+    await rag.initialize_storages()
+    await initialize_pipeline_status()
+
+    chunks = {
+        f"chunk-{i}": {
+            "content": f"Alice{i} met Bob{i}",
+            "tokens": 16,
+            "chunk_order_index": 0,
+            "full_doc_id": f"doc-{i}",
+            "file_path": f"doc{i}.txt",
+        }
+        for i in range(5)
+    }
+    await rag.text_chunks.upsert(chunks)
+    await rag.chunks_vdb.upsert(chunks)
+    for i in range(5):
+        for name in (f"Alice{i}", f"Bob{i}"):
+            await rag.chunk_entity_relation_graph.upsert_node(
+                name,
+                {
+                    "entity_id": name,
+                    "entity_type": "person",
+                    "description": f"{name} is a person",
+                    "source_id": f"chunk-{i}",
+                    "file_path": f"doc{i}.txt",
+                },
+            )
+        await rag.chunk_entity_relation_graph.upsert_edge(
+            f"Alice{i}",
+            f"Bob{i}",
+            {
+                "description": "met",
+                "keywords": "meeting",
+                "source_id": f"chunk-{i}",
+                "file_path": f"doc{i}.txt",
+                "weight": 1.0,
+            },
+        )
+    return rag
+
+
+async def vectors(rag: LightRAG) -> dict[str, dict[str, list[float]]]:
+    result = {}
+    for name in ("chunks_vdb", "entities_vdb", "relationships_vdb"):
+        result[name] = {}
+        async for batch in getattr(rag, name).iter_batches(include_vector=True):
+            for record in batch:
+                result[name][record["id"]] = list(record["vector"])
+    return result
+
+
+@pytest.fixture(autouse=True)
+def shared_data():
+    yield
+    finalize_share_data()
+
+
+def test_rebuild_swaps_in_new_indexes(tmp_path):
+    async def main():
+        rag = await make_rag(tmp_path)
+        calls = []
+        counts = await rag.arebuild_vector_storages(embedding(24, calls), batch_size=2)
+        embedded = len(calls)
+        rebuilt = await vectors(rag)
+        # Queries embed with the new function
+        results = await rag.entities_vdb.query("Alice1", top_k=2)
+        await rag.finalize_storages()
+        return counts, embedded, rebuilt, results
+
+    counts, embedded, rebuilt, results = asyncio.run(main())
+    assert counts == {"chunks_vdb": 5, "entities_vdb": 10, "relationships_vdb": 5}
+    assert embedded == 20
+    for name, records in rebuilt.items():
+        assert len(records) == counts[name]
+        assert all(len(vector) == 24 for vector in records.values())
+    assert results
+
+
+def test_failed_rebuild_leaves_indexes_unchanged(tmp_path):
+    async def main():
+        rag = await make_rag(tmp_path)
+        before = await vectors(rag)
+        with pytest.raises(RuntimeError, match="embedding failed"):
+            await rag.arebuild_vector_storages(
+                embedding(24, [], fail_after=4), batch_size=2
+            )
+        after = await vectors(rag)
+        dim = rag.entities_vdb.embedding_func.embedding_dim
+        rebuild_files = list(tmp_path.glob("*_rebuild*"))
+        await rag.finalize_storages()
+        return before, after, dim, rebuild_files
+
+    before, after, dim, rebuild_files = asyncio.run(main())
+    assert after == before
+    assert dim == 16
+    assert rebuild_files == []
+
+
+def test_rebuild_in_place_requires_opt_in(tmp_path):
+    async def unsupported(embedding_func):
+        raise NotImplementedError
+
+    async def main():
+        rag = await make_rag(tmp_path)
+        rag.relationships_vdb.create_rebuild_storage = unsupported
+        before = await vectors(rag)
+        with pytest.raises(RuntimeError, match="in_place=True"):
+            await rag.arebuild_vector_storages(embedding(24, []))
+        refused = await vectors(rag)
+        counts = await rag.arebuild_vector_storages(embedding(24, []), in_place=True)
+        rebuilt = await vectors(rag)
+        await rag.finalize_storages()
+        return before, refused, counts, rebuilt
+
+    before, refused, counts, rebuilt = asyncio.run(main())
+    assert refused == before
+    assert counts["relationships_vdb"] == 5
+    assert all(len(vector) == 24 for vector in rebuilt["relationships_vdb"].values())
+
+
+def test_rebuild_does_not_read_embedding_cache(tmp_path):
+    async def main():
+        rag = await make_rag(tmp_path, enable_embedding_cache=True)
+        calls = []
+        # Same model name as the current function for the cache
+        await rag.arebuild_vector_storages(embedding(16, calls))
+        rebuilt = await vectors(rag)
+        cached = await rag.embedding_cache.get_all()
+        await rag.finalize_storages()
+        return calls, rebuilt, cached
+
+    calls, rebuilt, cached = asyncio.run(main())
+    assert len(calls) == 20
+    # The rebuilt vectors are written to the cache
+    assert len(cached) == 20
+    assert len(rebuilt["entities_vdb"]) == 10
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from lightrag.utils import SingleFlight, StreamFanout
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    async def main():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return "result"
+
+        callers = [asyncio.create_task(flights.do("key", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers)
+        # Once the call has finished, the next one runs again
+        results.append(await flights.do("key", work))
+        return results
+
+    assert asyncio.run(main()) == ["result"] * 6
+    assert calls == [1, 1]
+
+
+def test_cancelled_first_caller_does_not_cancel_the_others():
+    async def main():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "result"
+
+        first = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "result"
+
+
+def test_exception_reaches_every_joined_caller():
+    calls = []
+
+    async def main():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            raise ValueError("llm failed")
+
+        callers = [asyncio.create_task(flights.do("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert all(str(result) == "llm failed" for result in results)
+
+
+async def chunks(count: int, fail: bool = False):
+    for i in range(count):
+        await asyncio.sleep(0)
+        yield f"chunk {i}"
+    if fail:
+        raise RuntimeError("stream broken")
+
+
+async def read(stream) -> list[str]:
+    return [chunk async for chunk in stream]
+
+
+def test_stream_is_replayed_in_full_to_late_subscribers():
+    async def main():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return chunks(4)
+
+        callers = [asyncio.create_task(flights.do("key", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        first_stream, second_stream = await asyncio.gather(*callers)
+        # The first subscriber reads the whole stream before the second starts
+        first = await read(first_stream)
+        second = await read(second_stream)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second == [f"chunk {i}" for i in range(4)]
+
+
+def test_stream_subscriber_joining_mid_stream_gets_every_chunk():
+    async def main():
+        fanout = StreamFanout(chunks(5))
+        early = fanout.subscribe()
+        seen = [await early.__anext__(), await early.__anext__()]
+        late = await read(fanout.subscribe())
+        seen.extend(await read(early))
+        return seen, late
+
+    seen, late = asyncio.run(main())
+    assert seen == late == [f"chunk {i}" for i in range(5)]
+
+
+def test_stream_error_reaches_every_subscriber_after_its_chunks():
+    async def main():
+        fanout = StreamFanout(chunks(2, fail=True))
+        results = []
+        for _ in range(2):
+            received = []
+            with pytest.raises(RuntimeError, match="stream broken"):
+                async for chunk in fanout.subscribe():
+                    received.append(chunk)
+            results.append(received)
+        return results
+
+    assert asyncio.run(main()) == [["chunk 0", "chunk 1"]] * 2
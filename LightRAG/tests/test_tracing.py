@@ -0,0 +1,51 @@
+import asyncio
+
+import numpy as np
+
+from lightrag.embedding_batcher import EmbeddingBatcher
+from lightrag.tracing import start_trace, trace_span
+from lightrag.utils import priority_limit_async_func_call
+
+
+def test_limiter_spans_go_to_the_calling_trace():
+    @priority_limit_async_func_call(2)
+    async def call(name: str) -> str:
+        with trace_span(name):
+            await asyncio.sleep(0)
+        return name
+
+    async def traced(name: str):
+        with start_trace() as trace:
+            await call(name)
+        return trace
+
+    async def main():
+        first = await traced("first")
+        second = await traced("second")
+        third, fourth = await asyncio.gather(traced("third"), traced("fourth"))
+        await call.shutdown()
+        return first, second, third, fourth
+
+    traces = asyncio.run(main())
+    for trace, name in zip(traces, ["first", "second", "third", "fourth"]):
+        assert [span.name for span in trace.spans] == [name]
+
+
+def test_embedding_batches_are_timed_by_each_caller():
+    async def embed(texts: list[str]) -> np.ndarray:
+        with trace_span("embed_call"):
+            return np.ones((len(texts), 2), dtype=np.float32)
+
+    async def main():
+        batcher = EmbeddingBatcher(embed, len, max_batch_size=8, window=0.01)
+
+        async def traced(texts):
+            with start_trace() as trace:
+                await batcher.embed(texts)
+            return trace
+
+        # Both callers share one batch started by the first one
+        return await asyncio.gather(traced(["a", "b"]), traced(["c"]))
+
+    for trace in asyncio.run(main()):
+        assert [span.name for span in trace.spans] == ["embedding_batch"]